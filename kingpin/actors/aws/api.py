@@ -0,0 +1,260 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.aws.api`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Natively asynchronous AWS API access.
+
+All of our regular AWS calls go through Boto/Boto3 on a thread pool (see
+`kingpin.actors.aws.base.AWSBaseActor.thread`). That means that every call
+(including a simple `describe_stacks` poll) ties up one of a small number of
+threads for its full duration.
+
+This package provides an `AsyncClient` that uses Botocore's own request
+serializers, SigV4 signer and response parsers -- but hands the actual HTTP
+request off to the Tornado `AsyncHTTPClient`. The returned data is identical to
+what the equivalent Boto3 client method returns, so the two can be used
+interchangeably. Thousands of concurrent polls cost no threads at all.
+
+This transport is only used for a handful of hot read-only calls, and only if
+the ``AWS_ASYNC_TRANSPORT`` environment variable is set. Everything else
+continues to go through Boto.
+"""
+
+import logging
+import threading
+
+from botocore import auth as botocore_auth
+from botocore import awsrequest
+from botocore import credentials as botocore_credentials
+from botocore import exceptions as botocore_exceptions
+from botocore import parsers
+from botocore import serialize
+from tornado import gen
+from tornado import httpclient
+import botocore
+import botocore.session
+
+from kingpin import utils
+from kingpin.actors import exceptions
+from kingpin.actors.aws import settings as aws_settings
+
+log = logging.getLogger(__name__)
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+# Error codes returned by Amazon that mean we should back off and try again.
+RETRYABLE_ERRORS = ('Throttling', 'RequestLimitExceeded', 'Rate exceeded')
+
+# A single Botocore session is used to resolve service models, endpoints and
+# the default credential chain. Creating one is expensive (it loads a large
+# amount of JSON data from disk), so we do it once.
+_SESSION = None
+
+# AsyncClient objects keyed by (service, region, key, endpoint_url).
+_CLIENTS = {}
+_LOCK = threading.Lock()
+
+
+def _get_session():
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = botocore.session.get_session()
+    return _SESSION
+
+
+class AsyncClient(object):
+
+    """Tornado-native client for a single AWS service in a single region.
+
+    Methods are called by their Boto3 (snake_case) name through the `call()`
+    method, and return the same dictionaries that Boto3 would.
+
+    Example:
+        >>> client = AsyncClient('cloudformation', 'us-east-1')
+        >>> ret = yield client.call('describe_stacks', StackName='foo')
+
+    Args:
+        service: Botocore service name (ie, 'ecs', 'sqs')
+        region: AWS region name
+        key: AWS access key (optional)
+        secret: AWS secret key (optional)
+        endpoint_url: Override the AWS-provided endpoint (optional)
+        http_client: Tornado AsyncHTTPClient object (optional)
+    """
+
+    def __init__(self, service, region, key=None, secret=None,
+                 endpoint_url=None, http_client=None):
+        session = _get_session()
+
+        # We use a real Botocore client only to resolve the service model
+        # and endpoint. It is never used to make an API call.
+        meta = session.create_client(
+            service,
+            region_name=region,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=key or 'unused',
+            aws_secret_access_key=secret or 'unused').meta
+
+        if key and secret:
+            creds = botocore_credentials.Credentials(key, secret)
+        else:
+            creds = session.get_credentials()
+
+        if creds is None:
+            raise exceptions.InvalidCredentials(
+                'Unable to locate AWS credentials for %s' % service)
+
+        self._service = service
+        self._model = meta.service_model
+        self._endpoint_url = meta.endpoint_url
+        self._serializer = serialize.create_serializer(
+            self._model.protocol, include_validation=True)
+        self._parser = parsers.create_parser(self._model.protocol)
+        self._signer = botocore_auth.SigV4Auth(
+            creds, self._model.signing_name or service, region)
+        self._http_client = http_client
+
+        # Map the boto3-style snake_case names to the API operation names
+        self._operations = dict(
+            (botocore.xform_name(op), op)
+            for op in self._model.operation_names)
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self._endpoint_url)
+
+    def _get_http_client(self):
+        return self._http_client or httpclient.AsyncHTTPClient()
+
+    def _build_request(self, operation_model, params):
+        """Serializes and signs a request.
+
+        Args:
+            operation_model: botocore.model.OperationModel
+            params: Dict of API parameters
+
+        Returns:
+            tornado.httpclient.HTTPRequest object
+        """
+        request_dict = self._serializer.serialize_to_request(
+            params, operation_model)
+        awsrequest.prepare_request_dict(
+            request_dict, endpoint_url=self._endpoint_url,
+            user_agent='kingpin')
+        request = awsrequest.create_request_object(request_dict)
+        self._signer.add_auth(request)
+        prepared = request.prepare()
+
+        return httpclient.HTTPRequest(
+            url=prepared.url,
+            method=prepared.method,
+            headers=dict(prepared.headers.items()),
+            body=prepared.body or None,
+            allow_nonstandard_methods=True)
+
+    @gen.coroutine
+    def call(self, method, **kwargs):
+        """Executes an API call and returns the parsed response.
+
+        Throttling and server-side errors are retried with an exponential
+        backoff (up to aws_settings.ASYNC_RETRY_ATTEMPTS times). All other
+        errors are raised as botocore.exceptions.ClientError -- just like
+        Boto3 would raise them.
+
+        Args:
+            method: Boto3-style method name (ie, 'describe_stacks')
+            kwargs: API parameters
+
+        Returns:
+            Dict of parsed response data
+        """
+        try:
+            operation = self._operations[method]
+        except KeyError:
+            raise exceptions.UnrecoverableActorFailure(
+                '%s has no method %s' % (self._service, method))
+
+        operation_model = self._model.operation_model(operation)
+        attempts = aws_settings.ASYNC_RETRY_ATTEMPTS
+
+        for i in xrange(1, attempts + 1):
+            # Requests must be re-signed on every try, since the signature
+            # includes a timestamp.
+            request = self._build_request(operation_model, kwargs)
+            log.debug('Calling %s.%s (try %s/%s)',
+                      self._service, operation, i, attempts)
+            response = yield self._get_http_client().fetch(
+                request, raise_error=False)
+
+            # 599 represents a connection failure or timeout in Tornado. There
+            # is no response to parse.
+            if response.code == 599:
+                if i < attempts:
+                    yield utils.tornado_sleep(self._backoff(i))
+                    continue
+                raise response.error
+
+            parsed = self._parser.parse(
+                {'status_code': response.code,
+                 'headers': dict(response.headers.get_all()),
+                 'body': response.body or ''},
+                operation_model.output_shape)
+
+            if response.code < 300:
+                raise gen.Return(parsed)
+
+            code = parsed.get('Error', {}).get('Code', '')
+            retryable = (response.code >= 500 or
+                         any(c in code for c in RETRYABLE_ERRORS))
+            if retryable and i < attempts:
+                log.debug('%s.%s returned %s (%s), retrying',
+                          self._service, operation, response.code, code)
+                yield utils.tornado_sleep(self._backoff(i))
+                continue
+
+            raise botocore_exceptions.ClientError(parsed, operation)
+
+    @staticmethod
+    def _backoff(attempt):
+        """Returns an exponential backoff delay (in seconds) for a retry."""
+        delay = aws_settings.ASYNC_RETRY_DELAY * (2 ** (attempt - 1))
+        return min(delay, 10)
+
+
+def get_client(service, region, key=None, secret=None, endpoint_url=None):
+    """Returns a shared AsyncClient for the supplied service and region.
+
+    Building an AsyncClient means resolving a service model and endpoint,
+    which is not free. Since the clients hold no per-actor state, we share
+    them across all actors.
+
+    Args:
+        service: Botocore service name (ie, 'ecs', 'sqs')
+        region: AWS region name
+        key: AWS access key (optional)
+        secret: AWS secret key (optional)
+        endpoint_url: Override the AWS-provided endpoint (optional)
+
+    Returns:
+        AsyncClient object
+    """
+    cache_key = (service, region, key, endpoint_url)
+    with _LOCK:
+        if cache_key not in _CLIENTS:
+            _CLIENTS[cache_key] = AsyncClient(
+                service, region, key=key, secret=secret,
+                endpoint_url=endpoint_url)
+        return _CLIENTS[cache_key]
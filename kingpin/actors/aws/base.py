@@ -30,16 +30,33 @@ _Note, these can be skipped only if you have a .aws/credentials file in place._
 
 :AWS_SECRET_ACCESS_KEY:
   Your AWS secret
+
+**Optional Environment Variables**
+
+:AWS_ASYNC_TRANSPORT:
+  If set, hot polling calls (such as `describe_stacks` or
+  `describe_services`) are made directly on the Tornado IOLoop rather than
+  through Boto on a thread. See `kingpin.actors.aws.api`.
+
+:AWS_ENDPOINT_URL:
+  If set, every AWS API call is sent to this URL rather than to Amazon. This
+  is meant for testing against a local stand-in, like
+  `kingpin.bench.fakecloud`.
 """
 
 import json
 import logging
 import urllib
+import urlparse
 import re
+import socket
 
 from boto import exception as boto_exception
+from boto import regioninfo
 from boto import utils as boto_utils
 from boto3 import exceptions as boto3_exceptions
+from botocore import config as botocore_config
+from botocore import exceptions as botocore_exceptions
 from retrying import retry
 from tornado import concurrent
 from tornado import gen
@@ -49,13 +66,17 @@ import boto.ec2
 import boto.ec2.elb
 import boto.iam
 import boto.sqs
+import boto.sqs.connection
 import boto3
 
 from kingpin import utils
 from kingpin import exceptions as kingpin_exceptions
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.aws import api as aws_api
 from kingpin.actors.aws import settings as aws_settings
+from kingpin.actors.support import breaker
+from kingpin.actors.support import readcache
 
 log = logging.getLogger(__name__)
 
@@ -79,6 +100,103 @@ class InvalidPolicy(exceptions.RecoverableActorFailure):
     """Raised when Amazon indicates that policy JSON is invalid."""
 
 
+def _endpoint_kwargs():
+    """Returns the Boto connection arguments for aws_settings.ENDPOINT_URL."""
+    url = urlparse.urlparse(aws_settings.ENDPOINT_URL)
+    return {'host': url.hostname,
+            'port': url.port,
+            'is_secure': url.scheme == 'https'}
+
+
+def _operation(function):
+    """Returns the name of the circuit breaker of an API call."""
+    name = getattr(function, '__name__', None) or repr(function)
+    owner = getattr(function, '__self__', None)
+    if owner is None:
+        return name
+    return '%s.%s' % (type(owner).__name__, name)
+
+
+def _is_outage(exception):
+    """Whether a failed API call means that AWS is in trouble.
+
+    Throttling, server errors and connection errors (or timeouts) count.
+    Errors about the call itself (a missing resource, a bad parameter) do not
+    -- AWS answered. Neither do errors raised before the call was ever sent
+    (missing credentials, a parameter that fails validation, a bug).
+    """
+    if isinstance(exception, boto_exception.BotoServerError):
+        return (exception.status >= 500 or
+                aws_settings.is_retriable_exception(exception))
+    if isinstance(exception, botocore_exceptions.ClientError):
+        error = exception.response.get('Error', {})
+        status = exception.response.get(
+            'ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return status >= 500 or 'Throttl' in error.get('Code', '')
+    return isinstance(exception, (botocore_exceptions.ConnectionError,
+                                  botocore_exceptions.ReadTimeoutError,
+                                  socket.error))
+
+
+def _guarded(function, *args, **kwargs):
+    """Calls an API function through its run-wide circuit breaker."""
+    guard = breaker.get_breaker(_operation(function))
+    guard.before()
+    breaker.get_budget().attempt()
+    try:
+        ret = function(*args, **kwargs)
+    except Exception as e:
+        if _is_outage(e):
+            guard.failure()
+        else:
+            guard.success()
+        raise
+
+    guard.success()
+    return ret
+
+
+def connect_boto(module, connection_cls, region, key, secret):
+    """Returns a Boto connection object for a region.
+
+    Normally this is just `module.connect_to_region()`. If
+    aws_settings.ENDPOINT_URL is set though, the connection is pointed at that
+    endpoint instead.
+
+    Args:
+        module: The Boto service module (ie, boto.sqs)
+        connection_cls: The module's connection class (ie, SQSConnection)
+        region: AWS region name
+        key: AWS access key (or None)
+        secret: AWS secret key (or None)
+    """
+    if not aws_settings.ENDPOINT_URL:
+        return module.connect_to_region(
+            region, aws_access_key_id=key, aws_secret_access_key=secret)
+
+    kwargs = _endpoint_kwargs()
+    return connection_cls(
+        region=regioninfo.RegionInfo(name=region, endpoint=kwargs.pop('host')),
+        aws_access_key_id=key,
+        aws_secret_access_key=secret,
+        **kwargs)
+
+
+def connect_boto3(service, region, key, secret):
+    """Returns a Boto3 client, honoring aws_settings.ENDPOINT_URL."""
+    kwargs = {}
+    if aws_settings.ENDPOINT_URL:
+        kwargs['endpoint_url'] = aws_settings.ENDPOINT_URL
+        kwargs['config'] = botocore_config.Config(
+            s3={'addressing_style': 'path'})
+    return boto3.client(
+        service,
+        region_name=region,
+        aws_access_key_id=key,
+        aws_secret_access_key=secret,
+        **kwargs)
+
+
 class AWSBaseActor(base.BaseActor):
 
     # Get references to existing objects that are used by the
@@ -100,6 +218,7 @@ class AWSBaseActor(base.BaseActor):
         # API calls to the Metadata service, but those should be fast.
         key = None
         secret = None
+        self._region = None
 
         # In the event though that someone has explicitly set the AWS access
         # keys in the environment (either for the purposes of a unit test, or
@@ -113,9 +232,13 @@ class AWSBaseActor(base.BaseActor):
         # sure things worked!
         try:
             # Establish connection objects that don't require a region
+            endpoint = {}
+            if aws_settings.ENDPOINT_URL:
+                endpoint = _endpoint_kwargs()
             self.iam_conn = boto.iam.connection.IAMConnection(
                 aws_access_key_id=key,
-                aws_secret_access_key=secret)
+                aws_secret_access_key=secret,
+                **endpoint)
         except boto.exception.NoAuthHandlerFound:
             raise exceptions.InvalidCredentials(
                 'AWS settings imported but not all credentials are supplied. '
@@ -137,8 +260,14 @@ class AWSBaseActor(base.BaseActor):
 
             # Set the fixed region
             region = zone_check.group(1)
-            self.log.warning('Converting zone "%s" to region "%s".' % (
-                zone, region))
+            self.log.warning('Converting zone "%s" to region "%s".',
+                             zone, region)
+
+        # Remember the credentials and region for the natively asynchronous
+        # API clients used in api_call() below.
+        self._region = region
+        self._key = key
+        self._secret = secret
 
         region_names = [r.name for r in boto.ec2.elb.regions()]
         if region not in region_names:
@@ -146,33 +275,15 @@ class AWSBaseActor(base.BaseActor):
                    (region, region_names))
             raise exceptions.InvalidOptions(err)
 
-        self.ec2_conn = boto.ec2.connect_to_region(
-            region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret)
-        self.ecs_conn = boto3.client(
-            'ecs',
-            region_name=region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret)
-        self.elb_conn = boto.ec2.elb.connect_to_region(
-            region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret)
-        self.cf3_conn = boto3.client(
-            'cloudformation',
-            region_name=region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret)
-        self.sqs_conn = boto.sqs.connect_to_region(
-            region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret)
-        self.s3_conn = boto3.client(
-            's3',
-            region_name=region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret)
+        self.ec2_conn = connect_boto(
+            boto.ec2, boto.ec2.connection.EC2Connection, region, key, secret)
+        self.ecs_conn = connect_boto3('ecs', region, key, secret)
+        self.elb_conn = connect_boto(
+            boto.ec2.elb, boto.ec2.elb.ELBConnection, region, key, secret)
+        self.cf3_conn = connect_boto3('cloudformation', region, key, secret)
+        self.sqs_conn = connect_boto(
+            boto.sqs, boto.sqs.connection.SQSConnection, region, key, secret)
+        self.s3_conn = connect_boto3('s3', region, key, secret)
 
     @concurrent.run_on_executor
     @retry(**aws_settings.RETRYING_SETTINGS)
@@ -185,9 +296,13 @@ class AWSBaseActor(base.BaseActor):
 
         This allows execution of any function in a thread without having
         to write a wrapper method that is decorated with run_on_executor()
+
+        Every API operation (ie, `ELBConnection.get_all_load_balancers`) has
+        its own run-wide circuit breaker, which trips when the operation
+        keeps failing with throttling or server errors.
         """
         try:
-            return function(*args, **kwargs)
+            return _guarded(function, *args, **kwargs)
         except boto_exception.BotoServerError as e:
             # If we're using temporary IAM credentials, when those expire we
             # can get back a blank 400 from Amazon. This is confusing, but it
@@ -212,6 +327,59 @@ class AWSBaseActor(base.BaseActor):
             raise exceptions.RecoverableActorFailure(
                 'Boto3 had a failure: %s' % e)
 
+    def cached_read(self, operation, key, fetch):
+        """Makes an idempotent read call through the read cache.
+
+        See `kingpin.actors.support.readcache`. The account, endpoint and
+        region are added to the `key` of the call.
+
+        Args:
+            operation: Name of the API operation (ie, 'describe_stacks')
+            key: JSON-able arguments of the call
+            fetch: Function that makes the call, returning a Future
+        """
+        scope = [aws_settings.AWS_ACCESS_KEY_ID, aws_settings.ENDPOINT_URL,
+                 self._region]
+        return readcache.cached(operation, scope + [key], fetch)
+
+    def cached_thread(self, function, *args, **kwargs):
+        """Same as thread(), for idempotent reads (see cached_read())."""
+        operation = _operation(function)
+        return self.cached_read(
+            operation.rsplit('.', 1)[-1], [operation, args, kwargs],
+            lambda: self.thread(function, *args, **kwargs))
+
+    @property
+    def async_transport(self):
+        """Whether or not api_call() should be used for hot read calls."""
+        return bool(aws_settings.ASYNC_TRANSPORT and self._region)
+
+    @gen.coroutine
+    def api_call(self, service, method, **kwargs):
+        """Execute a read-only AWS API call without tying up a thread.
+
+        Uses the `kingpin.actors.aws.api.AsyncClient` to make the call
+        directly on the IOLoop. The return value is the same as the
+        equivalent Boto3 client method would return.
+
+        Example:
+            >>> ret = yield api_call('ecs', 'describe_services',
+            ...                      cluster='foo', services=['bar'])
+
+        Args:
+            service: Botocore service name (ie, 'ecs')
+            method: Boto3-style method name (ie, 'describe_services')
+            kwargs: API parameters
+
+        Raises:
+            botocore.exceptions.ClientError
+        """
+        client = aws_api.get_client(service, self._region,
+                                    key=self._key, secret=self._secret,
+                                    endpoint_url=aws_settings.ENDPOINT_URL)
+        ret = yield client.call(method, **kwargs)
+        raise gen.Return(ret)
+
     @gen.coroutine
     def _find_elb(self, name):
         """Return an ELB with the matching name.
@@ -227,7 +395,7 @@ class AWSBaseActor(base.BaseActor):
         Raises:
             ELBNotFound
         """
-        self.log.info('Searching for ELB "%s"' % name)
+        self.log.info('Searching for ELB "%s"', name)
 
         try:
             elbs = yield self.thread(self.elb_conn.get_all_load_balancers,
@@ -241,7 +409,7 @@ class AWSBaseActor(base.BaseActor):
 
             raise
 
-        self.log.debug('ELBs found: %s' % elbs)
+        self.log.debug('ELBs found: %s', elbs)
 
         if len(elbs) != 1:
             raise ELBNotFound('Expected to find exactly 1 ELB. Found %s: %s'
@@ -296,7 +464,7 @@ class AWSBaseActor(base.BaseActor):
 
         # Run through any supplied Inline IAM Policies and verify that they're
         # not corrupt very early on.
-        self.log.debug('Parsing and validating %s' % policy)
+        self.log.debug('Parsing and validating %s', policy)
 
         try:
             p_doc = utils.convert_script_to_dict(script_file=policy,
@@ -17,6 +17,7 @@
 ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
 """
 
+import functools
 import logging
 import json
 import uuid
@@ -230,7 +231,7 @@ class CloudFormationBaseActor(base.AWSBaseActor):
 
         if url is not None:
             cfg = {'TemplateURL': url}
-            self.log.info('Validating template (%s) with AWS...' % url)
+            self.log.info('Validating template (%s) with AWS...', url)
             try:
                 yield self.thread(self.cf3_conn.validate_template, **cfg)
             except ClientError as e:
@@ -279,9 +280,16 @@ class CloudFormationBaseActor(base.AWSBaseActor):
         Returns
             <Stack Dict> or <None>
         """
+        if self.async_transport:
+            fetch = functools.partial(
+                self.api_call, 'cloudformation', 'describe_stacks',
+                StackName=stack)
+        else:
+            fetch = functools.partial(
+                self.thread, self.cf3_conn.describe_stacks, StackName=stack)
+
         try:
-            stacks = yield self.thread(self.cf3_conn.describe_stacks,
-                                       StackName=stack)
+            stacks = yield self.cached_read('describe_stacks', stack, fetch)
         except ClientError as e:
             if 'does not exist' in e.message:
                 raise gen.Return(None)
@@ -298,8 +306,8 @@ class CloudFormationBaseActor(base.AWSBaseActor):
             stack: Stack name or stack ID
         """
         try:
-            ret = yield self.thread(self.cf3_conn.get_template,
-                                    StackName=stack)
+            ret = yield self.cached_thread(self.cf3_conn.get_template,
+                                           StackName=stack)
         except ClientError as e:
             raise CloudFormationError(e)
 
@@ -332,14 +340,14 @@ class CloudFormationBaseActor(base.AWSBaseActor):
             # First, lets see if the stack is still in progress (either
             # creation, deletion, or rollback .. doesn't really matter)
             if stack['StackStatus'] in IN_PROGRESS:
-                self.log.info('Stack state is %s, waiting %s(s)...' %
-                              (stack['StackStatus'], sleep))
+                self.log.info('Stack state is %s, waiting %s(s)...',
+                              stack['StackStatus'], sleep)
                 yield utils.tornado_sleep(sleep)
                 continue
 
             # If the stack is in the desired state, then return
             if stack['StackStatus'] in desired_states:
-                self.log.debug('Found Stack state: %s' % stack['StackStatus'])
+                self.log.debug('Found Stack state: %s', stack['StackStatus'])
                 raise gen.Return()
 
             # Lastly, if we get here, then something is very wrong and we got
@@ -403,7 +411,7 @@ class CloudFormationBaseActor(base.AWSBaseActor):
             raise CloudFormationError(e.message)
 
         req_id = ret['ResponseMetadata']['RequestId']
-        self.log.info('Stack delete requested: %s' % req_id)
+        self.log.info('Stack delete requested: %s', req_id)
 
         # Now wait until the stack creation has finished
         try:
@@ -421,7 +429,7 @@ class CloudFormationBaseActor(base.AWSBaseActor):
     def _create_stack(self, stack):
         """Executes the stack creation."""
         # Create the stack, and get its ID.
-        self.log.info('Creating stack %s' % stack)
+        self.log.info('Creating stack %s', stack)
 
         if self._template_body:
             cfg = {'TemplateBody': self._template_body}
@@ -451,7 +459,7 @@ class CloudFormationBaseActor(base.AWSBaseActor):
             msg = 'Stack creation failed: %s' % events
             raise StackFailed(msg)
 
-        self.log.info('Stack created: %s' % stack['StackId'])
+        self.log.info('Stack created: %s', stack['StackId'])
 
         raise gen.Return(stack['StackId'])
 
@@ -538,10 +546,8 @@ class Create(CloudFormationBaseActor):
 
     desc = "Creating CloudFormation Stack {name}"
 
-    def __init__(self, *args, **kwargs):
+    def _prepare(self):
         """Initialize our object variables."""
-        super(Create, self).__init__(*args, **kwargs)
-
         # Convert our supplied parameters into a properly formatted dict
         self._parameters = self._create_parameters(self.option('parameters'))
 
@@ -732,10 +738,8 @@ class Stack(CloudFormationBaseActor):
 
     desc = 'CloudFormation Stack {name}'
 
-    def __init__(self, *args, **kwargs):
+    def _prepare(self):
         """Initialize our object variables."""
-        super(Stack, self).__init__(*args, **kwargs)
-
         # Convert our supplied parameters into a properly formatted dict
         self._parameters = self._create_parameters(self.option('parameters'))
 
@@ -750,7 +754,7 @@ class Stack(CloudFormationBaseActor):
         self._noecho_params = self._discover_noecho_params(self._template_body)
         for p in self._noecho_params:
             self.log.warning('Parameter "%s" has NoEcho set to True. '
-                             'Will not use in parameter comparison.' % p)
+                             'Will not use in parameter comparison.', p)
 
     @gen.coroutine
     def _update_stack(self, stack):
@@ -762,7 +766,7 @@ class Stack(CloudFormationBaseActor):
         # and re-create it, you cannot fix a broken stack.
         if stack['StackStatus'] in ('CREATE_FAILED', 'ROLLBACK_COMPLETE'):
             self.log.warning(
-                'Stack found in a failed state: %s' % stack['StackStatus'])
+                'Stack found in a failed state: %s', stack['StackStatus'])
             yield self._delete_stack(stack=stack['StackId'])
             yield self._create_stack(stack=stack['StackName'])
             raise gen.Return()
@@ -802,7 +806,7 @@ class Stack(CloudFormationBaseActor):
         if diff:
             self.log.warning('Stack templates do not match.')
             for line in diff.split('\n'):
-                self.log.info('Diff: %s' % line)
+                self.log.info('Diff: %s', line)
 
             # Plan to make a change set!
             needs_update = True
@@ -869,7 +873,7 @@ class Stack(CloudFormationBaseActor):
         # diff.
         for p in self._noecho_params:
             self.log.debug(
-                'Removing "%s" from parameters before comparison.' % p)
+                'Removing "%s" from parameters before comparison.', p)
             remote = [pair for pair in remote if pair['ParameterKey'] != p]
             local = [pair for pair in local if pair['ParameterKey'] != p]
 
@@ -877,7 +881,7 @@ class Stack(CloudFormationBaseActor):
         if diff:
             self.log.warning('Stack parameters do not match.')
             for line in diff.split('\n'):
-                self.log.info('Diff: %s' % line)
+                self.log.info('Diff: %s', line)
 
             return True
 
@@ -939,8 +943,8 @@ class Stack(CloudFormationBaseActor):
         returns:
             The final completed change set dictionary
         """
-        self.log.info('Waiting for %s to reach %s' %
-                      (change_set_name, desired_state))
+        self.log.info('Waiting for %s to reach %s',
+                      change_set_name, desired_state)
         while True:
             try:
                 change = yield self.thread(
@@ -949,22 +953,22 @@ class Stack(CloudFormationBaseActor):
             except ClientError as e:
                 # If we hit an intermittent error, lets just loop around and
                 # try again.
-                self.log.error('Error receiving change set state: %s' % e)
+                self.log.error('Error receiving change set state: %s', e)
                 yield utils.tornado_sleep(sleep)
                 continue
 
             # The Stack State can be 'AVAILABLE', or an IN_PROGRESS string. In
             # either case, we loop and wait.
             if change[status_key] in (('AVAILABLE',) + IN_PROGRESS):
-                self.log.info('Change Set state is %s, waiting %s(s)...' %
-                              (change[status_key], sleep))
+                self.log.info('Change Set state is %s, waiting %s(s)...',
+                              change[status_key], sleep)
                 yield utils.tornado_sleep(sleep)
                 continue
 
             # If the stack is in the desired state, then return
             if change[status_key] == desired_state:
-                self.log.debug('Change Set reached desired state: %s'
-                               % change[status_key])
+                self.log.debug('Change Set reached desired state: %s',
+                               change[status_key])
                 raise gen.Return(change)
 
             # Lastly, if we get here, then something is very wrong and we got
@@ -981,7 +985,7 @@ class Stack(CloudFormationBaseActor):
         args:
             change_set: Change Set Object
         """
-        self.log.debug('Parsing change set: %s' % change_set)
+        self.log.debug('Parsing change set: %s', change_set)
 
         # Reverse the list, and iterate through the data
         for change in change_set['Changes']:
@@ -1014,7 +1018,7 @@ class Stack(CloudFormationBaseActor):
         args:
             change_set_name: The Change Set Name/ARN
         """
-        self.log.info('Executing change set %s' % change_set_name)
+        self.log.info('Executing change set %s', change_set_name)
         try:
             yield self.thread(self.cf3_conn.execute_change_set,
                               ChangeSetName=change_set_name)
@@ -1031,8 +1035,8 @@ class Stack(CloudFormationBaseActor):
         state = self.option('state')
         stack_name = self.option('name')
 
-        self.log.info('Ensuring that CF Stack %s is %s' %
-                      (stack_name, state))
+        self.log.info('Ensuring that CF Stack %s is %s',
+                      stack_name, state)
 
         # Figure out if the stack already exists or not. In this case, we
         # ignore DELETED stacks because they don't apply or block you from
@@ -191,9 +191,7 @@ class ECSBaseActor(base.AWSBaseActor):
         'count': ((int, str), 1, 'How many tasks to run.')
     }
 
-    def __init__(self, *args, **kwargs):
-        super(ECSBaseActor, self).__init__(*args, **kwargs)
-
+    def _prepare(self):
         count = self.option('count')
         if type(count) is str or type(count) is unicode:
             try:
@@ -355,8 +353,7 @@ class ECSBaseActor(base.AWSBaseActor):
             return None
 
         # Defined Kingpin tokens will override environment variables.
-        final_tokens = default_tokens.copy()
-        final_tokens.update(tokens)
+        final_tokens = utils.TokenScope(tokens, parent=default_tokens)
 
         task_definition = utils.convert_script_to_dict(
             task_definition_file, final_tokens)
@@ -389,8 +386,8 @@ class ECSBaseActor(base.AWSBaseActor):
         if not service_definition_file:
             service_definition = {}
         else:
-            final_tokens = default_tokens.copy()
-            final_tokens.update(tokens)
+            final_tokens = utils.TokenScope(
+                tokens, parent=default_tokens)
 
             service_definition = utils.convert_script_to_dict(
                 service_definition_file, final_tokens)
@@ -503,8 +500,8 @@ class RunTask(ECSBaseActor):
                  'Whether to wait for the tasks to complete.')
     }
 
-    def __init__(self, *args, **kwargs):
-        super(RunTask, self).__init__(*args, **kwargs)
+    def _prepare(self):
+        super(RunTask, self)._prepare()
         self.task_definition = self._load_task_definition(
             self.option('task_definition'),
             self.option('tokens'),
@@ -579,10 +576,16 @@ class RunTask(ECSBaseActor):
         Returns:
             A boolean indicating whether all tasks are done.
         """
-        response = yield self.thread(
-            self.ecs_conn.describe_tasks,
-            cluster=self.option('cluster'),
-            tasks=tasks)
+        if self.async_transport:
+            response = yield self.api_call(
+                'ecs', 'describe_tasks',
+                cluster=self.option('cluster'),
+                tasks=tasks)
+        else:
+            response = yield self.thread(
+                self.ecs_conn.describe_tasks,
+                cluster=self.option('cluster'),
+                tasks=tasks)
 
         self._handle_failures(response['failures'])
 
@@ -814,8 +817,8 @@ class Service(ECSBaseActor):
             "Only used when state is 'absent'.")
     }
 
-    def __init__(self, *args, **kwargs):
-        super(Service, self).__init__(*args, **kwargs)
+    def _prepare(self):
+        super(Service, self)._prepare()
         self.task_definition = self._load_task_definition(
             self.option('task_definition'),
             self.option('tokens'),
@@ -838,10 +841,16 @@ class Service(ECSBaseActor):
         Raises:
             RecoverableActorFailure if number of services found is not 1.
         """
-        response = yield self.thread(
-            self.ecs_conn.describe_services,
-            cluster=self.option('cluster'),
-            services=[service_name])
+        if self.async_transport:
+            response = yield self.api_call(
+                'ecs', 'describe_services',
+                cluster=self.option('cluster'),
+                services=[service_name])
+        else:
+            response = yield self.thread(
+                self.ecs_conn.describe_services,
+                cluster=self.option('cluster'),
+                services=[service_name])
         self._handle_failures(response['failures'], self.FAILURE_MISSING)
 
         services = response['services']
@@ -892,13 +901,13 @@ class Service(ECSBaseActor):
             try:
                 service = yield self._describe_service(service_name)
             except ServiceNotFound as e:
-                self.log.info('Service Not Found: %s' % e.message)
+                self.log.info('Service Not Found: %s', e.message)
                 yield gen.sleep(2)
                 continue
 
             primary_deployment = self._get_primary_deployment(service)
             if primary_deployment:
-                self.log.info('Primary deployment is %s.' %
+                self.log.info('Primary deployment is %s.',
                               self._arn_to_name(
                                   primary_deployment['taskDefinition']))
                 if self._is_task_in_deployment(
@@ -1038,7 +1047,7 @@ class Service(ECSBaseActor):
             existing_service: result of _describe_service on the given
                 service name.
         """
-        self.log.info('Shutting down all current tasks in %s.' % service_name)
+        self.log.info('Shutting down all current tasks in %s.', service_name)
         task_definition_name = yield self._update_service(
             service_name,
             existing_service,
@@ -27,6 +27,7 @@ from tornado import gen
 from kingpin import utils
 from kingpin.actors import exceptions
 from kingpin.actors.aws import base
+from kingpin.actors.support import pages
 from kingpin.actors.utils import dry
 from kingpin.constants import REQUIRED
 
@@ -162,20 +163,26 @@ class WaitUntilHealthy(ELBBaseActor):
         """
         name = elb.name
 
-        self.log.debug('Counting ELB InService instances for : %s' % name)
+        self.log.debug('Counting ELB InService instances for : %s', name)
 
         # Get all instances for this ELB
-        instance_list = yield self.thread(elb.get_instance_health)
+        if self.async_transport:
+            health = yield self.api_call(
+                'elb', 'describe_instance_health', LoadBalancerName=name)
+            instance_list = health['InstanceStates']
+            states = [i['State'] for i in instance_list]
+        else:
+            instance_list = yield self.thread(elb.get_instance_health)
+            states = [i.state for i in instance_list]
         total_count = len(instance_list)
 
-        self.log.debug('All instances: %s' % instance_list)
-        in_service_count = [
-            i.state for i in instance_list].count('InService')
+        self.log.debug('All instances: %s', instance_list)
+        in_service_count = states.count('InService')
 
         expected_count = self._get_expected_count(count, total_count)
 
         healthy = (in_service_count >= expected_count)
-        self.log.debug('ELB "%s" healthy state: %s' % (elb.name, healthy))
+        self.log.debug('ELB "%s" healthy state: %s', elb.name, healthy)
 
         raise gen.Return(healthy)
 
@@ -297,7 +304,7 @@ class SetCert(ELBBaseActor):
             string: the ARN value of the certificate
         """
 
-        self.log.debug('Searching for cert "%s"...' % name)
+        self.log.debug('Searching for cert "%s"...', name)
         try:
             cert = yield self.thread(
                 self.iam_conn.get_server_certificate, name)
@@ -323,7 +330,7 @@ class SetCert(ELBBaseActor):
             arn: ARN for server certificate to use.
         """
 
-        self.log.info('Setting ELB "%s" to use cert arn: %s' % (elb, arn))
+        self.log.info('Setting ELB "%s" to use cert arn: %s', elb, arn)
         try:
             yield self.thread(
                 elb.set_listener_SSL_certificate, self.option('port'), arn)
@@ -358,7 +365,7 @@ class SetCert(ELBBaseActor):
         same_cert = self._compare_certs(elb, cert_arn)
 
         if same_cert:
-            self.log.warning('ELB %s is already using this cert.' % elb)
+            self.log.warning('ELB %s is already using this cert.', elb)
             raise gen.Return()
 
         if self._dry:
@@ -433,8 +440,8 @@ class RegisterInstance(base.AWSBaseActor):
         enabled_zones = set(elb.availability_zones)
 
         if not zone_names.issubset(enabled_zones):
-            self.log.warning('ELB "%s" is missing some AZ.' % elb.name)
-            self.log.info('Enabling all zones: %s' % zone_names)
+            self.log.warning('ELB "%s" is missing some AZ.', elb.name)
+            self.log.info('Enabling all zones: %s', zone_names)
             yield self.thread(elb.enable_zones, zone_names)
 
     @gen.coroutine
@@ -446,7 +453,7 @@ class RegisterInstance(base.AWSBaseActor):
             self.log.debug('No instance provided. Using current instance id.')
             iid = yield self._get_meta_data('instance-id')
             instances = [iid]
-            self.log.debug('Instances is: %s' % instances)
+            self.log.debug('Instances is: %s', instances)
 
         if type(instances) is not list:
             instances = [instances]
@@ -554,8 +561,8 @@ class DeregisterInstance(base.AWSBaseActor):
         if attrs.connection_draining.enabled:
             timeout = attrs.connection_draining.timeout
 
-            self.log.info('Connection Draining Enabled, waiting %s(s)'
-                          % timeout)
+            self.log.info('Connection Draining Enabled, waiting %s(s)',
+                          timeout)
             yield utils.tornado_sleep(timeout)
 
     @gen.coroutine
@@ -572,17 +579,32 @@ class DeregisterInstance(base.AWSBaseActor):
         Returns:
             a list of LoadBalancer objects
         """
-        all_elbs = yield self.thread(self.elb_conn.get_all_load_balancers)
         elbs_with_members = []
 
-        for instance in instances:
-            elbs = filter(lambda lb: instance in [i.id for i in lb.instances],
-                          all_elbs)
-            self.log.debug('%s is a member of %s' % (instance, elbs))
-            elbs_with_members.extend(elbs)
+        # Match the instances against each page of ELBs as it comes in,
+        # rather than holding on to every ELB in the region.
+        elb_pages = pages.Pages(self._get_elbs_page)
+        while (yield elb_pages.fetch_next()):
+            for instance in instances:
+                elbs = [lb for lb in elb_pages.items
+                        if instance in [i.id for i in lb.instances]]
+                self.log.debug('%s is a member of %s', instance, elbs)
+                elbs_with_members.extend(elbs)
 
         raise gen.Return(elbs_with_members)
 
+    @gen.coroutine
+    def _get_elbs_page(self, marker):
+        """Returns one page of the ELBs in the region, and the next marker.
+
+        Args:
+            marker: The marker returned with the previous page (or None)
+        """
+        kwargs = {'marker': marker} if marker else {}
+        elbs = yield self.thread(self.elb_conn.get_all_load_balancers,
+                                 **kwargs)
+        raise gen.Return((elbs, getattr(elbs, 'next_marker', None)))
+
     @gen.coroutine
     def _execute(self):
         instances = self.option('instances')
@@ -591,7 +613,7 @@ class DeregisterInstance(base.AWSBaseActor):
             self.log.debug('No instance provided. Using current instance id.')
             iid = yield self._get_meta_data('instance-id')
             instances = [iid]
-            self.log.debug('Instances is: %s' % instances)
+            self.log.debug('Instances is: %s', instances)
 
         if type(instances) is not list:
             instances = [instances]
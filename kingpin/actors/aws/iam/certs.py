@@ -117,10 +117,10 @@ class UploadCert(base.IAMBaseActor):
 
         # Upload it
         if self._dry:
-            self.log.info('Would upload cert "%s"' % self.option('name'))
+            self.log.info('Would upload cert "%s"', self.option('name'))
             raise gen.Return()
 
-        self.log.info('Uploading cert "%s"' % self.option('name'))
+        self.log.info('Uploading cert "%s"', self.option('name'))
         yield self._upload(
             cert_name=self.option('name'),
             cert_body=cert_body,
@@ -162,7 +162,7 @@ class DeleteCert(base.IAMBaseActor):
     def _find_cert(self, name):
         """Find a cert by name."""
 
-        self.log.debug('Searching for cert "%s"...' % name)
+        self.log.debug('Searching for cert "%s"...', name)
         try:
             yield self.thread(self.iam_conn.get_server_certificate, name)
         except BotoServerError as e:
@@ -179,8 +179,8 @@ class DeleteCert(base.IAMBaseActor):
         if self._dry:
             self.log.info('Checking that the cert exists...')
             yield self._find_cert(self.option('name'))
-            self.log.info('Would delete cert "%s"' % self.option('name'))
+            self.log.info('Would delete cert "%s"', self.option('name'))
             raise gen.Return()
 
-        self.log.info('Deleting cert "%s"' % self.option('name'))
+        self.log.info('Deleting cert "%s"', self.option('name'))
         yield self._delete(cert_name=self.option('name'))
@@ -28,6 +28,7 @@ from tornado import gen
 from kingpin import utils
 from kingpin.actors import exceptions
 from kingpin.actors.aws.iam import base
+from kingpin.actors.support import pages
 from kingpin.constants import REQUIRED
 from kingpin.constants import STATE
 
@@ -154,8 +155,8 @@ class EntityBaseActor(base.IAMBaseActor):
             p_name = self._generate_policy_name(policy)
             self.inline_policies[p_name] = self._parse_policy_json(policy)
 
-            self.log.debug('Parsed policy %s: %s' %
-                           (p_name, self.inline_policies[p_name]))
+            self.log.debug('Parsed policy %s: %s',
+                           p_name, self.inline_policies[p_name])
 
     @gen.coroutine
     def _get_entity_policies(self, name):
@@ -176,8 +177,9 @@ class EntityBaseActor(base.IAMBaseActor):
         # catch that and silently move on.
         policy_names = []
         try:
-            self.log.debug('Searching for any inline policies for %s' % name)
-            ret = yield self.thread(self.get_all_entity_policies, name)
+            self.log.debug('Searching for any inline policies for %s', name)
+            ret = yield self.cached_thread(self.get_all_entity_policies,
+                                           name)
             policy_names = (ret['list_%s_policies_response' % self.entity_name]
                                ['list_%s_policies_result' % self.entity_name]
                                ['policy_names'])
@@ -197,7 +199,8 @@ class EntityBaseActor(base.IAMBaseActor):
         tasks = []
         for p_name in policy_names:
             tasks.append((p_name,
-                         self.thread(self.get_entity_policy, name, p_name)))
+                         self.cached_thread(self.get_entity_policy,
+                                            name, p_name)))
 
         # Now that we've fired off all the calls, we walk through each yielded
         # result, parse the returned policy, and append it to our policies
@@ -219,7 +222,7 @@ class EntityBaseActor(base.IAMBaseActor):
 
             # Store the converted document under the policy name key
             policies[p_name] = p_doc
-            self.log.debug('Got policy %s/%s: %s' % (name, p_name, p_doc))
+            self.log.debug('Got policy %s/%s: %s', name, p_name, p_doc)
 
         raise gen.Return(policies)
 
@@ -258,9 +261,9 @@ class EntityBaseActor(base.IAMBaseActor):
             exist = existing_policies[policy]
             diff = utils.diff_dicts(exist, new)
             if diff:
-                self.log.info('Policy %s differs from Amazons:' % policy)
+                self.log.info('Policy %s differs from Amazons:', policy)
                 for line in diff.split('\n'):
-                    self.log.info('Diff: %s' % line)
+                    self.log.info('Diff: %s', line)
                 policy_doc = self.inline_policies[policy]
                 tasks.append(self._put_entity_policy(name, policy, policy_doc))
         yield tasks
@@ -281,16 +284,16 @@ class EntityBaseActor(base.IAMBaseActor):
             policy_name: The entity policy name
         """
         if self._dry:
-            self.log.warning('Would delete policy %s from %s %s' %
-                             (policy_name, self.entity_name, name))
+            self.log.warning('Would delete policy %s from %s %s',
+                             policy_name, self.entity_name, name)
             raise gen.Return()
 
-        self.log.info('Deleting policy %s from %s %s' %
-                      (policy_name, self.entity_name, name))
+        self.log.info('Deleting policy %s from %s %s',
+                      policy_name, self.entity_name, name)
         try:
             ret = yield self.thread(
                 self.delete_entity_policy, name, policy_name)
-            self.log.debug('Policy %s deleted: %s' % (policy_name, ret))
+            self.log.debug('Policy %s deleted: %s', policy_name, ret)
         except BotoServerError as e:
             if e.error_code != 404:
                 raise exceptions.RecoverableActorFailure(
@@ -306,23 +309,41 @@ class EntityBaseActor(base.IAMBaseActor):
             policy_doc: The ploicy document object itself
         """
         if self._dry:
-            self.log.warning('Would push policy %s to %s %s' %
-                             (policy_name, self.entity_name, name))
+            self.log.warning('Would push policy %s to %s %s',
+                             policy_name, self.entity_name, name)
             raise gen.Return()
 
-        self.log.info('Pushing policy %s to %s %s' %
-                      (policy_name, self.entity_name, name))
+        self.log.info('Pushing policy %s to %s %s',
+                      policy_name, self.entity_name, name)
         try:
             ret = yield self.thread(
                 self.put_entity_policy,
                 name,
                 policy_name,
                 json.dumps(policy_doc))
-            self.log.debug('Policy %s pushed: %s' % (policy_name, ret))
+            self.log.debug('Policy %s pushed: %s', policy_name, ret)
         except BotoServerError as e:
             raise exceptions.RecoverableActorFailure(
                 'An unexpected API error occurred: %s' % e)
 
+    @gen.coroutine
+    def _get_entities_page(self, marker):
+        """Returns one page of our IAM Entities, and the marker of the next.
+
+        args:
+            marker: The marker returned with the previous page (or None)
+        """
+        kwargs = {'marker': marker} if marker else {}
+        ret = yield self.thread(self.get_all_entities, **kwargs)
+        result = (ret['list_%ss_response' % self.entity_name]
+                     ['list_%ss_result' % self.entity_name])
+
+        marker = None
+        if result.get('is_truncated') in ('true', True):
+            marker = result.get('marker')
+
+        raise gen.Return((result['%ss' % self.entity_name], marker))
+
     @gen.coroutine
     def _get_entity(self, name):
         """Returns an IAM Entity JSON Blob.
@@ -333,22 +354,17 @@ class EntityBaseActor(base.IAMBaseActor):
         args:
             name: The IAM Entity Name
         """
-        self.log.debug('Searching for %s %s' % (self.entity_name, name))
+        self.log.debug('Searching for %s %s', self.entity_name, name)
 
-        # Get a list of all of our entities.
+        # Page through our entities, and stop at the first page that has the
+        # one we are looking for.
         try:
-            entities = yield self.thread(self.get_all_entities)
+            entity = yield pages.Pages(self._get_entities_page).find(
+                lambda entity: entity['%s_name' % self.entity_name] == name)
         except BotoServerError as e:
             raise exceptions.RecoverableActorFailure(
                 'An unexpected API error occurred: %s' % e)
 
-        # Now search for the entity
-        entity = [entity for entity in
-                  entities['list_%ss_response' % self.entity_name]
-                          ['list_%ss_result' % self.entity_name]
-                          ['%ss' % self.entity_name] if
-                  entity['%s_name' % self.entity_name] == name]
-
         # If there aren't any entities, return None.
         if not entity:
             raise gen.Return()
@@ -361,7 +377,7 @@ class EntityBaseActor(base.IAMBaseActor):
                 (self.entity_name, name))
 
         # Finally, return the result!
-        self.log.debug('Found %s %s' % (self.entity_name, entity[0]['arn']))
+        self.log.debug('Found %s %s', self.entity_name, entity[0]['arn'])
         raise gen.Return(entity[0])
 
     @gen.coroutine
@@ -376,8 +392,8 @@ class EntityBaseActor(base.IAMBaseActor):
             name: The IAM User Name
             state: 'present' or 'absent'
         """
-        self.log.info('Ensuring that %s %s is %s' %
-                      (self.entity_name, name, state))
+        self.log.info('Ensuring that %s %s is %s',
+                      self.entity_name, name, state)
 
         entity = yield self._get_entity(name)
 
@@ -400,7 +416,7 @@ class EntityBaseActor(base.IAMBaseActor):
             name: The IAM Entity Name
         """
         if self._dry:
-            self.log.warning('Would create %s %s' % (self.entity_name, name))
+            self.log.warning('Would create %s %s', self.entity_name, name)
             raise gen.Return()
 
         try:
@@ -411,14 +427,14 @@ class EntityBaseActor(base.IAMBaseActor):
                 raise exceptions.RecoverableActorFailure(
                     'An unexpected API error occurred: %s' % e)
             self.log.warning(
-                '%s %s already exists, skipping creation.' %
-                (self.entity_name, name))
+                '%s %s already exists, skipping creation.',
+                self.entity_name, name)
             raise gen.Return()
 
         arn = (ret['create_%s_response' % self.entity_name]
                   ['create_%s_result' % self.entity_name]
                   [self.entity_name]['arn'])
-        self.log.info('%s %s created' % (self.entity_name, arn))
+        self.log.info('%s %s created', self.entity_name, arn)
 
     @gen.coroutine
     def _delete_entity(self, name):
@@ -430,7 +446,7 @@ class EntityBaseActor(base.IAMBaseActor):
             name: The IAM Entity Name
         """
         if self._dry:
-            self.log.warning('Would delete %s %s' % (self.entity_name, name))
+            self.log.warning('Would delete %s %s', self.entity_name, name)
             raise gen.Return()
 
         try:
@@ -444,12 +460,12 @@ class EntityBaseActor(base.IAMBaseActor):
 
             # Now delete the entity
             yield self.thread(self.delete_entity, name)
-            self.log.info('%s %s deleted' % (self.entity_name, name))
+            self.log.info('%s %s deleted', self.entity_name, name)
         except BotoServerError as e:
             if e.status != 404:
                 raise exceptions.RecoverableActorFailure(
                     'An unexpected API error occurred: %s' % e)
-            self.log.warning('%s %s doesn\'t exist' % (self.entity_name, name))
+            self.log.warning('%s %s doesn\'t exist', self.entity_name, name)
 
     @gen.coroutine
     def _add_user_to_group(self, name, group):
@@ -460,11 +476,11 @@ class EntityBaseActor(base.IAMBaseActor):
             group: group name
         """
         if self._dry:
-            self.log.warning('Would have added %s to %s' % (name, group))
+            self.log.warning('Would have added %s to %s', name, group)
             raise gen.Return()
 
         try:
-            self.log.info('Adding %s to %s' % (name, group))
+            self.log.info('Adding %s to %s', name, group)
             yield self.thread(self.iam_conn.add_user_to_group, group, name)
         except BotoServerError as e:
             raise exceptions.RecoverableActorFailure(
@@ -479,11 +495,11 @@ class EntityBaseActor(base.IAMBaseActor):
             group: group name
         """
         if self._dry:
-            self.log.warning('Would have removed %s from %s' % (name, group))
+            self.log.warning('Would have removed %s from %s', name, group)
             raise gen.Return()
 
         try:
-            self.log.info('Removing %s from %s' % (name, group))
+            self.log.info('Removing %s from %s', name, group)
             yield self.thread(self.iam_conn.remove_user_from_group,
                               group, name)
         except BotoServerError as e:
@@ -568,6 +584,7 @@ class User(EntityBaseActor):
         self.get_entity_policy = self.iam_conn.get_user_policy
         self.put_entity_policy = self.iam_conn.put_user_policy
 
+    def _prepare(self):
         # Parse the supplied inline policies
         self._parse_inline_policies(self.option('inline_policies'))
 
@@ -705,6 +722,7 @@ class Group(EntityBaseActor):
         self.get_entity_policy = self.iam_conn.get_group_policy
         self.put_entity_policy = self.iam_conn.put_group_policy
 
+    def _prepare(self):
         # Parse the supplied inline policies
         self._parse_inline_policies(self.option('inline_policies'))
 
@@ -750,7 +768,7 @@ class Group(EntityBaseActor):
             self.log.warning(('Will not be able to delete this group '
                               'without first removing all of its members. '
                               'Use the `force` option to purge all members.'))
-            self.log.warning('Group members: %s' % ', '.join(users))
+            self.log.warning('Group members: %s', ', '.join(users))
 
         if not force:
             raise gen.Return()
@@ -860,6 +878,7 @@ class Role(EntityBaseActor):
         self.get_entity_policy = self.iam_conn.get_role_policy
         self.put_entity_policy = self.iam_conn.put_role_policy
 
+    def _prepare(self):
         # Pre-parse the supplied inline policies
         self._parse_inline_policies(self.option('inline_policies'))
 
@@ -900,7 +919,7 @@ class Role(EntityBaseActor):
 
         self.log.info('Assume Role Policy differs from Amazons:')
         for line in diff.split('\n'):
-            self.log.info('Diff: %s' % line)
+            self.log.info('Diff: %s', line)
 
         if self._dry:
             self.log.warning('Would have updated the Assume Role Policy Doc')
@@ -996,11 +1015,11 @@ class InstanceProfile(EntityBaseActor):
             role: The name of the role to assign to the profile
         """
         if self._dry:
-            self.log.warning('Would add role %s from %s' % (role, name))
+            self.log.warning('Would add role %s from %s', role, name)
             raise gen.Return()
 
         try:
-            self.log.info('Adding role %s to %s' % (role, name))
+            self.log.info('Adding role %s to %s', role, name)
             yield self.thread(self.iam_conn.add_role_to_instance_profile,
                               name, role)
         except BotoServerError as e:
@@ -1017,11 +1036,11 @@ class InstanceProfile(EntityBaseActor):
             role: The name of the role to remove
         """
         if self._dry:
-            self.log.warning('Would remove role %s from %s' % (role, name))
+            self.log.warning('Would remove role %s from %s', role, name)
             raise gen.Return()
 
         try:
-            self.log.info('Removing role %s from %s' % (role, name))
+            self.log.info('Removing role %s from %s', role, name)
             yield self.thread(self.iam_conn.remove_role_from_instance_profile,
                               name, role)
         except BotoServerError as e:
@@ -292,6 +292,28 @@ class TestEntityBaseActor(testing.AsyncTestCase):
         self.actor.iam_conn.get_all_bases.reset_mock()
         self.assertEquals(ret, matching_entity)
 
+    @testing.gen_test
+    def test_get_entity_paginated(self):
+        def page(bases, marker=None):
+            result = {'bases': bases, 'is_truncated': 'false'}
+            if marker:
+                result.update({'is_truncated': 'true', 'marker': marker})
+            return {'list_bases_response': {'list_bases_result': result}}
+
+        other = {'base_name': 'other', 'arn': 'arn:other'}
+        test = {'base_name': 'test', 'arn': 'arn:test'}
+        self.actor.iam_conn.get_all_bases.side_effect = [
+            page([other], marker='m1'),
+            page([test], marker='m2'),
+            page([other])]
+
+        ret = yield self.actor._get_entity('test')
+        self.assertEquals(ret, test)
+
+        # The last page was never asked for
+        self.assertEquals(self.actor.iam_conn.get_all_bases.mock_calls,
+                          [mock.call(), mock.call(marker='m1')])
+
     @testing.gen_test
     def test_ensure_entity(self):
         create_mock = mock.MagicMock(name='_create_entity')
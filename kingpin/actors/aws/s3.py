@@ -380,6 +380,11 @@ class Bucket(base.EnsurableAWSBaseActor):
     def __init__(self, *args, **kwargs):
         super(Bucket, self).__init__(*args, **kwargs)
 
+        # Start out assuming the bucket doesn't exist. The _precache() method
+        # will populate this with True if the bucket does exist.
+        self._bucket_exists = False
+
+    def _prepare(self):
         # If the policy is None, or '', we simply set it to self.policy. If its
         # anything else, we parse it.
         self.policy = self.option('policy')
@@ -392,10 +397,6 @@ class Bucket(base.EnsurableAWSBaseActor):
         if self.option('lifecycle') is not None:
             self.lifecycle = self._generate_lifecycle(self.option('lifecycle'))
 
-        # Start out assuming the bucket doesn't exist. The _precache() method
-        # will populate this with True if the bucket does exist.
-        self._bucket_exists = False
-
     def _snake_to_camel(self, data):
         """Converts a snake_case dict to CamelCase.
 
@@ -432,7 +433,7 @@ class Bucket(base.EnsurableAWSBaseActor):
         # Generate a fresh Lifecycle configuration object
         rules = []
         for c in config:
-            self.log.debug('Generating lifecycle rule from: %s' % c)
+            self.log.debug('Generating lifecycle rule from: %s', c)
 
             # You must supply at least 'expiration' or 'transition' in your
             # lifecycle config. This is tricky to check in the jsonschema, so
@@ -524,7 +525,7 @@ class Bucket(base.EnsurableAWSBaseActor):
     def _delete_bucket(self):
         bucket = self.option('name')
         try:
-            self.log.info('Deleting bucket %s' % bucket)
+            self.log.info('Deleting bucket %s', bucket)
             yield self.thread(self.s3_conn.delete_bucket, Bucket=bucket)
         except ClientError as e:
             raise exceptions.RecoverableActorFailure(
@@ -566,7 +567,7 @@ class Bucket(base.EnsurableAWSBaseActor):
         # Now, print out the diff..
         self.log.info('Bucket policy differs from Amazons:')
         for line in diff.split('\n'):
-            self.log.info('Diff: %s' % line)
+            self.log.info('Diff: %s', line)
 
         raise gen.Return(False)
 
@@ -580,8 +581,8 @@ class Bucket(base.EnsurableAWSBaseActor):
     @gen.coroutine
     @dry('Would have pushed bucket policy')
     def _push_policy(self):
-        self.log.info('Pushing bucket policy %s' % self.option('policy'))
-        self.log.debug('Policy doc: %s' % self.policy)
+        self.log.info('Pushing bucket policy %s', self.option('policy'))
+        self.log.debug('Policy doc: %s', self.policy)
 
         try:
             yield self.thread(
@@ -617,9 +618,9 @@ class Bucket(base.EnsurableAWSBaseActor):
                 'target': '',
                 'prefix': ''})
 
-        self.log.debug('Logging is set to s3://%s/%s' %
-                       (data['LoggingEnabled']['TargetBucket'],
-                        data['LoggingEnabled']['TargetPrefix']))
+        self.log.debug('Logging is set to s3://%s/%s',
+                       data['LoggingEnabled']['TargetBucket'],
+                       data['LoggingEnabled']['TargetPrefix'])
         raise gen.Return({
             'target': data['LoggingEnabled']['TargetBucket'],
             'prefix': data['LoggingEnabled']['TargetPrefix']})
@@ -663,7 +664,7 @@ class Bucket(base.EnsurableAWSBaseActor):
             prefix: Target S3 bucket prefix
         """
         target_str = 's3://%s/%s' % (target, prefix.lstrip('/'))
-        self.log.info('Updating Bucket logging config to %s' % target_str)
+        self.log.info('Updating Bucket logging config to %s', target_str)
 
         try:
             yield self.thread(
@@ -709,7 +710,7 @@ class Bucket(base.EnsurableAWSBaseActor):
     @gen.coroutine
     @dry('Bucket versioning would set to: {0}')
     def _put_versioning(self, state):
-        self.log.info('Setting bucket object versioning to: %s' % state)
+        self.log.info('Setting bucket object versioning to: %s', state)
         yield self.thread(
             self.s3_conn.put_bucket_versioning,
             Bucket=self.option('name'),
@@ -752,7 +753,7 @@ class Bucket(base.EnsurableAWSBaseActor):
 
         self.log.info('Lifecycle configurations do not match. Updating.')
         for line in diff.split('\n'):
-            self.log.info('Diff: %s' % line)
+            self.log.info('Diff: %s', line)
         raise gen.Return(False)
 
     @gen.coroutine
@@ -773,7 +774,7 @@ class Bucket(base.EnsurableAWSBaseActor):
     @gen.coroutine
     @dry('Would have pushed a new lifecycle configuration')
     def _push_lifecycle(self):
-        self.log.debug('Lifecycle config: %s' %
+        self.log.debug('Lifecycle config: %s',
                        jsonpickle.encode(self.lifecycle))
 
         self.log.info('Updating the Bucket Lifecycle config')
@@ -829,7 +830,7 @@ class Bucket(base.EnsurableAWSBaseActor):
 
         self.log.info('Bucket tags differs from Amazons:')
         for line in diff.split('\n'):
-            self.log.info('Diff: %s' % line)
+            self.log.info('Diff: %s', line)
 
         raise gen.Return(False)
 
@@ -24,6 +24,8 @@ import os
 
 import boto
 
+from kingpin.actors.support import breaker
+
 __author__ = 'Mikhail Simin <mikhail@nextdoor.com>'
 
 # By default, this means that Boto will make HTTP calls at instantiation time
@@ -34,8 +36,20 @@ __author__ = 'Mikhail Simin <mikhail@nextdoor.com>'
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID', None)
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY', None)
 
+# If set, every AWS API call is sent to this URL instead of to Amazon. Used to
+# point Kingpin at a local stand-in (see kingpin.bench.fakecloud).
+ENDPOINT_URL = os.getenv('AWS_ENDPOINT_URL', None)
+
 SQS_RETRY_DELAY = 30
 
+# If set, a handful of hot read-only API calls (describe_stacks,
+# describe_services, describe_tasks, describe_instance_health and SQS
+# get_queue_attributes) are made through the natively asynchronous
+# kingpin.actors.aws.api.AsyncClient instead of through Boto on a thread.
+ASYNC_TRANSPORT = bool(os.getenv('AWS_ASYNC_TRANSPORT', False))
+ASYNC_RETRY_ATTEMPTS = 5
+ASYNC_RETRY_DELAY = 0.25
+
 ECS_RETRY_ATTEMPTS = 3
 ECS_RETRY_DELAY = 5
 
@@ -65,10 +79,20 @@ def is_retriable_exception(exception):
     return any([c in error_code for c in retry_codes])
 
 
+def should_retry(exception):
+    """Return true if a failed AWS call should be retried.
+
+    Only transient failures are retried, and only as long as the run-wide
+    retry budget (see `kingpin.actors.support.breaker`) lasts.
+    """
+    return (is_retriable_exception(exception) and
+            breaker.get_budget().withdraw())
+
+
 RETRYING_SETTINGS = {
-    # Verify if we need to retry with the is_retriable_exception
-    # method described above.
-    'retry_on_exception': is_retriable_exception,
+    # Verify if we need to retry with the should_retry method described
+    # above.
+    'retry_on_exception': should_retry,
 
     # Wait up to 10 times
     'stop_max_attempt_number': 10,
@@ -60,6 +60,66 @@ class QueueDeletionFailed(exceptions.RecoverableActorFailure):
     """
 
 
+# The most queues that a single ListQueues call returns.
+MAX_LIST_QUEUES = 1000
+
+# Regex characters that end the literal prefix of a pattern.
+_REGEX_SPECIAL = set('.^$*+?{}[]\\|()')
+
+
+def _top_level_alternation(pattern):
+    """Whether a pattern has a ``|`` outside of any group or set."""
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            # Skip the escaped character
+            index += 1
+        elif char == '[':
+            # Skip the set. A ] right at its start is a literal one.
+            index += 1
+            if pattern[index:index + 1] == '^':
+                index += 1
+            if pattern[index:index + 1] == ']':
+                index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                index += 2 if pattern[index] == '\\' else 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        index += 1
+    return False
+
+
+def _literal_prefix(pattern):
+    """Returns the literal prefix of the queue names a pattern can match.
+
+    Only patterns anchored with ``^`` (and without any top-level ``|``
+    alternatives) have one, e.g. ``^release-(a|b)`` -> ``release-``, but
+    ``^release-a|^release-b`` -> ``''``. Anything without one gets an empty
+    prefix, which matches all queues.
+
+    Args:
+        pattern: string - regex used in `re.search()`
+    """
+    if not pattern.startswith('^') or _top_level_alternation(pattern):
+        return ''
+
+    prefix = ''
+    for char in pattern[1:]:
+        if char in _REGEX_SPECIAL:
+            # These make the character before them optional
+            if char in '*?{':
+                prefix = prefix[:-1]
+            break
+        prefix += char
+    return prefix
+
+
 class SQSBaseActor(base.AWSBaseActor):
 
     # This actor should not be instantiated, but unit testing requires that
@@ -84,7 +144,18 @@ class SQSBaseActor(base.AWSBaseActor):
         Returns:
             Array of matched queues, even if empty.
         """
-        queues = yield self.thread(self.sqs_conn.get_all_queues)
+        # ListQueues is not paginated, and returns at most 1000 queues. It
+        # can filter by a name prefix though, so whatever literal prefix the
+        # pattern has is handed to it to narrow the list down.
+        prefix = _literal_prefix(pattern)
+        queues = yield self.thread(self.sqs_conn.get_all_queues,
+                                   prefix=prefix)
+        if len(queues) >= MAX_LIST_QUEUES:
+            self.log.warning(
+                'SQS listed %s queues (its maximum) for prefix "%s", so some '
+                'queues matching "%s" may have been missed.',
+                len(queues), prefix, pattern)
+
         match_queues = [q for q in queues if re.search(pattern, q.name)]
         raise gen.Return(match_queues)
 
@@ -138,13 +209,13 @@ class Create(SQSBaseActor):
             An SQS Queue Object
         """
         if not self._dry:
-            self.log.info('Creating a new queue: %s' % name)
+            self.log.info('Creating a new queue: %s', name)
             new_queue = yield self.thread(self.sqs_conn.create_queue, name)
         else:
-            self.log.info('Would create a new queue: %s' % name)
+            self.log.info('Would create a new queue: %s', name)
             new_queue = mock.Mock(name=name)
 
-        self.log.debug('Returning queue object: %s' % new_queue)
+        self.log.debug('Returning queue object: %s', new_queue)
         raise gen.Return(new_queue)
 
     @gen.coroutine
@@ -157,9 +228,9 @@ class Create(SQSBaseActor):
         q = yield self._create_queue(name=self.option('name'))
 
         if q.__class__ == boto.sqs.queue.Queue:
-            self.log.info('Queue Created: %s' % q.url)
+            self.log.info('Queue Created: %s', q.url)
         elif self._dry:
-            self.log.info('Fake Queue: %s' % q)
+            self.log.info('Fake Queue: %s', q)
         else:
             raise exceptions.UnrecoverableActorFailure(
                 'All hell broke loose: %s' % q)
@@ -233,7 +304,7 @@ class Delete(SQSBaseActor):
         Raises:
           QueueDeletionFailed if queue deletion failed.
         """
-        self.log.info('Deleting Queue: %s...' % queue.url)
+        self.log.info('Deleting Queue: %s...', queue.url)
         ok = yield self.thread(self.sqs_conn.delete_queue, queue)
 
         # Raise an exception if the tasks failed
@@ -261,7 +332,7 @@ class Delete(SQSBaseActor):
             raise QueueNotFound(
                 'No queues with pattern "%s" found.' % pattern)
 
-        self.log.info('Deleting SQS Queues: %s' % matched_queues)
+        self.log.info('Deleting SQS Queues: %s', matched_queues)
 
         tasks = []
         for q in matched_queues:
@@ -319,6 +390,31 @@ class WaitUntilEmpty(SQSBaseActor):
         'required': (bool, False, 'At least 1 queue must be found.')
     }
 
+    @gen.coroutine
+    def _count(self, queue):
+        """Returns the number of visible and invisible messages in a queue.
+
+        Args:
+            queue: AWS SQS Queue object
+
+        Returns:
+            Integer count of messages
+        """
+        attr = 'ApproximateNumberOfMessagesNotVisible'
+
+        # The async transport can fetch both attributes in a single call
+        if self.async_transport:
+            ret = yield self.api_call(
+                'sqs', 'get_queue_attributes', QueueUrl=queue.url,
+                AttributeNames=['ApproximateNumberOfMessages', attr])
+            attrs = ret.get('Attributes', {})
+            raise gen.Return(int(attrs.get('ApproximateNumberOfMessages', 0)) +
+                             int(attrs.get(attr, 0)))
+
+        visible = yield self.thread(queue.count)
+        invisible = yield self.thread(queue.get_attributes, attr)
+        raise gen.Return(visible + int(invisible[attr]))
+
     @gen.coroutine
     def _wait(self, queue, sleep=3):
         """Sleeps until an SQS Queue has emptied out.
@@ -334,19 +430,15 @@ class WaitUntilEmpty(SQSBaseActor):
         count = 0
         while True:
             if not self._dry:
-                self.log.debug('Counting %s' % queue.url)
-                visible = yield self.thread(queue.count)
-                attr = 'ApproximateNumberOfMessagesNotVisible'
-                invisible = yield self.thread(queue.get_attributes, attr)
-                invisible_int = int(invisible[attr])
-                count = visible + invisible_int
+                self.log.debug('Counting %s', queue.url)
+                count = yield self._count(queue)
             else:
-                self.log.info('Pretending that count is 0 for %s' % queue.url)
+                self.log.info('Pretending that count is 0 for %s', queue.url)
                 count = 0
 
-            self.log.debug('Queue has %s messages in it.' % count)
+            self.log.debug('Queue has %s messages in it.', count)
             if count > 0:
-                self.log.info('Waiting on %s to become empty...' % queue.name)
+                self.log.info('Waiting on %s to become empty...', queue.name)
                 yield utils.tornado_sleep(sleep)
             else:
                 self.log.debug('Queue is empty!')
@@ -368,14 +460,14 @@ class WaitUntilEmpty(SQSBaseActor):
             raise QueueNotFound(
                 'No queues like "%s" were found!' % pattern)
 
-        self.log.info('Waiting for "%s" queues to become empty.' %
+        self.log.info('Waiting for "%s" queues to become empty.',
                       self.option('name'))
 
         sleepers = []
         for q in matched_queues:
             sleepers.append(self._wait(queue=q))
 
-        self.log.info('%s queues need to be empty.' % len(matched_queues))
+        self.log.info('%s queues need to be empty.', len(matched_queues))
         self.log.info([q.name for q in matched_queues])
         yield sleepers
         self.log.info('All queues report empty.')
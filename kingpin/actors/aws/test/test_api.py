@@ -0,0 +1,154 @@
+import json
+import logging
+import urlparse
+
+from botocore.exceptions import ClientError
+from tornado import testing
+from tornado import web
+
+from kingpin.actors import exceptions
+from kingpin.actors.aws import api
+from kingpin.actors.aws import settings
+
+log = logging.getLogger(__name__)
+
+
+STACKS_XML = """<DescribeStacksResponse>
+  <DescribeStacksResult>
+    <Stacks>
+      <member>
+        <StackName>unit-test</StackName>
+        <StackStatus>CREATE_COMPLETE</StackStatus>
+      </member>
+    </Stacks>
+  </DescribeStacksResult>
+</DescribeStacksResponse>"""
+
+THROTTLED_XML = """<ErrorResponse>
+  <Error>
+    <Type>Sender</Type>
+    <Code>Throttling</Code>
+    <Message>Rate exceeded</Message>
+  </Error>
+</ErrorResponse>"""
+
+MISSING_XML = """<ErrorResponse>
+  <Error>
+    <Type>Sender</Type>
+    <Code>ValidationError</Code>
+    <Message>Stack with id unit-test does not exist</Message>
+  </Error>
+</ErrorResponse>"""
+
+
+class StubHandler(web.RequestHandler):
+
+    """Fake AWS endpoint that returns pre-canned responses in order."""
+
+    def initialize(self, responses, requests):
+        self.responses = responses
+        self.requests = requests
+
+    def post(self):
+        self.requests.append(self.request)
+        code, body = self.responses.pop(0)
+        self.set_status(code)
+        self.write(body)
+
+
+class TestAsyncClient(testing.AsyncHTTPTestCase):
+
+    def setUp(self):
+        self.responses = []
+        self.requests = []
+        super(TestAsyncClient, self).setUp()
+        settings.ASYNC_RETRY_DELAY = 0
+
+    def get_app(self):
+        return web.Application([
+            ('/', StubHandler,
+             {'responses': self.responses, 'requests': self.requests})])
+
+    def _client(self, service):
+        return api.AsyncClient(
+            service, 'us-east-1', key='unit-test', secret='unit-test',
+            endpoint_url=self.get_url('/'), http_client=self.http_client)
+
+    @testing.gen_test
+    def test_query_protocol(self):
+        self.responses.append((200, STACKS_XML))
+        client = self._client('cloudformation')
+
+        ret = yield client.call('describe_stacks', StackName='unit-test')
+
+        self.assertEquals(ret['Stacks'][0]['StackName'], 'unit-test')
+        req = self.requests[0]
+        self.assertIn('AWS4-HMAC-SHA256', req.headers['Authorization'])
+        body = urlparse.parse_qs(req.body)
+        self.assertEquals(body['Action'], ['DescribeStacks'])
+        self.assertEquals(body['StackName'], ['unit-test'])
+
+    @testing.gen_test
+    def test_json_protocol(self):
+        self.responses.append(
+            (200, json.dumps({'services': [{'serviceName': 'svc'}],
+                              'failures': []})))
+        client = self._client('ecs')
+
+        ret = yield client.call('describe_services',
+                                cluster='c', services=['svc'])
+
+        self.assertEquals(ret['services'][0]['serviceName'], 'svc')
+        self.assertEquals(ret['failures'], [])
+        req = self.requests[0]
+        self.assertIn('DescribeServices', req.headers['X-Amz-Target'])
+        self.assertEquals(json.loads(req.body),
+                          {'cluster': 'c', 'services': ['svc']})
+
+    @testing.gen_test
+    def test_throttling_is_retried(self):
+        self.responses.append((400, THROTTLED_XML))
+        self.responses.append((503, ''))
+        self.responses.append((200, STACKS_XML))
+        client = self._client('cloudformation')
+
+        ret = yield client.call('describe_stacks', StackName='unit-test')
+
+        self.assertEquals(ret['Stacks'][0]['StackName'], 'unit-test')
+        self.assertEquals(len(self.requests), 3)
+
+    @testing.gen_test
+    def test_throttling_gives_up(self):
+        settings.ASYNC_RETRY_ATTEMPTS = 2
+        self.responses.append((400, THROTTLED_XML))
+        self.responses.append((400, THROTTLED_XML))
+        client = self._client('cloudformation')
+
+        with self.assertRaises(ClientError):
+            yield client.call('describe_stacks', StackName='unit-test')
+        self.assertEquals(len(self.requests), 2)
+        settings.ASYNC_RETRY_ATTEMPTS = 5
+
+    @testing.gen_test
+    def test_client_error(self):
+        self.responses.append((400, MISSING_XML))
+        client = self._client('cloudformation')
+
+        with self.assertRaises(ClientError) as e:
+            yield client.call('describe_stacks', StackName='unit-test')
+
+        self.assertIn('does not exist', e.exception.message)
+        self.assertEquals(len(self.requests), 1)
+
+    @testing.gen_test
+    def test_bad_method(self):
+        client = self._client('cloudformation')
+        with self.assertRaises(exceptions.UnrecoverableActorFailure):
+            yield client.call('not_a_method')
+
+    def test_get_client_is_shared(self):
+        c1 = api.get_client('ecs', 'us-east-1', 'unit-test', 'unit-test')
+        c2 = api.get_client('ecs', 'us-east-1', 'unit-test', 'unit-test')
+        c3 = api.get_client('ecs', 'us-west-2', 'unit-test', 'unit-test')
+        self.assertIs(c1, c2)
+        self.assertIsNot(c1, c3)
@@ -1,14 +1,20 @@
 import logging
+import socket
 
 from boto.exception import NoAuthHandlerFound
 from boto.exception import BotoServerError
 from boto import utils
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+from botocore.exceptions import NoCredentialsError
+from botocore.exceptions import ParamValidationError
 from tornado import testing
 import mock
 
 from kingpin.actors import exceptions
 from kingpin.actors.aws import base
 from kingpin.actors.aws import settings
+from kingpin.actors.support import breaker
 
 log = logging.getLogger(__name__)
 
@@ -37,6 +43,19 @@ class TestBase(testing.AsyncTestCase):
                                   {'region': 'us-west-1d'})
         self.assertEquals(actor.ec2_conn.region.name, 'us-west-1')
 
+    def test_endpoint_url(self):
+        with mock.patch.object(settings, 'ENDPOINT_URL',
+                               'http://127.0.0.1:8700'):
+            actor = base.AWSBaseActor('Unit Test Action',
+                                      {'region': 'us-west-2'})
+        self.assertEquals(actor.sqs_conn.host, '127.0.0.1')
+        self.assertEquals(actor.sqs_conn.port, 8700)
+        self.assertFalse(actor.sqs_conn.is_secure)
+        self.assertEquals(actor.iam_conn.host, '127.0.0.1')
+        self.assertEquals(actor.s3_conn.meta.endpoint_url,
+                          'http://127.0.0.1:8700')
+        self.assertEquals(actor.s3_conn.meta.region_name, 'us-west-2')
+
     @testing.gen_test
     def test_thread_400(self):
         actor = base.AWSBaseActor('Unit Test Action', {})
@@ -59,6 +78,83 @@ class TestBase(testing.AsyncTestCase):
         with self.assertRaises(exceptions.InvalidCredentials):
             yield actor._find_elb('')
 
+    @testing.gen_test
+    def test_thread_opens_the_breaker_of_the_operation(self):
+        self.addCleanup(breaker.reset)
+        actor = base.AWSBaseActor('Unit Test Action', {})
+        calls = []
+
+        def describe_things():
+            calls.append(1)
+            raise BotoServerError(503, 'Service Unavailable')
+
+        with mock.patch.object(breaker, 'BREAKER_THRESHOLD', 2):
+            for _ in xrange(2):
+                with self.assertRaises(BotoServerError):
+                    yield actor.thread(describe_things)
+
+            with self.assertRaises(exceptions.CircuitOpen):
+                yield actor.thread(describe_things)
+        self.assertEquals(len(calls), 2)
+
+    @testing.gen_test
+    def test_thread_client_errors_keep_the_breaker_closed(self):
+        self.addCleanup(breaker.reset)
+        actor = base.AWSBaseActor('Unit Test Action', {})
+
+        def describe_things():
+            raise BotoServerError(404, 'Not Found')
+
+        with mock.patch.object(breaker, 'BREAKER_THRESHOLD', 1):
+            for _ in xrange(3):
+                with self.assertRaises(BotoServerError):
+                    yield actor.thread(describe_things)
+
+    def test_is_outage(self):
+        self.assertTrue(base._is_outage(BotoServerError(503, 'Unavailable')))
+        self.assertFalse(base._is_outage(BotoServerError(404, 'Not Found')))
+        self.assertTrue(base._is_outage(ClientError(
+            {'Error': {'Code': 'Throttling'}}, 'DescribeStacks')))
+        self.assertTrue(base._is_outage(ClientError(
+            {'ResponseMetadata': {'HTTPStatusCode': 500}}, 'DescribeStacks')))
+        self.assertFalse(base._is_outage(ClientError(
+            {'Error': {'Code': 'ValidationError'}}, 'DescribeStacks')))
+        self.assertTrue(base._is_outage(
+            EndpointConnectionError(endpoint_url='https://aws')))
+        self.assertTrue(base._is_outage(socket.error(111, 'refused')))
+
+        # Errors raised before anything was sent to AWS
+        self.assertFalse(base._is_outage(NoCredentialsError()))
+        self.assertFalse(base._is_outage(
+            ParamValidationError(report='bad')))
+        self.assertFalse(base._is_outage(TypeError('bug')))
+
+    @testing.gen_test
+    def test_thread_local_errors_keep_the_breaker_closed(self):
+        self.addCleanup(breaker.reset)
+        actor = base.AWSBaseActor('Unit Test Action', {})
+
+        def describe_things(name):
+            raise ParamValidationError(report='bad name')
+
+        with mock.patch.object(breaker, 'BREAKER_THRESHOLD', 1):
+            for _ in xrange(3):
+                with self.assertRaises(ParamValidationError):
+                    yield actor.thread(describe_things, 1)
+
+    def test_should_retry_spends_the_budget(self):
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        exc = BotoServerError(400, 'Rate exceeded')
+        exc.error_code = 'Throttling'
+
+        with mock.patch.object(breaker, 'RETRY_BUDGET_MIN', 1):
+            with mock.patch.object(breaker, 'RETRY_BUDGET', 0):
+                breaker.get_budget().attempt()
+                self.assertTrue(settings.should_retry(exc))
+                self.assertFalse(settings.should_retry(exc))
+        self.assertFalse(settings.should_retry(Exception('Not AWS')))
+
     @testing.gen_test
     def test_find_elb(self):
         actor = base.AWSBaseActor('Unit Test Action', {})
@@ -149,6 +149,20 @@ class TestCloudFormationBaseActor(testing.AsyncTestCase):
         ret = yield self.actor._get_stack('s1')
         self.assertEquals(ret['StackName'], 's1')
 
+    @testing.gen_test
+    def test_get_stack_async_transport(self):
+        self.actor.api_call = mock.MagicMock(name='api_call')
+        self.actor.api_call.return_value = tornado_value({
+            'Stacks': [create_fake_stack('s1', 'UPDATE_COMPLETE')]})
+
+        with mock.patch.object(settings, 'ASYNC_TRANSPORT', True):
+            ret = yield self.actor._get_stack('s1')
+
+        self.assertEquals(ret['StackName'], 's1')
+        self.actor.api_call.assert_called_with(
+            'cloudformation', 'describe_stacks', StackName='s1')
+        self.assertFalse(self.actor.cf3_conn.describe_stacks.called)
+
     @testing.gen_test
     def test_get_stack_not_found(self):
         fake_exc = {
@@ -768,6 +768,25 @@ class TestDescribeService(testing.AsyncTestCase):
         result = yield self.actor._describe_service(service_name)
         self.assertEqual(result, service_name)
 
+    @testing.gen_test
+    def test_one_service_async_transport(self):
+        service_name = 'service_name'
+        self.actor._region = 'us-east-1'
+        self.actor.api_call = mock.MagicMock(name='api_call')
+        self.actor.api_call.return_value = helper.tornado_value({
+            'failures': [],
+            'services': [service_name]})
+
+        with mock.patch.object(settings, 'ASYNC_TRANSPORT', True):
+            result = yield self.actor._describe_service(service_name)
+
+        self.assertEqual(result, service_name)
+        self.actor.api_call.assert_called_with(
+            'ecs', 'describe_services',
+            cluster=self.actor.option('cluster'),
+            services=[service_name])
+        self.assertFalse(self.actor.ecs_conn.describe_services.called)
+
     @testing.gen_test
     def test_multiple_services_only_one(self):
         service_name1 = 'service_name1'
@@ -1,6 +1,7 @@
 import logging
 
 from boto.exception import BotoServerError
+from boto.resultset import ResultSet
 from tornado import testing
 import mock
 
@@ -224,6 +225,35 @@ class TestDeregisterInstance(testing.AsyncTestCase):
 
         self.assertEquals(ret, [fake_elb_2])
 
+    @testing.gen_test
+    def test_find_instance_elbs_paginated(self):
+        act = elb_actor.DeregisterInstance('UTA', {
+            'elb': '*',
+            'region': 'us-east-1',
+            'instances': 'i-test'})
+
+        fake_instance = mock.Mock(name='i-test')
+        fake_instance.id = 'i-test'
+        fake_elb_1 = mock.Mock(name='elb_1')
+        fake_elb_1.instances = [fake_instance]
+        fake_elb_2 = mock.Mock(name='elb_2')
+        fake_elb_2.instances = []
+
+        page_1 = ResultSet()
+        page_1.extend([fake_elb_1, fake_elb_2])
+        page_1.next_marker = 'next'
+        page_2 = ResultSet()
+        page_2.extend([fake_elb_1])
+
+        act.elb_conn.get_all_load_balancers = mock.Mock(
+            side_effect=[page_1, page_2])
+
+        ret = yield act._find_instance_elbs(['i-test'])
+
+        self.assertEquals(ret, [fake_elb_1, fake_elb_1])
+        self.assertEquals(act.elb_conn.get_all_load_balancers.mock_calls,
+                          [mock.call(), mock.call(marker='next')])
+
     @testing.gen_test
     def test_execute_self(self):
         # No instance id specified
@@ -363,6 +393,32 @@ class TestWaitUntilHealthy(testing.AsyncTestCase):
 
         self.assertTrue(val)
 
+    @testing.gen_test
+    def test_is_healthy_async_transport(self):
+        actor = elb_actor.WaitUntilHealthy(
+            'Unit Test Action', {'name': 'unit-test-queue',
+                                 'region': 'us-west-2',
+                                 'count': '50%'})
+
+        elb = mock.Mock()
+        elb.name = 'unit-test-elb'
+        actor.api_call = mock.MagicMock(name='api_call')
+        actor.api_call.return_value = helper.tornado_value({
+            'InstanceStates': [
+                {'State': 'InService'},
+                {'State': 'OutOfService'},
+                {'State': 'OutOfService'},
+            ]})
+
+        with mock.patch.object(settings, 'ASYNC_TRANSPORT', True):
+            val = yield actor._is_healthy(elb, '50%')
+
+        self.assertFalse(val)
+        actor.api_call.assert_called_with(
+            'elb', 'describe_instance_health',
+            LoadBalancerName='unit-test-elb')
+        self.assertFalse(elb.get_instance_health.called)
+
 
 class TestSetCert(testing.AsyncTestCase):
 
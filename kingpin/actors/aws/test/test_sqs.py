@@ -8,7 +8,7 @@ import mock
 from kingpin.actors import exceptions
 from kingpin.actors.aws import settings
 from kingpin.actors.aws import sqs
-from kingpin.actors.test.helper import mock_tornado
+from kingpin.actors.test.helper import mock_tornado, tornado_value
 
 log = logging.getLogger(__name__)
 
@@ -48,6 +48,42 @@ class TestSQSBaseActor(SQSTestCase):
         results = yield actor._fetch_queues('match')
 
         self.assertEquals(results, [all_queues[2], all_queues[3]])
+        self.sqs_conn().get_all_queues.assert_called_with(prefix='')
+
+    @testing.gen_test
+    def test_fetch_prefix(self):
+        queue = mock.Mock()
+        queue.name = 'release-1'
+        self.sqs_conn().get_all_queues.return_value = [queue] * 1000
+
+        actor = sqs.SQSBaseActor('Unit Test Action', {
+            'name': 'unit-test-queue',
+            'region': 'us-east-1'})
+
+        with mock.patch.object(actor.log, 'warning') as warning:
+            results = yield actor._fetch_queues('^release-\\d+$')
+
+        self.assertEquals(len(results), 1000)
+        self.sqs_conn().get_all_queues.assert_called_with(prefix='release-')
+        self.assertTrue(warning.called)
+
+    def test_literal_prefix(self):
+        self.assertEquals(sqs._literal_prefix('release'), '')
+        self.assertEquals(sqs._literal_prefix('^release$'), 'release')
+        self.assertEquals(sqs._literal_prefix('^release-(a|b)'), 'release-')
+        self.assertEquals(sqs._literal_prefix('^release-a|^release-b'), '')
+        self.assertEquals(sqs._literal_prefix('^release-a|b'), '')
+        self.assertEquals(sqs._literal_prefix('^release-[|]a|b'), '')
+        self.assertEquals(sqs._literal_prefix('^release-[|)]'), 'release-')
+        self.assertEquals(sqs._literal_prefix('^release-[]|]'), 'release-')
+        self.assertEquals(sqs._literal_prefix(r'^release-\(a|b'), '')
+        self.assertEquals(sqs._literal_prefix(r'^release-(\)|b)'), 'release-')
+        self.assertEquals(sqs._literal_prefix('^release-(a)'), 'release-')
+        self.assertEquals(sqs._literal_prefix('^releases?'), 'release')
+        self.assertEquals(sqs._literal_prefix('^releases*'), 'release')
+        self.assertEquals(sqs._literal_prefix('^releases{0,1}'), 'release')
+        self.assertEquals(sqs._literal_prefix('^releases+'), 'releases')
+        self.assertEquals(sqs._literal_prefix('^release.'), 'release')
 
 
 class TestCreateSQSQueueActor(SQSTestCase):
@@ -200,6 +236,32 @@ class TestWaitUntilQueueEmptyActor(SQSTestCase):
         yield actor._wait(queue, sleep=0)
         self.assertEqual(queue.count.call_count, 3)
 
+    @testing.gen_test
+    def test_wait_async_transport(self):
+        actor = sqs.WaitUntilEmpty('UTA!',
+                                   {'name': 'unit-test-queue',
+                                    'region': 'us-west-2'})
+        queue = mock.Mock()
+        queue.url = 'https://unit-test-queue'
+        actor.api_call = mock.MagicMock(name='api_call')
+        actor.api_call.side_effect = [
+            tornado_value({'Attributes': {
+                'ApproximateNumberOfMessages': '1',
+                'ApproximateNumberOfMessagesNotVisible': '0'}}),
+            tornado_value({'Attributes': {
+                'ApproximateNumberOfMessages': '0',
+                'ApproximateNumberOfMessagesNotVisible': '0'}})]
+
+        with mock.patch.object(settings, 'ASYNC_TRANSPORT', True):
+            yield actor._wait(queue, sleep=0)
+
+        self.assertEqual(actor.api_call.call_count, 2)
+        actor.api_call.assert_called_with(
+            'sqs', 'get_queue_attributes', QueueUrl='https://unit-test-queue',
+            AttributeNames=['ApproximateNumberOfMessages',
+                            'ApproximateNumberOfMessagesNotVisible'])
+        self.assertFalse(queue.count.called)
+
     @testing.gen_test
     def test_wait_dry(self):
         actor = sqs.WaitUntilEmpty('UTA!',
@@ -44,6 +44,9 @@ from tornado import httputil
 
 from kingpin import utils
 from kingpin.actors import exceptions
+from kingpin.actors.support import history
+from kingpin.actors.support import incremental
+from kingpin.actors.support import plan
 from kingpin.actors.utils import timer
 from kingpin.constants import REQUIRED, STATE
 
@@ -63,6 +66,41 @@ if os.getenv('URLLIB_DEBUG', None):
 # environment variable
 DEFAULT_TIMEOUT = os.getenv('DEFAULT_TIMEOUT', 3600)
 
+# The ways in which the execution of an actor can end (see ActorRecord)
+SUCCEEDED = 'succeeded'
+WARNED = 'warned'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class _PrefixFilter(logging.Filter):
+
+    """Puts the actor prefix in front of the formatted log message.
+
+    Actors pass their arguments to the logger rather than formatting the
+    message themselves, so messages that are never emitted are never
+    formatted. The prefix can not simply be glued onto the format string
+    though: an actor description with a `%` in it would then break the
+    formatting. Instead, the message is formatted first and the prefix is
+    added to the result.
+    """
+
+    def filter(self, record):
+        prefix = getattr(record, 'actor_prefix', None)
+        if prefix is None:
+            return True
+
+        try:
+            record.msg = prefix + record.getMessage()
+            record.args = ()
+        except Exception:
+            # Leave the broken message for the handler to report as usual
+            record.msg = '%s%s' % (prefix.replace('%', '%%'), record.msg)
+        return True
+
+
+_PREFIXER = _PrefixFilter()
+
 
 class LogAdapter(logging.LoggerAdapter):
 
@@ -70,11 +108,131 @@ class LogAdapter(logging.LoggerAdapter):
 
     Provides a common logging format for actors that uses the actors
     description and dry parameter as a prefix to the supplied log message.
+
+    Rendering the actors description can be expensive (see
+    BaseActor.__repr__), so the prefix is built once and cached. Call
+    reset() if the description may have changed. The prefix is added once the
+    message has been formatted (see _PrefixFilter).
+
+    The actor description is also attached to every record as `actor`, for
+    the benefit of structured log formatters (see kingpin.utils.JSONFormatter).
     """
 
+    def __init__(self, logger, extra):
+        logging.LoggerAdapter.__init__(self, logger, extra)
+        logger.addFilter(_PREFIXER)
+        self.reset()
+
+    def reset(self):
+        """Throws away the cached log prefix."""
+        self._record_extra = None
+
     def process(self, msg, kwargs):
-        return ('[%s%s] %s' % (self.extra['dry'], self.extra['desc'], msg),
-                kwargs)
+        if self._record_extra is None:
+            desc = str(self.extra['desc'])
+            self._record_extra = {
+                'actor': desc,
+                'actor_prefix': '[%s%s] ' % (self.extra['dry'], desc)}
+
+        kwargs.setdefault('extra', self._record_extra)
+        return (msg, kwargs)
+
+
+class ActorRecord(object):
+
+    """A compact record of an actor that has finished executing.
+
+    Group actors hold on to all of their acts for as long as they run, and an
+    executed actor may hold on to a lot: its options, parsed templates and
+    policies, API clients and their responses. Once an act is done, its group
+    swaps it for one of these, which only remembers what the actor was and how
+    its execution went. Records can still be drawn in an orgchart.
+
+    Args:
+        actor: The `BaseActor` to record
+
+    Attributes:
+        id: The id() of the actor, as used in its orgchart
+        desc: The actor description
+        type: The actor class (ie, 'kingpin.actors.misc.Sleep')
+        started: Time the execution began (or None if it never did)
+        finished: Time the execution ended (or None)
+        outcome: SUCCEEDED, WARNED, FAILED, SKIPPED or None if it never ran
+        error: The error message of a failed (or warned) execution
+        children: Records of any acts run by the actor
+    """
+
+    __slots__ = ('id', 'desc', 'type', 'started', 'finished', 'outcome',
+                 'error', 'children')
+
+    def __init__(self, actor):
+        self.id = str(id(actor))
+        self.desc = actor._desc
+        self.type = actor._type
+        self.started = actor._started
+        self.finished = actor._finished
+        self.outcome = actor._outcome
+        self.error = actor._error
+        self.children = [child.compact() for child in actor._get_children()]
+
+    def __repr__(self):
+        return self.desc
+
+    @property
+    def duration(self):
+        """Seconds the execution took, or None."""
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def compact(self):
+        return self
+
+    def _get_children(self):
+        return self.children
+
+    def _orgchart_entry(self, parent, timings=False):
+        entry = {
+            'id': self.id,
+            'desc': self.desc,
+            'class': self.type.rsplit('.', 1)[-1],
+            'parent_id': parent,
+        }
+        if timings:
+            entry.update(_timings(self.started, self.finished, self.outcome))
+        return entry
+
+    def iter_orgchart(self, parent='', timings=False):
+        """Same as `BaseActor.iter_orgchart()`."""
+        return _walk_orgchart(self, parent, timings)
+
+    def get_orgchart(self, parent=''):
+        """Same as `BaseActor.get_orgchart()`."""
+        return list(self.iter_orgchart(parent=parent))
+
+
+def _timings(started, finished, outcome):
+    duration = None
+    if started is not None and finished is not None:
+        duration = round(finished - started, 3)
+    return {'started': started, 'duration': duration, 'outcome': outcome}
+
+
+def _walk_orgchart(actor, parent, timings):
+    """Yields the orgchart entries of an actor, and all of its children.
+
+    The tree is walked depth-first with a stack rather than by recursion, so
+    that even very deep or very wide scripts are walked in linear time.
+    """
+    stack = [(actor, parent)]
+    while stack:
+        node, parent = stack.pop()
+        entry = node._orgchart_entry(parent, timings)
+        yield entry
+
+        # Reversed, so that the children come off of the stack in order
+        children = node._get_children()
+        stack.extend((child, entry['id']) for child in reversed(children))
 
 
 class BaseActor(object):
@@ -131,7 +289,8 @@ class BaseActor(object):
                 This is usually driven by the group.Sync/Async actors.
             init_tokens: (Dict) Key/Value pairs passed into the actor that can
             be used for token replacement. Typically this is os.environ() plus
-            some custom tokens. Set generally by the misc.Macro actor.
+            some custom tokens. Set generally by the misc.Macro actor, and
+            stored as a read-only `kingpin.utils.TokenScope`.
             timeout: (Str/Int/Float) Timeout in seconds for the actor.
         """
         self._type = '%s.%s' % (self.__module__, self.__class__.__name__)
@@ -141,7 +300,16 @@ class BaseActor(object):
         self._warn_on_failure = warn_on_failure
         self._condition = condition
         self._init_context = init_context
-        self._init_tokens = init_tokens
+        self._init_tokens = utils.TokenScope.wrap(init_tokens)
+
+        # Filled in by execute(), for our ActorRecord
+        self._started = None
+        self._finished = None
+        self._outcome = None
+        self._error = None
+
+        # Key of our durations in the run's history (see support.history)
+        self._history_key = None
 
         self._timeout = timeout
         if timeout is None:
@@ -155,11 +323,12 @@ class BaseActor(object):
         self._setup_log()
         self._setup_defaults()
         self._validate_options()  # Relies on _setup_log() above
+        self._prepare()
 
         # Fill in any options with the supplied initialization context. Be
         self.log.debug('Initialized (warn_on_failure=%s, '
-                       'strict_init_context=%s)' %
-                       (warn_on_failure, self.strict_init_context))
+                       'strict_init_context=%s)',
+                       warn_on_failure, self.strict_init_context)
 
     def __repr__(self):
         """Returns a nice name/description of the actor.
@@ -210,7 +379,7 @@ class BaseActor(object):
                     for (opt_name, definition) in self.all_options.items()
                     if definition[1] is REQUIRED]
 
-        self.log.debug('Checking for required options: %s' % required)
+        self.log.debug('Checking for required options: %s', required)
         option_errors = []
         option_warnings = []
         for opt in required:
@@ -305,8 +474,8 @@ class BaseActor(object):
         """
 
         # Get our timeout setting, or fallback to the default
-        self.log.debug('%s.%s() deadline: %s(s)' %
-                       (self._type, f.__name__, self._timeout))
+        self.log.debug('%s.%s() deadline: %s(s)',
+                       self._type, f.__name__, self._timeout)
 
         # Get our Future object but don't yield on it yet, This starts the
         # execution, but allows us to wrap it below with the
@@ -369,8 +538,8 @@ class BaseActor(object):
         """
 
         check = self.str2bool(self._condition)
-        self.log.debug('Condition %s evaluates to %s' % (
-            self._condition, check))
+        self.log.debug('Condition %s evaluates to %s',
+                       self._condition, check)
         return check
 
     def _fill_in_contexts(self, context={}, strict=True):
@@ -446,14 +615,76 @@ class BaseActor(object):
           desc: actor description
           parent_id: organizational relationship. Same as `id` above.
         """
+        return list(self.iter_orgchart(parent=parent))
+
+    def iter_orgchart(self, parent='', timings=False):
+        """Yields the orgchart objects of get_orgchart() one by one.
+
+        Sub actors are found through _get_children(), and the whole tree is
+        walked in linear time without building up the chart in memory. See
+        `kingpin.actors.support.orgchart` for writing it out to a file.
+
+        Args:
+            parent: The `id` of our parent
+            timings: Add the `started` time, `duration` and `outcome` of the
+                     last execution of each actor to its orgchart object
+        """
+        return _walk_orgchart(self, parent, timings)
 
-        return [{
+    def _orgchart_entry(self, parent, timings=False):
+        entry = {
             'id': str(id(self)),
             'desc': self._desc,
             'class': self.__class__.__name__,
             # 'options': self._options,  # May include tokens & ENV vars
             'parent_id': parent,
-        }]
+        }
+        if timings:
+            entry.update(_timings(self._started, self._finished,
+                                  self._outcome))
+        return entry
+
+    def _get_children(self):
+        """Returns the actors that this actor executes (if any)."""
+        return []
+
+    def _prepare(self):
+        """Checks and prepares the options of this actor, without any API.
+
+        Called at the end of BaseActor.__init__(), both for real actors and
+        when compiling them offline (see `kingpin.actors.support.compiler`).
+        Checks of the options against each other, and the reading and
+        parsing of local files (templates, policies, configs) belong here
+        rather than in __init__(), so that ``--build-only --offline`` catches
+        the same mistakes as ``--build-only`` does.
+        """
+
+    def _compile(self):
+        """Stands in for the rest of __init__() when compiling offline.
+
+        Called by `kingpin.actors.support.compiler.compile_actor()` after
+        BaseActor.__init__(), instead of this class's own __init__(). Must not
+        set up any API clients. Actors that build other actors compile them
+        here, so that they show up in _get_children().
+        """
+
+    def compact(self):
+        """Returns a compact `ActorRecord` of this actor.
+
+        The record is meant to replace this actor once it has been executed,
+        so that everything else the actor holds on to can be freed.
+        """
+        return ActorRecord(self)
+
+    def _finish(self, outcome, error=None):
+        self._finished = time.time()
+        self._outcome = outcome
+        if error is not None:
+            self._error = str(error)
+
+        durations = history.get_history()
+        if durations is not None and outcome in (SUCCEEDED, WARNED):
+            durations.record(self, self._finished - self._started)
 
     @gen.coroutine
     @timer
@@ -476,15 +707,22 @@ class BaseActor(object):
         Raises:
             gen.Return(result)
         """
+        # Options may have been munged by our subclass since we were
+        # initialized, so make sure our log prefix reflects them.
+        self.log.reset()
         self.log.debug('Beginning')
 
         # Any exception thats raised by an actors _execute() method will
         # automatically cause actor failure and we return right away.
         result = None
+        self._started = time.time()
+        if history.get_history() is not None:
+            history.actor_key(self)
 
         if not self._check_condition():
-            self.log.warning('Skipping execution. Condition: %s' %
+            self.log.warning('Skipping execution. Condition: %s',
                              self._condition)
+            self._finish(SKIPPED)
             raise gen.Return()
 
         try:
@@ -495,13 +733,15 @@ class BaseActor(object):
             recover = isinstance(e, exceptions.RecoverableActorFailure)
             if not recover or not self._warn_on_failure:
                 self.log.critical(e)
+                self._finish(FAILED, e)
                 raise
 
             # Otherwise - flag this failure as a warning, and continue
             self.log.warning(e)
             self.log.warning(
                 'Continuing execution even though a failure was '
-                'detected (warn_on_failure=%s)' % self._warn_on_failure)
+                'detected (warn_on_failure=%s)', self._warn_on_failure)
+            self._finish(WARNED, e)
         except Exception as e:
             # We don't like general exception catch clauses like this, but
             # because actors can be written by third parties and automatically
@@ -513,9 +753,11 @@ class BaseActor(object):
                          'with this stacktrace' %
                          sys.modules[self.__module__].__author__)
             self.log.exception(e)
+            self._finish(FAILED, e)
             raise exceptions.ActorException(e)
         else:
-            self.log.debug('Finished successfully, return value: %s' % result)
+            self.log.debug('Finished successfully, return value: %s', result)
+            self._finish(SUCCEEDED)
 
         # If we got here, we're exiting the actor cleanly and moving on.
         raise gen.Return(result)
@@ -557,6 +799,20 @@ class EnsurableBaseActor(BaseActor):
                                method if you're not doing a pure string
                                comparison between the source and destination.
 
+      :`_plan_fingerprint`: Returns a cheap fingerprint of the resource, built
+                            from the data gathered by `_precache`. Actors that
+                            implement this (and whose setters rely only on
+                            `_precache`) can have a plan recorded by
+                            ``--plan-out`` applied by ``--plan-in``. See
+                            :mod:`kingpin.actors.support.plan`.
+
+      :`_remote_version`: Returns a cheap marker of the version of the remote
+                          resource, without calling `_precache`. Actors that
+                          implement this are skipped by ``--incremental`` runs
+                          when neither their options nor the resource have
+                          changed since they were last ensured. See
+                          :mod:`kingpin.actors.support.incremental`.
+
     **Examples**
 
     .. code-block:: python
@@ -605,6 +861,11 @@ class EnsurableBaseActor(BaseActor):
         # Now go ahead and validate all of the user inputs the normal way
         super(EnsurableBaseActor, self).__init__(*args, **kwargs)
 
+        # The plan being recorded (--plan-out) or applied (--plan-in), if any.
+        self._plan = plan.get_plan()
+        self._observed = {}
+        self._planned_setters = []
+
         # Generate a list of options that will be ensured ...
         self._ensurable_options = self.all_options.keys()
         for option in self.unmanaged_options:
@@ -645,6 +906,9 @@ class EnsurableBaseActor(BaseActor):
                 setattr(self, comparer, _comparer)
                 # self.log.debug('Creating dynamic method %s' % comparer)
 
+            if self._recording_plan():
+                self._observe(option, getter)
+
             self.setters[option] = getattr(self, setter)
             self.getters[option] = getattr(self, getter)
             self.comparers[option] = getattr(self, comparer)
@@ -652,6 +916,24 @@ class EnsurableBaseActor(BaseActor):
     def _is_method(self, name):
         return hasattr(self, name) and inspect.ismethod(getattr(self, name))
 
+    def _observe(self, option, name):
+        """Wraps a getter so that the values it returns end up in the plan."""
+        getter = getattr(self, name)
+
+        @gen.coroutine
+        def _observer(*args, **kwargs):
+            value = yield getter(*args, **kwargs)
+            self._observed[option] = value
+            raise gen.Return(value)
+        setattr(self, name, _observer)
+
+    def _recording_plan(self):
+        return self._dry and self._plan is not None and self._plan.recording
+
+    def _applying_plan(self):
+        return (not self._dry and self._plan is not None and
+                not self._plan.recording)
+
     @gen.coroutine
     def _precache(self):
         """Override this method to pre-cache data in your actor.
@@ -663,6 +945,33 @@ class EnsurableBaseActor(BaseActor):
         """
         raise gen.Return()
 
+    @gen.coroutine
+    def _plan_fingerprint(self):
+        """Override this method to allow plans to be applied to your actor.
+
+        Called right after `_precache()`. Should return a string that changes
+        whenever the resource does (ie, a hash of the data fetched by
+        `_precache()`, or a last-modified time) -- or None if that can't be
+        determined cheaply.
+        """
+        raise gen.Return()
+
+    @gen.coroutine
+    def _remote_version(self):
+        """Override this method to allow your actor to be skipped when unchanged.
+
+        Called (with ``--incremental``) before `_precache()`, and again once
+        the resource has been ensured. Should return a string that changes
+        whenever the resource does, and that is much cheaper to get than
+        `_precache()` and the getters are (ie, an ETag or a last-modified
+        time) -- or None if there is no such thing.
+
+        The actor's options are already part of its fingerprint. Anything else
+        that the desired state comes from (like the contents of a file named
+        by an option) has to be mixed into the version.
+        """
+        raise gen.Return()
+
     @gen.coroutine
     def _get_state(self):
         raise NotImplementedError('_get_state is required for Ensurable')
@@ -685,14 +994,77 @@ class EnsurableBaseActor(BaseActor):
         equals = yield self.comparers[option]()
 
         if equals:
-            self.log.debug('Option "%s" matches' % option)
+            self.log.debug('Option "%s" matches', option)
             raise gen.Return()
 
-        self.log.debug('Option "%s" DOES NOT match, calling setter' % option)
+        self.log.debug('Option "%s" DOES NOT match, calling setter', option)
+        if self._recording_plan():
+            self._planned_setters.append(option)
         yield self.setters[option]()
 
+    @gen.coroutine
+    def _apply_plan(self):
+        """Calls the setters recorded in the plan, if it is still valid.
+
+        Returns:
+            True if the plan was applied, False if the actor should be ensured
+            the normal way.
+        """
+        entry = self._plan.take(self)
+        if entry is None:
+            self.log.debug('Not found in the plan')
+            raise gen.Return(False)
+
+        fingerprint = yield self._plan_fingerprint()
+        if fingerprint is None:
+            self.log.debug('Unable to verify the plan')
+            raise gen.Return(False)
+
+        if fingerprint != entry['fingerprint']:
+            self.log.warning('Resource has changed since the plan was made')
+            raise gen.Return(False)
+
+        # Creating or deleting the resource changes what the rest of the
+        # options need to do, so there is nothing to be saved by the plan.
+        setters = entry['setters']
+        if 'state' in setters or not set(setters) <= set(self.setters):
+            raise gen.Return(False)
+
+        self.log.debug('Applying plan: %s', (setters or 'no changes'))
+        for option in setters:
+            yield self.setters[option]()
+
+        raise gen.Return(True)
+
     @gen.coroutine
     def _execute(self):
+        """Ensures the resource, unless it is unchanged since the last run.
+
+        See `kingpin.actors.support.incremental`.
+        """
+        fingerprints = incremental.get_fingerprints()
+        if fingerprints is None:
+            yield self._converge()
+            raise gen.Return()
+
+        key = incremental.actor_key(self)
+        remote_version = yield self._remote_version()
+        if (remote_version is not None and
+                fingerprints.matches(key, remote_version)):
+            self.log.info('Unchanged since it was last ensured, skipping')
+            raise gen.Return()
+
+        yield self._converge()
+        if self._dry:
+            raise gen.Return()
+
+        # The setters may well have changed the version of the resource
+        remote_version = yield self._remote_version()
+        if remote_version is not None:
+            fingerprints.record(key, remote_version)
+
+    @gen.coroutine
+    def _converge(self):
         """A pretty simple execution pipeline for the actor.
 
         Note: An OrderedDict can be used instead of a plain dict when order
@@ -700,6 +1072,25 @@ class EnsurableBaseActor(BaseActor):
         """
         yield self._precache()
 
+        if self._applying_plan():
+            applied = yield self._apply_plan()
+            if applied:
+                raise gen.Return()
+
+        if not self._recording_plan():
+            yield self._ensure_all()
+            raise gen.Return()
+
+        # The fingerprint has to describe the resource as it was found, before
+        # any of the (dry) setters touch the data gathered by _precache().
+        fingerprint = yield self._plan_fingerprint()
+        yield self._ensure_all()
+        self._plan.record(
+            self, fingerprint, self._observed, self._planned_setters)
+
+    @gen.coroutine
+    def _ensure_all(self):
+        """Ensures the state, and then every other option."""
         yield self._ensure('state')
 
         if self.option('state') == 'absent':
@@ -729,7 +1120,8 @@ class HTTPBaseActor(BaseActor):
     def _get_http_client(self):
         """Returns an asynchronous web client object
 
-        The object is actually of type SimpleAsyncHTTPClient
+        The implementation (SimpleAsyncHTTPClient or the pooled curl client)
+        is selected once at startup by `kingpin.utils.setup_http_client()`.
         """
         return httpclient.AsyncHTTPClient()
 
@@ -774,7 +1166,7 @@ class HTTPBaseActor(BaseActor):
 
         # Now generate the URL
         full_url = httputil.url_concat(url, sorted(args.items()))
-        self.log.debug('Generated URL: %s' % full_url)
+        self.log.debug('Generated URL: %s', full_url)
 
         return full_url
 
@@ -793,7 +1185,9 @@ class HTTPBaseActor(BaseActor):
         """
 
         # Generate the full request URL and log out what we're doing...
-        self.log.debug('Making HTTP request to %s with data: %s' % (url, post))
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug('Making HTTP request to %s with data: %s',
+                           url, post)
 
         # Create the http_request object
         http_client = self._get_http_client()
@@ -84,3 +84,11 @@ class UnparseableResponseFromEndpoint(UnrecoverableActorFailure):
 class BadRequest(RecoverableActorFailure):
 
     """An action failed due to a HTTP 400 error likely due to bad input. """
+
+
+class CircuitOpen(RecoverableActorFailure):
+
+    """Raised instead of calling an endpoint that is known to be failing.
+
+    See `kingpin.actors.support.breaker`.
+    """
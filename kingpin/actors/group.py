@@ -23,12 +23,17 @@ or asynchronous stages.
 import logging
 
 from tornado import gen
+from tornado import locks
 import demjson
 
 from kingpin import utils as kp_utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
 from kingpin.actors import utils
+from kingpin.actors.support import compiler
+from kingpin.actors.support import history
+from kingpin.actors.support import shard
+from kingpin.actors.support import workers
 from kingpin.constants import REQUIRED
 
 log = logging.getLogger(__name__)
@@ -36,6 +41,16 @@ log = logging.getLogger(__name__)
 __author__ = 'Matt Wise <matt@nextdoor.com>'
 
 
+def _environ_default(name, default, cast):
+    """Returns the default of an option, from the environment of the run.
+
+    These are read when the group executes rather than when this module is
+    imported, since a run submitted to `kingpin serve` brings its own
+    environment (see kingpin.utils.get_environ()).
+    """
+    return cast(kp_utils.get_environ().get(name, default))
+
+
 class BaseGroupActor(base.BaseActor):
 
     """Group together a series of other `kingpin.actors.base.BaseActor` objects
@@ -52,6 +67,7 @@ class BaseGroupActor(base.BaseActor):
 
     all_options = {
         'contexts': ((dict, str, list), [], "List of contextual hashes."),
+        'shard': (bool, False, "Only build this --shard's share of contexts."),
         'acts': (list, REQUIRED, "Array of actor definitions.")
     }
 
@@ -61,6 +77,9 @@ class BaseGroupActor(base.BaseActor):
     # the moment that this actor is instantiated.
     strict_init_context = False
 
+    # Set by _compile(), to compile our acts rather than build them
+    _compiling = False
+
     def __init__(self, *args, **kwargs):
         """Initializes all of the sub actors.
 
@@ -76,7 +95,8 @@ class BaseGroupActor(base.BaseActor):
           externally supplied data (usually os.environ) being used as available
           tokens for %TOKEN% parsing when reading JSON/YAML scripts. By passing
           this data between these three actors, we are able to allow nested
-          token passing.
+          token passing. The tokens are a read-only
+          `kingpin.utils.TokenScope` that is shared by every sub actor.
 
           See `Token-replacement <basicuse.html#token-replacement>` for more
           info.
@@ -90,22 +110,44 @@ class BaseGroupActor(base.BaseActor):
                 open(filename)
             except IOError as e:
                 self.log.error('Option `contexts` must have valid `file`. '
-                               'Received: %s' % filename)
+                               'Received: %s', filename)
                 raise exceptions.InvalidOptions(e)
         # END DEPRECATION
 
         # Pre-initialize all of our actions!
         self._actions = self._build_actions()
 
-    def get_orgchart(self, parent=''):
-        """Generate an orgchart for all the `acts` specified."""
+    def _get_children(self):
+        """Our acts (or the records of finished ones), for the orgchart."""
+        return self._actions
 
-        ret = super(BaseGroupActor, self).get_orgchart(parent=parent)
-        group_id = str(id(self))
-        for act in self._actions:
-            ret = ret + act.get_orgchart(parent=group_id)
+    def _compile(self):
+        """Compiles our acts for every context, without building them."""
+        self._compiling = True
+        self._actions = self._build_actions()
+
+    @gen.coroutine
+    def _execute_act(self, index, buffered=False):
+        """Executes one of our acts, then swaps it for its ActorRecord.
 
-        return ret
+        A long running group may have thousands of acts, each holding on to
+        their options, parsed files, API clients and so on. None of that is
+        needed once an act is done, so we only keep a compact record of it
+        around (see `kingpin.actors.base.ActorRecord`).
+
+        Args:
+            index: Index of the act in self._actions
+            buffered: Hold back the log output of the act until it finishes
+                      (see `kingpin.utils.buffered_logs`)
+        """
+        act = self._actions[index]
+        try:
+            if buffered:
+                yield kp_utils.buffered_logs(act.execute)
+            else:
+                yield act.execute()
+        finally:
+            self._actions[index] = act.compact()
 
     def _build_actions(self):
         """Builds either a single set of actions, or multiple sets.
@@ -148,14 +190,22 @@ class BaseGroupActor(base.BaseActor):
             context_data = kp_utils.convert_script_to_dict(
                 contexts, self._init_tokens)
 
+        if self.option('shard') and shard.get_shard():
+            total = len(context_data)
+            context_data = shard.select(context_data)
+            self.log.info('Shard %s/%s: building %s of %s contexts' % (
+                shard.get_shard() + (len(context_data), total)))
+
         actions = []
         for context in context_data:
             combined_context = dict(self._init_context.items() +
                                     context.items())
-            self.log.debug('Inherited context %s' % self._init_context.items())
-            self.log.debug('Specified context %s' % context.items())
-            self.log.debug('Building acts with parameters: %s' %
-                           combined_context)
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug('Inherited context %s',
+                               self._init_context.items())
+                self.log.debug('Specified context %s', context.items())
+                self.log.debug('Building acts with parameters: %s',
+                               combined_context)
             for action in self._build_action_group(context=combined_context):
                 actions.append(action)
 
@@ -168,17 +218,23 @@ class BaseGroupActor(base.BaseActor):
         then either be yielded as a whole (for an async operation), or
         individually (for a synchronous operation).
 
+        When compiling offline (see `kingpin.actors.support.compiler`), the
+        acts are compiled rather than built.
+
         Returns:
             A list of references to <actor objects>.
         """
+        build = compiler.compile_actor if self._compiling else utils.get_actor
+        # Neither the context nor the tokens are ever modified by an actor, so
+        # every act shares ours rather than getting its own copy.
         actions = []
-        self.log.debug('Building %s actors' % len(self.option('acts')))
+        self.log.debug('Building %s actors', len(self.option('acts')))
         for act in self.option('acts'):
-            act['init_context'] = context.copy()
-            act['init_tokens'] = self._init_tokens.copy()
-            actor = utils.get_actor(act, dry=self._dry)
+            act['init_context'] = context
+            act['init_tokens'] = self._init_tokens
+            actor = build(act, dry=self._dry)
             actions.append(actor)
-            self.log.debug('Actor %s built' % actor)
+            self.log.debug('Actor %s built', actor)
         return actions
 
     def _get_exc_type(self, exc_list):
@@ -210,10 +266,19 @@ class BaseGroupActor(base.BaseActor):
         If an actor execution fails in _run_actions(), then that exception is
         raised up the stack.
         """
-        self.log.info('Beginning %s actions' % len(self._actions))
+        expected = self._expected_duration()
+        if expected is None:
+            self.log.info('Beginning %s actions', len(self._actions))
+        else:
+            self.log.info('Beginning %s actions (expected to take ~%.0fs)',
+                          len(self._actions), expected)
         yield self._run_actions()
         raise gen.Return()
 
+    def _expected_duration(self):
+        """Seconds our acts are expected to take (see support.history)."""
+        return history.estimate(self._actions)
+
 
 class Sync(BaseGroupActor):
 
@@ -227,6 +292,11 @@ class Sync(BaseGroupActor):
     :acts:
       An array of individual Actor definitions.
 
+    :dry_concurrency:
+      During a dry run, rehearse up to this many acts at the same time
+      (default: the ``DRY_CONCURRENCY`` environment variable, or off). See
+      *Dry Mode* below.
+
     :contexts:
 
       This variable can be one of two formats:
@@ -243,6 +313,11 @@ class Sync(BaseGroupActor):
         tokens need to be the same format as a Macro actor: a dictionary
         passing token data to be used.
 
+    :shard:
+      When Kingpin is run with ``--shard INDEX/COUNT``, only build the acts
+      for this shard's share of the ``contexts`` (default: false). See
+      `Sharding <basicuse.html#sharding>`_.
+
 
     **Timeouts**
 
@@ -312,6 +387,12 @@ class Sync(BaseGroupActor):
     This provides the user with an insight to all the errors that are possible
     to encounter, rather than abort and quit on the first one.
 
+    Since nothing is changed in a dry run, the acts can optionally be rehearsed
+    concurrently by setting ``dry_concurrency``. The log output of each act is
+    held back until it finishes, so that it is written out in one readable
+    block. Only use this if none of your acts rely on an earlier act having
+    run first during the dry run.
+
     **Failure**
 
     In the event that an act fails, this actor will return the failure
@@ -321,6 +402,15 @@ class Sync(BaseGroupActor):
     The behavior is different in the dry run (read above.)
     """
 
+    all_options = {
+        'dry_concurrency': (int, None,
+                            "Max number of acts to rehearse at once in a dry "
+                            "run."),
+        'contexts': ((dict, str, list), [], "List of contextual hashes."),
+        'shard': (bool, False, "Only build this --shard's share of contexts."),
+        'acts': (list, REQUIRED, "Array of actor definitions.")
+    }
+
     @gen.coroutine
     def _run_actions(self):
         """Synchronously executes all of the Actor.execute() methods.
@@ -332,21 +422,28 @@ class Sync(BaseGroupActor):
             In dry run - worst of all the raised errors.
             In real run - the first of the exceptions.
         """
+        concurrency = self.option('dry_concurrency')
+        if concurrency is None:
+            concurrency = _environ_default('DRY_CONCURRENCY', 0, int)
+
+        if self._dry and concurrency > 1:
+            yield self._rehearse_actions(concurrency)
+            raise gen.Return()
 
         errors = []
 
-        for act in self._actions:
-            self.log.debug('Beginning "%s"..' % act._desc)
+        for index, act in enumerate(self._actions):
+            self.log.debug('Beginning "%s"..', act._desc)
             try:
-                yield act.execute()
+                yield self._execute_act(index)
             except exceptions.ActorException as e:
                 if self._dry:
-                    self.log.error('%s failed: %s' % (act._desc, str(e)))
+                    self.log.error('%s failed: %s', act._desc, str(e))
                     self.log.warning('Continuing since this is a dry run.')
                     errors.append(e)
                 else:
                     self.log.error('Aborting sequential execution because '
-                                   '"%s" failed' % act._desc)
+                                   '"%s" failed', act._desc)
                     raise
 
         if errors:
@@ -354,6 +451,38 @@ class Sync(BaseGroupActor):
             raise ExcType('Exceptions raised by %s of %s actors in "%s".' % (
                           len(errors), len(self._actions), self._desc))
 
+    @gen.coroutine
+    def _rehearse_actions(self, concurrency):
+        """Dry-runs up to `concurrency` of the acts at the same time.
+
+        Just like a sequential dry run, every act is executed and all of the
+        failures are collected up and raised at the end.
+        """
+        self.log.info('Rehearsing up to %s acts at once', concurrency)
+        semaphore = locks.Semaphore(concurrency)
+
+        @gen.coroutine
+        def rehearse(index, desc):
+            with (yield semaphore.acquire()):
+                self.log.debug('Beginning "%s"..', desc)
+                yield self._execute_act(index, buffered=True)
+
+        descs = [act._desc for act in self._actions]
+        tasks = [rehearse(index, desc) for index, desc in enumerate(descs)]
+
+        errors = []
+        for desc, task in zip(descs, tasks):
+            try:
+                yield task
+            except exceptions.ActorException as e:
+                self.log.error('%s failed: %s', desc, str(e))
+                errors.append(e)
+
+        if errors:
+            ExcType = self._get_exc_type(errors)
+            raise ExcType('Exceptions raised by %s of %s actors in "%s".' % (
+                          len(errors), len(self._actions), self._desc))
+
 
 class Async(BaseGroupActor):
 
@@ -369,6 +498,17 @@ class Async(BaseGroupActor):
       in parallel, and continue with the remained as soon as the first
       execution is done. This is faster than creating N Sync executions.
 
+    :processes:
+      Execute the acts in up to this many worker processes, each with its own
+      IOLoop (default: the ``KINGPIN_PROCESSES`` environment variable, or
+      off). See *Worker Processes* below.
+
+    :longest_first:
+      Start the acts that took the longest in earlier runs first (default:
+      the ``KINGPIN_LONGEST_FIRST`` environment variable, or off). Only
+      useful with ``concurrency`` or ``processes``, and when Kingpin is run
+      with ``--history``. See *Scheduling* below.
+
     :acts:
       An array of individual Actor definitions.
 
@@ -385,6 +525,11 @@ class Async(BaseGroupActor):
         the same format as a Macro actor: a dictionary passing token data to be
         used.
 
+    :shard:
+      When Kingpin is run with ``--shard INDEX/COUNT``, only build the acts
+      for this shard's share of the ``contexts`` (default: false). See
+      `Sharding <basicuse.html#sharding>`_.
+
     **Timeouts**
 
     Timeouts are disabled specifically in this actor. The sub-actors can still
@@ -419,6 +564,30 @@ class Async(BaseGroupActor):
          }
        }
 
+    **Worker Processes**
+
+    Kingpin normally does all of its work on a single CPU. When the acts of
+    a group are CPU heavy (ie, large CloudFormation or ElastiGroup configs
+    being compared), set ``processes`` to spread them out over that many
+    child processes. The acts are dealt out to the workers round-robin, and
+    each worker executes its share all at once (``concurrency`` is split
+    between the workers). The log output of the workers is written out by
+    Kingpin as usual.
+
+    Only the outermost ``group.Async`` actors use worker processes -- the
+    groups nested in them run inside of a worker. The acts must be
+    independent of each other, since they no longer share a process.
+
+    **Scheduling**
+
+    With ``concurrency`` set, the acts are normally started in the order they
+    are listed in, so one long CloudFormation stack or ECS service update
+    listed last can keep the whole group waiting long after everything else
+    is done. When Kingpin is run with ``--history FILE``, it records how long
+    every actor takes. Set ``longest_first`` to start the acts that are
+    expected to take the longest first, and the shortest ones last, where
+    they fill in the gaps. Acts that have never been run are started first.
+
     **Dry Mode**
 
     Passes on the Dry mode setting to the sub-actors that are called.
@@ -433,7 +602,11 @@ class Async(BaseGroupActor):
 
     all_options = {
         'concurrency': (int, 0, "Max number of concurrent executions."),
+        'processes': (int, None, "Max number of worker processes."),
+        'longest_first': (bool, None,
+                          "Start the acts expected to take longest first."),
         'contexts': ((dict, str, list), [], "List of contextual hashes."),
+        'shard': (bool, False, "Only build this --shard's share of contexts."),
         'acts': (list, REQUIRED, "Array of actor definitions.")
     }
 
@@ -447,6 +620,17 @@ class Async(BaseGroupActor):
         failed (False).
         """
 
+        processes = self.option('processes')
+        if processes is None:
+            processes = _environ_default('KINGPIN_PROCESSES', 0, int)
+
+        order = self._order()
+
+        if processes > 1 and len(self._actions) > 1 and \
+                not workers.in_worker():
+            yield self._run_in_workers(processes, order)
+            raise gen.Return()
+
         # This is an interesting tornado-ism. Here we generate and fire off
         # each of the acts asynchronously into the IOLoop, and we record
         # references to those tasks. However, we don't yield (wait) on them to
@@ -454,10 +638,10 @@ class Async(BaseGroupActor):
         tasks = []
 
         if self.option('concurrency'):
-            self.log.info('Concurrency set to %s' % self.option('concurrency'))
+            self.log.info('Concurrency set to %s', self.option('concurrency'))
 
-        for act in self._actions:
-            tasks.append(act.execute())
+        for index in order:
+            tasks.append(self._execute_act(index))
 
             if not self.option('concurrency'):
                 # No concurrency limit - continue the loop without checks.
@@ -474,8 +658,8 @@ class Async(BaseGroupActor):
                 yield gen.moment
                 running_tasks = len([t for t in tasks if t.running()])
 
-            self.log.debug('Concurrency desaturated: %s<%s. Continuing.' % (
-                running_tasks, self.option('concurrency')))
+            self.log.debug('Concurrency desaturated: %s<%s. Continuing.',
+                           running_tasks, self.option('concurrency'))
 
         # Now that we've fired them off, we walk through them one-by-one and
         # check on their status. If they've raised an exception, we catch it
@@ -496,3 +680,47 @@ class Async(BaseGroupActor):
             ExcType = self._get_exc_type(errors)
             raise ExcType('Exceptions raised by %s of %s actors in "%s".' % (
                           len(errors), len(self._actions), self._desc))
+
+    def _order(self):
+        """Returns the indexes of our acts, in the order to start them."""
+        longest_first = self.option('longest_first')
+        if longest_first is None:
+            longest_first = _environ_default(
+                'KINGPIN_LONGEST_FIRST', False, bool)
+
+        if not longest_first:
+            return range(len(self._actions))
+
+        if history.get_history() is None:
+            self.log.debug('No --history, starting the acts in order')
+            return range(len(self._actions))
+
+        self.log.debug('Starting the acts expected to take longest first')
+        return history.longest_first(self._actions)
+
+    def _expected_duration(self):
+        actions = [self._actions[index] for index in self._order()]
+        return history.estimate(actions, self.option('concurrency'))
+
+    @gen.coroutine
+    def _run_in_workers(self, processes, order=None):
+        """Executes the acts in (up to) `processes` worker processes.
+
+        See `kingpin.actors.support.workers`. Failures are handled exactly as
+        in _run_actions().
+        """
+        self.log.info('Executing %s acts in up to %s worker processes',
+                      len(self._actions), processes)
+        results = yield workers.execute(
+            self._actions, processes, self.option('concurrency'), order)
+
+        errors = []
+        for index, (record, error) in enumerate(results):
+            self._actions[index] = record
+            if error is not None:
+                errors.append(error)
+
+        if errors:
+            ExcType = self._get_exc_type(errors)
+            raise ExcType('Exceptions raised by %s of %s actors in "%s".' % (
+                          len(errors), len(self._actions), self._desc))
@@ -31,6 +31,7 @@ sending the messages.
   (defaults to ``Kingpin``)
 """
 
+import functools
 import logging
 import os
 
@@ -40,6 +41,7 @@ from tornado import httpclient
 from kingpin import utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import outbox
 from kingpin.constants import REQUIRED
 
 log = logging.getLogger(__name__)
@@ -144,6 +146,11 @@ class Message(HipchatBase):
     :message:
       (str) Message to send
 
+    :async_delivery:
+      *(Optional)* Queue the message up for delivery in the background, rather
+      than waiting for it to be sent. See
+      :mod:`kingpin.actors.support.outbox`. (default: False)
+
     **Examples**
 
     .. code-block:: json
@@ -165,7 +172,8 @@ class Message(HipchatBase):
 
     all_options = {
         'room': (str, REQUIRED, 'Hipchat room name'),
-        'message': (str, REQUIRED, 'Message to send')
+        'message': (str, REQUIRED, 'Message to send'),
+        'async_delivery': (bool, False, 'Send the message in the background')
     }
 
     desc = "Sending Message to {room}"
@@ -208,8 +216,19 @@ class Message(HipchatBase):
 
         raises: gen.Return()
         """
-        self.log.info('Sending message "%s" to Hipchat room "%s"' %
-                      (self.option('message'), self.option('room')))
+        self.log.info('Sending message "%s" to Hipchat room "%s"',
+                      self.option('message'), self.option('room'))
+
+        if self.option('async_delivery') and not self._dry:
+            outbox.get_outbox().enqueue('hipchat', outbox.Envelope(
+                send=functools.partial(self._post_message,
+                                       self.option('room')),
+                payload=self.option('message'),
+                key=('message', self.option('room')),
+                merge=lambda a, b: '%s<br />%s' % (a, b)))
+            self.log.debug('Message queued for delivery')
+            raise gen.Return()
+
         res = yield self._post_message(self.option('room'),
                                        self.option('message'))
 
@@ -224,7 +243,7 @@ class Message(HipchatBase):
         # message send, but just validated the API token against the API.
         if 'success' in res:
             if res['success']['code'] == 202:
-                self.log.info('API Token Validated: %s' %
+                self.log.info('API Token Validated: %s',
                               res['success']['message'])
 
         raise gen.Return()
@@ -238,6 +257,10 @@ class Topic(HipchatBase):
 
     -  ``room`` - The string-name (or ID) of the room to set the topic of
     -  ``topic`` - String of the topic to send
+    -  ``async_delivery`` - *(Optional)* Set the topic in the background,
+       rather than waiting for it. If the topic is changed several times
+       before it is delivered, only the latest topic is sent.
+       (default: False)
 
     **Examples**
 
@@ -260,7 +283,8 @@ class Topic(HipchatBase):
 
     all_options = {
         'room': (str, REQUIRED, 'Hipchat room name'),
-        'topic': (str, REQUIRED, 'Topic to set')
+        'topic': (str, REQUIRED, 'Topic to set'),
+        'async_delivery': (bool, False, 'Set the topic in the background')
     }
 
     desc = "Setting Room {room} topic"
@@ -296,8 +320,18 @@ class Topic(HipchatBase):
 
         raises: gen.Return()
         """
-        self.log.info('Setting room "%s" topic to: %s' %
-                      (self.option('room'), self.option('topic')))
+        self.log.info('Setting room "%s" topic to: %s',
+                      self.option('room'), self.option('topic'))
+
+        if self.option('async_delivery') and not self._dry:
+            outbox.get_outbox().enqueue('hipchat', outbox.Envelope(
+                send=functools.partial(self._set_topic, self.option('room')),
+                payload=self.option('topic'),
+                key=('topic', self.option('room')),
+                merge=lambda a, b: b))
+            self.log.debug('Topic queued for delivery')
+            raise gen.Return()
+
         res = yield self._set_topic(self.option('room'),
                                     self.option('topic'))
 
@@ -312,7 +346,7 @@ class Topic(HipchatBase):
         # message send, but just validated the API token against the API.
         if 'success' in res:
             if res['success']['code'] == 202:
-                self.log.info('API Token Validated: %s' %
+                self.log.info('API Token Validated: %s',
                               res['success']['message'])
 
         raise gen.Return()
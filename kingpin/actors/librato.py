@@ -30,6 +30,7 @@ cause/effect analysis.
 
 """
 
+import functools
 import logging
 import os
 import urllib
@@ -40,6 +41,8 @@ from tornado import httpclient
 from kingpin import utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import breaker
+from kingpin.actors.support import outbox
 from kingpin.constants import REQUIRED
 
 log = logging.getLogger(__name__)
@@ -72,6 +75,11 @@ class Annotation(base.HTTPBaseActor):
     :name:
       Name of the metric to annotate
 
+    :async_delivery:
+      *(Optional)* Queue the annotation up for delivery in the
+      background, rather than waiting for it to be sent. See
+      :mod:`kingpin.actors.support.outbox`. (default: False)
+
     **Examples**
 
     .. code-block:: json
@@ -93,7 +101,9 @@ class Annotation(base.HTTPBaseActor):
     all_options = {
         'title': (str, REQUIRED, "Annotation title"),
         'description': (str, REQUIRED, "Annotation description"),
-        'name': (str, REQUIRED, "Name of the metric to annotate")
+        'name': (str, REQUIRED, "Name of the metric to annotate"),
+        'async_delivery': (bool, False,
+                           'Send the annotation in the background')
     }
 
     desc = "Sending Annotation to {name}"
@@ -111,7 +121,8 @@ class Annotation(base.HTTPBaseActor):
                 'Missing the "LIBRATO_EMAIL" environment variable.')
 
     @gen.coroutine
-    @utils.retry(excs=(httpclient.HTTPError), retries=3)
+    @utils.retry(excs=(httpclient.HTTPError), retries=3,
+                 guard=breaker.Guard('librato'))
     def _fetch_wrapper(self, *args, **kwargs):
         """Wrap the superclass _fetch method to catch known Librato errors."""
         try:
@@ -146,14 +157,22 @@ class Annotation(base.HTTPBaseActor):
                 METRICS_URL, auth_username=EMAIL, auth_password=TOKEN)
         else:
             self.log.info(
-                "Annotating metric '%s' with title:'%s', description:'%s'" % (
-                    self.option('name'), self.option('title'),
-                    self.option('description')))
+                "Annotating metric '%s' with title:'%s', description:'%s'",
+                self.option('name'), self.option('title'),
+                self.option('description'))
             url = ANNOTATIONS_URL + self.option('name')
             args = urllib.urlencode(
                 {'title': self.option('title'),
                  'description': self.option('description')})
 
-            yield self._fetch_wrapper(url, post=args,
-                                      auth_username=EMAIL, auth_password=TOKEN)
+            send = functools.partial(
+                self._fetch_wrapper, url, post=args,
+                auth_username=EMAIL, auth_password=TOKEN)
+
+            if self.option('async_delivery'):
+                outbox.get_outbox().enqueue(
+                    'librato', outbox.Envelope(send=send))
+                raise gen.Return()
+
+            yield send()
         raise gen.Return()
@@ -30,10 +30,12 @@ dedicated packages. Things like sleep timers, loggers, etc.
 import StringIO
 import json
 import logging
+import math
 import urllib
 
 from tornado import gen
 from tornado import httpclient
+from tornado import locks
 from kingpin.actors import utils as actor_utils
 from kingpin.actors import group
 from kingpin import exceptions as kingpin_exceptions
@@ -42,6 +44,7 @@ from kingpin import schema
 from kingpin import utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import compiler
 from kingpin.constants import REQUIRED
 
 log = logging.getLogger(__name__)
@@ -146,24 +149,27 @@ class Macro(base.BaseActor):
 
     desc = "Macro: {macro}"
 
+    # The actor in the macro file (None until it is built)
+    initial_actor = None
+
     def __init__(self, *args, **kwargs):
         """Pre-parse the script file and compile actors.
 
-        Note, we override the default init_tokens={} from the base class and
-        default it to a _copy_ of the os.environ dict.
+        Note, our `tokens` are layered on top of the init_tokens handed to us
+        by our parent actor (see `kingpin.utils.TokenScope`).
         """
         super(Macro, self).__init__(*args, **kwargs)
 
         # Temporary check that macro is a local file.
         self._check_macro()
 
-        self.log.info('Preparing actors from %s' % self.option('macro'))
+        self.log.info('Preparing actors from %s', self.option('macro'))
 
         # Take the "init tokens" that were supplied to this actor by its parent
         # and merge them with the explicitly defined tokens in the actor
         # definition itself. Give priority to the explicitly defined tokens on
         # any conflicts.
-        self._init_tokens.update(self.option('tokens'))
+        self._init_tokens = self._init_tokens.child(self.option('tokens'))
 
         # Copy the tmp file / download a remote macro
         macro_file = self._get_macro()
@@ -184,7 +190,7 @@ class Macro(base.BaseActor):
         else:
             # After the schema has been checked, pass in whatever tokens _we_
             # got, off to the soon-to-be-created actor.
-            config['init_tokens'] = self._init_tokens.copy()
+            config['init_tokens'] = self._init_tokens
 
             self.initial_actor = actor_utils.get_actor(config, dry=self._dry)
 
@@ -244,7 +250,7 @@ class Macro(base.BaseActor):
             UnrecoverableActorFailure -
                 if parsing script or inserting env vars fails.
         """
-        self.log.debug('Parsing %s' % script_file)
+        self.log.debug('Parsing %s', script_file)
         try:
             return utils.convert_script_to_dict(
                 script_file=script_file,
@@ -254,24 +260,52 @@ class Macro(base.BaseActor):
 
     def _check_schema(self, config):
         # Run the dict through our schema validator quickly
-        self.log.debug('Validating schema for %s' % self.option('macro'))
+        self.log.debug('Validating schema for %s', self.option('macro'))
         try:
             schema.validate(config)
         except kingpin_exceptions.InvalidScript as e:
             self.log.critical('Invalid Schema.')
             raise exceptions.UnrecoverableActorFailure(e)
 
-    def get_orgchart(self, parent=''):
-        """Return orgchart including the actor inside of the macro file."""
-        ret = super(Macro, self).get_orgchart(parent=parent)
-        macro = self.initial_actor.get_orgchart(parent=str(id(self)))
-        return ret + macro
+    def _get_children(self):
+        """Includes the actor inside of the macro file in the orgchart."""
+        if self.initial_actor is None:
+            return []
+        return [self.initial_actor]
+
+    def _compile(self):
+        """Parses and compiles a local macro file, without building it.
+
+        Remote macros are not fetched, so whatever is in them is not checked.
+        """
+        self._check_macro()
+        self._init_tokens = self._init_tokens.child(self.option('tokens'))
+
+        if self.option('macro').startswith(('http://', 'https://')):
+            self.log.warning('Not compiling the remote macro %s offline',
+                             self.option('macro'))
+            return
+
+        config = self._get_config_from_script(self._get_macro())
+        self._check_schema(config)
+
+        if type(config) == list:
+            config = {'actor': 'group.Sync', 'options': {'acts': config}}
+        else:
+            config['init_tokens'] = self._init_tokens
+
+        self.initial_actor = compiler.compile_actor(config, dry=self._dry)
 
     @gen.coroutine
     def _execute(self):
         # initial_actor is configured with same dry parameter as this actor.
-        # Just execute it and the rest will be handled internally.
-        yield self.initial_actor.execute()
+        # Just execute it and the rest will be handled internally. Once it is
+        # done, we only keep a compact record of it (see
+        # group.BaseGroupActor._execute_act).
+        try:
+            yield self.initial_actor.execute()
+        finally:
+            self.initial_actor = self.initial_actor.compact()
 
 
 class Sleep(base.BaseActor):
@@ -310,7 +344,7 @@ class Sleep(base.BaseActor):
     def _execute(self):
         """Executes an actor and yields the results when its finished."""
 
-        self.log.debug('Sleeping for %s seconds' % self.option('sleep'))
+        self.log.debug('Sleeping for %s seconds', self.option('sleep'))
 
         sleep = self.option('sleep')
 
@@ -377,8 +411,8 @@ class GenericHTTP(base.HTTPBaseActor):
         is_post = bool(self.option('data'))
         method = ['GET', 'POST'][is_post]
 
-        self.log.info("Would do a %s request to %s"
-                      % (method, self.option('url')))
+        self.log.info("Would do a %s request to %s",
+                      method, self.option('url'))
         raise gen.Return()
 
     @gen.coroutine
@@ -405,3 +439,201 @@ class GenericHTTP(base.HTTPBaseActor):
         except httpclient.HTTPError as e:
             if e.code == 401:
                 raise exceptions.InvalidCredentials(e.message)
+
+
+def _percentile(values, percent):
+    """Returns the nearest-rank percentile of a sorted list of values."""
+    index = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(index, 0)]
+
+
+class HTTPBatch(base.HTTPBaseActor):
+
+    """Fetches a batch of URLs concurrently, checking every response.
+
+    Meant for warming caches and smoke testing a service after a deployment,
+    where `GenericHTTP` would need one actor (and one connection) per URL.
+    Up to ``concurrency`` requests are in flight at once. Every response must
+    have one of the ``codes`` and contain each of the ``contains`` strings,
+    and the actor fails if fewer than ``threshold`` percent of the URLs pass.
+
+    Once done, the latency percentiles of the batch are logged, along with
+    every URL that failed and why.
+
+    The requests are made with the HTTP client shared by all of the actors.
+    Run Kingpin with ``--curl`` to have that client keep its connections
+    open between requests, so that a batch only pays for a handful of TLS
+    handshakes per host. Note that ``--max-clients`` caps the number of
+    requests in flight as well.
+
+    **Options**
+
+    :urls:
+      List of URLs to fetch.
+
+    :url_file:
+      Path to a file of URLs to fetch, one per line. Blank lines and lines
+      starting with ``#`` are skipped. Combined with ``urls``.
+
+    :concurrency:
+      Maximum number of requests in flight at once, or 0 for no limit.
+      (default: 10)
+
+    :codes:
+      List of acceptable HTTP response codes. (default: ``[200]``)
+
+    :contains:
+      List of strings that every response body must contain.
+
+    :headers:
+      Dict of extra headers to send with every request.
+
+    :request_timeout:
+      Seconds to wait for each response. (default: 30)
+
+    :threshold:
+      Percentage of the URLs that must pass. (default: 100)
+
+    **Examples**
+
+    .. code-block:: json
+
+       { "actor": "misc.HTTPBatch",
+         "desc": "Smoke test the site",
+         "options": {
+           "url_file": "smoke-test-urls.txt",
+           "concurrency": 20,
+           "codes": [200, 301],
+           "contains": ["</html>"],
+           "threshold": 99
+         }
+       }
+
+    **Dry Mode**
+
+    Reads the ``url_file`` and logs how many URLs would be fetched, without
+    fetching any of them.
+    """
+
+    all_options = {
+        'urls': (list, [], 'URLs to fetch'),
+        'url_file': (str, None, 'File of URLs to fetch, one per line'),
+        'concurrency': (int, 10, 'Max number of requests in flight'),
+        'codes': (list, [200], 'Acceptable HTTP response codes'),
+        'contains': (list, [], 'Strings every response body must contain'),
+        'headers': (dict, {}, 'Extra headers to send with every request'),
+        'request_timeout': ((int, float), 30,
+                            'Seconds to wait for each response'),
+        'threshold': ((int, float), 100,
+                      'Percentage of the URLs that must pass'),
+    }
+
+    desc = 'Fetch a batch of URLs'
+
+    def _prepare(self):
+        if not (self.option('urls') or self.option('url_file')):
+            raise exceptions.InvalidOptions(
+                'Either `urls` or `url_file` must be supplied.')
+
+        if not 0 <= self.option('threshold') <= 100:
+            raise exceptions.InvalidOptions(
+                '`threshold` must be a percentage, not %s' %
+                self.option('threshold'))
+
+        try:
+            self._codes = set(int(code) for code in self.option('codes'))
+        except ValueError as e:
+            raise exceptions.InvalidOptions('Invalid `codes`: %s' % e)
+
+    def _get_urls(self):
+        """Returns the URLs from the `urls` and `url_file` options."""
+        urls = list(self.option('urls'))
+        if self.option('url_file'):
+            for line in self.readfile(self.option('url_file')).splitlines():
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+        return urls
+
+    @gen.coroutine
+    def _get(self, url):
+        """Fetches a URL, returning the response even if it is an error."""
+        request = httpclient.HTTPRequest(
+            url=url,
+            headers=self.option('headers') or None,
+            request_timeout=self.option('request_timeout'),
+            follow_redirects=True,
+            max_redirects=10)
+        response = yield self._get_http_client().fetch(
+            request, raise_error=False)
+        raise gen.Return(response)
+
+    def _check(self, response):
+        """Returns why a response fails the checks, or None if it passes."""
+        if response.code not in self._codes:
+            if response.code == 599:
+                return str(response.error)
+            return 'got a %s, expected one of %s' % (
+                response.code, sorted(self._codes))
+
+        # The strings to look for come from the script as unicode, so the
+        # body is decoded before it is searched.
+        body = (response.body or '').decode('utf-8', 'replace')
+        for string in self.option('contains'):
+            if string not in body:
+                return 'the body does not contain %r' % string
+
+        return None
+
+    def _report(self, count, failures, latencies):
+        """Logs how the batch went, and fails it below the threshold."""
+        passed = 100.0 * (count - failures) / count
+        latencies.sort()
+        self.log.info(
+            'Fetched %s URLs, %.1f%% passed. Latency: p50 %.3fs, p90 %.3fs, '
+            'p99 %.3fs, max %.3fs',
+            count, passed,
+            _percentile(latencies, 50), _percentile(latencies, 90),
+            _percentile(latencies, 99), latencies[-1])
+
+        if passed < self.option('threshold'):
+            raise exceptions.RecoverableActorFailure(
+                '%s of %s URLs failed (at least %s%% must pass)' %
+                (failures, count, self.option('threshold')))
+
+    @gen.coroutine
+    def _execute(self):
+        urls = self._get_urls()
+        concurrency = self.option('concurrency')
+
+        if not urls:
+            self.log.warning('There are no URLs to fetch')
+            raise gen.Return()
+
+        if self._dry:
+            self.log.info('Would fetch %s URLs, %s at a time',
+                          len(urls), concurrency or 'all')
+            raise gen.Return()
+
+        self.log.info('Fetching %s URLs, %s at a time',
+                      len(urls), concurrency or 'all')
+        semaphore = locks.Semaphore(concurrency) if concurrency else None
+        latencies = []
+        failures = []
+
+        @gen.coroutine
+        def fetch(url):
+            if semaphore is None:
+                response = yield self._get(url)
+            else:
+                with (yield semaphore.acquire()):
+                    response = yield self._get(url)
+
+            latencies.append(response.request_time)
+            reason = self._check(response)
+            if reason is not None:
+                failures.append(url)
+                self.log.warning('%s failed: %s', url, reason)
+
+        yield [fetch(url) for url in urls]
+        self._report(len(urls), len(failures), latencies)
@@ -28,6 +28,12 @@ https://packagecloud.io/docs/api
 
 :PACKAGECLOUD_TOKEN:
   packagecloud API Token
+
+**Optional Environment Variables**
+
+:PACKAGECLOUD_ENDPOINT:
+  Override the packagecloud API URL (defaults to
+  ``https://packagecloud.io/api/v1/``)
 """
 
 import datetime
@@ -37,10 +43,10 @@ import re
 import sys
 
 from tornado import gen
-from tornado_rest_client import api
 
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import api
 from kingpin.constants import REQUIRED
 
 log = logging.getLogger(__name__)
@@ -49,12 +55,14 @@ __author__ = 'Charles McLaughlin <charles@nextdoor.com>'
 
 ACCOUNT = os.getenv('PACKAGECLOUD_ACCOUNT', None)
 TOKEN = os.getenv('PACKAGECLOUD_TOKEN', None)
+ENDPOINT = os.getenv('PACKAGECLOUD_ENDPOINT',
+                     'https://packagecloud.io/api/v1/')
 
 
 class PackagecloudAPI(api.RestConsumer):
 
-    ENDPOINT = 'https://packagecloud.io/api/v1/'
-    CONFIG = {
+    _ENDPOINT = ENDPOINT
+    _CONFIG = {
         'attrs': {
             'packages': {
                 'path': ('repos/%account%/%repo%/packages.json'
@@ -77,6 +85,10 @@ class PackagecloudBase(base.BaseActor):
 
     """Simple packagecloud Abstract Base Object"""
 
+    # Whether to make conditional GETs for resources that we have fetched
+    # before (see kingpin.actors.support.api.RestClient)
+    cache_responses = False
+
     def __init__(self, *args, **kwargs):
         """Check required environment variables."""
         super(PackagecloudBase, self).__init__(*args, **kwargs)
@@ -89,7 +101,8 @@ class PackagecloudBase(base.BaseActor):
             raise exceptions.InvalidCredentials(
                 'Missing the "PACKAGECLOUD_TOKEN" environment variable.')
 
-        rest_client = api.RestClient(timeout=120)
+        rest_client = api.RestClient(timeout=120,
+                                     cache=self.cache_responses)
         self._packagecloud_client = PackagecloudAPI(client=rest_client)
 
     @gen.coroutine
@@ -141,8 +154,8 @@ class PackagecloudBase(base.BaseActor):
         packages_list_to_delete = {package['name'] for package in packages
                                    if pattern.match(package['name'])}
 
-        self.log.debug('List of packages matching regex (%s): %s' %
-                       (regex, packages_list_to_delete))
+        self.log.debug('List of packages matching regex (%s): %s',
+                       regex, packages_list_to_delete)
 
         return packages_list_to_delete
 
@@ -178,8 +191,8 @@ class PackagecloudBase(base.BaseActor):
             # the repo -- this variable will then be counted down as we loop,
             # to prevent us from deleting more than 'number_to_keep' packages.
             number_in_repo = len(package_versions)
-            self.log.debug('Scanning %s versions (%s)' %
-                           (name, number_in_repo))
+            self.log.debug('Scanning %s versions (%s)',
+                           name, number_in_repo)
 
             for package in package_versions:
                 # Safety check -- if there aren't more than the number_to_keep
@@ -188,8 +201,8 @@ class PackagecloudBase(base.BaseActor):
                 # packages_list_to_delete.
                 if number_in_repo <= number_to_keep:
                     self.log.debug(
-                        '%s has only %s package versions left, skipping'
-                        % (name, number_in_repo))
+                        '%s has only %s package versions left, skipping',
+                        name, number_in_repo)
                     break
 
                 # If older_than (time in seconds) was supplied, figure out how
@@ -202,9 +215,9 @@ class PackagecloudBase(base.BaseActor):
                     allowed_age = datetime.timedelta(seconds=older_than)
                     if package_age <= allowed_age:
                         self.log.debug(
-                            '%s/%s is only %s old, skipping deletion' %
-                            (package['distro_version'],
-                             package['name'], package_age))
+                            '%s/%s is only %s old, skipping deletion',
+                            package['distro_version'],
+                            package['name'], package_age)
                         continue
 
                 # Finally if we got here, then we have enough packages left in
@@ -213,9 +226,9 @@ class PackagecloudBase(base.BaseActor):
                 msg = '%s/%s/%s' % (
                     repo, package['distro_version'], package['filename'])
                 if self._dry:
-                    self.log.info('Would have deleted %s' % msg)
+                    self.log.info('Would have deleted %s', msg)
                 else:
-                    self.log.info('Deleting %s' % msg)
+                    self.log.info('Deleting %s', msg)
 
                     yield self._packagecloud_client.delete(
                         token=TOKEN, account=ACCOUNT, repo=repo,
@@ -244,7 +257,7 @@ class PackagecloudBase(base.BaseActor):
                              (package['distro_version'], package['filename'])
                              for package in packages_deleted]
             files_left = list(set(all_files) - set(deleted_files))
-            self.log.debug('%s remaining packages: %s' % (name, files_left))
+            self.log.debug('%s remaining packages: %s', name, files_left)
 
         raise gen.Return(all_packages_deleted)
 
@@ -301,10 +314,7 @@ class Delete(PackagecloudBase):
 
     desc = "Deleting {repo}/{packages_to_delete} (keeping {number_to_keep})"
 
-    def __init__(self, *args, **kwargs):
-        """Check required environment variables."""
-        super(Delete, self).__init__(*args, **kwargs)
-
+    def _prepare(self):
         try:
             re.compile(self.option('packages_to_delete'))
         except re.error:
@@ -388,6 +398,10 @@ class WaitForPackage(PackagecloudBase):
     """Searches for a package that matches `name` and `version` until found or
     a timeout occurs.
 
+    Each search after the first is a conditional GET of the package list, so
+    while the list has not changed, packagecloud only answers with a short
+    `304 Not Modified`.
+
     **Options**
 
     :name:
@@ -431,10 +445,10 @@ class WaitForPackage(PackagecloudBase):
 
     desc = "Waiting for {repo}/{name}@{version} (up to {sleep}s)"
 
-    def __init__(self, *args, **kwargs):
-        """Check required environment variables."""
-        super(WaitForPackage, self).__init__(*args, **kwargs)
+    # We poll the same (large) package list over and over again
+    cache_responses = True
 
+    def _prepare(self):
         try:
             re.compile(self.option('name'))
         except re.error:
@@ -461,7 +475,7 @@ class WaitForPackage(PackagecloudBase):
         """
 
         all_packages = yield self._get_all_packages(repo=repo)
-        self.log.debug('Found all packages: %s' % all_packages)
+        self.log.debug('Found all packages: %s', all_packages)
 
         name_pattern = re.compile(name)
         version_pattern = re.compile(version)
@@ -476,8 +490,8 @@ class WaitForPackage(PackagecloudBase):
     def _execute(self):
         """Execute method for the WaitForPackage actor"""
         while True:
-            self.log.info('Searching for %s %s...' %
-                          (self.option('name'), self.option('version')))
+            self.log.info('Searching for %s %s...',
+                          self.option('name'), self.option('version'))
 
             matched_packages = yield self._search(
                 repo=self.option('repo'),
@@ -488,6 +502,6 @@ class WaitForPackage(PackagecloudBase):
                 self.log.info('Found it!')
                 raise gen.Return()
 
-            self.log.debug('Not found, sleeping for (%s)'
-                           % self.option('sleep'))
+            self.log.debug('Not found, sleeping for (%s)',
+                           self.option('sleep'))
             yield gen.sleep(self.option('sleep'))
@@ -154,11 +154,11 @@ class Pause(PingdomBase):
         check = yield self._get_check()
 
         if self._dry:
-            self.log.info('Would pause %s (%s) pingdom check.' % (
-                check['name'], check['hostname']))
+            self.log.info('Would pause %s (%s) pingdom check.',
+                          check['name'], check['hostname'])
             raise gen.Return()
 
-        self.log.info('Pausing %s' % check['name'])
+        self.log.info('Pausing %s', check['name'])
         yield self._pingdom_client.check(
             check_id=check['id']).http_put(paused='true')
 
@@ -197,10 +197,10 @@ class Unpause(PingdomBase):
         check = yield self._get_check()
 
         if self._dry:
-            self.log.info('Would unpause %s (%s) pingdom check.' % (
-                check['name'], check['hostname']))
+            self.log.info('Would unpause %s (%s) pingdom check.',
+                          check['name'], check['hostname'])
             raise gen.Return()
 
-        self.log.info('Unpausing %s' % check['name'])
+        self.log.info('Unpausing %s', check['name'])
         yield self._pingdom_client.check(
             check_id=check['id']).http_put(paused='false')
@@ -25,6 +25,7 @@ import requests
 from kingpin.actors import exceptions
 from kingpin.actors.utils import dry
 from kingpin.actors.rightscale import base
+from kingpin.actors.support import plan
 from kingpin.constants import SchemaCompareBase
 from kingpin.constants import REQUIRED
 
@@ -208,6 +209,7 @@ class Create(AlertsBaseActor):
             self._array_raise_on = None
             self._array_allow_mock = True
 
+    def _prepare(self):
         if self.option('vote_type') not in ('grow', 'shrink', None):
             raise exceptions.InvalidOptions(
                 'vote_type must be either: grow, shrink, None')
@@ -220,7 +222,7 @@ class Create(AlertsBaseActor):
             self.option('array'),
             raise_on=self._array_raise_on,
             allow_mock=self._array_allow_mock)
-        self.log.info('Found %s (%s)' % (array.soul['name'], array.href))
+        self.log.info('Found %s (%s)', array.soul['name'], array.href)
 
         # Add all of the required parameters to a dictionary
         params = {
@@ -245,12 +247,12 @@ class Create(AlertsBaseActor):
                 params[optional] = self.option(optional)
 
         params = self._generate_rightscale_params('alert_spec', params)
-        self.log.debug('Generated params: %s' % params)
+        self.log.debug('Generated params: %s', params)
 
         if self._dry:
             # In dry run mode, just log out what we would have done.
-            self.log.info('Would have created the alert spec \"%s\" on %s' %
-                          (self.option('name'), array.soul['name']))
+            self.log.info('Would have created the alert spec \"%s\" on %s',
+                          self.option('name'), array.soul['name'])
             raise gen.Return()
 
         # We're really doin this. If we get a known exception back, handle
@@ -335,8 +337,8 @@ class Destroy(AlertsBaseActor):
             raise_on=self._array_raise_on,
             allow_mock=self._array_allow_mock)
 
-        self.log.info('Found %s (%s) to delete alert spec from' %
-                      (array.soul['name'], array.href))
+        self.log.info('Found %s (%s) to delete alert spec from',
+                      array.soul['name'], array.href)
 
         # Find the AlertSpec on this server, if it exists.
         alerts = yield self._find_alert_spec(
@@ -357,16 +359,16 @@ class Destroy(AlertsBaseActor):
 
             if self._dry:
                 # In dry run mode, just log out what we would have done.
-                self.log.info('Would have deleted alert \"%s\" (%s) on %s' %
-                              (spec.soul['name'],
-                               spec.href,
-                               array.soul['name']))
+                self.log.info('Would have deleted alert \"%s\" (%s) on %s',
+                              spec.soul['name'],
+                              spec.href,
+                              array.soul['name'])
             else:
                 # We're really doin this!
-                self.log.info('Deleting alert \"%s\" (%s) on %s' %
-                              (spec.soul['name'],
-                               spec.href,
-                               array.soul['name']))
+                self.log.info('Deleting alert \"%s\" (%s) on %s',
+                              spec.soul['name'],
+                              spec.href,
+                              array.soul['name'])
                 deletes.append(self._client.destroy_resource(spec))
 
         # Wait for the deletes to finish
@@ -512,6 +514,11 @@ class AlertSpecBase(base.EnsurableRightScaleBaseActor):
         else:
             log.debug('Got AlertSpec: %s' % self.existing_spec)
 
+    @gen.coroutine
+    def _plan_fingerprint(self):
+        soul = self.existing_spec.soul if self.existing_spec else None
+        raise gen.Return(plan.fingerprint(soul))
+
     @gen.coroutine
     def _get_state(self):
         if self.existing_spec:
@@ -25,9 +25,12 @@ calls.
 
 **Async vs Threads**
 
-In the future, this will get re-factored to use a native Tornado
-AsyncHTTPClient object. The methods themselves will stay the same, but the
-underlying private methods will change.
+The `RightScale` object wraps the synchronous python-rightscale library, and
+executes every call on a small pool of threads. The `AsyncRightScale` object
+provides the exact same methods, but the commonly used operations (finding
+arrays and resources, listing instances, running executables, polling tasks,
+reading audit entries, managing tags and inputs) are made natively with the
+Tornado AsyncHTTPClient and no longer queue up behind the thread pool.
 
 The methods in this object are specifically designed to support common
 operations that the RightScale Actor objects need to do. Operations like
@@ -50,18 +53,25 @@ from datetime import datetime
 from os import path
 import functools
 import logging
+import threading
+import time
+import urllib
 
 from retrying import retry as sync_retry
+from rightscale import httpclient as rightscale_httpclient
 from rightscale import util as rightscale_util
 from tornado import concurrent
 from tornado import gen
+from tornado import httpclient
 from tornado import ioloop
+from tornado import locks
 import requests
 import rightscale
 import simplejson
 
 from kingpin import utils
 from kingpin.actors.rightscale import settings
+from kingpin.actors.support import readcache
 
 log = logging.getLogger(__name__)
 
@@ -73,11 +83,24 @@ __author__ = 'Matt Wise <matt@nextdoor.com>'
 
 DEFAULT_ENDPOINT = 'https://my.rightscale.com'
 
+# Maximum number of simultaneous threads (and therefore simultaneous API
+# calls) that we allow against the RightScale API.
+THREADPOOL_SIZE = 10
+
 # This executor is used by the tornado.concurrent.run_on_executor()
 # decorator. We would like this to be a class variable so its shared
 # across RightScale objects, but we see testing IO errors when we
 # do this.
-EXECUTOR = concurrent.futures.ThreadPoolExecutor(10)
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(THREADPOOL_SIZE)
+
+# Shared rightscale.RightScale client objects, keyed by (token, endpoint).
+# See get_shared_client() below.
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+# Shared AsyncSession objects, keyed by (token, endpoint). These are only
+# ever touched from the IOLoop thread, so they need no lock.
+_SESSIONS = {}
 
 
 class RightScaleError(Exception):
@@ -106,6 +129,86 @@ class ServerArrayException(Exception):
     """Raised when an operation on or looking for a ServerArray fails"""
 
 
+class SharedHTTPClient(rightscale_httpclient.HTTPClient):
+
+    """Thread-safe, connection-pooling python-rightscale HTTPClient.
+
+    The stock HTTPClient disables HTTP keepalives entirely and checks the
+    expiration of its OAuth token without any locking. When a single client is
+    shared by many threads (see get_shared_client()), this causes every
+    thread to open a brand new TCP/TLS connection for every call, and several
+    threads to simultaneously exchange the same refresh token when the access
+    token expires.
+
+    This client re-enables keepalives with a connection pool sized to our
+    thread pool, and refreshes the OAuth token exactly once (under a lock)
+    shortly *before* it expires rather than after.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SharedHTTPClient, self).__init__(*args, **kwargs)
+        self._login_lock = threading.Lock()
+
+        # Undo the 'Connection: close' header set by the parent class, and
+        # size the connection pool so that every thread in the EXECUTOR can
+        # hold its own open connection to the API.
+        self.s.headers.pop('Connection', None)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=THREADPOOL_SIZE)
+        self.s.mount('https://', adapter)
+        self.s.mount('http://', adapter)
+
+    def _token_expiring(self):
+        """Returns True if our OAuth token is (nearly) expired."""
+        margin = settings.TOKEN_REFRESH_MARGIN
+        return time.time() > (self.auth_expires_at - margin)
+
+    def request(self, method, path='/', url=None, ignore_codes=[], **kwargs):
+        """Thread-safe version of HTTPClient.request().
+
+        Only one thread is allowed to refresh the OAuth token at a time. Any
+        other threads that were waiting on the lock will find a fresh token
+        once they get it, and skip the login entirely.
+        """
+        if self._token_expiring():
+            with self._login_lock:
+                if self._token_expiring():
+                    self.login()
+
+        return self._request(method, path, url, ignore_codes, **kwargs)
+
+
+def get_shared_client(token, endpoint=DEFAULT_ENDPOINT):
+    """Returns a shared rightscale.RightScale client object.
+
+    Every RightScale actor used to create its own rightscale.RightScale client
+    object, which meant that every actor exchanged the refresh token for its
+    own OAuth token and opened its own connections to the API. Instead, we
+    hand out a single client per (token, endpoint) pair.
+
+    Args:
+        token: A RightScale RefreshToken
+        endpoint: API URL Endpoint
+
+    Returns:
+        <rightscale.RightScale object>
+    """
+    key = (token, endpoint)
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            client = rightscale.RightScale(refresh_token=token,
+                                           api_endpoint=endpoint)
+            client.client = SharedHTTPClient(
+                endpoint,
+                {'X-API-Version': '1.5'},
+                client.client.oauth_path,
+                token)
+            _CLIENTS[key] = client
+            log.debug('Created shared RightScale client for %s', endpoint)
+
+        return _CLIENTS[key]
+
+
 class RightScale(object):
 
     # Get references to existing objects that are used by the
@@ -122,16 +225,15 @@ class RightScale(object):
         """
         self._token = token
         self._endpoint = endpoint
-        self._client = rightscale.RightScale(refresh_token=self._token,
-                                             api_endpoint=self._endpoint)
+        self._client = get_shared_client(self._token, self._endpoint)
 
         # Quiet down the urllib requests library, its noisy even in
         # INFO mode and muddies up the logs.
         r_log = logging.getLogger('requests.packages.urllib3.connectionpool')
         r_log.setLevel(logging.WARNING)
 
-        log.debug('%s initialized (token=<hidden>, endpoint=%s)' %
-                  (self.__class__.__name__, endpoint))
+        log.debug('%s initialized (token=<hidden>, endpoint=%s)',
+                  self.__class__.__name__, endpoint)
 
     def get_res_id(self, resource):
         """Returns the Resource ID of a given RightScale Resource object.
@@ -158,14 +260,14 @@ class RightScale(object):
         Returns:
             <rightscale.Resource object(s)>
         """
-        log.debug('Searching for ServerArrays matching: %s (exact match: %s)' %
-                  (name, exact))
+        log.debug('Searching for ServerArrays matching: %s (exact match: %s)',
+                  name, exact)
 
         found_arrays = rightscale_util.find_by_name(
             self._client.server_arrays, name, exact=exact)
 
         if not found_arrays:
-            log.debug('ServerArray matching "%s" not found' % name)
+            log.debug('ServerArray matching "%s" not found', name)
             return
 
         if isinstance(found_arrays, list):
@@ -173,7 +275,7 @@ class RightScale(object):
         else:
             names = [found_arrays.soul['name']]
 
-        log.debug('Got ServerArray(s): %s' % ', '.join(names))
+        log.debug('Got ServerArray(s): %s', ', '.join(names))
 
         return found_arrays
 
@@ -206,7 +308,7 @@ class RightScale(object):
         """
         cookbook = name.split('::')[0]
 
-        log.debug('Searching for Cookbooks matching: %s' % name)
+        log.debug('Searching for Cookbooks matching: %s', name)
         found_cookbooks = self._client.cookbooks.index(
             params={'filter[]': ['name==%s' % cookbook],
                     'view': 'extended'})
@@ -215,13 +317,13 @@ class RightScale(object):
             found_cookbooks)
 
         if not found_recipes:
-            log.debug('Recipe matching "%s" could not be found.' % name)
-            log.debug('Found cookbooks %s' % found_cookbooks)
+            log.debug('Recipe matching "%s" could not be found.', name)
+            log.debug('Found cookbooks %s', found_cookbooks)
             return
 
         recipe = found_recipes[0]
 
-        log.debug('Found recipe: %s' % recipe)
+        log.debug('Found recipe: %s', recipe)
 
         return recipe
 
@@ -238,23 +340,60 @@ class RightScale(object):
         Return:
             rightscale.Resource object
         """
-        log.debug('Searching for RightScript matching: %s' % name)
+        log.debug('Searching for RightScript matching: %s', name)
         found_script = rightscale_util.find_by_name(
             self._client.right_scripts, name, exact=True)
 
         if not found_script:
-            log.debug('RightScript matching "%s" could not be found.' % name)
+            log.debug('RightScript matching "%s" could not be found.', name)
             return
 
-        log.debug('Got RightScript: %s' % found_script)
+        log.debug('Got RightScript: %s', found_script)
 
         return found_script
 
+    @gen.coroutine
+    def find_by_name_and_keys(self, collection, exact=True, **kwargs):
+        """Search for a RightScale resource by name, and optional keys.
+
+        The searches of a dry run may be answered by the read cache (see
+        `kingpin.actors.support.readcache`).
+
+        Args:
+            collection: RightScale.<xxx> resource object
+            exact: If True, returns the first match. If False, returns a list
+                of all returned resources.
+            **kwargs: Any additional keys-and-values to use in the search.
+
+        Returns:
+            One RightScale Resource Object or a List of objects.
+        """
+        found = yield readcache.cached(
+            'find_by_name_and_keys',
+            [self._endpoint, self._token, collection.path, exact, kwargs],
+            lambda: self._find_by_name_and_keys(collection, exact, **kwargs),
+            encode=self._freeze, decode=self._thaw)
+        raise gen.Return(found)
+
+    def _freeze(self, found):
+        """Turns found resources into (picklable) soul and path pairs."""
+        if isinstance(found, list):
+            return [self._freeze(resource) for resource in found]
+        return (found.soul, found.path)
+
+    def _thaw(self, frozen):
+        """Turns the output of _freeze() back into resources."""
+        if isinstance(frozen, list):
+            return [self._thaw(resource) for resource in frozen]
+        soul, path = frozen
+        return rightscale.rightscale.Resource(
+            soul, path, client=self._client.client)
+
     @concurrent.run_on_executor
     @sync_retry(**settings.RETRYING_SETTINGS)
     @rightscale_error_logger
     @utils.exception_logger
-    def find_by_name_and_keys(self, collection, exact=True, **kwargs):
+    def _find_by_name_and_keys(self, collection, exact=True, **kwargs):
         """Search for a RightScale resource by name, and optional keys.
 
         This code is blatently stolen from rightscale.util.find_by_name and
@@ -410,10 +549,10 @@ class RightScale(object):
         Return:
             <rightscale.Resource object>
         """
-        log.debug('Cloning ServerArray %s' % array.soul['name'])
+        log.debug('Cloning ServerArray %s', array.soul['name'])
         source_id = self.get_res_id(array)
         new_array = self._client.server_arrays.clone(res_id=source_id)
-        log.debug('New ServerArray %s created!' % new_array.soul['name'])
+        log.debug('New ServerArray %s created!', new_array.soul['name'])
         return new_array
 
     @concurrent.run_on_executor
@@ -430,7 +569,7 @@ class RightScale(object):
         Args:
             array: ServerArray Resource Object
         """
-        log.debug('Destroying ServerArray %s' % array.soul['name'])
+        log.debug('Destroying ServerArray %s', array.soul['name'])
         array_id = self.get_res_id(array)
         self._client.server_arrays.destroy(res_id=array_id)
         log.debug('Array Destroyed')
@@ -457,7 +596,7 @@ class RightScale(object):
             <updated rightscale array object>
         """
 
-        log.debug('Resource: %s' % resource)
+        log.debug('Resource: %s', resource)
         resource.self.update(params=params)
         updated_resource = resource.self.show()
         return updated_resource
@@ -503,8 +642,8 @@ class RightScale(object):
                 { 'inputs[ELB_NAME]': 'text:foobar' }
         """
 
-        log.debug('Patching ServerArray (%s) with new inputs: %s' %
-                  (array.soul['name'], inputs))
+        log.debug('Patching ServerArray (%s) with new inputs: %s',
+                  array.soul['name'], inputs)
 
         next_inst = array.next_instance.show()
         next_inst.inputs.multi_update(params=inputs)
@@ -544,7 +683,7 @@ class RightScale(object):
         if count > 1:
             params = {'count': count}
 
-        log.debug('Launching a new instance of ServerArray %s' %
+        log.debug('Launching a new instance of ServerArray %s',
                   array.soul['name'])
         array_id = self.get_res_id(array)
         return self._client.server_arrays.launch(
@@ -575,7 +714,7 @@ class RightScale(object):
         Returns:
             [<list of rightscale.Resource objects>]
         """
-        log.debug('Searching for current instances of ServerArray (%s)' %
+        log.debug('Searching for current instances of ServerArray (%s)',
                   array.soul['name'])
         params = {'filter[]': filters}
         return array.current_instances.index(params=params)
@@ -601,7 +740,7 @@ class RightScale(object):
         Return:
             <task object for termination request>
         """
-        log.debug('Terminating all instances of ServerArray (%s)' %
+        log.debug('Terminating all instances of ServerArray (%s)',
                   array.soul['name'])
         array_id = self.get_res_id(array)
         try:
@@ -674,13 +813,13 @@ class RightScale(object):
                 status = False
                 break
 
-            loc_log.debug('Task (%s) status: %s (updated at: %s)' %
-                          (output.path, output.soul['summary'], stamp))
+            loc_log.debug('Task (%s) status: %s (updated at: %s)',
+                          output.path, output.soul['summary'], stamp)
 
             yield utils.tornado_sleep(min(sleep, 5))
 
-        loc_log.debug('Task (%s) status: %s (updated at: %s)' %
-                      (output.path, output.soul['summary'], stamp))
+        loc_log.debug('Task (%s) status: %s (updated at: %s)',
+                      output.path, output.soul['summary'], stamp)
 
         if timeout_id:
             utils.clear_repeating_log(timeout_id)
@@ -711,8 +850,8 @@ class RightScale(object):
         if not audit_logs:
             loc_log.error('No audit logs for %s' % instance)
 
-        loc_log.debug('Task finished, return value: %s, summary: %s' %
-                      (status, summary))
+        loc_log.debug('Task finished, return value: %s, summary: %s',
+                      status, summary)
 
         raise gen.Return(status)
 
@@ -760,15 +899,15 @@ class RightScale(object):
             'end_date': end
         })
 
-        log.debug('Found %s audit logs.' % len(all_entries))
+        log.debug('Found %s audit logs.', len(all_entries))
 
         logs = []
         for entry in all_entries:
             summary = entry.soul['summary']
             if match and match not in summary:
-                log.debug('Skipping details for "%s"' % summary)
+                log.debug('Skipping details for "%s"', summary)
                 continue
-            log.debug('Fetching details for "%s"' % summary)
+            log.debug('Fetching details for "%s"', summary)
 
             # grabbing raw output because RightScale doesn't reply via JSON
             # when accessing details of a log.
@@ -823,7 +962,7 @@ class RightScale(object):
 
             params['right_script_href'] = script.href
 
-        log.debug('Executing %s with params: %s' % (script_type, params))
+        log.debug('Executing %s with params: %s', script_type, params)
 
         # Walk through the list of instances and fire off the execution on each
         # instance. For each execution, we will store a reference to the
@@ -833,7 +972,7 @@ class RightScale(object):
         # iterate over the responses to these requests.
         task_pairs = []
         for i in instances:
-            log.debug('Executing %s on %s' % (name, i.soul['name']))
+            log.debug('Executing %s on %s', name, i.soul['name'])
             url = '%s/run_executable' % i.links['self']
             req = self.make_generic_request(url, post=params)
             task_pairs.append((i, req))
@@ -890,7 +1029,7 @@ class RightScale(object):
             <rightscale.Resource objects>
         """
         # Make the initial web call
-        log.debug('Making generic API call: %s (%s)' % (url, post))
+        log.debug('Making generic API call: %s (%s)', url, post)
 
         # Here we're reaching into the rightscale client library and getting
         # access directly to its requests client object.
@@ -923,3 +1062,410 @@ class RightScale(object):
             client=self._client.client)
 
         return resource
+
+
+class AsyncSession(object):
+
+    """OAuth-authenticated Tornado HTTP session for the RightScale 1.5 API.
+
+    Exchanges the refresh token for an access token (once, no matter how many
+    coroutines are making calls at the time), and makes the raw API calls with
+    the Tornado AsyncHTTPClient. Server-side errors and throttling are retried
+    with an exponential backoff.
+
+    Args:
+        token: A RightScale RefreshToken
+        endpoint: API URL Endpoint
+        http_client: Tornado AsyncHTTPClient object (optional)
+    """
+
+    def __init__(self, token, endpoint=DEFAULT_ENDPOINT, http_client=None):
+        self._token = token
+        self._endpoint = endpoint.rstrip('/')
+        self._http_client = http_client
+        self._access_token = None
+        self._expires_at = 0
+        self._login_lock = locks.Lock()
+
+    def _get_http_client(self):
+        return self._http_client or httpclient.AsyncHTTPClient()
+
+    def _token_expiring(self):
+        margin = settings.TOKEN_REFRESH_MARGIN
+        return time.time() > (self._expires_at - margin)
+
+    def _url(self, path):
+        if path.startswith('http'):
+            return path
+        return self._endpoint + path
+
+    @gen.coroutine
+    def login(self):
+        """Exchanges our refresh token for a fresh OAuth access token."""
+        with (yield self._login_lock.acquire()):
+            # Someone else may have refreshed the token while we were
+            # waiting on the lock.
+            if not self._token_expiring():
+                raise gen.Return()
+
+            log.debug('Logging into RightScale...')
+            body = urllib.urlencode({'grant_type': 'refresh_token',
+                                     'refresh_token': self._token})
+            request = httpclient.HTTPRequest(
+                url=self._url(rightscale.rightscale.OAUTH2_RES_PATH),
+                method='POST',
+                body=body,
+                headers={'X-API-Version': '1.5',
+                         'Accept': 'application/json'})
+            response = yield self._get_http_client().fetch(
+                request, raise_error=False)
+
+            if response.code != 200:
+                raise RightScaleError('Unable to log into RightScale: %s' %
+                                      (response.body or response.error))
+
+            raw = simplejson.loads(response.body)
+            self._access_token = raw['access_token']
+            self._expires_at = time.time() + int(raw['expires_in'])
+            log.debug('Auth Token expires in %s(s)', raw['expires_in'])
+
+    @gen.coroutine
+    def request(self, method, path, params=None, ignore_codes=()):
+        """Makes an authenticated API call.
+
+        Args:
+            method: GET/PUT/POST/DELETE
+            path: Path (or full URL) of the API call
+            params: Dict or list of tuples of RightScale-style parameters.
+                    Sent as URL arguments for GET/DELETE calls, and as a form
+                    body for POST/PUT calls.
+            ignore_codes: HTTP error codes that should not raise an exception.
+
+        Returns:
+            <rightscale.httpclient.HTTPResponse wrapped tornado response>
+
+        Raises:
+            RightScaleError
+        """
+        url = self._url(path)
+        body = None
+        if params:
+            encoded = urllib.urlencode(params, doseq=True)
+            if method in ('GET', 'DELETE'):
+                url = '%s?%s' % (url, encoded)
+            else:
+                body = encoded
+        if method in ('POST', 'PUT') and body is None:
+            body = ''
+
+        attempts = settings.ASYNC_RETRY_ATTEMPTS
+        for i in xrange(1, attempts + 1):
+            if self._token_expiring():
+                yield self.login()
+
+            request = httpclient.HTTPRequest(
+                url=url,
+                method=method,
+                body=body,
+                headers={'X-API-Version': '1.5',
+                         'Accept': 'application/json',
+                         'Authorization': 'Bearer %s' % self._access_token})
+            response = yield self._get_http_client().fetch(
+                request, raise_error=False)
+
+            if i == attempts:
+                break
+
+            # Our token was revoked or expired early. Get a new one.
+            if response.code == 401:
+                self._expires_at = 0
+                continue
+
+            # 599 is a Tornado timeout or connection failure
+            if response.code in (429, 599) or response.code >= 500:
+                log.debug('%s %s returned %s, retrying',
+                          method, url, response.code)
+                delay = settings.ASYNC_RETRY_DELAY * (2 ** (i - 1))
+                yield utils.tornado_sleep(min(delay, 30))
+                continue
+
+            break
+
+        if response.code >= 400 and response.code not in ignore_codes:
+            log.error('Error in RightScale API Call: %s %s: %s' %
+                      (method, url, response.code))
+            raise RightScaleError('RightScale Error: %s' %
+                                  (response.body or response.error))
+
+        raise gen.Return(rightscale_httpclient.HTTPResponse(response))
+
+
+def get_shared_session(token, endpoint=DEFAULT_ENDPOINT):
+    """Returns a shared AsyncSession for the supplied token and endpoint.
+
+    Args:
+        token: A RightScale RefreshToken
+        endpoint: API URL Endpoint
+
+    Returns:
+        AsyncSession object
+    """
+    key = (token, endpoint)
+    if key not in _SESSIONS:
+        _SESSIONS[key] = AsyncSession(token, endpoint)
+    return _SESSIONS[key]
+
+
+class AsyncRightScale(RightScale):
+
+    """Natively asynchronous version of the `RightScale` object.
+
+    The most common (and the most heavily parallelized) operations are
+    re-implemented here on top of an `AsyncSession`. The returned objects are
+    regular rightscale.Resource objects, so they can be passed back into any
+    of the other methods -- including the ones that still run on threads
+    (creating, committing and destroying resources).
+
+    Args:
+        token: A RightScale RefreshToken
+        endpoint: API URL Endpoint
+    """
+
+    def __init__(self, token, endpoint=DEFAULT_ENDPOINT):
+        super(AsyncRightScale, self).__init__(token, endpoint)
+        self._session = get_shared_session(token, endpoint)
+
+    def _to_resource(self, response, path):
+        """Turns an API response into rightscale.Resource object(s).
+
+        Args:
+            response: rightscale.httpclient.HTTPResponse object
+            path: The path that was requested
+
+        Returns:
+            A rightscale.Resource, a list of them, or None if the response
+            had no JSON body.
+        """
+        try:
+            soul = simplejson.loads(response.body)
+        except ValueError:
+            return None
+
+        client = self._client.client
+        if rightscale.rightscale.COLLECTION_TYPE in response.content_type:
+            return [rightscale.rightscale.Resource(r, path, response, client)
+                    for r in soul]
+
+        return rightscale.rightscale.Resource(soul, path, response, client)
+
+    @gen.coroutine
+    def _get(self, path, params=None):
+        response = yield self._session.request('GET', path, params=params)
+        raise gen.Return(self._to_resource(response, path))
+
+    @gen.coroutine
+    def _post(self, path, params=None, ignore_codes=()):
+        """POSTs to a path, and follows any returned Location header.
+
+        Returns:
+            The rightscale.Resource that was created/returned, or None.
+        """
+        response = yield self._session.request(
+            'POST', path, params=params, ignore_codes=ignore_codes)
+
+        if response.code in ignore_codes:
+            raise gen.Return()
+
+        loc = response.headers.get('location', None)
+        if loc:
+            ret = yield self._get(loc)
+            raise gen.Return(ret)
+
+        raise gen.Return(self._to_resource(response, path))
+
+    @staticmethod
+    def _exact_match(found, name):
+        """Mimics rightscale.util.find_by_name(exact=True)."""
+        for resource in found or []:
+            if resource.soul['name'] == name:
+                return resource
+
+    @gen.coroutine
+    def find_server_arrays(self, name, exact=True):
+        log.debug('Searching for ServerArrays matching: %s (exact match: %s)',
+                  name, exact)
+
+        found = yield self._get('/api/server_arrays',
+                                {'filter[]': ['name==%s' % name]})
+        if exact:
+            found = self._exact_match(found, name)
+
+        if not found:
+            log.debug('ServerArray matching "%s" not found', name)
+            raise gen.Return()
+
+        raise gen.Return(found)
+
+    @gen.coroutine
+    def show(self, resource):
+        ret = yield self._get(resource.path)
+        raise gen.Return(ret)
+
+    @gen.coroutine
+    def find_right_script(self, name):
+        log.debug('Searching for RightScript matching: %s', name)
+        found = yield self._get('/api/right_scripts',
+                                {'filter[]': ['name==%s' % name]})
+        found_script = self._exact_match(found, name)
+
+        if not found_script:
+            log.debug('RightScript matching "%s" could not be found.', name)
+            raise gen.Return()
+
+        raise gen.Return(found_script)
+
+    @gen.coroutine
+    def _find_by_name_and_keys(self, collection, exact=True, **kwargs):
+        filter_keys = ['%s==%s' % (key, val) for key, val in kwargs.items()]
+        found = yield self._get(collection.path,
+                                {'filter[]': sorted(filter_keys)})
+
+        if not exact and len(found) > 0:
+            raise gen.Return(found)
+
+        if len(found) < 1:
+            raise gen.Return([])
+
+        if len(found) == 1:
+            raise gen.Return(found[0])
+
+        raise gen.Return(found)
+
+    @gen.coroutine
+    def add_resource_tags(self, res, tags):
+        params = [('resource_hrefs[]', res.href)]
+        params.extend(('tags[]', tag) for tag in tags)
+        ret = yield self._post('/api/tags/multi_add', params)
+        raise gen.Return(ret)
+
+    @gen.coroutine
+    def delete_resource_tags(self, res, tags):
+        params = [('resource_hrefs[]', res.href)]
+        params.extend(('tags[]', tag) for tag in tags)
+        ret = yield self._post('/api/tags/multi_delete', params)
+        raise gen.Return(ret)
+
+    @gen.coroutine
+    def get_resource_tags(self, res):
+        params = [('resource_hrefs[]', res.href)]
+        raw = yield self._post('/api/tags/by_resource', params)
+        raise gen.Return([tag['name'] for tag in raw[0].soul['tags']])
+
+    @gen.coroutine
+    def update(self, resource, params):
+        log.debug('Resource: %s', resource)
+        yield self._session.request('PUT', resource.href, params=params)
+        updated_resource = yield self._get(resource.href)
+        raise gen.Return(updated_resource)
+
+    @gen.coroutine
+    def get_server_array_inputs(self, array):
+        instance = yield self._get(array.links['next_instance'])
+        all_inputs = yield self._get(instance.links['inputs'])
+        raise gen.Return(all_inputs)
+
+    @gen.coroutine
+    def update_server_array_inputs(self, array, inputs):
+        log.debug('Patching ServerArray (%s) with new inputs: %s',
+                  array.soul['name'], inputs)
+
+        next_inst = yield self._get(array.links['next_instance'])
+        yield self._session.request(
+            'PUT', '%s/multi_update' % next_inst.links['inputs'],
+            params=inputs)
+
+    @gen.coroutine
+    def launch_server_array(self, array, count=1):
+        if not count or count < 1:
+            raise gen.Return()
+
+        params = None
+        if count > 1:
+            params = {'count': count}
+
+        log.debug('Launching a new instance of ServerArray %s',
+                  array.soul['name'])
+        ret = yield self._post('%s/launch' % array.href, params)
+        raise gen.Return(ret)
+
+    @gen.coroutine
+    def get_server_array_current_instances(
+            self, array, filters=['state<>terminated']):
+        log.debug('Searching for current instances of ServerArray (%s)',
+                  array.soul['name'])
+        ret = yield self._get(array.links['current_instances'],
+                              {'filter[]': filters})
+        raise gen.Return(ret)
+
+    @gen.coroutine
+    def terminate_server_array_instances(self, array):
+        log.debug('Terminating all instances of ServerArray (%s)',
+                  array.soul['name'])
+
+        # A 422 means that there are no instances to terminate.
+        task = yield self._post('%s/multi_terminate' % array.href,
+                                ignore_codes=(422,))
+        raise gen.Return(task)
+
+    @gen.coroutine
+    def _get_task_info(self, task):
+        ret = yield self._get(task.href)
+        raise gen.Return(ret)
+
+    @gen.coroutine
+    def get_audit_logs(self, instance, start, end, match=None):
+        href = instance.links['self']
+        all_entries = yield self._get('/api/audit_entries', {
+            'filter[]': ['auditee_href==%s' % href],
+            'limit': 10,
+            'start_date': start,
+            'end_date': end
+        })
+
+        log.debug('Found %s audit logs.', len(all_entries))
+
+        # Fetch the details of all of the matching entries at once. The
+        # details are raw text, not JSON.
+        details = []
+        for entry in all_entries:
+            summary = entry.soul['summary']
+            if match and match not in summary:
+                log.debug('Skipping details for "%s"', summary)
+                continue
+            log.debug('Fetching details for "%s"', summary)
+            details.append(
+                self._session.request('GET', entry.links['detail']))
+
+        responses = yield details
+        raise gen.Return([r.body for r in responses])
+
+    @gen.coroutine
+    def make_generic_request(self, url, post=None):
+        log.debug('Making generic API call: %s (%s)', url, post)
+
+        if post is not None:
+            response = yield self._session.request('POST', url, params=post)
+        else:
+            response = yield self._session.request('GET', url)
+
+        loc = response.headers.get('location', None)
+        if loc:
+            response = yield self._session.request('GET', loc)
+            url = loc
+
+        resource = self._to_resource(response, url)
+        if resource is None:
+            log.debug('No JSON found. Returning the raw text')
+            raise gen.Return(response.body)
+
+        raise gen.Return(resource)
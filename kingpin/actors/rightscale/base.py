@@ -30,6 +30,12 @@ below for using each actor.
 :RIGHTSCALE_ENDPOINT:
   Your account-specific API Endpoint
   (defaults to https://my.rightscale.com)
+
+**Optional Environment Variables**
+
+:RIGHTSCALE_ASYNC_TRANSPORT:
+  If set, the most common RightScale API calls are made natively with the
+  Tornado HTTP client rather than on a thread pool.
 """
 
 from random import randint
@@ -44,6 +50,7 @@ from kingpin.actors import base
 from kingpin.actors import exceptions
 from kingpin.actors.utils import dry
 from kingpin.actors.rightscale import api
+from kingpin.actors.rightscale import settings
 
 log = logging.getLogger(__name__)
 
@@ -54,6 +61,13 @@ TOKEN = os.getenv('RIGHTSCALE_TOKEN', None)
 ENDPOINT = os.getenv('RIGHTSCALE_ENDPOINT', 'https://my.rightscale.com')
 
 
+def get_api_client():
+    """Returns the RightScale API object that our actors should use."""
+    if settings.ASYNC_TRANSPORT:
+        return api.AsyncRightScale(token=TOKEN, endpoint=ENDPOINT)
+    return api.RightScale(token=TOKEN, endpoint=ENDPOINT)
+
+
 class ArrayNotFound(exceptions.RecoverableActorFailure):
 
     """Raised when a ServerArray could not be found."""
@@ -78,7 +92,7 @@ class RightScaleBaseActor(base.BaseActor):
             raise exceptions.InvalidCredentials(
                 'Missing the "RIGHTSCALE_TOKEN" environment variable.')
 
-        self._client = api.RightScale(token=TOKEN, endpoint=ENDPOINT)
+        self._client = get_api_client()
 
     @gen.coroutine
     def _find_server_arrays(self, array_name,
@@ -116,7 +130,7 @@ class RightScaleBaseActor(base.BaseActor):
         if not array and self._dry and allow_mock:
             # Create a fake ServerArray object thats mocked up to help with
             # execution of the rest of the code.
-            self.log.info('Array "%s" not found -- creating a mock.' %
+            self.log.info('Array "%s" not found -- creating a mock.',
                           array_name)
             array = mock.MagicMock(name=array_name)
             # Give the mock a real identity and give it valid elasticity
@@ -143,7 +157,7 @@ class RightScaleBaseActor(base.BaseActor):
         # note to the user so they know whats going on.
         if isinstance(array, list):
             for a in array:
-                self.log.info('Matching array found: %s' % a.soul['name'])
+                self.log.info('Matching array found: %s', a.soul['name'])
 
         raise gen.Return(array)
 
@@ -204,13 +218,13 @@ class RightScaleBaseActor(base.BaseActor):
     @gen.coroutine
     @dry('Would have added tags to {resource.soul[name]}')
     def _add_resource_tags(self, resource, tags):
-        self.log.info('Adding tags: %s' % ','.join(tags))
+        self.log.info('Adding tags: %s', ','.join(tags))
         yield self._client.add_resource_tags(resource, tags)
 
     @gen.coroutine
     @dry('Would have deleted tags from {resource.soul[name]}')
     def _delete_resource_tags(self, resource, tags):
-        self.log.info('Removing tags: %s' % ','.join(tags))
+        self.log.info('Removing tags: %s', ','.join(tags))
         yield self._client.delete_resource_tags(resource, tags)
 
     @gen.coroutine
@@ -275,5 +289,5 @@ class EnsurableRightScaleBaseActor(
             raise exceptions.InvalidCredentials(
                 'Missing the "RIGHTSCALE_TOKEN" environment variable.')
 
-        self._client = api.RightScale(token=TOKEN, endpoint=ENDPOINT)
+        self._client = get_api_client()
         self._gather_methods()
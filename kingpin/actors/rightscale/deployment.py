@@ -79,11 +79,8 @@ class Create(DeploymentBaseActor):
             'The routing scope for tags for servers in the deployment.')
     }
 
-    def __init__(self, *args, **kwargs):
+    def _prepare(self):
         """Validate the user-supplied parameters at instantiation time."""
-
-        super(Create, self).__init__(*args, **kwargs)
-
         allowed_scopes = ('deployment', 'account', '')
 
         scope = self.option('server_tag_scope')
@@ -109,11 +106,11 @@ class Create(DeploymentBaseActor):
         params = self._generate_rightscale_params('deployment', params)
 
         if self._dry:
-            self.log.info('Would create a deployment %s' % self.option('name'))
-            self.log.debug('Deployment params: %s' % params)
+            self.log.info('Would create a deployment %s', self.option('name'))
+            self.log.debug('Deployment params: %s', params)
             raise gen.Return()
 
-        self.log.info('Creating deployment %s' % self.option('name'))
+        self.log.info('Creating deployment %s', self.option('name'))
 
         yield self._client.create_resource(
             self._client._client.deployments, params)
@@ -147,8 +144,8 @@ class Destroy(DeploymentBaseActor):
         info = (yield self._client.show(dep.self)).soul
 
         if self._dry:
-            self.log.info('Would delete deployment %s' % info['name'])
+            self.log.info('Would delete deployment %s', info['name'])
             raise gen.Return()
 
-        self.log.info('Deleting deployment %s' % info['name'])
+        self.log.info('Deleting deployment %s', info['name'])
         yield self._client.destroy_resource(dep)
@@ -114,7 +114,7 @@ class MCIBaseActor(base.RightScaleBaseActor):
         args:
             name: MCI name to search for
         """
-        self.log.debug('Searching for MCI "%s"' % name)
+        self.log.debug('Searching for MCI "%s"', name)
         mci = yield self._client.find_by_name_and_keys(
             collection=self._client._client.multi_cloud_images,
             name=name,
@@ -164,7 +164,7 @@ class MCIBaseActor(base.RightScaleBaseActor):
         # If we're in a dry run, we return back a mocked out MCI image object
         # because its passed around a bunch for the other methods.
         if self._dry:
-            self.log.warning('Would have created MCI: %s' % name)
+            self.log.warning('Would have created MCI: %s', name)
 
             mci = mock.MagicMock(name=name)
             mci.href = None
@@ -174,7 +174,7 @@ class MCIBaseActor(base.RightScaleBaseActor):
             }
             raise gen.Return(mci)
 
-        self.log.info('Creating MCI %s' % self.option('name'))
+        self.log.info('Creating MCI %s', self.option('name'))
         mci = yield self._client.create_resource(
             self._client._client.multi_cloud_images, params)
         self.changed = True
@@ -195,7 +195,7 @@ class MCIBaseActor(base.RightScaleBaseActor):
         if not mci:
             raise gen.Return()
 
-        self.log.info('Deleting MCI %s' % name)
+        self.log.info('Deleting MCI %s', name)
         yield self._client.destroy_resource(mci)
         self.changed = True
 
@@ -260,20 +260,20 @@ class MCIBaseActor(base.RightScaleBaseActor):
             prefix='multi_cloud_image_setting',
             params=params)
 
-        self.log.debug('Prepared MCI Image Definition: %s' % definition)
+        self.log.debug('Prepared MCI Image Definition: %s', definition)
         raise gen.Return(definition)
 
     @gen.coroutine
     @dry('Would have added {cloud} to {mci.soul[name]}')
     def _create_mci_setting(self, cloud, mci, params):
-        self.log.info('Adding Cloud %s to MCI %s' % (cloud, mci.soul['name']))
+        self.log.info('Adding Cloud %s to MCI %s', cloud, mci.soul['name'])
         yield self._client.create_resource(mci.settings, params)
         self.changed = True
 
     @gen.coroutine
     @dry('Would have updated the {mci_setting.links[cloud]} image settings')
     def _update_mci_setting(self, mci_setting, params):
-        self.log.info('Updating Cloud %s settings' %
+        self.log.info('Updating Cloud %s settings',
                       mci_setting.links['cloud'])
         yield self._client.update(mci_setting, params)
         self.changed = True
@@ -281,7 +281,7 @@ class MCIBaseActor(base.RightScaleBaseActor):
     @gen.coroutine
     @dry('Would have deleted the {mci_setting.links[cloud]} image settings')
     def _delete_mci_setting(self, mci_setting):
-        self.log.info('Deleting Cloud %s settings' %
+        self.log.info('Deleting Cloud %s settings',
                       mci_setting.links['cloud'])
         yield self._client.destroy_resource(mci_setting)
         self.changed = True
@@ -289,7 +289,7 @@ class MCIBaseActor(base.RightScaleBaseActor):
     @gen.coroutine
     @dry('Would have updated the MCI description to: {description}')
     def _update_description(self, mci, description, params):
-        self.log.info('Updating MCI description: %s' % description)
+        self.log.info('Updating MCI description: %s', description)
         mci = yield self._client.update(mci, params)
         self.changed = True
         raise gen.Return(mci)
@@ -438,10 +438,11 @@ class MCI(MCIBaseActor):
     desc = 'RightScale MCI {name}'
 
     def __init__(self, *args, **kwargs):
-        """Validate the user-supplied parameters at instantiation time."""
-
         super(MCI, self).__init__(*args, **kwargs)
         self.changed = False
+
+    def _prepare(self):
+        """Validate the user-supplied parameters at instantiation time."""
         self._mci_params = self._generate_rightscale_params(
             prefix='multi_cloud_image',
             params={
@@ -453,7 +454,7 @@ class MCI(MCIBaseActor):
     def _ensure_mci(self):
         state = self.option('state')
         name = self.option('name')
-        self.log.info('Ensuring that MCI %s is %s' % (name, state))
+        self.log.info('Ensuring that MCI %s is %s', name, state)
         mci = yield self._get_mci(name)
 
         if state == 'absent' and mci is None:
@@ -585,7 +586,7 @@ class MCI(MCIBaseActor):
             res=mci,
             res_type=self._client._client.multi_cloud_images,
             message=message)
-        self.log.info('Committed revision %s' % ret.soul['revision'])
+        self.log.info('Committed revision %s', ret.soul['revision'])
 
     @gen.coroutine
     def _execute(self):
@@ -24,6 +24,7 @@ from tornado import gen
 from kingpin import utils
 from kingpin.actors import exceptions
 from kingpin.actors.rightscale import base
+from kingpin.actors.support import plan
 from kingpin.actors.utils import dry
 from kingpin.constants import REQUIRED, STATE
 
@@ -108,10 +109,11 @@ class RightScript(base.EnsurableRightScaleBaseActor):
     desc = 'RightScript: {name}'
 
     def __init__(self, *args, **kwargs):
-        """Validate the user-supplied parameters at instantiation time."""
         super(RightScript, self).__init__(*args, **kwargs)
         self.changed = False
 
+    def _prepare(self):
+        """Validate the user-supplied parameters at instantiation time."""
         # The rightscale API allows you to push an invalid list of packages
         # (multiple spaces, newlines, etc). We need to sanitize the list
         # quickly first.
@@ -191,7 +193,7 @@ class RightScript(base.EnsurableRightScaleBaseActor):
             name: The name of the script to create
         """
         if self._dry:
-            self.log.warning('Would have set RightScript state: %s' %
+            self.log.warning('Would have set RightScript state: %s',
                              self.option('state'))
             self.script = None
             self.changed = True
@@ -212,6 +214,13 @@ class RightScript(base.EnsurableRightScaleBaseActor):
             self._client._client.right_scripts, self._desired_params)
         self.changed = True
 
+    @gen.coroutine
+    def _plan_fingerprint(self):
+        # Everything we manage lives in the script object and its source, both
+        # of which were already fetched by _precache().
+        soul = self.script.soul if self.script else None
+        raise gen.Return(plan.fingerprint(soul, self.source))
+
     @gen.coroutine
     def _get_state(self):
         if self.script is None:
@@ -275,7 +284,7 @@ class RightScript(base.EnsurableRightScaleBaseActor):
             res=self.script, res_type=self._client._client.right_scripts,
             params={'right_script[commit_message]': self.option('commit')})
 
-        self.log.info('Committed revision %s' % ret.soul['revision'])
+        self.log.info('Committed revision %s', ret.soul['revision'])
 
     @gen.coroutine
     def _execute(self):
@@ -74,9 +74,9 @@ class ServerArrayBaseActor(base.RightScaleBaseActor):
 
         tasks = []
         for array in arrays:
-            self.log.debug('Adding %s(%s, %s, %s) to async call list' %
-                           (function.__name__, array.soul['name'],
-                            args, kwargs))
+            self.log.debug('Adding %s(%s, %s, %s) to async call list',
+                           function.__name__, array.soul['name'],
+                           args, kwargs)
             tasks.append(function(array, *args, **kwargs))
 
         self.log.debug('Calling all functions in async call list')
@@ -210,7 +210,7 @@ class Clone(ServerArrayBaseActor):
             allow_mock=self._dest_allow_mock)
 
         # Now, clone the array!
-        self.log.info('Cloning array "%s"' % source_array.soul['name'])
+        self.log.info('Cloning array "%s"', source_array.soul['name'])
         if not self._dry:
             # We're really doin this!
             new_array = yield self._client.clone_server_array(source_array)
@@ -224,8 +224,8 @@ class Clone(ServerArrayBaseActor):
         # Lastly, rename the array
         params = self._generate_rightscale_params(
             'server_array', {'name': self.option('dest')})
-        self.log.info('Renaming array "%s" to "%s"' % (new_array.soul['name'],
-                                                       self.option('dest')))
+        self.log.info('Renaming array "%s" to "%s"',
+                      new_array.soul['name'], self.option('dest'))
         yield self._client.update(new_array, params)
         raise gen.Return()
 
@@ -322,9 +322,8 @@ class Update(ServerArrayBaseActor):
         'inputs': (dict, {}, 'ServerArray inputs for launching.')
     }
 
-    def __init__(self, *args, **kwargs):
+    def _prepare(self):
         """Validate the user-supplied parameters at instantiation time."""
-        super(Update, self).__init__(*args, **kwargs)
         self._params = self._generate_rightscale_params(
             'server_array', self.option('params'))
         self._inputs = self._generate_rightscale_params(
@@ -354,7 +353,7 @@ class Update(ServerArrayBaseActor):
         for input_name, _ in inputs.items():
             # Inputs have to be there. If not -- it's a problem.
             if input_name not in all_input_names:
-                self.log.error('Input not found: "%s"' % input_name)
+                self.log.error('Input not found: "%s"', input_name)
                 success = False
 
         if not success:
@@ -373,8 +372,8 @@ class Update(ServerArrayBaseActor):
         if not self.option('params'):
             raise gen.Return()
 
-        self.log.info('Updating array "%s" with params: %s' %
-                      (array.soul['name'], self._params))
+        self.log.info('Updating array "%s" with params: %s',
+                      array.soul['name'], self._params)
         try:
             yield self._client.update(array, self._params)
         except api.RightScaleError as e:
@@ -395,8 +394,8 @@ class Update(ServerArrayBaseActor):
         if not self.option('inputs'):
             raise gen.Return()
 
-        self.log.info('Updating array "%s" with inputs: %s' %
-                      (array.soul['name'], self._inputs))
+        self.log.info('Updating array "%s" with inputs: %s',
+                      array.soul['name'], self._inputs)
         yield self._client.update_server_array_inputs(array, self._inputs)
 
     @gen.coroutine
@@ -409,9 +408,9 @@ class Update(ServerArrayBaseActor):
         if self._dry:
             self.log.debug('Not making any changes.')
             if self.option('params'):
-                self.log.info('Params would be: %s' % self.option('params'))
+                self.log.info('Params would be: %s', self.option('params'))
             if self.option('inputs'):
-                self.log.info('Inputs would be: %s' % self.option('inputs'))
+                self.log.info('Inputs would be: %s', self.option('inputs'))
                 yield self._apply(self._check_array_inputs,
                                   arrays, self.option('inputs'))
 
@@ -512,9 +511,8 @@ class UpdateNextInstance(ServerArrayBaseActor):
         'params': (dict, REQUIRED, 'Next Instance RightScale parameters'),
     }
 
-    def __init__(self, *args, **kwargs):
+    def _prepare(self):
         """Validate the user-supplied parameters at instantiation time."""
-        super(UpdateNextInstance, self).__init__(*args, **kwargs)
         self._params = self._generate_rightscale_params(
             'instance', self.option('params'))
 
@@ -546,12 +544,12 @@ class UpdateNextInstance(ServerArrayBaseActor):
 
         if self._dry:
             self.log.info('Would have updated array\'s next_instance "%s" '
-                          'with params: %s' %
-                          (instance.soul['name'], rs_params))
+                          'with params: %s',
+                          instance.soul['name'], rs_params)
             raise gen.Return()
 
-        self.log.info('Updating array\'s next_instance "%s" with params: %s' %
-                      (instance.soul['name'], rs_params))
+        self.log.info('Updating array\'s next_instance "%s" with params: %s',
+                      instance.soul['name'], rs_params)
 
         try:
             yield self._client.update(instance, rs_params)
@@ -564,15 +562,15 @@ class UpdateNextInstance(ServerArrayBaseActor):
 
     @gen.coroutine
     def _find_def_image_href(self, instance):
-        self.log.debug('Searching for default boot AMI for %s' %
+        self.log.debug('Searching for default boot AMI for %s',
                        instance.soul['name'])
 
         # Find the MultiCloudImage associated with this 'instance' object, then
         # get the full list of 'settings' for that MCI.
         mci = yield self._client.show(instance.multi_cloud_image)
-        self.log.debug('Got MCI: %s' % mci.soul['name'])
+        self.log.debug('Got MCI: %s', mci.soul['name'])
         mci_settings = yield self._client.show(mci.settings)
-        self.log.debug('Got %s MCI Cloud Settings.' % len(mci_settings))
+        self.log.debug('Got %s MCI Cloud Settings.', len(mci_settings))
 
         # Now, find the 'setting' that matches the cloud of our instance. Note,
         # there should never be more than one returned -- so we take the first
@@ -666,11 +664,11 @@ class Terminate(ServerArrayBaseActor):
     @gen.coroutine
     def _terminate_all_instances(self, array):
         if self._dry:
-            self.log.info('Would have terminated all array "%s" instances.' %
+            self.log.info('Would have terminated all array "%s" instances.',
                           array.soul['name'])
             raise gen.Return()
 
-        self.log.info('Terminating all instances in array "%s"' %
+        self.log.info('Terminating all instances in array "%s"',
                       array.soul['name'])
         task = yield self._client.terminate_server_array_instances(array)
         # We don't care if it succeeded -- the multi-terminate job
@@ -696,14 +694,14 @@ class Terminate(ServerArrayBaseActor):
         """
         if self._dry:
                 self.log.info('Pretending that array %s instances '
-                              'are terminated.' % array.soul['name'])
+                              'are terminated.', array.soul['name'])
                 raise gen.Return()
 
         while True:
             instances = yield self._client.get_server_array_current_instances(
                 array)
             count = len(instances)
-            self.log.info('%s instances found' % count)
+            self.log.info('%s instances found', count)
 
             if count < 1:
                 raise gen.Return()
@@ -723,11 +721,11 @@ class Terminate(ServerArrayBaseActor):
             'server_array', {'state': 'disabled'})
 
         if self._dry:
-            self.log.info('Would have updated array "%s" with params: %s' %
-                          (array.soul['name'], params))
+            self.log.info('Would have updated array "%s" with params: %s',
+                          array.soul['name'], params)
             raise gen.Return()
 
-        self.log.info('Disabling Array "%s"' % array.soul['name'])
+        self.log.info('Disabling Array "%s"', array.soul['name'])
         yield self._client.update(array, params)
         raise gen.Return()
 
@@ -827,11 +825,11 @@ class Destroy(Terminate):
         TODO: Handle exceptions if the array is not terminatable.
         """
         if self._dry:
-            self.log.info('Pretending to destroy array "%s"' %
+            self.log.info('Pretending to destroy array "%s"',
                           array.soul['name'])
             raise gen.Return()
 
-        self.log.info('Destroying array "%s"' % array.soul['name'])
+        self.log.info('Destroying array "%s"', array.soul['name'])
         yield self._client.destroy_server_array(array)
         raise gen.Return()
 
@@ -948,12 +946,8 @@ class Launch(ServerArrayBaseActor):
             'Whether to search for multiple ServerArrays and act on them.')),
     }
 
-    def __init__(self, *args, **kwargs):
+    def _prepare(self):
         """Check Actor prerequisites."""
-
-        # Base class does everything to set up a generic class
-        super(Launch, self).__init__(*args, **kwargs)
-
         try:
             int(self._options.get('count', False))
         except ValueError:
@@ -973,8 +967,8 @@ class Launch(ServerArrayBaseActor):
             sleep: Integer time to sleep between checks (def: 60)
         """
         if self._dry:
-            self.log.info('Pretending that array %s instances are launched.'
-                          % array.soul['name'])
+            self.log.info('Pretending that array %s instances are launched.',
+                          array.soul['name'])
             raise gen.Return()
 
         max_count = int(self.option('count'))
@@ -989,8 +983,8 @@ class Launch(ServerArrayBaseActor):
             instances = yield self._client.get_server_array_current_instances(
                 array, filters=['state==operational'])
             count = len(instances)
-            self.log.info('%s instances found, waiting for %s/%s' %
-                          (count, enough_count, max_count))
+            self.log.info('%s instances found, waiting for %s/%s',
+                          count, enough_count, max_count)
 
             if count >= enough_count:
                 raise gen.Return()
@@ -1033,8 +1027,8 @@ class Launch(ServerArrayBaseActor):
                 count = 0
 
         if self._dry:
-            self.log.info('Would have launched %s instances of array %s' % (
-                          count, array.soul['name']))
+            self.log.info('Would have launched %s instances of array %s',
+                          count, array.soul['name'])
             raise gen.Return()
 
         if count < 1:
@@ -1043,13 +1037,13 @@ class Launch(ServerArrayBaseActor):
                 'max_count is set to %s') % (current_count, max_count))
             raise gen.Return()
 
-        self.log.info('Launching %s instances of array %s' % (
-                      count, array.soul['name']))
+        self.log.info('Launching %s instances of array %s',
+                      count, array.soul['name'])
 
         # Launch!
         yield self._client.launch_server_array(array, count=count)
-        self.log.info('Launched %s instances for array %s' % (
-                      count, array.soul['name']))
+        self.log.info('Launched %s instances for array %s',
+                      count, array.soul['name'])
 
         raise gen.Return()
 
@@ -1065,12 +1059,12 @@ class Launch(ServerArrayBaseActor):
         # newly updated array.
         if self.option('enable'):
             if not self._dry:
-                self.log.info('Enabling Array "%s"' % array.soul['name'])
+                self.log.info('Enabling Array "%s"', array.soul['name'])
                 params = self._generate_rightscale_params(
                     'server_array', {'state': 'enabled'})
                 array = yield self._client.update(array, params)
             else:
-                self.log.info('Would enable array "%s"' % array.soul['name'])
+                self.log.info('Would enable array "%s"', array.soul['name'])
 
     @gen.coroutine
     def _execute(self):
@@ -1213,11 +1207,11 @@ class Execute(ServerArrayBaseActor):
         if non_op_count > 0:
             self.log.warning(
                 'Found %s instances (in %s) in a non-Operational state, '
-                'will not execute on these hosts!' %
-                (non_op_count, array.soul['name']))
+                'will not execute on these hosts!',
+                non_op_count, array.soul['name'])
 
-        self.log.info('Found %s instances (in %s) in the Operational state.' %
-                      (len(op), array.soul['name']))
+        self.log.info('Found %s instances (in %s) in the Operational state.',
+                      len(op), array.soul['name'])
         raise gen.Return(op)
 
     @gen.coroutine
@@ -1244,8 +1238,8 @@ class Execute(ServerArrayBaseActor):
         for key, value in inputs.items():
             if value.split(':')[0] not in types:
                 issues = True
-                self.log.error('Value for %s needs to begin with %s'
-                               % (key, types))
+                self.log.error('Value for %s needs to begin with %s',
+                               key, types)
 
         if issues:
             raise exceptions.InvalidOptions('One or more inputs has a problem')
@@ -1263,7 +1257,7 @@ class Execute(ServerArrayBaseActor):
         """
 
         task_count = len(task_pairs)
-        self.log.info('Queueing %s tasks' % task_count)
+        self.log.info('Queueing %s tasks', task_count)
         task_waiting = []
 
         for instance, task in task_pairs:
@@ -1278,7 +1272,7 @@ class Execute(ServerArrayBaseActor):
                 instance=instance
             ))
 
-        self.log.info('Waiting for %s tasks to finish...' % task_count)
+        self.log.info('Waiting for %s tasks to finish...', task_count)
         statuses = yield task_waiting
 
         raise gen.Return(all(statuses))
@@ -1343,7 +1337,7 @@ class Execute(ServerArrayBaseActor):
                     self.option('concurrency')))
             raise gen.Return()
 
-        self.log.info('Concurrency set to %s' % self.option('concurrency'))
+        self.log.info('Concurrency set to %s', self.option('concurrency'))
         tasks = []
         for i in instances:
             tasks.append(self._exec_and_wait(
@@ -1362,8 +1356,8 @@ class Execute(ServerArrayBaseActor):
                 yield gen.moment
                 running_tasks = len([t for t in tasks if t.running()])
 
-            self.log.debug('Concurrency desaturated: %s<%s. Continuing.' % (
-                running_tasks, self.option('concurrency')))
+            self.log.debug('Concurrency desaturated: %s<%s. Continuing.',
+                           running_tasks, self.option('concurrency'))
 
         statuses = yield tasks
         raise gen.Return(all(statuses))
@@ -1389,22 +1383,22 @@ class Execute(ServerArrayBaseActor):
 
         if self._dry:
             self.log.info(
-                'Would have executed "%s" with inputs "%s" on "%s".'
-                % (self.option('script'), inputs, array.soul['name']))
+                'Would have executed "%s" with inputs "%s" on "%s".',
+                self.option('script'), inputs, array.soul['name'])
             raise gen.Return()
 
         count = len(instances)
         # Execute the script on all of the servers in the array and store the
         # task status resource records.
         self.log.info(
-            'Executing "%s" on %s instances in the array "%s"' %
-            (self.option('script'), count, array.soul['name']))
+            'Executing "%s" on %s instances in the array "%s"',
+            self.option('script'), count, array.soul['name'])
 
         try:
             task_pairs = yield self._client.run_executable_on_instances(
                 self.option('script'), inputs, instances)
         except api.ServerArrayException as e:
-            self.log.critical('Script execution error: %s' % e)
+            self.log.critical('Script execution error: %s', e)
             raise exceptions.RecoverableActorFailure(
                 'Invalid parameters supplied to execute script.')
 
@@ -1416,7 +1410,7 @@ class Execute(ServerArrayBaseActor):
             self.log.critical('One or more tasks failed.')
             raise TaskExecutionFailed()
         else:
-            self.log.info('Completed %s tasks.' % count)
+            self.log.info('Completed %s tasks.', count)
 
         raise gen.Return()
 
@@ -271,8 +271,6 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
     desc = 'ServerTemplate: {name}'
 
     def __init__(self, *args, **kwargs):
-        """Validate the user-supplied parameters at instantiation time."""
-
         super(ServerTemplate, self).__init__(*args, **kwargs)
         self.changed = False
 
@@ -287,6 +285,8 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
         self.images = {}
         self.alert_specs = None
 
+    def _prepare(self):
+        """Validate the user-supplied parameters at instantiation time."""
         self.params = self._generate_rightscale_params(
             prefix='server_template',
             params={
@@ -422,7 +422,7 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
         self.desired_images[mci.href] = {
             'default': default,
         }
-        self.log.debug('Discovered %s (%s) -> %s' % (name, revision, mci.href))
+        self.log.debug('Discovered %s (%s) -> %s', name, revision, mci.href)
 
     @gen.coroutine
     def _get_mci_mappings(self):
@@ -437,8 +437,8 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
 
         images = {}
         for mci_map in raw:
-            self.log.debug('Existing MCI Mapping -> %s (default: %s)' %
-                           (mci_map.href, mci_map.soul['is_default']))
+            self.log.debug('Existing MCI Mapping -> %s (default: %s)',
+                           mci_map.href, mci_map.soul['is_default'])
             images[mci_map.links['multi_cloud_image']] = {
                 'default': mci_map.soul['is_default'],
                 'map_href': mci_map.href,
@@ -484,7 +484,7 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
     @dry('Would have updated the template description')
     def _set_description(self):
         desc = self.option('description')
-        self.log.info('Updating description: %s' % desc)
+        self.log.info('Updating description: %s', desc)
         self.st = yield self._client.update(self.st, self.params)
         self.changed = True
 
@@ -625,8 +625,8 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
         for config in bindings:
             position += 1
 
-            self.log.debug('Searching for %s (rev: %s)' %
-                           (config['right_script'], config.get('rev')))
+            self.log.debug('Searching for %s (rev: %s)',
+                           config['right_script'], config.get('rev'))
 
             raw = yield self._client.find_by_name_and_keys(
                 collection=self._client._client.right_scripts,
@@ -690,13 +690,13 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
     def _set_bindings(self, params_to_add, bindings_to_delete, name):
         tasks = []
         for binding in bindings_to_delete:
-            self.log.info('Removing binding %s' % binding.href)
+            self.log.info('Removing binding %s', binding.href)
             tasks.append(self._client.destroy_resource(binding))
             self.changed = True
         yield tasks
 
         for binding in params_to_add:
-            self.log.info('Adding binding %s' % binding['right_script_href'])
+            self.log.info('Adding binding %s', binding['right_script_href'])
             yield self._client.create_resource(
                 self.st.runnable_bindings,
                 self._generate_rightscale_params(
@@ -718,7 +718,7 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
             }
         )
 
-        self.log.info('Adding MCI %s to ServerTemplate' % href)
+        self.log.info('Adding MCI %s to ServerTemplate', href)
         yield self._client.create_resource(
             self._client._client.server_template_multi_cloud_images,
             definition)
@@ -727,7 +727,7 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
     @gen.coroutine
     @dry('Would have deleted MCI reference {0.links[multi_cloud_image]}')
     def _delete_mci_reference(self, map_obj):
-        self.log.info('Deleting MCI %s from ServerTemplate' %
+        self.log.info('Deleting MCI %s from ServerTemplate',
                       map_obj.links['multi_cloud_image'])
 
         try:
@@ -769,8 +769,8 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
         # comparison is quick and doesn't require any API calls, so we do it
         # before we do anything else.
         current_default = self.st.links['default_multi_cloud_image']
-        self.log.debug('Desired Default MCI HREF: %s' % default_mci_href)
-        self.log.debug('Current Default MCI HREF: %s' % current_default)
+        self.log.debug('Desired Default MCI HREF: %s', default_mci_href)
+        self.log.debug('Current Default MCI HREF: %s', current_default)
         matching = (current_default == default_mci_href)
 
         # They match? Great, get out of here before we do anything bad!
@@ -787,8 +787,8 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
 
         # Final sanity check here -- if we're in DRY mode, get out!
         if self._dry:
-            self.log.warning('Would have updated default MCI HREF to: %s'
-                             % default_mci_href)
+            self.log.warning('Would have updated default MCI HREF to: %s',
+                             default_mci_href)
             raise gen.Return()
 
         # If we're not in DRY mode, AND we're updating the MCI reference to a
@@ -810,7 +810,7 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
 
         # Finally, we have the desired new_default object... grab its URL
         # reference and lets make the API call.
-        self.log.info('Making %s the default MCI' % default_mci_href)
+        self.log.info('Making %s the default MCI', default_mci_href)
         url = '%s/make_default' % new_default.links['self']
         yield self._client.make_generic_request(url, post=[])
         self.changed = True
@@ -850,7 +850,7 @@ class ServerTemplate(base.EnsurableRightScaleBaseActor):
             res_type=self._client._client.server_templates,
             params=params)
 
-        self.log.info('Committed revision %s' % ret.soul['revision'])
+        self.log.info('Committed revision %s', ret.soul['revision'])
 
     @gen.coroutine
     def _execute(self):
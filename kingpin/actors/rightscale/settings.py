@@ -21,6 +21,8 @@ Common settings used by many of the `kingpin.actors.rightscale` modules.
 
 
 import logging
+import os
+
 import requests
 
 __author__ = 'Matt Wise <matt@nextdoor.com>'
@@ -28,6 +30,19 @@ __author__ = 'Matt Wise <matt@nextdoor.com>'
 log = logging.getLogger(__name__)
 
 
+# Number of seconds before the RightScale OAuth token actually expires that we
+# go and fetch a new one. This keeps threads from racing to use a token that is
+# just about to expire.
+TOKEN_REFRESH_MARGIN = 300
+
+# If set, the RightScale actors use the natively asynchronous
+# kingpin.actors.rightscale.api.AsyncRightScale client rather than making all
+# of their API calls on a thread pool.
+ASYNC_TRANSPORT = bool(os.getenv('RIGHTSCALE_ASYNC_TRANSPORT', False))
+ASYNC_RETRY_ATTEMPTS = 10
+ASYNC_RETRY_DELAY = 0.25
+
+
 # Common Settings for the retrying.retry() decorator
 #
 # Use like this: @retrying.retry(**settings.RETRYING_SETTINGS)
@@ -1,12 +1,17 @@
 import logging
 import mock
 import simplejson
+import time
+import unittest
+import urlparse
 
 from tornado import gen
 from tornado import testing
+from tornado import web
 import requests
 
 from kingpin.actors.rightscale import api
+from kingpin.actors.rightscale import settings
 from kingpin.actors.test import helper
 
 
@@ -23,6 +28,22 @@ class TestRightScale(testing.AsyncTestCase):
         self.mock_client = mock.MagicMock()
         self.client._client = self.mock_client
 
+    def test_client_is_shared(self):
+        client2 = api.RightScale(self.token)
+        self.assertIs(client2._client, api.get_shared_client(self.token))
+
+        client3 = api.RightScale('other-token')
+        self.assertIsNot(client2._client, client3._client)
+
+        client4 = api.RightScale(self.token, endpoint='https://other')
+        self.assertIsNot(client2._client, client4._client)
+
+    def test_shared_client_uses_shared_http_client(self):
+        client = api.get_shared_client(self.token)
+        self.assertTrue(isinstance(client.client, api.SharedHTTPClient))
+        self.assertNotIn('Connection', client.client.s.headers)
+        self.assertEquals(client.client.refresh_token, self.token)
+
     def test_get_res_id(self):
         resource = mock.Mock()
         resource.self.path = '/foo/bar/12345'
@@ -654,3 +675,290 @@ class TestRightScale(testing.AsyncTestCase):
             'a', 'b', 0)
         ret = yield self.client.make_generic_request('/foo')
         self.assertEquals('test', ret)
+
+
+class TestSharedHTTPClient(unittest.TestCase):
+
+    def setUp(self):
+        self.client = api.SharedHTTPClient(
+            'https://unittest', {}, '/api/oauth2', 'token')
+        self.client._request = mock.MagicMock(name='_request')
+
+    def test_request_logs_in_once(self):
+        def fake_login():
+            self.client.auth_expires_at = time.time() + 3600
+        self.client.login = mock.MagicMock(side_effect=fake_login)
+
+        self.client.request('get', '/a')
+        self.client.request('get', '/b')
+        self.assertEquals(self.client.login.call_count, 1)
+        self.assertEquals(self.client._request.call_count, 2)
+
+    def test_request_refreshes_before_expiry(self):
+        self.client.login = mock.MagicMock(name='login')
+
+        # Not yet expired -- but within the refresh margin.
+        self.client.auth_expires_at = time.time() + 10
+        self.client.request('get', '/a')
+        self.client.login.assert_called_once_with()
+
+        # Well outside of the margin
+        self.client.login.reset_mock()
+        self.client.auth_expires_at = time.time() + 3600
+        self.client.request('get', '/a')
+        self.assertFalse(self.client.login.called)
+
+
+class OAuthHandler(web.RequestHandler):
+
+    def initialize(self, logins):
+        self.logins = logins
+
+    def post(self):
+        self.logins.append(self.request)
+        self.write({'access_token': 'access-%s' % len(self.logins),
+                    'expires_in': 7200})
+
+
+class StubHandler(web.RequestHandler):
+
+    """Fake RightScale API that returns pre-canned responses in order."""
+
+    SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+    def initialize(self, responses, requests):
+        self.responses = responses
+        self.requests = requests
+
+    def _respond(self, *args):
+        self.requests.append(self.request)
+        code, headers, body = self.responses.pop(0)
+        self.set_status(code, reason='Stubbed')
+        for key, val in headers.items():
+            self.set_header(key, val)
+        if body:
+            self.write(body)
+
+    get = post = put = delete = _respond
+
+
+class TestAsyncRightScale(testing.AsyncHTTPTestCase):
+
+    def setUp(self):
+        self.logins = []
+        self.responses = []
+        self.requests = []
+        super(TestAsyncRightScale, self).setUp()
+        settings.ASYNC_RETRY_DELAY = 0
+
+        self.client = api.AsyncRightScale('token', self.get_url(''))
+        self.client._session = api.AsyncSession(
+            'token', self.get_url(''), http_client=self.http_client)
+
+    def get_app(self):
+        return web.Application([
+            ('/api/oauth2', OAuthHandler, {'logins': self.logins}),
+            ('/.*', StubHandler,
+             {'responses': self.responses, 'requests': self.requests})])
+
+    def _add(self, body, code=200, collection=False, headers=None):
+        ct = 'application/vnd.rightscale.server_array+json'
+        if collection:
+            ct += ';type=collection'
+        headers = headers or {}
+        headers['Content-Type'] = ct
+        if not isinstance(body, basestring):
+            body = simplejson.dumps(body)
+        self.responses.append((code, headers, body))
+
+    def _array(self, name='unittest', array_id=1):
+        href = '/api/server_arrays/%s' % array_id
+        return {
+            'name': name,
+            'links': [
+                {'rel': 'self', 'href': href},
+                {'rel': 'next_instance', 'href': '/api/clouds/1/instances/n'},
+                {'rel': 'current_instances',
+                 'href': '%s/current_instances' % href}]}
+
+    def test_sessions_are_shared(self):
+        client2 = api.AsyncRightScale('token', 'https://unittest')
+        client3 = api.AsyncRightScale('token', 'https://unittest')
+        client4 = api.AsyncRightScale('other', 'https://unittest')
+        self.assertIs(client2._session, client3._session)
+        self.assertIsNot(client2._session, client4._session)
+
+    @testing.gen_test
+    def test_login_once(self):
+        self._add(self._array())
+        self._add(self._array())
+
+        yield [self.client._get('/api/server_arrays/1'),
+               self.client._get('/api/server_arrays/1')]
+
+        self.assertEquals(len(self.logins), 1)
+        body = urlparse.parse_qs(self.logins[0].body)
+        self.assertEquals(body['refresh_token'], ['token'])
+        for req in self.requests:
+            self.assertEquals(req.headers['Authorization'], 'Bearer access-1')
+            self.assertEquals(req.headers['X-API-Version'], '1.5')
+
+    @testing.gen_test
+    def test_401_logs_in_again(self):
+        self._add('', code=401)
+        self._add(self._array())
+
+        ret = yield self.client._get('/api/server_arrays/1')
+
+        self.assertEquals(ret.soul['name'], 'unittest')
+        self.assertEquals(len(self.logins), 2)
+        self.assertEquals(self.requests[1].headers['Authorization'],
+                          'Bearer access-2')
+
+    @testing.gen_test
+    def test_server_errors_are_retried(self):
+        self._add('', code=429)
+        self._add('', code=503)
+        self._add(self._array())
+
+        ret = yield self.client._get('/api/server_arrays/1')
+
+        self.assertEquals(ret.soul['name'], 'unittest')
+        self.assertEquals(len(self.requests), 3)
+
+    @testing.gen_test
+    def test_client_errors_raise(self):
+        self._add('Bad things', code=400)
+
+        with self.assertRaises(api.RightScaleError):
+            yield self.client._get('/api/server_arrays/1')
+        self.assertEquals(len(self.requests), 1)
+
+    @testing.gen_test
+    def test_find_server_arrays(self):
+        self._add([self._array('unittest-2'), self._array('unittest')],
+                  collection=True)
+
+        ret = yield self.client.find_server_arrays('unittest')
+
+        self.assertEquals(ret.soul['name'], 'unittest')
+        self.assertEquals(ret.href, '/api/server_arrays/1')
+        self.assertEquals(self.requests[0].arguments['filter[]'],
+                          ['name==unittest'])
+
+    @testing.gen_test
+    def test_find_server_arrays_not_found(self):
+        self._add([], collection=True)
+        ret = yield self.client.find_server_arrays('unittest')
+        self.assertEquals(ret, None)
+
+    @testing.gen_test
+    def test_find_server_arrays_not_exact(self):
+        self._add([self._array('unittest-2'), self._array('unittest')],
+                  collection=True)
+        ret = yield self.client.find_server_arrays('unittest', exact=False)
+        self.assertEquals(len(ret), 2)
+
+    @testing.gen_test
+    def test_get_server_array_current_instances(self):
+        self._add([{'name': 'i-1'}, {'name': 'i-2'}], collection=True)
+        array = yield self._get_array()
+
+        ret = yield self.client.get_server_array_current_instances(array)
+
+        self.assertEquals([i.soul['name'] for i in ret], ['i-1', 'i-2'])
+        self.assertEquals(self.requests[1].path,
+                          '/api/server_arrays/1/current_instances')
+        self.assertEquals(self.requests[1].arguments['filter[]'],
+                          ['state<>terminated'])
+
+    @gen.coroutine
+    def _get_array(self):
+        self.responses.insert(0, (
+            200, {'Content-Type': 'application/json'},
+            simplejson.dumps(self._array())))
+        array = yield self.client._get('/api/server_arrays/1')
+        raise gen.Return(array)
+
+    @testing.gen_test
+    def test_launch_server_array(self):
+        self._add('', code=201, headers={'Location': '/api/instances/1'})
+        self._add({'name': 'i-1'})
+        array = yield self._get_array()
+
+        ret = yield self.client.launch_server_array(array, count=2)
+
+        self.assertEquals(ret.soul['name'], 'i-1')
+        self.assertEquals(self.requests[1].method, 'POST')
+        self.assertEquals(self.requests[1].path,
+                          '/api/server_arrays/1/launch')
+        self.assertEquals(self.requests[1].body, 'count=2')
+        self.assertEquals(self.requests[2].path, '/api/instances/1')
+
+    @testing.gen_test
+    def test_terminate_server_array_instances_422_error(self):
+        self._add('No instances', code=422)
+        array = yield self._get_array()
+
+        ret = yield self.client.terminate_server_array_instances(array)
+        self.assertEquals(ret, None)
+        self.assertEquals(self.requests[1].path,
+                          '/api/server_arrays/1/multi_terminate')
+
+    @testing.gen_test
+    def test_update_server_array_inputs(self):
+        self._add({'name': 'next',
+                   'links': [{'rel': 'inputs',
+                              'href': '/api/clouds/1/instances/n/inputs'}]})
+        self._add('', code=204)
+        array = yield self._get_array()
+
+        yield self.client.update_server_array_inputs(
+            array, {'inputs[foo]': 'text:bar'})
+
+        req = self.requests[-1]
+        self.assertEquals(req.method, 'PUT')
+        self.assertEquals(req.path, '/api/clouds/1/instances/n/inputs/'
+                                    'multi_update')
+        self.assertEquals(urlparse.parse_qs(req.body),
+                          {'inputs[foo]': ['text:bar']})
+
+    @testing.gen_test
+    def test_get_resource_tags(self):
+        self._add([{'tags': [{'name': 'a'}, {'name': 'b'}]}],
+                  collection=True)
+        array = yield self._get_array()
+
+        ret = yield self.client.get_resource_tags(array)
+
+        self.assertEquals(ret, ['a', 'b'])
+        self.assertEquals(self.requests[1].path, '/api/tags/by_resource')
+        self.assertEquals(urlparse.parse_qs(self.requests[1].body),
+                          {'resource_hrefs[]': ['/api/server_arrays/1']})
+
+    @testing.gen_test
+    def test_get_audit_logs(self):
+        self._add([{'summary': 'success: foo',
+                    'links': [{'rel': 'detail', 'href': '/api/detail/1'}]},
+                   {'summary': 'failed: foo',
+                    'links': [{'rel': 'detail', 'href': '/api/detail/2'}]}],
+                  collection=True)
+        self._add('Logs for the run')
+        array = yield self._get_array()
+
+        ret = yield self.client.get_audit_logs(
+            array, 'start', 'end', match='success')
+
+        self.assertEquals(ret, ['Logs for the run'])
+        self.assertEquals(self.requests[2].path, '/api/detail/1')
+
+    @testing.gen_test
+    def test_make_generic_request(self):
+        self._add('', code=201, headers={'Location': '/api/foo/1'})
+        self._add({'name': 'foo'})
+
+        ret = yield self.client.make_generic_request(
+            '/api/foo', post=[('foo[name]', 'foo')])
+
+        self.assertEquals(ret.soul['name'], 'foo')
+        self.assertEquals(self.requests[0].body, 'foo%5Bname%5D=foo')
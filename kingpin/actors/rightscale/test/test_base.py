@@ -5,7 +5,9 @@ from tornado import testing
 from tornado import gen
 
 from kingpin.actors import exceptions
+from kingpin.actors.rightscale import api
 from kingpin.actors.rightscale import base
+from kingpin.actors.rightscale import settings
 from kingpin.actors.test.helper import mock_tornado, tornado_value
 
 log = logging.getLogger(__name__)
@@ -37,6 +39,15 @@ class TestRightScaleBaseActor(testing.AsyncTestCase):
         self.client_mock = mock.MagicMock()
         self.actor._client = self.client_mock
 
+    def test_get_api_client(self):
+        with mock.patch.object(settings, 'ASYNC_TRANSPORT', False):
+            client = base.get_api_client()
+        self.assertEquals(type(client), api.RightScale)
+
+        with mock.patch.object(settings, 'ASYNC_TRANSPORT', True):
+            client = base.get_api_client()
+        self.assertEquals(type(client), api.AsyncRightScale)
+
     @testing.gen_test
     def test_init_without_environment_creds(self):
         # Un-set the token and make sure the init fails
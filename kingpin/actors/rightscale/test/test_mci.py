@@ -501,7 +501,7 @@ class TestMCIActor(testing.AsyncTestCase):
         yield self.actor._commit(mci, 'message')
         self.actor.log.assert_has_calls([
             mock.call.info('Committing a new revision'),
-            mock.call.info('Committed revision 2')
+            mock.call.info('Committed revision %s', 2)
         ])
 
     @testing.gen_test
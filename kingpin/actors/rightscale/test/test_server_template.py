@@ -761,7 +761,7 @@ class TestServerTemplateActor(testing.AsyncTestCase):
         yield self.actor._commit()
         self.actor.log.assert_has_calls([
             mock.call.info('Committing a new revision'),
-            mock.call.info('Committed revision 2')
+            mock.call.info('Committed revision %s', 2)
         ])
 
     @testing.gen_test
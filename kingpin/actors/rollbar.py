@@ -35,6 +35,7 @@ from tornado import httpclient
 from kingpin import utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import outbox
 from kingpin.constants import REQUIRED
 
 log = logging.getLogger(__name__)
@@ -164,6 +165,11 @@ class Deploy(RollbarBase):
     :comment:
       *(Optional)* Comment describing the deploy
 
+    :async_delivery:
+      *(Optional)* Queue the deploy notification up for delivery in the
+      background, rather than waiting for it to be sent. See
+      :mod:`kingpin.actors.support.outbox`. (default: False)
+
     **Examples**
 
     .. code-block:: json
@@ -189,7 +195,8 @@ class Deploy(RollbarBase):
         'revision': (str, REQUIRED, 'Revision number/sha being deployed'),
         'local_username': (str, 'Kingpin', 'User who deployed'),
         'rollbar_username': (str, '', 'Rollbar username'),
-        'comment': (str, '', 'Deploy comment')
+        'comment': (str, '', 'Deploy comment'),
+        'async_delivery': (bool, False, 'Send the deploy in the background')
     }
 
     desc = "Sending Deploy {environment}/{revision}"
@@ -232,10 +239,16 @@ class Deploy(RollbarBase):
 
         if self._dry:
             self.log.info('Would have sent %s, but instead just validating '
-                          'API key.' % rollbar_string)
+                          'API key.', rollbar_string)
             yield self._project()
             raise gen.Return()
 
-        self.log.info('Sending %s' % rollbar_string)
+        if self.option('async_delivery'):
+            self.log.info('Queueing %s', rollbar_string)
+            outbox.get_outbox().enqueue(
+                'rollbar', outbox.Envelope(send=self._deploy))
+            raise gen.Return()
+
+        self.log.info('Sending %s', rollbar_string)
         yield self._deploy()
         raise gen.Return()
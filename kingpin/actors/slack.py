@@ -31,6 +31,7 @@ sending the messages.
   (defaults to *Kingpin*)
 """
 
+import functools
 import logging
 import os
 import re
@@ -41,6 +42,7 @@ from kingpin.constants import REQUIRED
 from kingpin.actors import base
 from kingpin.actors import exceptions
 from kingpin.actors.support import api
+from kingpin.actors.support import outbox
 
 log = logging.getLogger(__name__)
 
@@ -134,6 +136,11 @@ class Message(SlackBase):
     :message:
       String of the message to send
 
+    :async_delivery:
+      *(Optional)* Queue the message up for delivery in the background, rather
+      than waiting for it to be sent. See
+      :mod:`kingpin.actors.support.outbox`. (default: False)
+
     **Examples**
 
     .. code-block:: json
@@ -155,15 +162,42 @@ class Message(SlackBase):
 
     all_options = {
         'channel': ((str, list), REQUIRED, 'Slack channel or a list of names'),
-        'message': (str, REQUIRED, 'Message to send')
+        'message': (str, REQUIRED, 'Message to send'),
+        'async_delivery': (bool, False, 'Send the message in the background')
     }
 
     desc = "Sending Message to {channel}"
 
+    @gen.coroutine
+    def _post_message(self, channels, message):
+        """Posts a message to a list of Slack channels.
+
+        Args:
+            channels: List of channel names
+            message: (Str) The message to send
+        """
+        posts = []
+        for channel in channels:
+            self.log.debug('Posting to %s', channel)
+            # Finally, send the message and check our return value
+            posts.append(self._slack_client.chat_postMessage().http_post(
+                channel=channel,
+                text=message,
+                username=NAME,
+                parse='none',
+                link_names=1,
+                unfurl_links=True,
+                unfurl_media=True
+            ))
+
+        results = yield posts
+        for res in results:
+            self._check_results(res)
+
     @gen.coroutine
     def _execute(self):
-        self.log.info('Sending message "%s" to Slack channel "%s"' %
-                      (self.option('message'), self.option('channel')))
+        self.log.info('Sending message "%s" to Slack channel "%s"',
+                      self.option('message'), self.option('channel'))
 
         if self._dry:
             # Check if our authentication creds are valid
@@ -179,20 +213,14 @@ class Message(SlackBase):
         else:
             channels = re.split('[, ]+', self.option('channel'))
 
-        posts = []
-        for channel in channels:
-            self.log.debug('Posting to %s' % channel)
-            # Finally, send the message and check our return value
-            posts.append(self._slack_client.chat_postMessage().http_post(
-                channel=channel,
-                text=self.option('message'),
-                username=NAME,
-                parse='none',
-                link_names=1,
-                unfurl_links=True,
-                unfurl_media=True
-            ))
+        if self.option('async_delivery'):
+            for channel in channels:
+                outbox.get_outbox().enqueue('slack', outbox.Envelope(
+                    send=functools.partial(self._post_message, [channel]),
+                    payload=self.option('message'),
+                    key=channel,
+                    merge=lambda a, b: '%s\n%s' % (a, b)))
+            self.log.debug('Message queued for delivery')
+            raise gen.Return()
 
-        results = yield posts
-        for res in results:
-            self._check_results(res)
+        yield self._post_message(channels, self.option('message'))
@@ -31,6 +31,9 @@ https://spotinst.atlassian.net/wiki/display/API/API+Semantics
 :SPOINST_TOKEN:
   SpotInst API Token generated at
   https://console.spotinst.com/#/settings/tokens
+
+:SPOTINST_ENDPOINT:
+  Override the Spotinst API URL (defaults to ``https://api.spotinst.io/``)
 """
 
 import base64
@@ -47,6 +50,8 @@ from kingpin import utils
 from kingpin import exceptions as kingpin_exceptions
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import plan
+from kingpin.actors.support import readcache
 from kingpin.actors.utils import dry
 from kingpin.constants import REQUIRED
 from kingpin.constants import SchemaCompareBase
@@ -57,11 +62,12 @@ __author__ = 'Matt Wise <matt@nextdoor.com>'
 
 DEBUG = os.getenv('SPOTINST_DEBUG', False)
 TOKEN = os.getenv('SPOTINST_TOKEN', None)
+ENDPOINT = os.getenv('SPOTINST_ENDPOINT', 'https://api.spotinst.io/')
 
 
 class SpotinstAPI(api.RestConsumer):
 
-    ENDPOINT = 'https://api.spotinst.io/'
+    ENDPOINT = ENDPOINT
     CONFIG = {
         'attrs': {
             'aws': {
@@ -433,6 +439,10 @@ class ElastiGroup(SpotinstBase):
     def __init__(self, *args, **kwargs):
         super(ElastiGroup, self).__init__(*args, **kwargs)
 
+        # Filld in later by self._precache()
+        self._group = None
+
+    def _prepare(self):
         # Quickly make sure that the roll_batch_size and roll_grace_period are
         # integers...
         for key in ('roll_batch_size', 'roll_grace_period'):
@@ -445,8 +455,8 @@ class ElastiGroup(SpotinstBase):
         # Parse the user-supplied ElastiGroup config, swap in any tokens, etc.
         self._config = self._parse_group_config()
 
-        # Filld in later by self._precache()
-        self._group = None
+        # The config as it was supplied (see self._remote_version())
+        self._config_fingerprint = plan.fingerprint(self._config)
 
     def _parse_group_config(self):
         """Parses the ElastiGroup config and replaces tokens.
@@ -464,12 +474,11 @@ class ElastiGroup(SpotinstBase):
         if config is None:
             return None
 
-        self.log.debug('Parsing and validating %s' % config)
+        self.log.debug('Parsing and validating %s', config)
 
         # Join the init_tokens the class was instantiated with and the explicit
         # tokens that the user supplied.
-        tokens = dict(self._init_tokens)
-        tokens.update(self.option('tokens'))
+        tokens = self._init_tokens.child(self.option('tokens'))
 
         try:
             parsed = utils.convert_script_to_dict(
@@ -520,17 +529,22 @@ class ElastiGroup(SpotinstBase):
         if self._group and 'capacity' in self._group['group']:
             target = self._group['group']['capacity']['target']
             self.log.info('Using the Spotinst supplied [capacity][target]'
-                          ' value: %s' % target)
+                          ' value: %s', target)
             self._config['group']['capacity']['target'] = target
 
     @gen.coroutine
     def _list_groups(self):
         """Returns a list of all ElastiGroups in your Spotinst acct.
 
+        The list of a dry run may come from the read cache (see
+        `kingpin.actors.support.readcache`).
+
         Returns:
             [List of JSON ElastiGroup objects]
         """
-        resp = yield self._client.aws.ec2.list_groups.http_get()
+        resp = yield readcache.cached(
+            'list_groups', [ENDPOINT, TOKEN],
+            self._client.aws.ec2.list_groups.http_get)
         raise gen.Return(resp['response']['items'])
 
     @gen.coroutine
@@ -569,7 +583,7 @@ class ElastiGroup(SpotinstBase):
             raise gen.Return(None)
 
         match = matching[0]
-        self.log.debug('Found ElastiGroup %s' % match['id'])
+        self.log.debug('Found ElastiGroup %s', match['id'])
         raise gen.Return({'group': match})
 
     @gen.coroutine
@@ -588,6 +602,31 @@ class ElastiGroup(SpotinstBase):
         yield self._client.aws.ec2.validate_group.http_post(
             group=self._config['group'])
 
+    @gen.coroutine
+    def _plan_fingerprint(self):
+        """Fingerprints the ElastiGroup config found by self._precache().
+
+        The config returned by Spotinst includes its `updatedAt` time, so any
+        change to the group changes the fingerprint.
+        """
+        raise gen.Return(plan.fingerprint(self._group))
+
+    @gen.coroutine
+    def _remote_version(self):
+        """Returns the `updatedAt` time of the ElastiGroup, with our config.
+
+        Only needs the list of ElastiGroups -- whereas self._precache() also
+        has Spotinst validate our config. The config comes from a file, so it
+        is mixed in here.
+        """
+        group = yield self._get_group()
+        if group is None or not group['group'].get('updatedAt'):
+            raise gen.Return()
+
+        raise gen.Return(plan.fingerprint(
+            self._config_fingerprint, group['group']['id'],
+            group['group']['updatedAt']))
+
     @gen.coroutine
     def _get_state(self):
         """Validates whether or not a matching ElastiGroup already exists.
@@ -634,19 +673,19 @@ class ElastiGroup(SpotinstBase):
     @gen.coroutine
     @dry('Would have created ElastiGroup')
     def _create_group(self):
-        self.log.info('Creating ElastiGroup %s' % self.option('name'))
+        self.log.info('Creating ElastiGroup %s', self.option('name'))
         yield self._client.aws.ec2.create_group.http_post(
             group=self._config['group'])
 
     @gen.coroutine
     @dry('Would have deleted ElastiGroup {id}')
     def _delete_group(self, id):
-        self.log.info('Deleting ElastiGroup %s' % id)
+        self.log.info('Deleting ElastiGroup %s', id)
         yield self._client.aws.ec2.delete_group(id=id).http_delete()
 
     @gen.coroutine
     def _get_group_status(self, id):
-        self.log.debug('Getting ElastiGroup %s status...' % id)
+        self.log.debug('Getting ElastiGroup %s status...', id)
         ret = yield self._client.aws.ec2.group_status(id=id).http_get()
         raise gen.Return(ret)
 
@@ -659,7 +698,7 @@ class ElastiGroup(SpotinstBase):
     @dry('Would have updated ElastiGroup config')
     def _set_config(self):
         group_id = self._group['group']['id']
-        self.log.info('Updating ElastiGroup %s' % group_id)
+        self.log.info('Updating ElastiGroup %s', group_id)
 
         # There are certain fields that simply cannot be updated -- strip them
         # out. We have a warning up in the above _compare_config() section that
@@ -739,7 +778,7 @@ class ElastiGroup(SpotinstBase):
         if diff:
             self.log.warning('Group configurations do not match')
             for line in diff.split('\n'):
-                self.log.info('Diff: %s' % line)
+                self.log.info('Diff: %s', line)
             return False
 
         return True
@@ -802,8 +841,8 @@ class ElastiGroup(SpotinstBase):
             unit = in_progress[0]['progress']['unit']
             progress = in_progress[0]['progress']['value']
 
-            self.log.info('Group roll is %s %s complete (%s)' % (progress,
-                                                                 unit, status))
+            self.log.info('Group roll is %s %s complete (%s)',
+                          progress, unit, status)
 
             yield gen.sleep(delay)
 
@@ -839,7 +878,7 @@ class ElastiGroup(SpotinstBase):
                          not None]
 
             if len(pending) < 1:
-                self.log.info('All instance requests fulfilled: %s' %
+                self.log.info('All instance requests fulfilled: %s',
                               ', '.join(fulfilled))
                 break
 
@@ -22,9 +22,12 @@ See the documentation in docs/DEVELOPMENT.md for more details on how to use
 this package to create your own API client.
 """
 
+import copy
 import logging
-import types
+import re
+import socket
 import urllib
+import urlparse
 
 from tornado import gen
 from tornado import httpclient
@@ -33,11 +36,25 @@ import simplejson as json
 
 from kingpin import utils
 from kingpin.actors import exceptions
+from kingpin.actors.support import breaker
 
 log = logging.getLogger(__name__)
 
 __author__ = 'Matt Wise <matt@nextdoor.com>'
 
+# Generated RestConsumer classes, keyed by (RestConsumer class, id(config)).
+# The config object itself is stored alongside the class so that its id() is
+# never re-used. See RestConsumer.__new__().
+_GENERATED_CLASSES = {}
+
+
+def _endpoint(args, kwargs):
+    """Returns the host that a fetch(url, ...) call goes to, or None."""
+    url = kwargs.get('url', args[0] if args else None)
+    if not isinstance(url, basestring):
+        return None
+    return urlparse.urlparse(url).netloc or None
+
 
 def _retry(*f_or_args, **options):
     """Coroutine-compatible Retry Decorator.
@@ -48,6 +65,10 @@ def _retry(*f_or_args, **options):
     with a '500' code might want to retry 3 times. On the otherhand, a 401/403
     might want to throw an InvalidCredentials exception.
 
+    Calls to the same host share a run-wide circuit breaker, and all of the
+    retries are drawn from the run-wide retry budget (see
+    `kingpin.actors.support.breaker`).
+
     Examples:
 
     >>> @_retry
@@ -99,18 +120,30 @@ def _retry(*f_or_args, **options):
             for k in remove:
                 safe_kwargs[k] = '****'
 
+            endpoint = _endpoint(args, kwargs)
+            guard = breaker.get_breaker(endpoint) if endpoint else None
+            budget = breaker.get_budget()
+
             while True:
                 # Don't log out the first try as a 'Try' ... just do it
                 if i > 1:
-                    log.debug('Try (%s/%s) of %s(%s, %s)' %
-                              (i, retries, f, args, safe_kwargs))
+                    log.debug('Try (%s/%s) of %s(%s, %s)',
+                              i, retries, f, args, safe_kwargs)
+
+                if guard:
+                    guard.before()
+                budget.attempt()
 
                 # Attempt the method. Catch any exception listed in
                 # self._EXCEPTIONS.
 
                 try:
                     ret = yield gen.coroutine(f)(self, *args, **kwargs)
+                    if guard:
+                        guard.success()
                     raise gen.Return(ret)
+                except gen.Return:
+                    raise
                 except tuple(self._EXCEPTIONS.keys()) as e:
                     error = str(e)
                     if hasattr(e, 'message'):
@@ -119,7 +152,9 @@ def _retry(*f_or_args, **options):
 
                     # If we've run out of retry attempts, raise the exception
                     if i >= retries:
-                        log.debug('Raising exception: %s' % e)
+                        if guard:
+                            guard.failure()
+                        log.debug('Raising exception: %s', e)
                         raise e
 
                     # Gather the config for this exception-type from
@@ -131,18 +166,28 @@ def _retry(*f_or_args, **options):
                     # It's optional, but can match before others match, so we
                     # pop it before searching.
                     default_exc = exc_conf.pop('', False)
-                    log.debug('Searching through %s' % exc_conf)
+                    log.debug('Searching through %s', exc_conf)
                     matched_exc = [exc for key, exc in exc_conf.items()
                                    if key in str(e)]
 
-                    log.debug('Matched exceptions: %s' % matched_exc)
+                    log.debug('Matched exceptions: %s', matched_exc)
+                    retryable = matched_exc and matched_exc[0] is None
+                    if guard:
+                        # Only the retryable errors (5xx, timeouts) mean that
+                        # the endpoint is in trouble.
+                        if retryable:
+                            guard.failure()
+                        else:
+                            guard.success()
+
                     if matched_exc and matched_exc[0] is not None:
                         exception = matched_exc[0]
-                        log.debug('Matched exception: %s' % exception)
+                        log.debug('Matched exception: %s', exception)
                         raise exception(error)
-                    elif matched_exc and matched_exc[0] is None:
+                    elif retryable:
                         log.debug('Exception is retryable!')
-                        pass
+                        if not budget.withdraw():
+                            raise e
                     elif default_exc is not False:
                         raise default_exc(str(e))
                     elif default_exc is False:
@@ -154,8 +199,19 @@ def _retry(*f_or_args, **options):
 
                     # Must have been a retryable exception. Retry.
                     i = i + 1
-                    log.debug('Retrying in %s...' % delay)
+                    log.debug('Retrying in %s...', delay)
                     yield utils.tornado_sleep(delay)
+                except Exception as e:
+                    # Any other error must still settle the call with the
+                    # breaker, or a half-open breaker waits on its probe
+                    # forever. Only a failure to connect at all counts
+                    # against the endpoint.
+                    if guard:
+                        if isinstance(e, socket.error):
+                            guard.failure()
+                        else:
+                            guard.success()
+                    raise
 
                 log.debug('Retrying..')
 
@@ -174,9 +230,9 @@ def _retry(*f_or_args, **options):
 def create_http_method(name, http_method):
     """Creates the get/put/delete/post coroutined-method for a resource.
 
-    This method is called during the __init__ of a RestConsumer object. The
-    method creates a custom method thats handles a GET, PUT, POST or DELETE
-    through the Tornado HTTPClient class.
+    This method is called once per RestConsumer configuration, when its class
+    is generated. The method creates a custom method thats handles a GET, PUT,
+    POST or DELETE through the Tornado HTTPClient class.
 
     Args:
         http_method: Name of the method (get, put, post, delete)
@@ -230,11 +286,11 @@ def create_method(name, config):
         # the RestConsumer parent object. This ensures that tokens replaced in
         # the 'path' variables are passed all the way down the instantiation
         # chain.
-        merged_kwargs = dict(self._kwargs.items() + kwargs.items())
+        merged_kwargs = dict(self._kwargs, **kwargs)
 
-        return self.__class__(
+        return self._consumer_class(
             name=name,
-            config=self._attrs[name],
+            config=config,
             client=self._client,
             *args, **merged_kwargs)
 
@@ -242,26 +298,120 @@ def create_method(name, config):
     return method
 
 
+class PathTemplate(object):
+
+    """Pre-parsed RestConsumer path with %token% (or %token|default%) fields.
+
+    Behaves like `kingpin.utils.populate_with_tokens(path, tokens)`, but the
+    path is only parsed once rather than on every RestConsumer instantiation.
+
+    Args:
+        path: A path string like '/v2/room/%res%/history'
+    """
+
+    _TOKEN_RE = re.compile(r'%(\w+)(?:\|([^%]+))?%')
+    _ALLOWED_TYPES = (str, unicode, bool, int, float)
+
+    def __init__(self, path):
+        self.path = path
+
+        # re.split() returns [text, token, default, text, token, default, ...]
+        self._parts = self._TOKEN_RE.split(path) if path else []
+
+    def fill(self, tokens):
+        """Returns the path with all of its tokens filled in.
+
+        Args:
+            tokens: A dictionary of tokens to fill in.
+
+        Raises:
+            TypeError: If a token has no value and no default.
+        """
+        if len(self._parts) < 2:
+            return self.path
+
+        parts = self._parts
+        filled = []
+        for i in xrange(0, len(parts) - 1, 3):
+            name, default = parts[i + 1], parts[i + 2]
+            value = tokens.get(name)
+            if type(value) not in self._ALLOWED_TYPES:
+                if default is None:
+                    raise TypeError('Path (%s), tokens: (%s) error: '
+                                    'Found un-filled token: %s' %
+                                    (self.path, tokens, name))
+                value = default
+            filled.append(parts[i])
+            filled.append(str(value))
+        filled.append(parts[-1])
+
+        return ''.join(filled)
+
+
 class RestConsumer(object):
 
     """An abstract object that self-defines its own API access methods.
 
-    At init time, this object reads its `_CONFIG` and pre-defines all of the
-    API access methods that have been described. It does not handle actual HTTP
-    calls directly, but is passed in a `client` object (anything that
-    subclasses the RestClient class) and leverages that for the actual web
-    calls.
+    The first time a particular `_CONFIG` (or sub-config from its `attrs`) is
+    used, a subclass is generated with all of the API access methods that have
+    been described, and the path template pre-parsed. Creating a RestConsumer
+    after that is a cheap object that just holds the filled-in path. It does
+    not handle actual HTTP calls directly, but is passed in a `client` object
+    (anything that subclasses the RestClient class) and leverages that for the
+    actual web calls.
     """
 
     _CONFIG = {}
     _ENDPOINT = None
 
+    def __new__(cls, name=None, config=None, *args, **kwargs):
+        config = config or cls._CONFIG
+        return object.__new__(cls._get_generated_class(config))
+
+    @classmethod
+    def _get_generated_class(cls, config):
+        """Returns (generating if needed) the class for a configuration.
+
+        Args:
+            config: The dictionary object with the configuration for this API
+                    endpoint call.
+
+        Returns:
+            A subclass of this class with the HTTP and attribute access
+            methods described in the config defined on it.
+        """
+        base = getattr(cls, '_consumer_class', cls)
+        key = (base, id(config))
+
+        try:
+            return _GENERATED_CLASSES[key][1]
+        except KeyError:
+            pass
+
+        attrs = {
+            '_consumer_class': base,
+            '_path_template': PathTemplate(config.get('path', None)),
+        }
+
+        for name in (config.get('http_methods', None) or {}):
+            full_method_name = 'http_%s' % name
+            attrs[full_method_name] = create_http_method(
+                full_method_name, name)
+
+        for name, attr_config in (config.get('attrs', None) or {}).items():
+            attrs[name] = create_method(name, attr_config)
+
+        generated = type(base.__name__, (base,), attrs)
+        _GENERATED_CLASSES[key] = (config, generated)
+        return generated
+
     def __init__(self, name=None, config=None, client=None, *args, **kwargs):
         """Initialize the RestConsumer object.
 
         The generic RestConsumer object (with no parameters passed in) looks at
-        the self.__class__._CONFIG dictionary and dynamically generates access
-        methods for the various API methods.
+        the self.__class__._CONFIG dictionary, and is an instance of a
+        (cached) generated class with access methods for the various API
+        methods.
 
         The GET, PUT, POST and DELETE methods optionally listed in
         CONFIG['http_methods'] represent the possible types of HTTP methods
@@ -286,7 +436,6 @@ class RestConsumer(object):
         config = config or self._CONFIG
 
         # Get the basic options for this particular REST endpoint access object
-        self._path = config.get('path', None)
         self._http_methods = config.get('http_methods', None)
         self._attrs = config.get('attrs', None)
         self._kwargs = kwargs
@@ -294,19 +443,13 @@ class RestConsumer(object):
         # If no client was supplied, then we
         self._client = client or RestClient()
 
-        # Ensure that any tokens that need filling-in in the self._path setting
-        # are pulled from the **kwargs passed into this init. This is used on
-        # API paths like Hipchats '/v2/room/%(res)/...' URLs.
-        self._path = self._replace_path_tokens(self._path, kwargs)
-
-        # Create all of the methods based on the self._http_methods and
-        # self._attrs dict.
-        self._create_methods()
-        self._create_attrs()
+        # Ensure that any tokens that need filling-in in the path setting are
+        # pulled from the **kwargs passed into this init. This is used on API
+        # paths like Hipchats '/v2/room/%(res)/...' URLs.
+        self._path = self._path_template.fill(kwargs)
 
         # Log some things
-        log.debug('%s/%s initialized' %
-                  (self.__class__.__name__, self._client))
+        log.debug('%s/%s initialized', self.__class__.__name__, self._client)
 
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self)
@@ -314,59 +457,6 @@ class RestConsumer(object):
     def __str__(self):
         return str(self._path)
 
-    def _replace_path_tokens(self, path, tokens):
-        """Search and replace %xxx% with values from tokens.
-
-        Used to replace any values of %xxx% with 'xxx' from tokens. Can replace
-        one, or many fields at aonce.
-
-        Args:
-            path: String of the path
-            tokens: A dictionary of tokens to search through.
-
-        Returns:
-            path: A modified string
-        """
-        if not path:
-            return
-
-        try:
-            path = utils.populate_with_tokens(path, tokens)
-        except LookupError as e:
-            msg = 'Path (%s), tokens: (%s) error: %s' % (path, tokens, e)
-            raise TypeError(msg)
-
-        return path
-
-    def _create_methods(self):
-        """Create @gen.coroutine wrapped HTTP methods.
-
-        Iterates through the methods described in self._methods and creates
-        @gen.coroutine wrapped access methods that perform these actions.
-        """
-        if not self._http_methods:
-            return
-
-        for name in self._http_methods.keys():
-            full_method_name = 'http_%s' % name
-            method = create_http_method(full_method_name, name)
-            setattr(self,
-                    full_method_name,
-                    types.MethodType(method, self, self.__class__))
-
-    def _create_attrs(self):
-        """Creates access methods to the attributes in self._attrs.
-
-        Iterates through the attributes described in self._attrs and creates
-        access methods that return RestConsumer objects for those attributes.
-        """
-        if not self._attrs:
-            return
-
-        for name in self._attrs.keys():
-            method = create_method(name, self._attrs[name])
-            setattr(self, name, types.MethodType(method, self, self.__class__))
-
 
 class RestClient(object):
 
@@ -377,8 +467,17 @@ class RestClient(object):
     This code is nearly identical to the kingpin.actors.base.BaseHTTPActor
     class, but is not actor-specific.
 
+    If `cache` is enabled, GET responses that carry an `ETag` or
+    `Last-Modified` header are remembered, and the next GET for the same URL
+    is made as a conditional request. When the server answers with a
+    `304 Not Modified`, the previously parsed body is returned -- so polling a
+    large, rarely changing resource costs almost nothing.
+
     Args:
         headers: Headers to pass in on every HTTP request
+        cache: Enable the conditional-GET response cache (default: False)
+        timeout: Connect and request timeout in seconds (default: the
+                 timeouts of the HTTP client)
     """
 
     _EXCEPTIONS = {
@@ -397,10 +496,48 @@ class RestClient(object):
         }
     }
 
-    def __init__(self, client=None, headers=None):
+    def __init__(self, client=None, headers=None, cache=False,
+                 timeout=None):
         self._client = client or httpclient.AsyncHTTPClient()
         self._private_kwargs = ['auth_password']
         self.headers = headers
+        self.timeout = timeout
+
+        # (url, auth_username) -> (validator headers, parsed body)
+        self._cache = {} if cache else None
+
+    def _cache_key(self, method, url, auth_username):
+        """Returns the response cache key for a request, or None."""
+        if self._cache is None or method != 'GET':
+            return None
+        return (url, auth_username)
+
+    def _get_headers(self, cache_key):
+        """Returns our headers, plus validators for any cached response."""
+        if cache_key not in (self._cache or {}):
+            return self.headers
+
+        headers = dict(self.headers or {})
+        headers.update(self._cache[cache_key][0])
+        return headers
+
+    def _store(self, cache_key, http_response, body):
+        """Caches a parsed body if the response carried any validators."""
+        if cache_key is None:
+            return
+
+        validators = {}
+        etag = http_response.headers.get('ETag')
+        if etag:
+            validators['If-None-Match'] = etag
+        modified = http_response.headers.get('Last-Modified')
+        if modified:
+            validators['If-Modified-Since'] = modified
+
+        if validators:
+            self._cache[cache_key] = (validators, copy.deepcopy(body))
+        else:
+            self._cache.pop(cache_key, None)
 
     def _generate_escaped_url(self, url, args):
         """Takes in a dictionary of arguments and returns a URL line.
@@ -428,7 +565,7 @@ class RestClient(object):
 
         # Now generate the URL
         full_url = httputil.url_concat(url, sorted(args.items()))
-        log.debug('Generated URL: %s' % full_url)
+        log.debug('Generated URL: %s', full_url)
 
         return full_url
 
@@ -461,36 +598,44 @@ class RestClient(object):
             url = self._generate_escaped_url(url, params)
 
         # Generate the full request URL and log out what we're doing...
-        log.debug('Making %s request to %s. Data: %s' % (method, url, body))
+        log.debug('Making %s request to %s. Data: %s', method, url, body)
+
+        cache_key = self._cache_key(method, url, auth_username)
 
         # Create the http_request object
         http_request = httpclient.HTTPRequest(
             url=url,
             method=method,
             body=body,
-            headers=self.headers,
+            headers=self._get_headers(cache_key),
             auth_username=auth_username,
             auth_password=auth_password,
+            connect_timeout=self.timeout,
+            request_timeout=self.timeout,
             follow_redirects=True,
             max_redirects=10)
 
         # Execute the request and raise any exception. Exceptions are not
         # caught here because they are unique to the API endpoints, and thus
         # should be handled by the individual Actor that called this method.
-        log.debug('HTTP Request: %s' % http_request)
+        log.debug('HTTP Request: %s', http_request)
         try:
             http_response = yield self._client.fetch(http_request)
         except httpclient.HTTPError as e:
+            if e.code == 304 and cache_key in (self._cache or {}):
+                log.debug('%s has not been modified, using cached body', url)
+                raise gen.Return(copy.deepcopy(self._cache[cache_key][1]))
             log.critical('Request for %s failed: %s' % (url, e))
             raise
-        log.debug('HTTP Response: %s' % http_response.body)
+        log.debug('HTTP Response: %s', http_response.body)
 
         try:
             body = json.loads(http_response.body)
         except ValueError:
-            raise gen.Return(http_response.body)
+            body = http_response.body
 
         # Receive a successful return
+        self._store(cache_key, http_response, body)
         raise gen.Return(body)
 
 
@@ -0,0 +1,290 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.breaker`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Run-wide circuit breakers and retry budget for the remote APIs.
+
+Every API call is retried on its own when it fails. When an endpoint goes
+down in the middle of a run that fans out over hundreds of actors, each one
+of them retries every call through its full schedule -- thousands of
+requests that are all doomed to fail, and that only make things worse for
+the endpoint.
+
+A `CircuitBreaker` is shared by all of the calls to one endpoint (or API
+operation). After `BREAKER_THRESHOLD` failures in a row, it *opens*: for the
+next `BREAKER_RESET` seconds, calls fail right away with a
+`kingpin.actors.exceptions.CircuitOpen` error rather than reaching the
+endpoint. Then it goes *half-open*, and lets a single call through to probe
+the endpoint. If that call succeeds, the breaker *closes* again -- otherwise
+it stays open for another `BREAKER_RESET` seconds.
+
+The `RetryBudget` caps the number of retries across the whole run to
+`RETRY_BUDGET` retries for every first attempt (plus a `RETRY_BUDGET_MIN`
+allowance, so that small runs can always retry). Once it is spent, failed
+calls are no longer retried.
+
+Both are safe to use from the thread pools that the Boto based actors make
+their calls on. A `Guard` wraps both up for `kingpin.utils.retry`.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from kingpin.actors import exceptions
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Number of failures in a row that open a breaker.
+BREAKER_THRESHOLD = int(os.getenv('KINGPIN_BREAKER_THRESHOLD', 5))
+
+# Seconds that an open breaker waits before letting a probe call through.
+BREAKER_RESET = float(os.getenv('KINGPIN_BREAKER_RESET', 30))
+
+# Retries allowed for every first attempt across the run, and the number of
+# retries that are always allowed.
+RETRY_BUDGET = float(os.getenv('KINGPIN_RETRY_BUDGET', 0.5))
+RETRY_BUDGET_MIN = int(os.getenv('KINGPIN_RETRY_BUDGET_MIN', 50))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# The run-wide breakers (by name) and retry budget. See get_breaker() and
+# get_budget() below.
+_BREAKERS = {}
+_BUDGET = None
+_LOCK = threading.Lock()
+
+
+class CircuitBreaker(object):
+
+    """Fails calls to an endpoint fast while the endpoint is failing.
+
+    Args:
+        name: Name of the endpoint (or operation)
+        threshold: Number of failures in a row that open the breaker
+        reset: Seconds to stay open before letting a probe call through
+    """
+
+    def __init__(self, name, threshold=None, reset=None):
+        self.name = name
+        self.threshold = threshold or BREAKER_THRESHOLD
+        self.reset = reset or BREAKER_RESET
+        self.state = CLOSED
+        self.failures = 0
+        self._opened = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before(self):
+        """Must be called before every call to the endpoint.
+
+        Raises:
+            CircuitOpen: If the call must not be made
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            if self.state == OPEN:
+                if time.time() - self._opened < self.reset:
+                    self._fail_fast()
+                self.state = HALF_OPEN
+                self._probing = False
+
+            # Half-open: exactly one call gets to find out whether the
+            # endpoint is back.
+            if self._probing:
+                self._fail_fast()
+            self._probing = True
+
+    def _fail_fast(self):
+        wait = max(0, self.reset - (time.time() - self._opened))
+        raise exceptions.CircuitOpen(
+            '%s has failed %s times in a row; not calling it for another '
+            '%.0fs' % (self.name, self.failures, wait))
+
+    def success(self):
+        """Records a successful call to the endpoint."""
+        with self._lock:
+            if self.state != CLOSED:
+                log.info('%s is back, closing its circuit breaker' %
+                         self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self):
+        """Records a failed call to the endpoint."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (
+                    self.state == CLOSED and
+                    self.failures >= self.threshold):
+                log.warning('%s failed %s times in a row, failing calls to '
+                            'it fast for %ss' % (self.name, self.failures,
+                                                 self.reset))
+                self.state = OPEN
+                self._opened = time.time()
+
+
+class RetryBudget(object):
+
+    """Caps the retries of a run to a ratio of its first attempts.
+
+    Args:
+        ratio: Retries allowed for every first attempt
+        minimum: Retries that are always allowed
+    """
+
+    def __init__(self, ratio=None, minimum=None):
+        self.ratio = RETRY_BUDGET if ratio is None else ratio
+        self.minimum = RETRY_BUDGET_MIN if minimum is None else minimum
+        self.attempts = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def attempt(self):
+        """Records an attempt (the first one or a retry) at a call."""
+        with self._lock:
+            self.attempts += 1
+
+    def withdraw(self):
+        """Asks for a retry.
+
+        Returns:
+            True if the retry is within the budget (and was recorded).
+        """
+        with self._lock:
+            first = self.attempts - self.retries
+            if self.retries >= self.minimum + self.ratio * first:
+                if not self.denied:
+                    log.warning('Retry budget spent (%s retries for %s '
+                                'calls), failed calls are no longer '
+                                'retried' % (self.retries, first))
+                self.denied += 1
+                return False
+
+            self.retries += 1
+            return True
+
+
+class Guard(object):
+
+    """Guards the calls made through `kingpin.utils.retry` to an endpoint.
+
+    Every attempt goes through the run-wide breaker of the endpoint, and every
+    retry is drawn from the run-wide retry budget. The breaker and budget are
+    looked up on every call, so that a guard can be made once (when a method
+    is decorated) and still follow the run that it is used in.
+
+    Only the errors that mean the endpoint itself is in trouble count against
+    it. Any other error came from an endpoint that is up, even if it did not
+    like what it was asked, and is retried without touching the budget.
+
+    Args:
+        endpoint: Name of the endpoint (or operation)
+        is_outage: Function that takes an exception, and returns whether it
+                   means that the endpoint is failing (default: http_outage)
+    """
+
+    def __init__(self, endpoint, is_outage=None):
+        self.endpoint = endpoint
+        self.is_outage = is_outage or http_outage
+
+    def before(self):
+        """Must be called before every attempt at a call.
+
+        Raises:
+            CircuitOpen: If the call must not be made
+        """
+        get_breaker(self.endpoint).before()
+        get_budget().attempt()
+
+    def success(self):
+        """Records an attempt that reached a working endpoint."""
+        get_breaker(self.endpoint).success()
+
+    def failure(self, exception):
+        """Records a failed attempt."""
+        if self.is_outage(exception):
+            get_breaker(self.endpoint).failure()
+        else:
+            get_breaker(self.endpoint).success()
+
+    def retry(self, exception):
+        """Asks for a retry of a failed attempt.
+
+        Returns:
+            True if the call may be retried.
+        """
+        if not self.is_outage(exception):
+            return True
+        return get_budget().withdraw()
+
+
+def http_outage(exception):
+    """Whether an HTTP error means that the endpoint is failing.
+
+    Server errors (5xx) count, and so do timeouts and connection errors --
+    which Tornado reports as a 599. Client errors (4xx) do not.
+    """
+    code = getattr(exception, 'code', None)
+    return isinstance(code, int) and code >= 500
+
+
+def get_breaker(name):
+    """Returns the run-wide CircuitBreaker of an endpoint."""
+    with _LOCK:
+        if name not in _BREAKERS:
+            _BREAKERS[name] = CircuitBreaker(name)
+        return _BREAKERS[name]
+
+
+def get_budget():
+    """Returns the run-wide RetryBudget."""
+    global _BUDGET
+    with _LOCK:
+        if _BUDGET is None:
+            _BUDGET = RetryBudget()
+        return _BUDGET
+
+
+def reset():
+    """Forgets all of the breakers and the retry budget of the run."""
+    global _BUDGET
+    with _LOCK:
+        _BREAKERS.clear()
+        _BUDGET = None
+
+
+def after_fork():
+    """Starts a forked worker process off with its own breakers and budget.
+
+    A thread of the parent may have been holding a lock when it forked, so
+    nothing that the parent had is kept.
+    """
+    global _BUDGET, _LOCK
+    _LOCK = threading.Lock()
+    _BREAKERS.clear()
+    _BUDGET = None
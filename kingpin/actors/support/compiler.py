@@ -0,0 +1,69 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.compiler`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Checks a script without building any of its actors for real.
+
+``--build-only`` instantiates every actor in a script, and many actors set up
+their API clients as they are instantiated -- connecting to AWS, looking up
+regions, logging in to RightScale or fetching remote macros. That makes it
+slow, and it needs credentials.
+
+With ``--build-only --offline``, every actor is compiled by `compile_actor()`
+instead. The actor class is looked up and only `BaseActor.__init__()` is run,
+which fills in the ``{CONTEXT}`` tokens, checks the options and their types
+and calls the actor's `_prepare()` hook (which reads and checks its local
+files), just as it would for the real actor. Then the actor's `_compile()`
+hook is called in place of the rest of its ``__init__()``: group actors
+compile their acts for every context, and `misc.Macro` parses, token-fills
+and schema-checks its (local) script and compiles the actor in it.
+
+Nothing is connected to, so checks that need an API (like whether a stack or
+an array exists) are left to the dry run, along with the credential checks
+made by the ``__init__()`` of the actors. Remote macros and templates are not
+fetched.
+"""
+
+import logging
+
+from kingpin.actors import base
+from kingpin.actors import utils
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+
+def compile_actor(config, dry=False):
+    """Compiles the actor described by `config`, without any network calls.
+
+    Takes the same arguments as `kingpin.actors.utils.get_actor()`, and raises
+    the same exceptions for any problem that can be found offline.
+
+    Returns:
+        The compiled actor. It is only good for walking its orgchart, and
+        must never be executed.
+    """
+    config = dict(config)
+    actor_string = config.pop('actor')
+    ActorClass = utils.get_actor_class(actor_string)
+
+    log.debug('Compiling Actor "%s"', actor_string)
+    actor = ActorClass.__new__(ActorClass)
+    base.BaseActor.__init__(actor, dry=dry, **config)
+    actor._compile()
+    return actor
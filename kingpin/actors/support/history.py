@@ -0,0 +1,219 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.history`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+How long actors took to execute in earlier runs.
+
+When Kingpin is run with ``--history FILE``, every actor that finishes
+(successfully, or with a warning) has its duration recorded under a key made
+of its class and a hash of its options. At the end of the run the new
+durations are folded into the file, as a moving average per key.
+
+The durations are used to estimate how long an actor will take:
+
+* `kingpin.actors.group.Async` can start the acts that are expected to take
+  the longest first (see its ``longest_first`` option), so that one slow act
+  queued up last does not stretch out the whole group.
+* The groups log how long they are expected to take when they begin.
+
+Actors that have never been run with their current options are expected to
+take as long as the other actors of their class do, on average.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import time
+
+from kingpin.actors.support import store
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Weight of the newest duration in the moving average of a key.
+WEIGHT = 0.5
+
+# Keys that have not been run for this long are dropped from the file.
+MAX_AGE = 90 * 24 * 3600
+
+# The run-wide History object (if any). See get_history() below.
+_HISTORY = None
+
+
+def _dumps(data):
+    # Group options hold their acts' token scopes, which only differ from one
+    # run to the next by their address in memory. The type is enough.
+    return json.dumps(data, sort_keys=True,
+                      default=lambda obj: type(obj).__name__)
+
+
+# Where the durations are kept between runs
+_STORE = store.Store('history', version=1, max_age=MAX_AGE, stamp='last',
+                     dumps=_dumps)
+
+
+def actor_key(actor):
+    """Returns the key of an actor's durations.
+
+    The key is worked out once, when the actor is first asked about (or
+    begins executing), so that options munged during the execution do not
+    change it.
+    """
+    if actor._history_key is None:
+        actor._history_key = hashlib.sha1(_dumps(
+            [actor._type, actor._dry, actor._options])).hexdigest()
+    return actor._history_key
+
+
+class History(object):
+
+    """The recorded durations of actors.
+
+    Args:
+        actors: Dict of actor key -> {'class', 'seconds', 'runs', 'last'}
+    """
+
+    def __init__(self, actors=None):
+        self.actors = {} if actors is None else actors
+
+        # (key, class, seconds) of every actor recorded during this run
+        self.samples = []
+        self._averages = None
+
+    def __len__(self):
+        return len(self.actors)
+
+    def _class_averages(self):
+        if self._averages is None:
+            totals = {}
+            for entry in self.actors.values():
+                total = totals.setdefault(entry['class'], [0.0, 0])
+                total[0] += entry['seconds']
+                total[1] += 1
+            self._averages = dict(
+                (cls, seconds / count)
+                for cls, (seconds, count) in totals.items())
+        return self._averages
+
+    def expected(self, actor):
+        """Returns the number of seconds an actor is expected to take.
+
+        Returns:
+            A float, or None if no actor of its class has been recorded.
+        """
+        entry = self.actors.get(actor_key(actor))
+        if entry is not None:
+            return entry['seconds']
+        return self._class_averages().get(actor._type)
+
+    def _update(self, key, cls, seconds, now):
+        entry = self.actors.get(key)
+        if entry is None:
+            entry = self.actors[key] = {'class': cls, 'seconds': seconds,
+                                        'runs': 0}
+        else:
+            entry['seconds'] = (WEIGHT * seconds +
+                                (1 - WEIGHT) * entry['seconds'])
+        entry['runs'] += 1
+        entry['last'] = now
+        self._averages = None
+
+    def add(self, key, cls, seconds):
+        """Records the duration of an actor by its key."""
+        self.samples.append((key, cls, seconds))
+        self._update(key, cls, seconds, time.time())
+
+    def record(self, actor, seconds):
+        """Records how long an actor took to execute."""
+        self.add(actor_key(actor), actor._type, seconds)
+
+    def save(self, path):
+        """Folds the durations recorded during this run into a file."""
+        def fold(actors):
+            current = History(actors)
+            now = time.time()
+            for key, cls, seconds in self.samples:
+                current._update(key, cls, seconds, now)
+
+        _STORE.save(path, fold)
+        log.info('Saved %s actor duration(s) to %s', len(self.samples), path)
+        self.samples = []
+
+    @classmethod
+    def load(cls, path):
+        """Reads in a file written by save()."""
+        return cls(actors=_STORE.load(path))
+
+
+def longest_first(actors):
+    """Returns the indexes of actors, ordered longest-expected-first.
+
+    Actors without any expected duration go first, since they may take the
+    longest of all. Otherwise, the order of the actors is kept.
+    """
+    current = get_history()
+    if current is None:
+        return range(len(actors))
+
+    def expected(index):
+        seconds = current.expected(actors[index])
+        return -(float('inf') if seconds is None else seconds)
+
+    return sorted(xrange(len(actors)), key=expected)
+
+
+def estimate(actors, concurrency=1):
+    """Returns how long a list of actors is expected to take.
+
+    Simulates the actors being started in order, with up to `concurrency` of
+    them running at the same time (0 for all of them at once).
+
+    Returns:
+        Seconds, or None if there is no history or any actor is unknown.
+    """
+    current = get_history()
+    if current is None or not actors:
+        return None
+
+    durations = []
+    for actor in actors:
+        seconds = current.expected(actor)
+        if seconds is None:
+            return None
+        durations.append(seconds)
+
+    if not concurrency or concurrency >= len(durations):
+        return max(durations)
+
+    # The time at which each of the `concurrency` slots frees up
+    slots = [0.0] * concurrency
+    for seconds in durations:
+        heapq.heappush(slots, heapq.heappop(slots) + seconds)
+    return max(slots)
+
+
+def get_history():
+    """Returns the run-wide History object, or None."""
+    return _HISTORY
+
+
+def set_history(history):
+    """Sets (or with None, clears) the run-wide History object."""
+    global _HISTORY
+    _HISTORY = history
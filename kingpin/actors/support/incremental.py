@@ -0,0 +1,117 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.incremental`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Skips Ensurable actors whose resources have not changed since the last run.
+
+Most runs of a script that "ensures" a lot of resources change nothing at
+all, yet every actor reads back the full state of its resource to find that
+out. When Kingpin is run with ``--incremental FILE``, every
+`EnsurableBaseActor` that supports it (by implementing `_remote_version()`)
+records a fingerprint after it has successfully ensured its resource: a hash
+of its class and options, along with a cheap marker of the version of the
+remote resource (like its last-modified time).
+
+On the next run, an actor whose options and remote version both still match
+its fingerprint is skipped, without calling `_precache()` or any of its
+getters. Fingerprints are only trusted for `MAX_AGE`, so that every resource
+is still fully checked every now and then -- catching changes that do not
+show up in its version.
+"""
+
+import logging
+import time
+
+from kingpin import version
+from kingpin.actors.support import plan
+from kingpin.actors.support import store
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Seconds that a fingerprint is trusted for.
+MAX_AGE = 7 * 24 * 3600
+
+# Where the fingerprints are kept between runs
+_STORE = store.Store('fingerprints', version=1, max_age=MAX_AGE,
+                     stamp='recorded')
+
+# The run-wide Fingerprints object (if any). See get_fingerprints() below.
+_FINGERPRINTS = None
+
+
+def actor_key(actor):
+    """Returns the key of an actor's fingerprint.
+
+    The key covers the Kingpin version (since the code of the actor may have
+    changed), the actor class and all of its (token filled) options.
+    """
+    return plan.fingerprint(version.__version__, actor._type, actor._options)
+
+
+class Fingerprints(object):
+
+    """The fingerprints of the resources ensured by earlier runs.
+
+    Args:
+        entries: Dict of actor key -> {'version', 'recorded'}
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+        # The entries recorded during this run
+        self.recorded = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def matches(self, key, remote_version):
+        """Whether an actor was ensured with this remote version lately."""
+        entry = self.entries.get(key)
+        if entry is None or entry['version'] != remote_version:
+            return False
+        return time.time() - entry['recorded'] < MAX_AGE
+
+    def record(self, key, remote_version):
+        """Records that an actor has ensured the given remote version."""
+        entry = {'version': remote_version, 'recorded': time.time()}
+        self.entries[key] = entry
+        self.recorded[key] = entry
+
+    def save(self, path):
+        """Folds the fingerprints recorded during this run into a file."""
+        _STORE.save(path, lambda entries: entries.update(self.recorded))
+        log.info('Saved %s fingerprint(s) to %s', len(self.recorded), path)
+        self.recorded = {}
+
+    @classmethod
+    def load(cls, path):
+        """Reads in a file written by save()."""
+        return cls(entries=_STORE.load(path))
+
+
+def get_fingerprints():
+    """Returns the run-wide Fingerprints object, or None."""
+    return _FINGERPRINTS
+
+
+def set_fingerprints(fingerprints):
+    """Sets (or with None, clears) the run-wide Fingerprints object."""
+    global _FINGERPRINTS
+    _FINGERPRINTS = fingerprints
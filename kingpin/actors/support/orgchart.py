@@ -0,0 +1,100 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.orgchart`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Writes the orgchart of an actor (see `BaseActor.get_orgchart()`) to a file.
+
+The orgchart is streamed out one actor at a time as the tree is walked, so
+writing out the chart of a script with a hundred thousand actors takes no more
+memory than writing out one with ten. Three formats are supported:
+
+* ``json`` -- A single JSON list of orgchart objects (the original format)
+* ``jsonl`` -- One JSON orgchart object per line
+* ``dot`` -- A `Graphviz <http://www.graphviz.org/>`_ digraph
+"""
+
+import json
+import logging
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+FORMATS = ('json', 'jsonl', 'dot')
+
+
+def _write_json(entries, output):
+    output.write('[')
+    for count, entry in enumerate(entries):
+        if count:
+            output.write(', ')
+        output.write(json.dumps(entry))
+    output.write(']')
+
+
+def _write_jsonl(entries, output):
+    for entry in entries:
+        output.write(json.dumps(entry))
+        output.write('\n')
+
+
+def _quote(string):
+    """Returns a double quoted DOT ID."""
+    string = unicode(string).replace('\\', '\\\\').replace('"', '\\"')
+    return u'"%s"' % string.replace('\n', '\\n')
+
+
+def _label(entry):
+    label = u'%s\n(%s)' % (entry['desc'], entry['class'])
+    if entry.get('outcome'):
+        label += u'\n%s in %ss' % (entry['outcome'], entry['duration'])
+    return label
+
+
+def _write_dot(entries, output):
+    output.write('digraph orgchart {\n')
+    output.write('  node [shape=box];\n')
+    for entry in entries:
+        node = _quote(entry['id'])
+        line = u'  %s [label=%s];\n' % (node, _quote(_label(entry)))
+        if entry['parent_id']:
+            line += u'  %s -> %s;\n' % (_quote(entry['parent_id']), node)
+        output.write(line.encode('utf-8'))
+    output.write('}\n')
+
+
+WRITERS = {
+    'json': _write_json,
+    'jsonl': _write_jsonl,
+    'dot': _write_dot,
+}
+
+
+def write(actor, output, fmt='json', timings=False):
+    """Writes the orgchart of an actor to an open file.
+
+    Args:
+        actor: A `BaseActor` (or `ActorRecord`)
+        output: File object to write to
+        fmt: One of FORMATS
+        timings: Include the timing and outcome of the last execution of each
+                 actor (see `BaseActor.iter_orgchart()`)
+
+    Raises:
+        KeyError: If the format is unknown
+    """
+    WRITERS[fmt](actor.iter_orgchart(timings=timings), output)
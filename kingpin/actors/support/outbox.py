@@ -0,0 +1,206 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.outbox`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Run-wide, non-blocking delivery of notifications.
+
+Notification actors (Slack, HipChat, Rollbar, Librato) that are given the
+`async_delivery` option hand their message to the shared `Outbox` and return
+immediately, rather than making the rest of the deployment wait on a slow or
+rate-limited chat API.
+
+Each destination (ie, 'slack') gets its own delivery loop that sends at most
+one message every `INTERVALS[destination]` seconds. Messages that are still
+waiting to be sent when another one arrives for the same key (ie, the same
+Slack channel) are coalesced into a single message.
+
+The outbox is flushed (with a deadline) by `kingpin.bin.deploy` before
+Kingpin exits.
+"""
+
+import datetime
+import logging
+import os
+import time
+
+from tornado import gen
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Minimum number of seconds between two deliveries to the same destination.
+INTERVALS = {
+    'slack': 1.0,
+    'hipchat': 1.0,
+}
+DEFAULT_INTERVAL = 0.5
+
+# Maximum number of seconds to wait for the outbox to drain before exiting.
+FLUSH_TIMEOUT = int(os.getenv('OUTBOX_FLUSH_TIMEOUT', 60))
+
+# The run-wide Outbox object. See get_outbox() below.
+_OUTBOX = None
+
+
+class Envelope(object):
+
+    """A single queued notification.
+
+    Args:
+        send: A coroutine function that delivers the notification. It is
+              called with `payload` as its only argument (or with no
+              arguments if `payload` is None).
+        payload: The (mergeable) contents of the notification
+        key: Notifications with the same key may be coalesced (optional)
+        merge: Function that combines two payloads into one (optional)
+    """
+
+    def __init__(self, send, payload=None, key=None, merge=None):
+        self.send = send
+        self.payload = payload
+        self.key = key
+        self.merge = merge
+        self.count = 1
+
+    def coalesce(self, other):
+        """Merges another envelope into this one, if possible.
+
+        Returns:
+            True if the other envelope was merged in.
+        """
+        if self.key is None or self.merge is None or self.key != other.key:
+            return False
+
+        self.payload = self.merge(self.payload, other.payload)
+        self.count += 1
+        return True
+
+    def deliver(self):
+        if self.payload is None:
+            return self.send()
+        return self.send(self.payload)
+
+
+class Outbox(object):
+
+    """Queues notifications and delivers them in the background."""
+
+    def __init__(self):
+        self._queues = {}
+        self._workers = {}
+        self._last_sent = {}
+        self.failures = 0
+
+    def pending(self):
+        """Returns the number of notifications that have not been sent."""
+        return sum(len(q) for q in self._queues.values())
+
+    def enqueue(self, destination, envelope):
+        """Queues up a notification for delivery.
+
+        Args:
+            destination: Name of the rate-limited destination (ie, 'slack')
+            envelope: An Envelope object
+        """
+        queue = self._queues.setdefault(destination, [])
+
+        for queued in queue:
+            if queued.coalesce(envelope):
+                log.debug('Coalesced %s notification (%s messages)' %
+                          (destination, queued.count))
+                return
+
+        queue.append(envelope)
+
+        worker = self._workers.get(destination)
+        if worker is None or worker.done():
+            self._workers[destination] = self._deliver(destination)
+
+    @gen.coroutine
+    def _deliver(self, destination):
+        """Delivers all queued notifications for a single destination."""
+        interval = INTERVALS.get(destination, DEFAULT_INTERVAL)
+        queue = self._queues[destination]
+
+        # Never deliver anything inline with the enqueue() call -- the actor
+        # should return right away, and any burst of messages queued up in
+        # the same IOLoop iteration can be coalesced.
+        yield gen.moment
+
+        while queue:
+            # Wait out our rate limit before taking the next envelope off of
+            # the queue, so that anything arriving in the meantime can still
+            # be coalesced into it.
+            last = self._last_sent.get(destination, 0)
+            wait = last + interval - time.time()
+            if wait > 0:
+                yield gen.sleep(wait)
+
+            envelope = queue.pop(0)
+            try:
+                yield envelope.deliver()
+            except Exception as e:
+                # The actor that queued this message has long since returned
+                # successfully, so all we can do is make noise.
+                self.failures += 1
+                log.error('Failed to deliver %s notification: %s' %
+                          (destination, e))
+            finally:
+                self._last_sent[destination] = time.time()
+
+    @gen.coroutine
+    def flush(self, timeout=None):
+        """Waits for all of the queued notifications to be delivered.
+
+        Args:
+            timeout: Maximum number of seconds to wait (defaults to
+                     FLUSH_TIMEOUT)
+
+        Returns:
+            The number of notifications left undelivered.
+        """
+        if timeout is None:
+            timeout = FLUSH_TIMEOUT
+
+        workers = [w for w in self._workers.values() if not w.done()]
+        if not workers:
+            raise gen.Return(0)
+
+        log.info('Delivering %s queued notification(s)...' % self.pending())
+        try:
+            yield gen.with_timeout(datetime.timedelta(seconds=timeout),
+                                   gen.multi(workers))
+        except gen.TimeoutError:
+            log.warning('Gave up on %s notification(s) after %ss' %
+                        (self.pending(), timeout))
+
+        raise gen.Return(self.pending())
+
+
+def get_outbox():
+    """Returns the run-wide Outbox object."""
+    global _OUTBOX
+    if _OUTBOX is None:
+        _OUTBOX = Outbox()
+    return _OUTBOX
+
+
+def set_outbox(outbox):
+    """Sets (or with None, resets) the run-wide Outbox object."""
+    global _OUTBOX
+    _OUTBOX = outbox
@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.pages`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Reads the results of paginated list APIs, one page at a time.
+
+Most list APIs (``ListUsers``, ``DescribeLoadBalancers``...) return their
+results a page at a time, along with a marker to ask for the next page with.
+Reading only the first page silently misses everything after it, while
+reading every page up front is wasted effort when all we are after is the
+one resource with a given name.
+
+A `Pages` object fetches the pages lazily, as they are needed:
+
+.. code-block:: python
+
+    pages = Pages(fetch)
+    while (yield pages.fetch_next()):
+        for item in pages.items:
+            ...
+
+Or, to stop reading pages as soon as a match has been found:
+
+.. code-block:: python
+
+    user = yield Pages(fetch).find(lambda user: user['user_name'] == name)
+"""
+
+import logging
+
+from tornado import gen
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+
+class Pages(object):
+
+    """The pages of a list API call.
+
+    Args:
+        fetch: Coroutine function that takes the marker of a page (None for
+               the first page) and returns a tuple of the items on that page
+               and the marker of the next page (None after the last one).
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._marker = None
+        self._done = False
+
+        # The items on the page that was fetched last
+        self.items = []
+
+        # Number of pages fetched so far
+        self.fetched = 0
+
+    @gen.coroutine
+    def fetch_next(self):
+        """Fetches the next page into `items`.
+
+        Returns:
+            True, or False if there are no more pages.
+        """
+        if self._done:
+            self.items = []
+            raise gen.Return(False)
+
+        items, self._marker = yield self._fetch(self._marker)
+        self.items = list(items)
+        self.fetched += 1
+        self._done = not self._marker
+
+        log.debug('Fetched page %s (%s items%s)' % (
+            self.fetched, len(self.items),
+            '' if self._done else ', more to come'))
+        raise gen.Return(True)
+
+    @gen.coroutine
+    def find(self, match):
+        """Returns the items that `match`, from the first page that has any.
+
+        Pages after the first one with a match are never fetched, so this is
+        meant for finding things that have unique names.
+
+        Args:
+            match: Function that takes an item and returns a bool
+
+        Returns:
+            A list of the matching items (empty if there are none)
+        """
+        while (yield self.fetch_next()):
+            found = [item for item in self.items if match(item)]
+            if found:
+                raise gen.Return(found)
+        raise gen.Return([])
+
+    @gen.coroutine
+    def all(self):
+        """Returns the items on every (remaining) page."""
+        items = []
+        while (yield self.fetch_next()):
+            items.extend(self.items)
+        raise gen.Return(items)
@@ -0,0 +1,165 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.plan`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Serialized execution plans for Ensurable actors.
+
+A dry run started with ``--plan-out FILE`` records, for every
+`EnsurableBaseActor`, the state that its getters observed and the list of
+setters it *would* have called. A later real run started with
+``--plan-in FILE`` skips the getters and comparisons entirely, and calls
+exactly those setters -- as long as a cheap fingerprint of the resource
+(computed from the data the actor fetches in its `_precache()` method) has not
+changed since the plan was made.
+
+Actors that cannot produce a fingerprint, resources that have changed, and
+actors that are not in the plan at all are simply ensured the normal way.
+"""
+
+import hashlib
+import json
+import logging
+
+from kingpin import exceptions
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Version of the plan file format. Plans of any other version are refused.
+VERSION = 1
+
+# The run-wide Plan object (if any). See get_plan() below.
+_PLAN = None
+
+
+def _dumps(data):
+    # Observed state often contains objects (datetimes, RightScale resources)
+    # that JSON doesn't know about. Their string forms are good enough.
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+def fingerprint(*data):
+    """Returns a stable hash of the supplied data.
+
+    Args:
+        data: Any number of JSON-able objects
+
+    Returns:
+        A hex digest string
+    """
+    return hashlib.sha1(_dumps(data)).hexdigest()
+
+
+def actor_key(actor):
+    """Returns the key that identifies an actor across two runs.
+
+    The key covers the actor class, its description and all of its (token
+    filled) options -- so an actor whose options change between the dry run
+    and the real run will not match its old plan entry.
+    """
+    cls = actor.__class__
+    return fingerprint('%s.%s' % (cls.__module__, cls.__name__),
+                       str(actor), actor._options)
+
+
+class Plan(object):
+
+    """A set of recorded actor plans.
+
+    Args:
+        actors: Dict of actor key -> list of plan entries (optional)
+        recording: True if this plan is being built by a dry run, False if it
+                   was loaded to be applied.
+    """
+
+    def __init__(self, actors=None, recording=True):
+        self.actors = actors or {}
+        self.recording = recording
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.actors.values())
+
+    def record(self, actor, fingerprint, observed, setters):
+        """Records the plan for a single actor.
+
+        Args:
+            actor: The EnsurableBaseActor object
+            fingerprint: The resource fingerprint (or None)
+            observed: Dict of option name -> value returned by the getter
+            setters: List of option names whose setters would be called
+        """
+        cls = actor.__class__
+        self.actors.setdefault(actor_key(actor), []).append({
+            'actor': str(actor),
+            'class': '%s.%s' % (cls.__module__, cls.__name__),
+            'fingerprint': fingerprint,
+            'observed': observed,
+            'setters': setters,
+        })
+
+    def take(self, actor):
+        """Returns (and removes) the next plan entry for an actor.
+
+        Identical actors in the same script share a key, so each one consumes
+        its own entry in order.
+
+        Returns:
+            A plan entry dict, or None
+        """
+        entries = self.actors.get(actor_key(actor))
+        if not entries:
+            return None
+        return entries.pop(0)
+
+    def save(self, path):
+        """Writes the plan out to a file."""
+        with open(path, 'w') as f:
+            f.write(_dumps({'version': VERSION, 'actors': self.actors}))
+        log.info('Wrote a plan for %s actor(s) to %s' % (len(self), path))
+
+    @classmethod
+    def load(cls, path):
+        """Reads in a plan file written by save().
+
+        Raises:
+            InvalidPlan: If the file is unreadable or of the wrong version
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            raise exceptions.InvalidPlan(
+                'Unable to read plan %s: %s' % (path, e))
+
+        if data.get('version') != VERSION:
+            raise exceptions.InvalidPlan(
+                'Plan %s has unsupported version %s' %
+                (path, data.get('version')))
+
+        return cls(actors=data['actors'], recording=False)
+
+
+def get_plan():
+    """Returns the run-wide Plan object, or None."""
+    return _PLAN
+
+
+def set_plan(plan):
+    """Sets (or with None, clears) the run-wide Plan object."""
+    global _PLAN
+    _PLAN = plan
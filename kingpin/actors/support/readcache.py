@@ -0,0 +1,208 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.readcache`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+A persistent cache of read-only API responses, shared between runs.
+
+The same dry run is often run over and over against the same accounts (say,
+by CI on every push). Most of the API calls that such a dry run makes are
+idempotent reads -- describing a stack, fetching its template, finding a
+RightScale resource by name -- whose answers rarely change from one run to
+the next.
+
+When Kingpin is run with ``--read-cache FILE``, the responses to a handful of
+those calls (see `TTLS`) are kept in a SQLite database, each for a number of
+seconds that depends on the operation. The cache is only used while the dry
+run executes. The real run always reads the live state of every resource, and
+since it may have changed any of them, the cache is emptied once it is done.
+
+The responses are stored with `pickle`, so the file is created readable by its
+owner only. Never point ``--read-cache`` at a file that others can write to.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import time
+
+from tornado import gen
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Seconds that the response to each operation is cached for. Operations that
+# are not listed here are cached for DEFAULT_TTL seconds.
+TTLS = {
+    'describe_stacks': 60,
+    'get_template': 300,
+    'get_all_group_policies': 300,
+    'get_all_role_policies': 300,
+    'get_all_user_policies': 300,
+    'get_group_policy': 600,
+    'get_role_policy': 600,
+    'get_user_policy': 600,
+    'find_by_name_and_keys': 300,
+    'list_groups': 60,
+}
+DEFAULT_TTL = 60
+
+# Returned by ReadCache.get() when there is no (fresh) response for a key.
+MISS = object()
+
+# The ReadCache used by the run (if any). See get_cache() below.
+_CACHE = None
+
+
+def _dumps(data):
+    return json.dumps(data, sort_keys=True,
+                      default=lambda obj: type(obj).__name__)
+
+
+def cache_key(operation, key):
+    """Returns the database key of an operation called with `key`."""
+    return hashlib.sha1(_dumps([operation, key])).hexdigest()
+
+
+class ReadCache(object):
+
+    """A SQLite database of API responses.
+
+    Any error reading from (or writing to) the database is logged and treated
+    as a cache miss -- the cache must never fail a deployment.
+
+    Args:
+        path: Path to the database file (created if necessary)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0600))
+        self.reopen()
+
+    def reopen(self):
+        """Opens a new connection to the database.
+
+        A SQLite connection must not be used from both sides of a fork, so a
+        worker process (see `kingpin.actors.support.workers`) opens its own.
+        """
+        self._db = sqlite3.connect(self.path, timeout=10,
+                                   isolation_level=None)
+        self._db.text_factory = str
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                         'key TEXT PRIMARY KEY, '
+                         'value BLOB NOT NULL, '
+                         'expires REAL NOT NULL)')
+
+    def get(self, key):
+        """Returns the cached response for a key, or MISS."""
+        try:
+            row = self._db.execute(
+                'SELECT value FROM responses WHERE key = ? AND expires > ?',
+                (key, time.time())).fetchone()
+            if row is not None:
+                self.hits += 1
+                return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            log.warning('Unable to read from the read cache: %s' % e)
+
+        self.misses += 1
+        return MISS
+
+    def put(self, key, value, ttl):
+        """Caches a response for `ttl` seconds."""
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?)',
+                (key, sqlite3.Binary(data), time.time() + ttl))
+        except (sqlite3.Error, pickle.PicklingError, TypeError) as e:
+            log.warning('Unable to write to the read cache: %s' % e)
+
+    def clear(self):
+        """Throws away every cached response."""
+        try:
+            self._db.execute('DELETE FROM responses')
+        except sqlite3.Error as e:
+            log.warning('Unable to clear the read cache: %s' % e)
+
+    def prune(self):
+        """Throws away the expired responses."""
+        try:
+            self._db.execute('DELETE FROM responses WHERE expires <= ?',
+                             (time.time(),))
+        except sqlite3.Error as e:
+            log.warning('Unable to prune the read cache: %s' % e)
+
+    def close(self):
+        self._db.close()
+
+
+@gen.coroutine
+def cached(operation, key, fetch, encode=None, decode=None):
+    """Returns the response to an idempotent read, from the cache if possible.
+
+    Example:
+        >>> stacks = yield cached(
+        ...     'describe_stacks', [region, name],
+        ...     lambda: self.thread(conn.describe_stacks, StackName=name))
+
+    Args:
+        operation: Name of the API operation (see `TTLS`)
+        key: JSON-able data that identifies the call -- the account, region
+             and arguments of the operation
+        fetch: Function that makes the call, returning a Future
+        encode: Function that turns a response into something picklable
+        decode: Function that turns the output of `encode` back into a
+                response
+
+    Returns:
+        The response
+    """
+    cache = get_cache()
+    if cache is None:
+        ret = yield fetch()
+        raise gen.Return(ret)
+
+    digest = cache_key(operation, key)
+    value = cache.get(digest)
+    if value is MISS:
+        ret = yield fetch()
+        value = encode(ret) if encode else ret
+        cache.put(digest, value, TTLS.get(operation, DEFAULT_TTL))
+        raise gen.Return(ret)
+
+    log.debug('Read cache hit for %s' % operation)
+    raise gen.Return(decode(value) if decode else value)
+
+
+def get_cache():
+    """Returns the ReadCache in use right now, or None."""
+    return _CACHE
+
+
+def set_cache(cache):
+    """Sets (or with None, stops using) the ReadCache of the run."""
+    global _CACHE
+    _CACHE = cache
@@ -0,0 +1,103 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.shard`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Splits the ``contexts`` of group actors between cooperating Kingpin runs.
+
+When Kingpin is started with ``--shard INDEX/COUNT``, every group actor that
+has the ``shard`` option set only builds its acts for the contexts that
+belong to shard ``INDEX``. Running the same script with every index from
+``0`` to ``COUNT - 1`` -- on one host or on many -- covers every context
+exactly once.
+
+A context belongs to a shard based on a hash of its contents, rather than its
+position in the list. The shards therefore agree even when the contexts file
+was generated (in a different order) on each host.
+"""
+
+import hashlib
+import json
+import re
+
+from kingpin import exceptions
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+# The (index, count) of this run, or None if it is not sharded. See
+# get_shard() below.
+_SHARD = None
+
+
+def parse(spec):
+    """Parses an ``INDEX/COUNT`` shard specification.
+
+    Args:
+        spec: String like '0/4'
+
+    Returns:
+        An (index, count) tuple
+
+    Raises:
+        InvalidShard: If the specification is malformed or out of range
+    """
+    match = re.match(r'^\s*(\d+)\s*/\s*(\d+)\s*$', spec or '')
+    if not match:
+        raise exceptions.InvalidShard(
+            'Shard must be INDEX/COUNT (ie, 0/4), not "%s"' % spec)
+
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or index >= count:
+        raise exceptions.InvalidShard(
+            'Shard index must be between 0 and %s, not %s' %
+            (count - 1, index))
+    return (index, count)
+
+
+def shard_of(context, count):
+    """Returns the shard (out of `count`) that a context belongs to."""
+    data = json.dumps(context, sort_keys=True, default=str)
+    return int(hashlib.sha1(data).hexdigest(), 16) % count
+
+
+def select(contexts, shard=None):
+    """Returns the contexts that belong to a shard.
+
+    Args:
+        contexts: List of context dicts
+        shard: (index, count) tuple (defaults to the shard of this run)
+
+    Returns:
+        A list of the contexts of the shard, in their original order (or
+        all of them, if there is no shard).
+    """
+    shard = shard or _SHARD
+    if shard is None:
+        return list(contexts)
+
+    index, count = shard
+    return [c for c in contexts if shard_of(c, count) == index]
+
+
+def get_shard():
+    """Returns the (index, count) of this run, or None."""
+    return _SHARD
+
+
+def set_shard(shard):
+    """Sets (or with None, clears) the (index, count) of this run."""
+    global _SHARD
+    _SHARD = shard
@@ -0,0 +1,100 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.store`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Versioned JSON files of per-actor entries, shared by the runs of a deployment.
+
+The durations of ``--history`` and the fingerprints of ``--incremental`` are
+both kept in files like these. Several runs (like the ``--shards`` of a
+deployment) may share one file, so saving reads the file again and folds the
+entries of this run into it, rather than overwriting it. The new file is
+written next to the old one and renamed into place, so that no run ever reads
+half of one.
+
+These files only ever make Kingpin faster. A missing, unreadable or outdated
+file simply has no entries: it is not worth failing a deployment over.
+"""
+
+import json
+import logging
+import os
+import time
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+
+class Store(object):
+
+    """A versioned JSON file of per-actor entries.
+
+    Args:
+        name: What the file holds, for log messages (ie, 'history')
+        version: Version of the file format. Files of any other version are
+                 ignored, so bump it whenever the format changes.
+        max_age: Seconds after which an entry is dropped from the file
+        stamp: Key of the time at which an entry was last updated
+        dumps: Function that serializes the contents of the file
+    """
+
+    def __init__(self, name, version, max_age, stamp, dumps=json.dumps):
+        self.name = name
+        self.version = version
+        self.max_age = max_age
+        self.stamp = stamp
+        self.dumps = dumps
+
+    def load(self, path):
+        """Returns the dict of entries in a file (empty if there are none)."""
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            log.warning('Ignoring unreadable %s %s: %s', self.name, path, e)
+            return {}
+
+        if data.get('version') != self.version:
+            log.warning('Ignoring %s %s of unsupported version %s',
+                        self.name, path, data.get('version'))
+            return {}
+
+        return data['actors']
+
+    def save(self, path, fold):
+        """Folds the entries of this run into a file.
+
+        Args:
+            path: Path of the file
+            fold: Function that takes the dict of entries currently in the
+                  file, and updates it with those of this run
+        """
+        entries = self.load(path)
+        fold(entries)
+
+        now = time.time()
+        for key, entry in entries.items():
+            if now - entry.get(self.stamp, now) > self.max_age:
+                del entries[key]
+
+        temporary = '%s.%s' % (path, os.getpid())
+        with open(temporary, 'w') as f:
+            f.write(self.dumps({'version': self.version, 'actors': entries}))
+        os.rename(temporary, path)
@@ -1,5 +1,7 @@
 """Tests for the actors.base package."""
 
+import socket
+
 import mock
 
 from tornado import gen
@@ -8,6 +10,7 @@ from tornado import httpclient
 
 from kingpin.actors import exceptions
 from kingpin.actors.support import api
+from kingpin.actors.support import breaker
 from kingpin.actors.test.helper import tornado_value
 
 __author__ = 'Matt Wise <matt@nextdoor.com>'
@@ -142,6 +145,17 @@ class TestRestConsumer(testing.AsyncTestCase):
         ret = test_consumer.test_path_with_res(res='abcd')
         self.assertEquals(str(ret), '/test/abcd/info')
 
+    def test_generated_classes_are_shared(self):
+        consumer_a = RestConsumerTest(client=RestClientTest())
+        consumer_b = RestConsumerTest(client=RestClientTest())
+        self.assertIs(type(consumer_a), type(consumer_b))
+        self.assertIs(type(consumer_a.testA()), type(consumer_b.testA()))
+        self.assertIsNot(type(consumer_a), type(consumer_a.testA()))
+        self.assertTrue(isinstance(consumer_a.testA(), RestConsumerTest))
+
+        # Nothing is bound on the instances themselves
+        self.assertNotIn('http_get', consumer_a.testA().__dict__)
+
     @testing.gen_test
     def test_http_method_get(self):
         test_consumer = RestConsumerTest(client=RestClientTest())
@@ -210,10 +224,34 @@ class TestRestConsumer(testing.AsyncTestCase):
             yield test_consumer.testA().http_get('bar')
 
 
+class TestPathTemplate(testing.unittest.TestCase):
+
+    def test_fill(self):
+        template = api.PathTemplate('/test/%res%/info/%id%')
+        self.assertEquals(template.fill({'res': 'abc', 'id': 1}),
+                          '/test/abc/info/1')
+
+    def test_fill_no_tokens(self):
+        template = api.PathTemplate('/test')
+        self.assertEquals(template.fill({'res': 'abc'}), '/test')
+        self.assertEquals(api.PathTemplate(None).fill({}), None)
+
+    def test_fill_default(self):
+        template = api.PathTemplate('/test/%res|all%')
+        self.assertEquals(template.fill({}), '/test/all')
+        self.assertEquals(template.fill({'res': 'x'}), '/test/x')
+
+    def test_fill_missing(self):
+        template = api.PathTemplate('/test/%res%')
+        with self.assertRaises(TypeError):
+            template.fill({'res': None})
+
+
 class TestRestClient(testing.AsyncTestCase):
 
     def setUp(self, *args, **kwargs):
         super(TestRestClient, self).setUp()
+        breaker.reset()
         self.client = api.RestClient()
         self.http_response_mock = mock.MagicMock(name='response')
         self.http_client_mock = mock.MagicMock(name='http_client')
@@ -309,6 +347,61 @@ class TestRestClient(testing.AsyncTestCase):
                 url='http://foo.com', method='GET',
                 auth_username='user', auth_password='pass')
 
+    @testing.gen_test
+    def test_fetch_500_opens_the_breaker_of_the_host(self):
+        e = httpclient.HTTPError(500, 'Failure')
+        self.http_client_mock.fetch.side_effect = e
+        with mock.patch.object(breaker, 'BREAKER_THRESHOLD', 3):
+            with self.assertRaises(httpclient.HTTPError):
+                yield self.client.fetch(url='http://foo.com', method='GET')
+
+            with self.assertRaises(exceptions.CircuitOpen):
+                yield self.client.fetch(url='http://foo.com/x', method='GET')
+        self.assertEquals(3, len(self.http_client_mock.method_calls))
+
+        # Other hosts are still called
+        self.http_client_mock.fetch.side_effect = None
+        self.http_response_mock.body = '{}'
+        yield self.client.fetch(url='http://bar.com', method='GET')
+        self.assertEquals(4, len(self.http_client_mock.method_calls))
+
+    @testing.gen_test
+    def test_fetch_other_error_settles_the_probe(self):
+        guard = breaker.get_breaker('foo.com')
+        guard.state = breaker.OPEN
+        guard._opened = 0
+
+        # The probe is refused, which is not in self._EXCEPTIONS
+        self.http_client_mock.fetch.side_effect = socket.error(
+            111, 'Connection refused')
+        with self.assertRaises(socket.error):
+            yield self.client.fetch(url='http://foo.com', method='GET')
+        self.assertEquals(guard.state, breaker.OPEN)
+        self.assertFalse(guard._probing)
+
+        # Once it may probe again, it does
+        guard._opened = 0
+        self.http_client_mock.fetch.side_effect = None
+        self.http_response_mock.body = '{}'
+        yield self.client.fetch(url='http://foo.com', method='GET')
+        self.assertEquals(guard.state, breaker.CLOSED)
+
+        # A local error (not the endpoint's fault) also ends the probe
+        guard.state = breaker.OPEN
+        guard._opened = 0
+        self.http_client_mock.fetch.side_effect = TypeError('bug')
+        with self.assertRaises(TypeError):
+            yield self.client.fetch(url='http://foo.com', method='GET')
+        self.assertFalse(guard._probing)
+        self.assertEquals(guard.state, breaker.CLOSED)
+
+    @testing.gen_test
+    def test_fetch_304_raises_recoverable(self):
+        e = httpclient.HTTPError(304, 'Not Modified')
+        self.http_client_mock.fetch.side_effect = e
+        with self.assertRaises(exceptions.RecoverableActorFailure):
+            yield self.client.fetch(url='http://foo.com', method='GET')
+
     @testing.gen_test
     def test_fetch_501_raises_recoverable(self):
         e = httpclient.HTTPError(501, 'Failure')
@@ -317,10 +410,72 @@ class TestRestClient(testing.AsyncTestCase):
             yield self.client.fetch(url='http://foo.com', method='GET')
 
 
+class TestRestClientCache(testing.AsyncTestCase):
+
+    def setUp(self, *args, **kwargs):
+        super(TestRestClientCache, self).setUp()
+        breaker.reset()
+        self.client = api.RestClient(headers={'X-Unit': 'test'}, cache=True)
+        self.http_response_mock = mock.MagicMock(name='response')
+        self.http_response_mock.body = '{"foo": ["bar"]}'
+        self.http_response_mock.headers = {
+            'ETag': '"abc"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        self.http_client_mock = mock.MagicMock(name='http_client')
+        self.http_client_mock.fetch.return_value = tornado_value(
+            self.http_response_mock)
+        self.client._client = self.http_client_mock
+
+    @testing.gen_test
+    def test_fetch_not_modified(self):
+        ret = yield self.client.fetch(url='http://foo.com', method='GET')
+        self.assertEquals({'foo': ['bar']}, ret)
+        first = self.http_client_mock.fetch.call_args[0][0]
+        self.assertEquals(first.headers, {'X-Unit': 'test'})
+
+        # Mutating the returned value must not taint the cache
+        ret['foo'].append('baz')
+
+        self.http_client_mock.fetch.side_effect = httpclient.HTTPError(304)
+        ret = yield self.client.fetch(url='http://foo.com', method='GET')
+        self.assertEquals({'foo': ['bar']}, ret)
+
+        second = self.http_client_mock.fetch.call_args[0][0]
+        self.assertEquals(second.headers['If-None-Match'], '"abc"')
+        self.assertEquals(second.headers['If-Modified-Since'],
+                          'Wed, 21 Oct 2015 07:28:00 GMT')
+        self.assertEquals(second.headers['X-Unit'], 'test')
+
+    @testing.gen_test
+    def test_fetch_modified_replaces_cache(self):
+        yield self.client.fetch(url='http://foo.com', method='GET')
+
+        self.http_response_mock.body = '{"foo": "new"}'
+        self.http_response_mock.headers = {}
+        ret = yield self.client.fetch(url='http://foo.com', method='GET')
+        self.assertEquals({'foo': 'new'}, ret)
+
+        # No validators were returned, so the next request is unconditional
+        yield self.client.fetch(url='http://foo.com', method='GET')
+        third = self.http_client_mock.fetch.call_args[0][0]
+        self.assertNotIn('If-None-Match', third.headers)
+
+    @testing.gen_test
+    def test_fetch_post_not_cached(self):
+        yield self.client.fetch(url='http://foo.com', method='POST')
+        self.assertEquals(self.client._cache, {})
+
+    @testing.gen_test
+    def test_fetch_304_without_cache_raises(self):
+        self.http_client_mock.fetch.side_effect = httpclient.HTTPError(304)
+        with self.assertRaises(exceptions.RecoverableActorFailure):
+            yield self.client.fetch(url='http://foo.com', method='GET')
+
+
 class TestSimpleTokenRestClient(testing.AsyncTestCase):
 
     def setUp(self, *args, **kwargs):
         super(TestSimpleTokenRestClient, self).setUp()
+        breaker.reset()
         self.client = api.SimpleTokenRestClient(
             tokens={'token': 'foobar'})
         self.http_response_mock = mock.MagicMock(name='response')
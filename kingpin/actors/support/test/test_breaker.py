@@ -0,0 +1,210 @@
+"""Tests for the actors.support.breaker package."""
+
+import mock
+from tornado import gen
+from tornado import httpclient
+from tornado import testing
+
+from kingpin import utils
+from kingpin.actors import exceptions
+from kingpin.actors.support import breaker
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestCircuitBreaker(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = breaker.CircuitBreaker('api', threshold=3, reset=10)
+
+    def _open(self, now):
+        with mock.patch('time.time', return_value=now):
+            for _ in xrange(3):
+                self.breaker.before()
+                self.breaker.failure()
+
+    def test_opens_after_threshold_failures(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.breaker.before()
+        self.assertEquals(self.breaker.state, breaker.CLOSED)
+
+        self.breaker.failure()
+        self.assertEquals(self.breaker.state, breaker.OPEN)
+        with self.assertRaises(exceptions.CircuitOpen):
+            self.breaker.before()
+
+    def test_success_resets_failures(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.breaker.success()
+        self.breaker.failure()
+        self.assertEquals(self.breaker.state, breaker.CLOSED)
+        self.assertEquals(self.breaker.failures, 1)
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self._open(now=100)
+
+        with mock.patch('time.time', return_value=105):
+            with self.assertRaises(exceptions.CircuitOpen):
+                self.breaker.before()
+
+        with mock.patch('time.time', return_value=111):
+            self.breaker.before()
+            self.assertEquals(self.breaker.state, breaker.HALF_OPEN)
+
+            # Everyone else waits for the probe
+            with self.assertRaises(exceptions.CircuitOpen):
+                self.breaker.before()
+
+        self.breaker.success()
+        self.assertEquals(self.breaker.state, breaker.CLOSED)
+        self.breaker.before()
+
+    def test_failed_probe_opens_again(self):
+        self._open(now=100)
+
+        with mock.patch('time.time', return_value=111):
+            self.breaker.before()
+            self.breaker.failure()
+            self.assertEquals(self.breaker.state, breaker.OPEN)
+
+        with mock.patch('time.time', return_value=115):
+            with self.assertRaises(exceptions.CircuitOpen):
+                self.breaker.before()
+
+
+class TestRetryBudget(testing.unittest.TestCase):
+
+    def test_minimum(self):
+        budget = breaker.RetryBudget(ratio=0, minimum=2)
+        budget.attempt()
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        self.assertEquals(budget.retries, 2)
+        self.assertEquals(budget.denied, 1)
+
+    def test_ratio(self):
+        budget = breaker.RetryBudget(ratio=0.5, minimum=0)
+        for _ in xrange(10):
+            budget.attempt()
+
+        for _ in xrange(5):
+            self.assertTrue(budget.withdraw())
+            budget.attempt()
+        self.assertFalse(budget.withdraw())
+
+        # More first attempts earn more retries
+        budget.attempt()
+        budget.attempt()
+        self.assertTrue(budget.withdraw())
+
+
+class TestGuard(testing.AsyncTestCase):
+
+    def tearDown(self):
+        breaker.reset()
+        super(TestGuard, self).tearDown()
+
+    @testing.gen_test
+    def test_fails_fast(self):
+        calls = []
+
+        @gen.coroutine
+        @utils.retry(excs=httpclient.HTTPError, retries=3, delay=0,
+                     guard=breaker.Guard('unit-test'))
+        def raise_exception():
+            calls.append(1)
+            raise httpclient.HTTPError(503)
+
+        with mock.patch.object(breaker, 'BREAKER_THRESHOLD', 3):
+            with self.assertRaises(httpclient.HTTPError):
+                yield raise_exception()
+            self.assertEquals(len(calls), 3)
+
+            # The endpoint failed three times in a row, so it is not called
+            # again for a while.
+            with self.assertRaises(exceptions.CircuitOpen):
+                yield raise_exception()
+            self.assertEquals(len(calls), 3)
+
+    @testing.gen_test
+    def test_spends_the_budget(self):
+        calls = []
+
+        @gen.coroutine
+        @utils.retry(excs=httpclient.HTTPError, retries=3, delay=0,
+                     guard=breaker.Guard('unit-test'))
+        def raise_exception():
+            calls.append(1)
+            raise httpclient.HTTPError(503)
+
+        with mock.patch.object(breaker, 'RETRY_BUDGET_MIN', 1):
+            with mock.patch.object(breaker, 'RETRY_BUDGET', 0):
+                with self.assertRaises(httpclient.HTTPError):
+                    yield raise_exception()
+        self.assertEquals(len(calls), 2)
+
+    @testing.gen_test
+    def test_client_errors_are_not_outages(self):
+        calls = []
+
+        @gen.coroutine
+        @utils.retry(excs=httpclient.HTTPError, retries=3, delay=0,
+                     guard=breaker.Guard('unit-test'))
+        def raise_exception():
+            calls.append(1)
+            raise httpclient.HTTPError(404)
+
+        with mock.patch.object(breaker, 'BREAKER_THRESHOLD', 3):
+            with mock.patch.object(breaker, 'RETRY_BUDGET_MIN', 0):
+                with mock.patch.object(breaker, 'RETRY_BUDGET', 0):
+                    for _ in xrange(2):
+                        with self.assertRaises(httpclient.HTTPError):
+                            yield raise_exception()
+
+        # Retried as usual, but the breaker is closed and no budget was spent
+        self.assertEquals(len(calls), 6)
+        self.assertEquals(breaker.get_breaker('unit-test').state,
+                          breaker.CLOSED)
+        self.assertEquals(breaker.get_budget().retries, 0)
+
+    def test_http_outage(self):
+        self.assertTrue(breaker.http_outage(httpclient.HTTPError(500)))
+        self.assertTrue(breaker.http_outage(httpclient.HTTPError(599)))
+        self.assertFalse(breaker.http_outage(httpclient.HTTPError(404)))
+        self.assertFalse(breaker.http_outage(ValueError()))
+
+    def test_follows_the_run(self):
+        guard = breaker.Guard('unit-test')
+        guard.before()
+        guard.failure(httpclient.HTTPError(500))
+        self.assertEquals(breaker.get_breaker('unit-test').failures, 1)
+
+        breaker.reset()
+        guard.before()
+        self.assertEquals(breaker.get_breaker('unit-test').failures, 0)
+        self.assertEquals(breaker.get_budget().attempts, 1)
+
+
+class TestRunWideState(testing.unittest.TestCase):
+
+    def tearDown(self):
+        breaker.reset()
+
+    def test_get_breaker(self):
+        self.assertIs(breaker.get_breaker('a'), breaker.get_breaker('a'))
+        self.assertIsNot(breaker.get_breaker('a'), breaker.get_breaker('b'))
+
+    def test_reset(self):
+        first = breaker.get_breaker('a')
+        budget = breaker.get_budget()
+        breaker.reset()
+        self.assertIsNot(breaker.get_breaker('a'), first)
+        self.assertIsNot(breaker.get_budget(), budget)
+
+    def test_after_fork(self):
+        first = breaker.get_breaker('a')
+        breaker.after_fork()
+        self.assertIsNot(breaker.get_breaker('a'), first)
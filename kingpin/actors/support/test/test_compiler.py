@@ -0,0 +1,139 @@
+"""Tests for the actors.support.compiler package."""
+
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+from tornado import httpclient
+from tornado import testing
+
+from kingpin.actors import exceptions
+from kingpin.actors import misc
+from kingpin.actors.aws import cloudformation
+from kingpin.actors.support import compiler
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+def _sleep(sleep='{SLEEP}', desc='Sleep {NAME}'):
+    return {'actor': 'misc.Sleep', 'desc': desc, 'options': {'sleep': sleep}}
+
+
+class TestCompileActor(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _script(self, script):
+        path = os.path.join(self.tmpdir, 'script.json')
+        with open(path, 'w') as f:
+            json.dump(script, f)
+        return path
+
+    def test_compile_actor(self):
+        actor = compiler.compile_actor(_sleep(sleep=1, desc='Sleep'))
+        self.assertIsInstance(actor, misc.Sleep)
+        self.assertEquals(actor.option('sleep'), 1)
+        self.assertEquals(actor._get_children(), [])
+
+    def test_compile_actor_errors(self):
+        with self.assertRaises(exceptions.InvalidActor):
+            compiler.compile_actor({'actor': 'misc.Missing'})
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            compiler.compile_actor({'actor': 'misc.Sleep', 'options': {}})
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            compiler.compile_actor(_sleep(sleep=[1], desc='Sleep'))
+
+    def test_no_clients_are_made(self):
+        template = self._script({'Resources': {}})
+        config = {'actor': 'aws.cloudformation.Create',
+                  'options': {'name': 'stack', 'region': 'us-west-2',
+                              'template': template}}
+        with mock.patch.object(cloudformation.Create, '__init__') as init:
+            actor = compiler.compile_actor(config)
+        self.assertFalse(init.called)
+        self.assertEquals(actor.option('name'), 'stack')
+
+        del config['options']['name']
+        with self.assertRaises(exceptions.InvalidOptions):
+            compiler.compile_actor(config)
+
+    def test_local_checks_are_made(self):
+        # The same checks as when the actors are built for real
+        with self.assertRaises(cloudformation.InvalidTemplate):
+            compiler.compile_actor({
+                'actor': 'aws.cloudformation.Create',
+                'options': {'name': 'stack', 'region': 'us-west-2',
+                            'template': os.path.join(self.tmpdir, 'nope')}})
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            compiler.compile_actor({'actor': 'misc.HTTPBatch',
+                                    'options': {'threshold': 50}})
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            compiler.compile_actor({'actor': 'misc.HTTPBatch',
+                                    'options': {'urls': ['http://a'],
+                                                'threshold': 500}})
+
+    def test_compile_group_contexts(self):
+        config = {'actor': 'group.Async',
+                  'options': {
+                      'contexts': [{'NAME': 'a', 'SLEEP': 1},
+                                   {'NAME': 'b', 'SLEEP': 2}],
+                      'acts': [_sleep()]}}
+        actor = compiler.compile_actor(config)
+        self.assertEquals([str(act) for act in actor._get_children()],
+                          ['Sleep a', 'Sleep b'])
+
+        # A context that is never filled in
+        config['options']['contexts'] = [{'NAME': 'a'}]
+        with self.assertRaises(exceptions.InvalidOptions):
+            compiler.compile_actor(config)
+
+    def test_compile_macro(self):
+        path = self._script({'actor': 'group.Sync',
+                             'options': {'acts': [{
+                                 'actor': 'misc.Sleep',
+                                 'desc': 'Sleep %WHO%',
+                                 'options': {'sleep': 1}}]}})
+        actor = compiler.compile_actor({
+            'actor': 'misc.Macro',
+            'options': {'macro': path, 'tokens': {'WHO': 'me'}}})
+
+        chart = actor.get_orgchart()
+        self.assertEquals([entry['class'] for entry in chart],
+                          ['Macro', 'Sync', 'Sleep'])
+        self.assertEquals(chart[-1]['desc'], 'Sleep me')
+
+        # A token that is never filled in
+        with self.assertRaises(exceptions.UnrecoverableActorFailure):
+            compiler.compile_actor({'actor': 'misc.Macro',
+                                    'options': {'macro': path}})
+
+    def test_compile_macro_list(self):
+        path = self._script([_sleep(sleep=1, desc='Sleep')])
+        actor = compiler.compile_actor({'actor': 'misc.Macro',
+                                        'options': {'macro': path}})
+        self.assertEquals([entry['class'] for entry in actor.get_orgchart()],
+                          ['Macro', 'Sync', 'Sleep'])
+
+    def test_compile_macro_bad_schema(self):
+        path = self._script({'actor': 'misc.Sleep', 'bogus': True})
+        with self.assertRaises(exceptions.UnrecoverableActorFailure):
+            compiler.compile_actor({'actor': 'misc.Macro',
+                                    'options': {'macro': path}})
+
+    def test_compile_remote_macro(self):
+        with mock.patch.object(httpclient.HTTPClient, 'fetch') as fetch:
+            actor = compiler.compile_actor({
+                'actor': 'misc.Macro',
+                'options': {'macro': 'https://example.com/script.json'}})
+        self.assertFalse(fetch.called)
+        self.assertEquals(actor._get_children(), [])
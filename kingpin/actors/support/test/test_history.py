@@ -0,0 +1,146 @@
+"""Tests for the actors.support.history package."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+from tornado import testing
+
+from kingpin.actors import misc
+from kingpin.actors.support import history
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+def _sleep(seconds, desc='Sleep'):
+    return misc.Sleep(desc, {'sleep': seconds})
+
+
+class TestHistory(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        history.set_history(None)
+
+    def test_actor_key(self):
+        # Same class and options: same key
+        self.assertEquals(history.actor_key(_sleep(1)),
+                          history.actor_key(_sleep(1, desc='Other')))
+        self.assertNotEquals(history.actor_key(_sleep(1)),
+                             history.actor_key(_sleep(2)))
+
+        dry = misc.Sleep('Sleep', {'sleep': 1}, dry=True)
+        self.assertNotEquals(history.actor_key(_sleep(1)),
+                             history.actor_key(dry))
+
+    def test_actor_key_is_kept(self):
+        actor = _sleep(1)
+        key = history.actor_key(actor)
+        actor._options['sleep'] = 2
+        self.assertEquals(history.actor_key(actor), key)
+
+    def test_expected(self):
+        durations = history.History()
+        self.assertEquals(durations.expected(_sleep(1)), None)
+
+        durations.record(_sleep(1), 2.0)
+        durations.record(_sleep(2), 4.0)
+        self.assertEquals(durations.expected(_sleep(1)), 2.0)
+
+        # Unknown options, so the average of the class
+        self.assertEquals(durations.expected(_sleep(3)), 3.0)
+
+        # The moving average leans towards the latest duration
+        durations.record(_sleep(1), 4.0)
+        self.assertEquals(durations.expected(_sleep(1)), 3.0)
+
+    def test_save_and_load(self):
+        first = history.History()
+        first.record(_sleep(1), 2.0)
+        first.save(self.path)
+        self.assertEquals(first.samples, [])
+
+        # Another run sharing the file
+        second = history.History.load(self.path)
+        second.record(_sleep(1), 4.0)
+        second.record(_sleep(2), 1.0)
+        second.save(self.path)
+
+        loaded = history.History.load(self.path)
+        self.assertEquals(len(loaded), 2)
+        self.assertEquals(loaded.expected(_sleep(1)), 3.0)
+        self.assertEquals(loaded.actors[history.actor_key(_sleep(1))]['runs'],
+                          2)
+
+    def test_save_drops_old_keys(self):
+        durations = history.History()
+        durations.record(_sleep(1), 2.0)
+        durations.save(self.path)
+
+        later = time.time() + history.MAX_AGE + 1
+        durations.record(_sleep(2), 2.0)
+        with mock.patch('time.time', return_value=later):
+            durations.save(self.path)
+
+        loaded = history.History.load(self.path)
+        self.assertEquals(loaded.expected(_sleep(1)), 2.0)
+        self.assertEquals(len(loaded), 1)
+
+    def test_load_missing_or_broken(self):
+        self.assertEquals(len(history.History.load(self.path)), 0)
+
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        self.assertEquals(len(history.History.load(self.path)), 0)
+
+        with open(self.path, 'w') as f:
+            json.dump({'version': 0, 'actors': {'a': {}}}, f)
+        self.assertEquals(len(history.History.load(self.path)), 0)
+
+
+class TestScheduling(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.actors = [_sleep(1), _sleep(5), _sleep(3)]
+        durations = history.History()
+        for actor in self.actors:
+            durations.record(actor, actor.option('sleep'))
+        history.set_history(durations)
+
+    def tearDown(self):
+        history.set_history(None)
+
+    def test_longest_first(self):
+        self.assertEquals(history.longest_first(self.actors), [1, 2, 0])
+
+    def test_longest_first_unknown_first(self):
+        other = misc.Note('Note', {'message': 'hi'})
+        self.assertEquals(history.longest_first(self.actors + [other]),
+                          [3, 1, 2, 0])
+
+    def test_longest_first_without_history(self):
+        history.set_history(None)
+        self.assertEquals(history.longest_first(self.actors), [0, 1, 2])
+
+    def test_estimate(self):
+        self.assertEquals(history.estimate(self.actors, 1), 9)
+        self.assertEquals(history.estimate(self.actors, 0), 5)
+
+        # 1 and 5 start at once; 3 starts when the 1 is done
+        self.assertEquals(history.estimate(self.actors, 2), 5)
+
+        # Leaving the longest for last takes longer
+        shortest_first = [self.actors[0], self.actors[2], self.actors[1]]
+        self.assertEquals(history.estimate(shortest_first, 2), 6)
+
+    def test_estimate_unknown(self):
+        other = misc.Note('Note', {'message': 'hi'})
+        self.assertEquals(history.estimate(self.actors + [other]), None)
+        self.assertEquals(history.estimate([]), None)
@@ -0,0 +1,96 @@
+"""Tests for the actors.support.incremental package."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+from tornado import testing
+
+from kingpin.actors import misc
+from kingpin.actors.support import incremental
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestFingerprints(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'fingerprints.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_actor_key(self):
+        first = misc.Sleep('Sleep', {'sleep': 1})
+        self.assertEquals(incremental.actor_key(first),
+                          incremental.actor_key(misc.Sleep('Other',
+                                                           {'sleep': 1})))
+        self.assertNotEquals(incremental.actor_key(first),
+                             incremental.actor_key(misc.Sleep('Sleep',
+                                                              {'sleep': 2})))
+
+        # Dry and real runs share their fingerprints
+        dry = misc.Sleep('Sleep', {'sleep': 1}, dry=True)
+        self.assertEquals(incremental.actor_key(first),
+                          incremental.actor_key(dry))
+
+        # Nor do they outlive an upgrade
+        key = incremental.actor_key(first)
+        with mock.patch('kingpin.version.__version__', '99.0'):
+            self.assertNotEquals(incremental.actor_key(first), key)
+
+    def test_matches(self):
+        fingerprints = incremental.Fingerprints()
+        self.assertFalse(fingerprints.matches('key', 'v1'))
+
+        fingerprints.record('key', 'v1')
+        self.assertTrue(fingerprints.matches('key', 'v1'))
+        self.assertFalse(fingerprints.matches('key', 'v2'))
+
+        later = time.time() + incremental.MAX_AGE + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertFalse(fingerprints.matches('key', 'v1'))
+
+    def test_save_and_load(self):
+        first = incremental.Fingerprints()
+        first.record('a', 'v1')
+        first.save(self.path)
+        self.assertEquals(first.recorded, {})
+
+        # Another run sharing the file
+        second = incremental.Fingerprints.load(self.path)
+        second.record('b', 'v1')
+        second.save(self.path)
+
+        loaded = incremental.Fingerprints.load(self.path)
+        self.assertEquals(len(loaded), 2)
+        self.assertTrue(loaded.matches('a', 'v1'))
+        self.assertTrue(loaded.matches('b', 'v1'))
+
+    def test_save_drops_old_entries(self):
+        fingerprints = incremental.Fingerprints()
+        fingerprints.record('a', 'v1')
+        fingerprints.save(self.path)
+
+        later = time.time() + incremental.MAX_AGE + 1
+        with mock.patch('time.time', return_value=later):
+            fingerprints.record('b', 'v1')
+            fingerprints.save(self.path)
+
+        loaded = incremental.Fingerprints.load(self.path)
+        self.assertEquals(loaded.entries.keys(), ['b'])
+
+    def test_load_missing_or_broken(self):
+        self.assertEquals(len(incremental.Fingerprints.load(self.path)), 0)
+
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        self.assertEquals(len(incremental.Fingerprints.load(self.path)), 0)
+
+        with open(self.path, 'w') as f:
+            json.dump({'version': 0, 'actors': {'a': {}}}, f)
+        self.assertEquals(len(incremental.Fingerprints.load(self.path)), 0)
@@ -0,0 +1,78 @@
+"""Tests for the actors.support.orgchart package."""
+
+import StringIO
+import json
+
+from tornado import testing
+
+from kingpin.actors import group
+from kingpin.actors.support import orgchart
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestOrgchart(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestOrgchart, self).setUp()
+        sleep = {'actor': 'misc.Sleep', 'desc': 'Sleep "quoted"',
+                 'options': {'sleep': 0}}
+        self.actor = group.Sync(
+            'Outer',
+            {'acts': [
+                {'actor': 'group.Async', 'desc': 'Inner',
+                 'options': {'acts': [dict(sleep), dict(sleep)]}},
+                dict(sleep)]})
+
+    def write(self, fmt, timings=False):
+        output = StringIO.StringIO()
+        orgchart.write(self.actor, output, fmt, timings=timings)
+        return output.getvalue()
+
+    def test_iter_orgchart_order(self):
+        chart = list(self.actor.iter_orgchart())
+        self.assertEquals([e['desc'] for e in chart],
+                          ['Outer', 'Inner', 'Sleep "quoted"',
+                           'Sleep "quoted"', 'Sleep "quoted"'])
+        outer, inner = chart[0]['id'], chart[1]['id']
+        self.assertEquals([e['parent_id'] for e in chart],
+                          ['', outer, inner, inner, outer])
+        self.assertEquals(self.actor.get_orgchart(), chart)
+
+    def test_write_json(self):
+        self.assertEquals(json.loads(self.write('json')),
+                          self.actor.get_orgchart())
+
+    def test_write_jsonl(self):
+        lines = self.write('jsonl').splitlines()
+        self.assertEquals([json.loads(line) for line in lines],
+                          self.actor.get_orgchart())
+
+    def test_write_dot(self):
+        dot = self.write('dot')
+        chart = self.actor.get_orgchart()
+        self.assertTrue(dot.startswith('digraph orgchart {\n'))
+        self.assertTrue(dot.endswith('}\n'))
+        self.assertIn('"%s" -> "%s";' % (chart[0]['id'], chart[1]['id']),
+                      dot)
+        self.assertIn('[label="Sleep \\"quoted\\"\\n(Sleep)"]', dot)
+        self.assertEquals(dot.count(' -> '), 4)
+
+    def test_write_unknown_format(self):
+        with self.assertRaises(KeyError):
+            self.write('xml')
+
+    @testing.gen_test
+    def test_write_timings(self):
+        before = json.loads(self.write('json', timings=True))
+        self.assertEquals(before[0]['outcome'], None)
+        self.assertEquals(before[0]['duration'], None)
+
+        yield self.actor.execute()
+
+        after = json.loads(self.write('json', timings=True))
+        self.assertEquals(len(after), 5)
+        for entry in after:
+            self.assertEquals(entry['outcome'], 'succeeded')
+            self.assertTrue(entry['duration'] >= 0)
+        self.assertIn('succeeded in ', self.write('dot', timings=True))
@@ -0,0 +1,93 @@
+"""Tests for the actors.support.outbox package."""
+
+import mock
+
+from tornado import gen
+from tornado import testing
+
+from kingpin.actors.support import outbox
+from kingpin.actors.test.helper import tornado_value
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestOutbox(testing.AsyncTestCase):
+
+    def setUp(self, *args, **kwargs):
+        super(TestOutbox, self).setUp()
+        self.outbox = outbox.Outbox()
+        outbox.INTERVALS['unittest'] = 0
+        self.sent = []
+
+    @gen.coroutine
+    def _send(self, payload):
+        self.sent.append(payload)
+
+    def _envelope(self, payload, key='room'):
+        return outbox.Envelope(send=self._send, payload=payload, key=key,
+                               merge=lambda a, b: '%s\n%s' % (a, b))
+
+    def test_get_outbox(self):
+        self.assertIs(outbox.get_outbox(), outbox.get_outbox())
+
+    @testing.gen_test
+    def test_enqueue_and_flush(self):
+        self.outbox.enqueue('unittest', self._envelope('a', key='a'))
+        self.outbox.enqueue('unittest', self._envelope('b', key='b'))
+        self.assertEquals(self.outbox.pending(), 2)
+
+        left = yield self.outbox.flush()
+
+        self.assertEquals(left, 0)
+        self.assertEquals(self.sent, ['a', 'b'])
+
+    @testing.gen_test
+    def test_flush_empty(self):
+        left = yield self.outbox.flush()
+        self.assertEquals(left, 0)
+
+    @testing.gen_test
+    def test_burst_is_coalesced(self):
+        # The first message goes out right away -- the rest pile up behind
+        # the rate limit and get merged together.
+        outbox.INTERVALS['unittest'] = 0.05
+        for message in ('a', 'b', 'c'):
+            self.outbox.enqueue('unittest', self._envelope(message))
+
+        yield self.outbox.flush()
+        self.assertEquals(self.sent, ['a\nb\nc'])
+
+        self.outbox.enqueue('unittest', self._envelope('d'))
+        self.outbox.enqueue('unittest', self._envelope('e'))
+        yield self.outbox.flush()
+        self.assertEquals(self.sent, ['a\nb\nc', 'd\ne'])
+
+    @testing.gen_test
+    def test_no_payload(self):
+        send = mock.MagicMock(return_value=tornado_value(None))
+        self.outbox.enqueue('unittest', outbox.Envelope(send=send))
+        yield self.outbox.flush()
+        send.assert_called_once_with()
+
+    @testing.gen_test
+    def test_failures_are_logged(self):
+        send = mock.MagicMock(side_effect=Exception('Nope'))
+        self.outbox.enqueue('unittest', outbox.Envelope(send=send))
+        self.outbox.enqueue('unittest', self._envelope('a'))
+
+        yield self.outbox.flush()
+
+        self.assertEquals(self.outbox.failures, 1)
+        self.assertEquals(self.sent, ['a'])
+
+    @testing.gen_test
+    def test_flush_timeout(self):
+        @gen.coroutine
+        def slow_send():
+            yield gen.sleep(1)
+
+        self.outbox.enqueue('unittest', outbox.Envelope(send=slow_send))
+        self.outbox.enqueue('unittest', outbox.Envelope(send=slow_send))
+
+        left = yield self.outbox.flush(timeout=0.01)
+        self.assertEquals(left, 1)
@@ -0,0 +1,74 @@
+"""Tests for the actors.support.pages package."""
+
+from tornado import gen
+from tornado import testing
+
+from kingpin.actors.support import pages
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class FakeAPI(object):
+
+    """A list API with three pages, that records the markers it was given."""
+
+    PAGES = {None: ([1, 2], 'b'), 'b': ([3, 4], 'c'), 'c': ([5], None)}
+
+    def __init__(self):
+        self.markers = []
+
+    @gen.coroutine
+    def fetch(self, marker):
+        self.markers.append(marker)
+        raise gen.Return(self.PAGES[marker])
+
+
+class TestPages(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestPages, self).setUp()
+        self.api = FakeAPI()
+
+    @testing.gen_test
+    def test_fetch_next(self):
+        p = pages.Pages(self.api.fetch)
+        seen = []
+        while (yield p.fetch_next()):
+            seen.append(p.items)
+
+        self.assertEquals(seen, [[1, 2], [3, 4], [5]])
+        self.assertEquals(self.api.markers, [None, 'b', 'c'])
+        self.assertEquals(p.fetched, 3)
+
+        # Once done, stays done
+        self.assertFalse((yield p.fetch_next()))
+        self.assertEquals(p.items, [])
+        self.assertEquals(p.fetched, 3)
+
+    @testing.gen_test
+    def test_find(self):
+        found = yield pages.Pages(self.api.fetch).find(lambda i: i > 2)
+        self.assertEquals(found, [3, 4])
+
+        # The last page was never fetched
+        self.assertEquals(self.api.markers, [None, 'b'])
+
+    @testing.gen_test
+    def test_find_nothing(self):
+        found = yield pages.Pages(self.api.fetch).find(lambda i: i > 5)
+        self.assertEquals(found, [])
+        self.assertEquals(self.api.markers, [None, 'b', 'c'])
+
+    @testing.gen_test
+    def test_all(self):
+        items = yield pages.Pages(self.api.fetch).all()
+        self.assertEquals(items, [1, 2, 3, 4, 5])
+
+    @testing.gen_test
+    def test_fetch_error(self):
+        @gen.coroutine
+        def fetch(marker):
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            yield pages.Pages(fetch).all()
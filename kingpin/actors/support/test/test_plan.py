@@ -0,0 +1,80 @@
+"""Tests for the actors.support.plan package."""
+
+import datetime
+import os
+import tempfile
+
+from tornado import testing
+import mock
+
+from kingpin import exceptions
+from kingpin.actors.support import plan
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestPlan(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.actor = mock.MagicMock(name='actor')
+        self.actor.__str__.return_value = 'Unit Test'
+        self.actor._options = {'name': 'foo'}
+
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_fingerprint(self):
+        now = datetime.datetime.now()
+        self.assertEquals(plan.fingerprint({'a': 1, 'b': now}),
+                          plan.fingerprint({'b': now, 'a': 1}))
+        self.assertNotEquals(plan.fingerprint(None), plan.fingerprint({}))
+
+    def test_actor_key(self):
+        key = plan.actor_key(self.actor)
+        self.actor._options = {'name': 'bar'}
+        self.assertNotEquals(key, plan.actor_key(self.actor))
+
+    def test_record_and_take(self):
+        p = plan.Plan()
+        p.record(self.actor, 'abc', {'name': 'old'}, ['name'])
+        p.record(self.actor, 'def', {}, [])
+        self.assertEquals(len(p), 2)
+
+        self.assertEquals(p.take(self.actor)['fingerprint'], 'abc')
+        self.assertEquals(p.take(self.actor)['fingerprint'], 'def')
+        self.assertEquals(p.take(self.actor), None)
+
+    def test_save_and_load(self):
+        p = plan.Plan()
+        p.record(self.actor, 'abc',
+                 {'updated': datetime.datetime(2016, 1, 1)}, ['name'])
+        p.save(self.path)
+
+        loaded = plan.Plan.load(self.path)
+        self.assertFalse(loaded.recording)
+        entry = loaded.take(self.actor)
+        self.assertEquals(entry['actor'], 'Unit Test')
+        self.assertEquals(entry['setters'], ['name'])
+        self.assertEquals(entry['observed'],
+                          {'updated': '2016-01-01 00:00:00'})
+
+    def test_load_invalid(self):
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        with self.assertRaises(exceptions.InvalidPlan):
+            plan.Plan.load(self.path)
+
+        with open(self.path, 'w') as f:
+            f.write('{"version": 0, "actors": {}}')
+        with self.assertRaises(exceptions.InvalidPlan):
+            plan.Plan.load(self.path)
+
+    def test_set_plan(self):
+        p = plan.Plan()
+        plan.set_plan(p)
+        self.assertIs(plan.get_plan(), p)
+        plan.set_plan(None)
+        self.assertEquals(plan.get_plan(), None)
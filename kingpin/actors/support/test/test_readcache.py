@@ -0,0 +1,139 @@
+"""Tests for the actors.support.readcache package."""
+
+import os
+import shutil
+import stat
+import tempfile
+import time
+
+import mock
+from tornado import gen
+from tornado import testing
+
+from kingpin.actors.support import readcache
+from kingpin.actors.test.helper import tornado_value
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestReadCache(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestReadCache, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.db')
+        self.cache = readcache.ReadCache(self.path)
+
+    def tearDown(self):
+        super(TestReadCache, self).tearDown()
+        readcache.set_cache(None)
+        self.cache.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_private_file(self):
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEquals(mode & 077, 0)
+
+    def test_get_and_put(self):
+        self.assertIs(self.cache.get('key'), readcache.MISS)
+
+        self.cache.put('key', {'Stacks': [{'StackName': 'foo'}]}, 60)
+        self.assertEquals(self.cache.get('key'),
+                          {'Stacks': [{'StackName': 'foo'}]})
+        self.assertEquals((self.cache.hits, self.cache.misses), (1, 1))
+
+        # Shared with the next run
+        other = readcache.ReadCache(self.path)
+        self.assertEquals(other.get('key'),
+                          {'Stacks': [{'StackName': 'foo'}]})
+        other.close()
+
+    def test_expiry(self):
+        self.cache.put('key', 'value', 60)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIs(self.cache.get('key'), readcache.MISS)
+            self.cache.prune()
+        self.assertIs(self.cache.get('key'), readcache.MISS)
+
+    def test_clear(self):
+        self.cache.put('key', 'value', 60)
+        self.cache.clear()
+        self.assertIs(self.cache.get('key'), readcache.MISS)
+
+    def test_unpicklable_values_are_not_cached(self):
+        self.cache.put('key', lambda: None, 60)
+        self.assertIs(self.cache.get('key'), readcache.MISS)
+
+    def test_broken_database_is_a_miss(self):
+        self.cache.close()
+        with open(self.path, 'w') as f:
+            f.write('not a database' * 100)
+
+        with self.assertRaises(readcache.sqlite3.Error):
+            readcache.ReadCache(self.path)
+
+        self.cache._db = mock.MagicMock()
+        self.cache._db.execute.side_effect = readcache.sqlite3.Error('bad')
+        self.assertIs(self.cache.get('key'), readcache.MISS)
+        self.cache.put('key', 'value', 60)
+        self.cache.clear()
+
+    def test_cache_key(self):
+        self.assertEquals(readcache.cache_key('op', ['a', {'b': 1}]),
+                          readcache.cache_key('op', ['a', {'b': 1}]))
+        self.assertNotEquals(readcache.cache_key('op', ['a']),
+                             readcache.cache_key('other', ['a']))
+
+    @testing.gen_test
+    def test_cached(self):
+        fetch = mock.MagicMock(return_value=tornado_value({'foo': 'bar'}))
+
+        # Without a cache, the call is always made
+        ret = yield readcache.cached('describe_stacks', ['foo'], fetch)
+        self.assertEquals(ret, {'foo': 'bar'})
+        self.assertEquals(fetch.call_count, 1)
+
+        readcache.set_cache(self.cache)
+        for _ in xrange(3):
+            ret = yield readcache.cached('describe_stacks', ['foo'], fetch)
+            self.assertEquals(ret, {'foo': 'bar'})
+        self.assertEquals(fetch.call_count, 2)
+
+        # Other arguments are another call
+        yield readcache.cached('describe_stacks', ['bar'], fetch)
+        self.assertEquals(fetch.call_count, 3)
+
+    @testing.gen_test
+    def test_cached_encode_decode(self):
+        readcache.set_cache(self.cache)
+
+        @gen.coroutine
+        def fetch():
+            raise gen.Return(['a', 'b'])
+
+        def encode(found):
+            return ','.join(found)
+
+        def decode(data):
+            return data.split(',')
+
+        ret = yield readcache.cached('op', [], fetch, encode, decode)
+        self.assertEquals(ret, ['a', 'b'])
+        self.assertEquals(self.cache.get(readcache.cache_key('op', [])),
+                          'a,b')
+
+        ret = yield readcache.cached('op', [], fetch, encode, decode)
+        self.assertEquals(ret, ['a', 'b'])
+
+    @testing.gen_test
+    def test_cached_errors_are_not_cached(self):
+        readcache.set_cache(self.cache)
+
+        @gen.coroutine
+        def fetch():
+            raise ValueError('does not exist')
+
+        for _ in xrange(2):
+            with self.assertRaises(ValueError):
+                yield readcache.cached('describe_stacks', ['foo'], fetch)
+        self.assertEquals(self.cache.misses, 2)
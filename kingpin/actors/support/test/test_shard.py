@@ -0,0 +1,55 @@
+"""Tests for the actors.support.shard package."""
+
+from tornado import testing
+
+from kingpin import exceptions
+from kingpin.actors.support import shard
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestShard(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.contexts = [{'ARRAY': 'array-%s' % i} for i in xrange(100)]
+
+    def tearDown(self):
+        shard.set_shard(None)
+
+    def test_parse(self):
+        self.assertEquals(shard.parse('0/4'), (0, 4))
+        self.assertEquals(shard.parse(' 3 / 4 '), (3, 4))
+
+    def test_parse_invalid(self):
+        for spec in ('', 'one/two', '4', '4/4', '0/0', '-1/4'):
+            with self.assertRaises(exceptions.InvalidShard):
+                shard.parse(spec)
+
+    def test_select_covers_every_context_once(self):
+        shares = [shard.select(self.contexts, (i, 3)) for i in xrange(3)]
+        selected = [c['ARRAY'] for share in shares for c in share]
+        self.assertEquals(sorted(selected),
+                          sorted(c['ARRAY'] for c in self.contexts))
+
+        # Every shard gets a reasonable share of the work
+        for share in shares:
+            self.assertTrue(15 < len(share) < 55)
+
+    def test_select_ignores_order(self):
+        share = shard.select(self.contexts, (1, 3))
+        reversed_share = shard.select(self.contexts[::-1], (1, 3))
+        self.assertEquals(share, reversed_share[::-1])
+
+    def test_select_without_shard(self):
+        self.assertEquals(shard.select(self.contexts), self.contexts)
+
+    def test_select_uses_run_shard(self):
+        shard.set_shard((0, 2))
+        self.assertEquals(shard.get_shard(), (0, 2))
+        self.assertEquals(shard.select(self.contexts),
+                          shard.select(self.contexts, (0, 2)))
+
+    def test_shard_of_is_stable(self):
+        # The shard of a context must never depend on the process (ie, the
+        # hash seed) it is computed in.
+        self.assertEquals(shard.shard_of({'ARRAY': 'array-0'}, 1000), 826)
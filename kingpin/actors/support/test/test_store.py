@@ -0,0 +1,61 @@
+"""Tests for the actors.support.store package."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+from tornado import testing
+
+from kingpin.actors.support import store
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestStore(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'store.json')
+        self.store = store.Store('things', version=2, max_age=10,
+                                 stamp='when')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_save_and_load(self):
+        self.assertEquals(self.store.load(self.path), {})
+
+        now = time.time()
+        self.store.save(self.path, lambda e: e.update(a={'when': now}))
+        self.store.save(self.path, lambda e: e.update(b={'when': now}))
+
+        # Both runs' entries are kept
+        self.assertEquals(self.store.load(self.path),
+                          {'a': {'when': now}, 'b': {'when': now}})
+        with open(self.path) as f:
+            self.assertEquals(json.load(f)['version'], 2)
+
+        # And no temporary file is left behind
+        self.assertEquals(os.listdir(self.tmpdir), ['store.json'])
+
+    def test_save_drops_old_entries(self):
+        now = time.time()
+        self.store.save(self.path, lambda e: e.update(a={'when': now}))
+
+        with mock.patch('time.time', return_value=now + 11):
+            self.store.save(self.path,
+                            lambda e: e.update(b={'when': now + 11}))
+
+        self.assertEquals(self.store.load(self.path).keys(), ['b'])
+
+    def test_load_missing_or_broken(self):
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        self.assertEquals(self.store.load(self.path), {})
+
+        with open(self.path, 'w') as f:
+            json.dump({'version': 1, 'actors': {'a': {}}}, f)
+        self.assertEquals(self.store.load(self.path), {})
@@ -0,0 +1,160 @@
+"""Tests for the actors.support.workers package."""
+
+import logging
+import os
+
+from tornado import gen
+from tornado import testing
+
+from kingpin.actors import base
+from kingpin.actors import exceptions
+from kingpin.actors.support import incremental
+from kingpin.actors.support import plan
+from kingpin.actors.support import workers
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class UnpicklableError(exceptions.RecoverableActorFailure):
+
+    def __init__(self, a, b):
+        super(UnpicklableError, self).__init__('%s %s' % (a, b))
+
+
+FAILURES = {
+    'recoverable': exceptions.RecoverableActorFailure('Worker failure'),
+    'unrecoverable': exceptions.UnrecoverableActorFailure('Worker failure'),
+    'unpicklable': UnpicklableError('Worker', 'failure'),
+}
+
+
+class PidActor(base.BaseActor):
+
+    """Logs the PID of the process it runs in, and optionally fails."""
+
+    all_options = {
+        'fail': (str, None, 'Name of the FAILURES exception to raise'),
+    }
+
+    @gen.coroutine
+    def _execute(self):
+        self.log.warning('pid=%s' % os.getpid())
+
+        current = plan.get_plan()
+        if current is not None:
+            current.record(self, None, {}, ['state'])
+
+        fingerprints = incremental.get_fingerprints()
+        if fingerprints is not None:
+            fingerprints.record(str(self), 'v1')
+
+        if self.option('fail'):
+            raise FAILURES[self.option('fail')]
+
+
+class DyingActor(base.BaseActor):
+
+    """Takes the whole worker process down with it."""
+
+    @gen.coroutine
+    def _execute(self):
+        os._exit(3)
+
+
+class TestWorkers(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestWorkers, self).setUp()
+        self.messages = []
+        self.handler = logging.Handler()
+        self.handler.emit = lambda r: self.messages.append(r.getMessage())
+        logging.getLogger().addHandler(self.handler)
+
+    def tearDown(self):
+        logging.getLogger().removeHandler(self.handler)
+        plan.set_plan(None)
+        incremental.set_fingerprints(None)
+        super(TestWorkers, self).tearDown()
+
+    def _actors(self, count, **options):
+        return [PidActor('Act %s' % i, options) for i in xrange(count)]
+
+    @testing.gen_test(timeout=30)
+    def test_execute(self):
+        actors = self._actors(4)
+        results = yield workers.execute(actors, processes=2)
+
+        self.assertEquals(len(results), 4)
+        for actor, (record, error) in zip(actors, results):
+            self.assertIsInstance(record, base.ActorRecord)
+            self.assertEquals(record.id, str(id(actor)))
+            self.assertEquals(record.outcome, base.SUCCEEDED)
+            self.assertEquals(error, None)
+
+        # The logs of the workers made it back, from two other processes
+        pids = set(m.split('=')[1] for m in self.messages if 'pid=' in m)
+        self.assertEquals(len(pids), 2)
+        self.assertNotIn(str(os.getpid()), pids)
+
+    @testing.gen_test(timeout=30)
+    def test_execute_never_more_processes_than_actors(self):
+        yield workers.execute(self._actors(2), processes=8)
+        pids = set(m for m in self.messages if 'pid=' in m)
+        self.assertEquals(len(pids), 2)
+
+    @testing.gen_test(timeout=30)
+    def test_execute_failures(self):
+        actors = (self._actors(1) +
+                  self._actors(1, fail='recoverable') +
+                  self._actors(1, fail='unrecoverable') +
+                  self._actors(1, fail='unpicklable'))
+        results = yield workers.execute(actors, processes=4)
+        errors = [error for _, error in results]
+
+        self.assertEquals(errors[0], None)
+        self.assertIs(type(errors[1]), exceptions.RecoverableActorFailure)
+        self.assertIs(type(errors[2]), exceptions.UnrecoverableActorFailure)
+        self.assertEquals(str(errors[2]), 'Worker failure')
+        self.assertEquals(results[2][0].outcome, base.FAILED)
+
+        # UnpicklableError cannot be rebuilt in the parent, but it is still
+        # a recoverable failure.
+        self.assertIs(type(errors[3]), exceptions.RecoverableActorFailure)
+        self.assertEquals(str(errors[3]), 'Worker failure')
+
+    @testing.gen_test(timeout=30)
+    def test_execute_worker_dies(self):
+        actors = [DyingActor('Dies', {})] + self._actors(1)
+        results = yield workers.execute(actors, processes=2)
+
+        self.assertIsInstance(results[0][1],
+                              exceptions.UnrecoverableActorFailure)
+        self.assertIn('exited with 3', str(results[0][1]))
+        self.assertEquals(results[1][1], None)
+
+    @testing.gen_test(timeout=30)
+    def test_execute_merges_plan(self):
+        recorded = plan.Plan()
+        plan.set_plan(recorded)
+        yield workers.execute(self._actors(3), processes=3)
+        self.assertEquals(len(recorded), 3)
+
+    @testing.gen_test(timeout=30)
+    def test_execute_merges_fingerprints(self):
+        fingerprints = incremental.Fingerprints()
+        incremental.set_fingerprints(fingerprints)
+        yield workers.execute(self._actors(3), processes=3)
+        self.assertEquals(sorted(fingerprints.recorded),
+                          ['Act 0', 'Act 1', 'Act 2'])
+        self.assertTrue(fingerprints.matches('Act 1', 'v1'))
+
+    def test_in_worker(self):
+        self.assertFalse(workers.in_worker())
+
+    def test_portable(self):
+        error = exceptions.UnrecoverableActorFailure('boom')
+        self.assertIs(workers._portable(error), error)
+
+        portable = workers._portable(UnpicklableError('a', 'b'))
+        self.assertIs(type(portable), exceptions.RecoverableActorFailure)
+        self.assertEquals(str(portable), 'a b')
@@ -0,0 +1,317 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.actors.support.workers`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Executes a set of independent actors in child processes.
+
+Kingpin runs on a single IOLoop, so parsing, diffing large configs, token
+replacement and logging all compete for one CPU with the callbacks that drive
+the actors. `execute()` forks up to `processes` workers, deals the actors out
+to them, and has each worker execute its share on an IOLoop (and thread pool
+executors) of its own.
+
+The actors are already built when the workers are forked, so nothing but the
+results ever has to be pickled. Each worker streams back its log records,
+which are handled by the logging configuration of the parent, and for every
+actor it has executed, an `ActorRecord` and the exception (if any) that the
+actor raised. Plans recorded by the workers during a dry run (see
+`kingpin.actors.support.plan`) are merged back into the plan of the parent,
+and so are the durations of the actors (see `kingpin.actors.support.history`)
+and the fingerprints of the resources they ensured (see
+`kingpin.actors.support.incremental`).
+"""
+
+import gc
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+import struct
+import sys
+import threading
+
+from concurrent import futures
+from tornado import gen
+from tornado import ioloop
+from tornado import iostream
+from tornado import locks
+import urllib3
+
+from kingpin.actors import exceptions
+from kingpin.actors.support import breaker
+from kingpin.actors.support import history
+from kingpin.actors.support import incremental
+from kingpin.actors.support import outbox
+from kingpin.actors.support import plan
+from kingpin.actors.support import readcache
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Every message is a pickled tuple, preceded by its length.
+HEADER = struct.Struct('!I')
+
+# Set in the worker processes, which never fork workers of their own.
+_IN_WORKER = False
+
+
+def in_worker():
+    """Whether we are running inside of a worker process."""
+    return _IN_WORKER
+
+
+class _Channel(object):
+
+    """The (write) end of the pipe from a worker back to its parent."""
+
+    def __init__(self, fd):
+        self._file = os.fdopen(fd, 'wb')
+        self._lock = threading.Lock()
+
+    def send(self, *message):
+        data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._file.write(HEADER.pack(len(data)) + data)
+            self._file.flush()
+
+
+class _ChannelHandler(logging.Handler):
+
+    """Sends the log records of a worker to its parent."""
+
+    def __init__(self, channel):
+        logging.Handler.__init__(self)
+        self._channel = channel
+
+    def emit(self, record):
+        try:
+            # Arguments and tracebacks may not be picklable, so render them
+            # into the record before it is sent.
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(
+                    record.exc_info)
+                record.exc_info = None
+            self._channel.send('log', record)
+        except Exception:
+            self.handleError(record)
+
+
+def _portable(error):
+    """Returns an exception that will survive the trip to the parent.
+
+    Exceptions that cannot be pickled (or unpickled) are replaced by the
+    Kingpin base exception that they derive from, so that the parent still
+    sees a recoverable failure as recoverable.
+    """
+    try:
+        pickle.loads(pickle.dumps(error, pickle.HIGHEST_PROTOCOL))
+        return error
+    except Exception:
+        pass
+
+    for cls in (exceptions.UnrecoverableActorFailure,
+                exceptions.RecoverableActorFailure):
+        if isinstance(error, cls):
+            return cls(str(error))
+    return exceptions.ActorException(str(error))
+
+
+def _reset_after_fork():
+    """Drops the state that a worker must not share with its parent.
+
+    The threads of the parent's thread pool executors did not survive the
+    fork, so every executor in a Kingpin module is swapped for a fresh one.
+    Any HTTP connections that the parent had already opened are dropped too,
+    rather than having several processes talk over the same socket. Each
+    worker gets its own circuit breakers and retry budget, and its own
+    connection to the read cache.
+    """
+    fresh = {}
+
+    def renew(executor):
+        if executor not in fresh:
+            fresh[executor] = futures.ThreadPoolExecutor(
+                executor._max_workers)
+        return fresh[executor]
+
+    for name, module in sys.modules.items():
+        if module is None or not name.startswith('kingpin'):
+            continue
+        for attr, value in vars(module).items():
+            if isinstance(value, futures.ThreadPoolExecutor):
+                setattr(module, attr, renew(value))
+            elif isinstance(value, type) and isinstance(
+                    value.__dict__.get('executor'),
+                    futures.ThreadPoolExecutor):
+                value.executor = renew(value.__dict__['executor'])
+
+    for obj in gc.get_objects():
+        if isinstance(obj, urllib3.PoolManager):
+            obj.clear()
+
+    outbox.set_outbox(None)
+    breaker.after_fork()
+    if readcache.get_cache() is not None:
+        readcache.get_cache().reopen()
+
+
+@gen.coroutine
+def _execute_share(actors, indexes, concurrency, channel):
+    """Executes the actors of one worker, reporting on each one."""
+    semaphore = locks.Semaphore(concurrency) if concurrency else None
+
+    @gen.coroutine
+    def execute(index):
+        actor = actors[index]
+        error = None
+        try:
+            if semaphore is None:
+                yield actor.execute()
+            else:
+                with (yield semaphore.acquire()):
+                    yield actor.execute()
+        except exceptions.ActorException as e:
+            error = _portable(e)
+        channel.send('done', index, actor.compact(), error)
+
+    yield [execute(index) for index in indexes]
+    yield outbox.get_outbox().flush()
+
+
+def _work(actors, indexes, concurrency, fd):
+    """The entry point of a worker process."""
+    global _IN_WORKER
+    _IN_WORKER = True
+
+    channel = _Channel(fd)
+    root = logging.getLogger()
+    root.handlers = [_ChannelHandler(channel)]
+    _reset_after_fork()
+
+    recorder = None
+    if plan.get_plan() is not None and plan.get_plan().recording:
+        recorder = plan.Plan()
+        plan.set_plan(recorder)
+
+    durations = history.get_history()
+    if durations is not None:
+        durations.samples = []
+
+    fingerprints = incremental.get_fingerprints()
+    if fingerprints is not None:
+        fingerprints.recorded = {}
+
+    ioloop.IOLoop.clear_current()
+    ioloop.IOLoop.clear_instance()
+    loop = ioloop.IOLoop()
+    loop.make_current()
+    loop.install()
+    loop.run_sync(lambda: _execute_share(actors, indexes, concurrency,
+                                         channel))
+
+    if recorder is not None:
+        channel.send('plan', recorder.actors)
+    if durations is not None:
+        channel.send('history', durations.samples)
+    if fingerprints is not None:
+        channel.send('fingerprints', fingerprints.recorded)
+
+
+@gen.coroutine
+def _spawn(actors, indexes, concurrency, results):
+    """Forks a worker for some of the actors, and waits for its results."""
+    reader, writer = os.pipe()
+    process = multiprocessing.Process(
+        target=_work, args=(actors, indexes, concurrency, writer))
+    process.daemon = True
+    process.start()
+    os.close(writer)
+    log.debug('Worker %s is executing %s actors' % (process.pid, len(indexes)))
+
+    stream = iostream.PipeIOStream(reader)
+    try:
+        while True:
+            header = yield stream.read_bytes(HEADER.size)
+            data = yield stream.read_bytes(HEADER.unpack(header)[0])
+            message = pickle.loads(data)
+            if message[0] == 'log':
+                record = message[1]
+                logging.getLogger(record.name).handle(record)
+            elif message[0] == 'done':
+                results[message[1]] = message[2:]
+            elif message[0] == 'plan':
+                current = plan.get_plan()
+                for key, entries in message[1].items():
+                    current.actors.setdefault(key, []).extend(entries)
+            elif message[0] == 'history':
+                for sample in message[1]:
+                    history.get_history().add(*sample)
+            elif message[0] == 'fingerprints':
+                current = incremental.get_fingerprints()
+                current.entries.update(message[1])
+                current.recorded.update(message[1])
+    except iostream.StreamClosedError:
+        pass
+    finally:
+        stream.close()
+
+    process.join()
+    for index in indexes:
+        if results[index] is None:
+            actor = actors[index]
+            results[index] = (actor.compact(),
+                              exceptions.UnrecoverableActorFailure(
+                                  'Worker process %s exited with %s before '
+                                  '"%s" finished' % (process.pid,
+                                                     process.exitcode,
+                                                     actor._desc)))
+
+
+@gen.coroutine
+def execute(actors, processes, concurrency=0, order=None):
+    """Executes actors in (up to) `processes` worker processes.
+
+    The actors are dealt out to the workers round-robin (in `order`), and
+    each worker executes all of its actors at once, just like
+    `kingpin.actors.group.Async` would.
+
+    Args:
+        actors: List of `BaseActor` objects to execute
+        processes: Maximum number of worker processes
+        concurrency: Maximum number of actors executing at once, across all
+                     of the workers (0 for no limit)
+        order: The indexes of the actors, in the order to start them in
+               (default: as listed)
+
+    Returns:
+        A list with an (ActorRecord, exception or None) tuple for each actor.
+    """
+    processes = min(processes, concurrency or processes, len(actors))
+    if concurrency:
+        concurrency = int(math.ceil(concurrency / float(processes)))
+
+    if order is None:
+        order = range(len(actors))
+
+    results = [None] * len(actors)
+    yield [_spawn(actors, order[i::processes], concurrency, results)
+           for i in xrange(processes)]
+    raise gen.Return(results)
@@ -25,6 +25,8 @@ os.environ['URLLIB_DEBUG'] = '1'
 from kingpin import utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
+from kingpin.actors.support import incremental
+from kingpin.actors.support import plan
 from kingpin.actors.test.helper import mock_tornado
 from kingpin.constants import REQUIRED, STATE
 
@@ -139,6 +141,42 @@ class TestBaseActor(testing.AsyncTestCase):
         self.actor._desc = None
         self.assertEquals('kingpin.actors.base.BaseActor', str(self.actor))
 
+    def _log_records(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = self.actor.log.logger
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.DEBUG)
+        return records
+
+    def test_log_prefix_is_cached(self):
+        records = self._log_records()
+        self.actor.log.info('Hello %s', 'world')
+        self.assertEquals(records[0].getMessage(),
+                          '[Unit Test Action] Hello world')
+        self.assertEquals(records[0].actor, 'Unit Test Action')
+
+        # The prefix is only rebuilt once the adapter is reset
+        self.actor._desc = 'Renamed'
+        self.actor.log.info('Hello')
+        self.assertEquals(records[1].getMessage(), '[Unit Test Action] Hello')
+        self.actor.log.reset()
+        self.actor.log.info('Hello')
+        self.assertEquals(records[2].getMessage(), '[Renamed] Hello')
+
+    def test_log_prefix_with_percent(self):
+        records = self._log_records()
+        self.actor._desc = 'Scale to 100%'
+        self.actor.log.reset()
+        self.actor.log.info('Hello')
+        self.actor.log.info('Hello %s', 'world')
+        self.assertEquals(
+            [r.getMessage() for r in records],
+            ['[Scale to 100%] Hello', '[Scale to 100%] Hello world'])
+
     @testing.gen_test
     def test_timer(self):
         # Create a function and wrap it in our timer
@@ -155,7 +193,7 @@ class TestBaseActor(testing.AsyncTestCase):
         msg = 'kingpin.actors.base.BaseActor.execute() execution time'
         msg_is_in_calls = False
         for call in self.actor.log.debug.mock_calls:
-            if msg in str(call):
+            if msg in call[1][0] % call[1][1:]:
                 msg_is_in_calls = True
         self.assertEquals(msg_is_in_calls, True)
 
@@ -453,6 +491,161 @@ class TestEnsurableBaseActor(testing.AsyncTestCase):
             self.actor._gather_methods()
 
 
+class FakePlannedEnsurableBaseActor(FakeEnsurableBaseActor):
+
+    @gen.coroutine
+    def _precache(self):
+        yield super(FakePlannedEnsurableBaseActor, self)._precache()
+
+        # The resource already exists, only its name needs fixing.
+        self.state = 'present'
+
+    @gen.coroutine
+    def _plan_fingerprint(self):
+        raise gen.Return(self.name)
+
+
+class TestEnsurableBaseActorPlan(testing.AsyncTestCase):
+
+    options = {'name': 'new name', 'description': 'Some description'}
+
+    def tearDown(self):
+        plan.set_plan(None)
+        super(TestEnsurableBaseActorPlan, self).tearDown()
+
+    def _actor(self, the_plan, dry):
+        plan.set_plan(the_plan)
+        return FakePlannedEnsurableBaseActor(
+            'Unit Test Actor', dict(self.options), dry=dry)
+
+    @testing.gen_test
+    def test_record(self):
+        the_plan = plan.Plan()
+        actor = self._actor(the_plan, dry=True)
+        yield actor._execute()
+
+        entry = the_plan.take(actor)
+        self.assertEquals(entry['fingerprint'], 'Old name')
+        self.assertEquals(entry['setters'], ['name'])
+        self.assertEquals(entry['observed'],
+                          {'state': 'present', 'name': 'Old name',
+                           'description': 'Some description'})
+
+    @testing.gen_test
+    def test_apply(self):
+        the_plan = plan.Plan(recording=False)
+        actor = self._actor(the_plan, dry=False)
+        the_plan.record(actor, 'Old name', {}, ['name'])
+        actor.comparers['name'] = mock_tornado(False)
+        actor.comparers['description'] = mock_tornado(True)
+
+        yield actor._execute()
+
+        # The setter was called without comparing anything
+        self.assertTrue(actor.set_name_called)
+        self.assertEquals(actor.comparers['name']._call_count, 0)
+        self.assertEquals(actor.comparers['description']._call_count, 0)
+
+    @testing.gen_test
+    def test_apply_stale(self):
+        the_plan = plan.Plan(recording=False)
+        actor = self._actor(the_plan, dry=False)
+        the_plan.record(actor, 'Someone elses name', {}, [])
+        actor.comparers['description'] = mock_tornado(True)
+
+        yield actor._execute()
+
+        # The resource changed, so it was ensured the regular way
+        self.assertTrue(actor.set_name_called)
+        self.assertEquals(actor.comparers['description']._call_count, 1)
+
+    @testing.gen_test
+    def test_apply_not_in_plan(self):
+        actor = self._actor(plan.Plan(recording=False), dry=False)
+        yield actor._execute()
+        self.assertTrue(actor.set_name_called)
+
+
+class FakeVersionedEnsurableBaseActor(FakeEnsurableBaseActor):
+
+    # Bumped by every setter call, like a last-modified time would be
+    remote_version = 'v1'
+
+    @gen.coroutine
+    def _remote_version(self):
+        raise gen.Return(self.remote_version)
+
+    @gen.coroutine
+    def _set_name(self):
+        yield super(FakeVersionedEnsurableBaseActor, self)._set_name()
+        self.remote_version = 'v2'
+
+
+class TestEnsurableBaseActorIncremental(testing.AsyncTestCase):
+
+    options = {'name': 'new name', 'description': 'Some description'}
+
+    def setUp(self):
+        super(TestEnsurableBaseActorIncremental, self).setUp()
+        self.fingerprints = incremental.Fingerprints()
+        incremental.set_fingerprints(self.fingerprints)
+
+    def tearDown(self):
+        incremental.set_fingerprints(None)
+        super(TestEnsurableBaseActorIncremental, self).tearDown()
+
+    def _actor(self, dry=False, **options):
+        options.update(self.options)
+        return FakeVersionedEnsurableBaseActor(
+            'Unit Test Actor', options, dry=dry)
+
+    @testing.gen_test
+    def test_record_and_skip(self):
+        actor = self._actor()
+        yield actor._execute()
+        self.assertTrue(actor.set_name_called)
+
+        # The version after the setters is the one that is recorded
+        key = incremental.actor_key(actor)
+        self.assertTrue(self.fingerprints.matches(key, 'v2'))
+
+        actor = self._actor()
+        actor.remote_version = 'v2'
+        actor._precache = mock_tornado()
+        yield actor._execute()
+        self.assertEquals(actor._precache._call_count, 0)
+
+    @testing.gen_test
+    def test_changed_resource(self):
+        actor = self._actor()
+        self.fingerprints.record(incremental.actor_key(actor), 'v0')
+        yield actor._execute()
+        self.assertTrue(actor._precache_called)
+
+    @testing.gen_test
+    def test_changed_options(self):
+        actor = self._actor()
+        self.fingerprints.record(incremental.actor_key(actor), 'v1')
+
+        actor = self._actor(unmanaged='changed')
+        yield actor._execute()
+        self.assertTrue(actor._precache_called)
+
+    @testing.gen_test
+    def test_dry_does_not_record(self):
+        actor = self._actor(dry=True)
+        yield actor._execute()
+        self.assertTrue(actor._precache_called)
+        self.assertEquals(len(self.fingerprints), 0)
+
+    @testing.gen_test
+    def test_unversioned(self):
+        actor = FakeEnsurableBaseActor('Unit Test Actor', dict(self.options))
+        yield actor._execute()
+        self.assertTrue(actor.set_name_called)
+        self.assertEquals(len(self.fingerprints), 0)
+
+
 class TestHTTPBaseActor(testing.AsyncTestCase):
 
     def setUp(self):
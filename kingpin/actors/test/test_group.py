@@ -1,5 +1,8 @@
+import gc
 import logging
+import os
 import time
+import weakref
 import mock
 
 from tornado import gen
@@ -9,6 +12,8 @@ from kingpin import utils
 from kingpin.actors import base
 from kingpin.actors import exceptions
 from kingpin.actors import group
+from kingpin.actors.support import history
+from kingpin.actors.support import shard
 
 
 log = logging.getLogger(__name__)
@@ -187,10 +192,15 @@ class TestBaseGroupActor(TestGroupActorBaseClass):
                 dict(self.actor_returns),
                 dict(self.actor_returns)]
 
-        actor = group.BaseGroupActor('Unit Test Action', {'acts': acts})
+        actor = group.BaseGroupActor('Unit Test Action', {'acts': acts},
+                                     init_tokens={'TOKEN': 'value'})
         ret = actor._build_action_group({'TEST': 'CONTEXT'})
         self.assertEquals(ret[0]._init_context, {'TEST': 'CONTEXT'})
 
+        # The tokens are shared by reference, not copied into every act
+        for act in ret:
+            self.assertIs(act._init_tokens, actor._init_tokens)
+
     @testing.gen_test
     def test_execute_success(self):
         actor = group.BaseGroupActor('Unit Test Action', {'acts': []})
@@ -219,6 +229,49 @@ class TestBaseGroupActor(TestGroupActorBaseClass):
         ret = yield actor._execute()
         self.assertEquals(ret, None)
 
+    @testing.gen_test
+    def test_execute_releases_acts(self):
+        actor = group.Sync(
+            'Unit Test Action',
+            {'acts': [dict(self.actor_returns),
+                      dict(self.actor_raises_recoverable_exception)]},
+            dry=True)
+        orgchart = actor.get_orgchart()
+        first = weakref.ref(actor._actions[0])
+
+        with self.assertRaises(exceptions.RecoverableActorFailure):
+            yield actor.execute()
+
+        # The acts have been swapped for compact records of their run...
+        gc.collect()
+        self.assertEquals(first(), None)
+        records = actor._actions
+        self.assertIsInstance(records[0], base.ActorRecord)
+        self.assertEquals(records[0].outcome, base.SUCCEEDED)
+        self.assertEquals(records[0].type,
+                          'kingpin.actors.test.test_group.TestActor')
+        self.assertTrue(records[0].duration >= 0)
+        self.assertEquals(records[1].outcome, base.FAILED)
+        self.assertEquals(records[1].error, '')
+
+        # ... which still make up the same orgchart.
+        self.assertEquals(actor.get_orgchart(), orgchart)
+        self.assertEquals(actor.compact().children, records)
+
+    @testing.gen_test
+    def test_execute_releases_acts_async(self):
+        actor = group.Async(
+            'Unit Test Action',
+            {'acts': [dict(self.actor_returns), dict(self.actor_returns)],
+             'concurrency': 1})
+        orgchart = actor.get_orgchart()
+
+        yield actor.execute()
+
+        self.assertEquals([r.outcome for r in actor._actions],
+                          [base.SUCCEEDED, base.SUCCEEDED])
+        self.assertEquals(actor.get_orgchart(), orgchart)
+
 
 class TestSyncGroupActor(TestGroupActorBaseClass):
 
@@ -270,6 +323,60 @@ class TestSyncGroupActor(TestGroupActorBaseClass):
         # Even after the first actor fails, the second one should get executed.
         self.assertEquals(TestActor.last_value, '123')
 
+    @testing.gen_test
+    def test_run_actions_dry_concurrency(self):
+        actor = group.Sync(
+            'Unit Test Action',
+            {'dry_concurrency': 2,
+             'acts': [
+                 dict(self.actor_returns),
+                 dict(self.actor_raises_unrecoverable_exception),
+                 dict(self.actor_returns),
+                 dict(self.actor_returns),
+             ]},
+            dry=True)
+
+        running = []
+        finished = []
+
+        def track(act):
+            execute = act.execute
+
+            @gen.coroutine
+            def _execute():
+                running.append(act)
+                self.assertLessEqual(len(running) - len(finished), 2)
+                yield gen.sleep(0.01)
+                try:
+                    yield execute()
+                finally:
+                    finished.append(act)
+            act.execute = _execute
+
+        for act in actor._actions:
+            track(act)
+
+        with self.assertRaises(exceptions.UnrecoverableActorFailure):
+            yield actor._run_actions()
+
+        # Every act ran, even though one of them failed
+        self.assertEquals(len(finished), 4)
+
+    @testing.gen_test
+    def test_run_actions_dry_concurrency_default(self):
+        actor = group.Sync(
+            'Unit Test Action', {'acts': [dict(self.actor_returns)]},
+            dry=True)
+        actor._rehearse_actions = mock.MagicMock()
+
+        yield actor._run_actions()
+        self.assertFalse(actor._rehearse_actions.called)
+
+        with mock.patch.dict(os.environ, {'DRY_CONCURRENCY': '5'}):
+            actor._rehearse_actions.return_value = utils.tornado_sleep(0)
+            yield actor._run_actions()
+        actor._rehearse_actions.assert_called_once_with(5)
+
     @testing.gen_test
     def test_run_actions_with_two_acts_one_fails_unrecoverable(self):
         # Call the executor and test it out
@@ -398,6 +505,45 @@ class TestAsyncGroupActor(TestGroupActorBaseClass):
         exe_time = stop - start
         self.assertTrue(0.2 < exe_time < 0.4)
 
+    @testing.gen_test
+    def test_run_actions_longest_first(self):
+        actor = group.Async('Unit Test Action', {
+            'concurrency': 1,
+            'longest_first': True,
+            'acts': [
+                {'actor': 'kingpin.actors.test.test_group.TestActor',
+                 'options': {'value': value}}
+                for value in ('short', 'long', 'new')]})
+        short, long_, new = actor._actions
+
+        durations = history.History()
+        durations.record(short, 1)
+        durations.record(long_, 60)
+        history.set_history(durations)
+        self.addCleanup(history.set_history, None)
+
+        started = []
+
+        @gen.coroutine
+        def execute_act(index, buffered=False):
+            started.append(index)
+
+        with mock.patch.object(actor, '_execute_act', execute_act):
+            yield actor._run_actions()
+
+        # The new act is of the same class, so it is expected to take as long
+        # as the others do on average.
+        self.assertEquals(started, [1, 2, 0])
+        self.assertEquals(actor._expected_duration(), 61 + 30.5)
+
+    @testing.gen_test
+    def test_run_actions_longest_first_without_history(self):
+        actor = group.Async('Unit Test Action', {
+            'longest_first': True,
+            'acts': [dict(self.actor_returns), dict(self.actor_returns)]})
+        self.assertEquals(actor._order(), [0, 1])
+        self.assertEquals(actor._expected_duration(), None)
+
     @testing.gen_test
     def test_run_actions_with_two_acts(self):
         # Call the executor and test it out
@@ -452,3 +598,59 @@ class TestAsyncGroupActor(TestGroupActorBaseClass):
 
         with self.assertRaises(exceptions.UnrecoverableActorFailure):
             yield actor._run_actions()
+
+    def test_build_actions_with_shard(self):
+        contexts = [{'ID': str(i)} for i in xrange(20)]
+        options = {'contexts': contexts, 'shard': True,
+                   'acts': [dict(self.actor_returns)]}
+
+        built = []
+        try:
+            for index in xrange(3):
+                shard.set_shard((index, 3))
+                actor = group.Async('Unit Test Action', dict(options))
+                built.append(len(actor._actions))
+
+            # Unmarked groups build every context
+            unmarked = group.Async('Unit Test Action',
+                                   dict(options, shard=False))
+            self.assertEquals(len(unmarked._actions), 20)
+        finally:
+            shard.set_shard(None)
+        self.assertEquals(sum(built), 20)
+
+        # .. and so does every group of an unsharded run
+        self.assertEquals(
+            len(group.Async('Unit Test Action', dict(options))._actions), 20)
+
+    @testing.gen_test(timeout=30)
+    def test_run_actions_in_workers(self):
+        actor = group.Async(
+            'Unit Test Action',
+            {'processes': 2,
+             'acts': [
+                 dict(self.actor_returns),
+                 dict(self.actor_raises_recoverable_exception),
+                 dict(self.actor_raises_unrecoverable_exception)]})
+
+        with self.assertRaises(exceptions.UnrecoverableActorFailure):
+            yield actor._run_actions()
+
+        # The acts ran elsewhere, and their records came back
+        self.assertEquals(TestActor.last_value, None)
+        outcomes = [act.outcome for act in actor._actions]
+        self.assertEquals(outcomes,
+                          [base.SUCCEEDED, base.FAILED, base.FAILED])
+
+    @testing.gen_test
+    def test_run_actions_in_workers_not_nested(self):
+        actor = group.Async(
+            'Unit Test Action',
+            {'processes': 2,
+             'acts': [dict(self.actor_returns), dict(self.actor_returns)]})
+
+        with mock.patch.object(group.workers, 'in_worker', return_value=True):
+            with mock.patch.object(group.workers, 'execute') as execute:
+                yield actor._run_actions()
+
+        self.assertFalse(execute.called)
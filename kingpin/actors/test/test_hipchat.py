@@ -10,6 +10,8 @@ from tornado import testing
 
 from kingpin.actors import hipchat
 from kingpin.actors import exceptions
+from kingpin.actors.support import outbox
+from kingpin.actors.test.helper import tornado_value
 
 
 __author__ = 'Matt Wise <matt@nextdoor.com>'
@@ -127,6 +129,26 @@ class TestHipchatMessage(testing.AsyncTestCase):
             res = yield actor._execute()
             self.assertEquals(res, None)
 
+    @testing.gen_test
+    def test_execute_async_delivery(self):
+        actor = hipchat.Message(
+            'Unit Test Action',
+            {'message': 'hi', 'room': 'unit_room', 'async_delivery': True})
+        actor._post_message = mock.MagicMock(
+            return_value=tornado_value({'status': 'sent'}))
+
+        test_outbox = outbox.Outbox()
+        with mock.patch.object(outbox, 'get_outbox',
+                               return_value=test_outbox):
+            yield actor._execute()
+            yield actor._execute()
+            self.assertFalse(actor._post_message.called)
+            yield test_outbox.flush()
+
+        # Both messages were coalesced into one post
+        actor._post_message.assert_called_once_with(
+            'unit_room', 'hi<br />hi')
+
     @testing.gen_test
     def test_execute_dry_mode_response(self):
         message = 'Unit test message'
@@ -10,6 +10,9 @@ from tornado import testing
 
 from kingpin.actors import exceptions
 from kingpin.actors import librato
+from kingpin.actors.support import breaker
+from kingpin.actors.support import outbox
+from kingpin.actors.test.helper import tornado_value
 
 
 class FakeHTTPClientClass(object):
@@ -115,6 +118,29 @@ class TestLibratoAnnotation(testing.AsyncTestCase):
             with self.assertRaises(httpclient.HTTPError):
                 yield actor._execute()
 
+    @testing.gen_test
+    def test_execute_with_404_is_not_an_outage(self):
+        self.addCleanup(breaker.reset)
+        actor = librato.Annotation(
+            'Unit Test Action',
+            {'title': 'unittest',
+             'description': 'unittest',
+             'name': 'unittest'})
+
+        http_response = httpclient.HTTPError(
+            code=404, response={})
+
+        with mock.patch.object(actor, '_get_http_client') as m:
+            m.return_value = FakeExceptionRaisingHTTPClientClass()
+            m.return_value.response_value = http_response
+
+            with self.assertRaises(httpclient.HTTPError):
+                yield actor._execute()
+
+        # A missing metric says nothing about the health of Librato
+        self.assertEquals(breaker.get_breaker('librato').failures, 0)
+        self.assertEquals(breaker.get_budget().retries, 0)
+
     @testing.gen_test
     def test_execute(self):
         actor = librato.Annotation(
@@ -135,6 +161,29 @@ class TestLibratoAnnotation(testing.AsyncTestCase):
             res = yield actor._execute()
             self.assertEquals(res, None)
 
+    @testing.gen_test
+    def test_execute_async_delivery(self):
+        actor = librato.Annotation(
+            'Unit Test Action',
+            {'title': 'unittest',
+             'description': 'unittest',
+             'name': 'unittest',
+             'async_delivery': True})
+        actor._fetch_wrapper = mock.MagicMock(
+            return_value=tornado_value(None))
+
+        test_outbox = outbox.Outbox()
+        with mock.patch.object(outbox, 'get_outbox',
+                               return_value=test_outbox):
+            yield actor._execute()
+            self.assertFalse(actor._fetch_wrapper.called)
+            yield test_outbox.flush()
+
+        actor._fetch_wrapper.assert_called_once_with(
+            librato.ANNOTATIONS_URL + 'unittest',
+            post='description=unittest&title=unittest',
+            auth_username='Unittest', auth_password='Unittest')
+
     @testing.gen_test
     def test_execute_dry_mode_response(self):
         actor = librato.Annotation(
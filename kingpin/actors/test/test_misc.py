@@ -1,13 +1,19 @@
+import StringIO
 import logging
+import os
+import shutil
+import tempfile
 
 from tornado import httpclient
 from tornado import testing
 import mock
 
 from kingpin import exceptions as kingpin_exceptions
+from kingpin.actors import base
 from kingpin.actors import exceptions
 from kingpin.actors import misc
 from kingpin.actors.test.helper import mock_tornado
+from kingpin.actors.test.helper import tornado_value
 
 log = logging.getLogger(__name__)
 
@@ -208,6 +214,22 @@ class TestMacro(testing.AsyncTestCase):
         self.assertEquals(len(actor.get_orgchart()), 3)  # Macro, Group, Sleep
         self.assertEquals(type(actor.get_orgchart()[0]), dict)
 
+    @testing.gen_test
+    def test_orgchart_after_execute(self):
+        misc.Macro._get_macro = mock.Mock(name='unittestmacro')
+        misc.Macro._get_config_from_script = mock.Mock(
+            return_value=[{'actor': 'misc.Sleep', 'options': {'sleep': 0}}]
+        )
+        actor = misc.Macro('Unit test', {'macro': 'test'})
+        orgchart = actor.get_orgchart()
+
+        yield actor.execute()
+
+        # Only a compact record is left of the executed actors
+        self.assertIsInstance(actor.initial_actor, base.ActorRecord)
+        self.assertEquals(actor.initial_actor.outcome, base.SUCCEEDED)
+        self.assertEquals(actor.get_orgchart(), orgchart)
+
 
 class TestSleep(testing.AsyncTestCase):
 
@@ -270,3 +292,138 @@ class TestGenericHTTP(testing.AsyncTestCase):
 
         with self.assertRaises(exceptions.InvalidCredentials):
             yield actor.execute()
+
+
+class TestHTTPBatch(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestHTTPBatch, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestHTTPBatch, self).tearDown()
+        shutil.rmtree(self.tmpdir)
+
+    def _actor(self, dry=False, **options):
+        actor = misc.HTTPBatch('Unit Test Action', options, dry=dry)
+        actor._get_http_client = mock.MagicMock()
+        fetch = actor._get_http_client.return_value.fetch
+        fetch.side_effect = self._respond
+        self.responses = {}
+        return actor
+
+    def _respond(self, request, raise_error=True):
+        code, body, seconds = self.responses.get(
+            request.url, (200, '<html>ok</html>', 0.1))
+        error = None
+        if code == 599:
+            error = httpclient.HTTPError(599, 'Timeout')
+        return tornado_value(httpclient.HTTPResponse(
+            request, code, buffer=StringIO.StringIO(body), error=error,
+            request_time=seconds))
+
+    def test_init(self):
+        with self.assertRaises(exceptions.InvalidOptions):
+            misc.HTTPBatch('Unit Test Action', {})
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            misc.HTTPBatch('Unit Test Action',
+                           {'urls': ['http://a'], 'threshold': 101})
+
+        with self.assertRaises(exceptions.InvalidOptions):
+            misc.HTTPBatch('Unit Test Action',
+                           {'urls': ['http://a'], 'codes': ['ok']})
+
+    def test_get_urls(self):
+        path = os.path.join(self.tmpdir, 'urls.txt')
+        with open(path, 'w') as f:
+            f.write('http://b\n\n# Not this one\n  http://c  \n')
+
+        actor = self._actor(urls=['http://a'], url_file=path)
+        self.assertEquals(actor._get_urls(),
+                          ['http://a', 'http://b', 'http://c'])
+
+        actor = self._actor(url_file=os.path.join(self.tmpdir, 'missing'))
+        with self.assertRaises(exceptions.InvalidOptions):
+            actor._get_urls()
+
+    @testing.gen_test
+    def test_execute_dry(self):
+        actor = self._actor(dry=True, urls=['http://a', 'http://b'])
+        yield actor.execute()
+        self.assertEquals(actor._get_http_client.call_count, 0)
+
+    @testing.gen_test
+    def test_execute(self):
+        urls = ['http://example.com/%s' % i for i in xrange(20)]
+        actor = self._actor(urls=urls, concurrency=5, contains=['ok'],
+                            headers={'Host': 'example.com'})
+        actor.log = mock.MagicMock()
+        yield actor.execute()
+
+        fetch = actor._get_http_client.return_value.fetch
+        self.assertEquals(fetch.call_count, 20)
+        request = fetch.call_args[0][0]
+        self.assertEquals(request.headers['Host'], 'example.com')
+        self.assertFalse(actor.log.warning.called)
+
+    @testing.gen_test
+    def test_execute_unlimited_concurrency(self):
+        actor = self._actor(urls=['http://a', 'http://b'], concurrency=0)
+        yield actor.execute()
+        fetch = actor._get_http_client.return_value.fetch
+        self.assertEquals(fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_execute_failures(self):
+        urls = ['http://example.com/%s' % i for i in xrange(10)]
+        actor = self._actor(urls=urls, contains=['ok'])
+        self.responses['http://example.com/1'] = (500, 'oops', 0.1)
+        self.responses['http://example.com/2'] = (599, '', 30)
+        self.responses['http://example.com/3'] = (200, 'nope', 0.1)
+
+        with self.assertRaises(exceptions.RecoverableActorFailure):
+            yield actor.execute()
+
+        # 70% passed
+        actor = self._actor(urls=urls, contains=['ok'], threshold=70)
+        actor.log = mock.MagicMock()
+        self.responses['http://example.com/1'] = (500, 'oops', 0.1)
+        self.responses['http://example.com/2'] = (599, '', 30)
+        self.responses['http://example.com/3'] = (200, 'nope', 0.1)
+        yield actor.execute()
+        self.assertEquals(actor.log.warning.call_count, 3)
+
+    def test_check(self):
+        actor = self._actor(urls=['http://a'], codes=[200, '301'],
+                            contains=['foo', 'bar'])
+        request = httpclient.HTTPRequest('http://a')
+
+        def response(code, body=''):
+            return httpclient.HTTPResponse(
+                request, code, buffer=StringIO.StringIO(body))
+
+        self.assertEquals(actor._check(response(200, 'foo bar')), None)
+        self.assertEquals(actor._check(response(301, 'foo bar')), None)
+        self.assertIn('expected one of [200, 301]',
+                      actor._check(response(404, 'foo bar')))
+        self.assertIn("'bar'", actor._check(response(200, 'foo')))
+
+        # Non-ASCII bodies (and strings) are compared as unicode
+        actor = self._actor(urls=['http://a'],
+                            contains=[u'</html>', u'caf\xe9'])
+        self.assertEquals(
+            actor._check(response(200, 'caf\xc3\xa9</html>')), None)
+        self.assertIn('</html>', actor._check(response(200, 'caf\xc3\xa9')))
+        self.assertIn('caf', actor._check(response(200, '\xff</html>')))
+
+    def test_report(self):
+        actor = self._actor(urls=['http://a'])
+        actor.log = mock.MagicMock()
+        latencies = [float(i) for i in xrange(100, 0, -1)]
+        actor._report(100, 0, latencies)
+
+        args = actor.log.info.call_args[0]
+        message = args[0] % args[1:]
+        self.assertIn('p50 50.000s, p90 90.000s, p99 99.000s, max 100.000s',
+                      message)
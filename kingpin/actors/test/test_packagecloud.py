@@ -1,8 +1,11 @@
 """Tests for the actors.packagecloud package"""
 
+import StringIO
 import datetime
 import mock
 
+from tornado import httpclient
+from tornado import httputil
 from tornado import testing
 
 from kingpin.actors import exceptions
@@ -281,6 +284,37 @@ class TestWaitForPackage(testing.AsyncTestCase):
                 'Unit test action',
                 {'name': '[', 'version': '1', 'repo': 'unittest'})
 
+    @testing.gen_test
+    def test_polls_are_conditional_gets(self):
+        actor = packagecloud.WaitForPackage(
+            'Unit test action',
+            {'name': 'unittest', 'repo': 'unittest', 'version': '0.2'})
+        rest_client = actor._packagecloud_client._client
+        self.assertEquals(rest_client.timeout, 120)
+
+        http_client = mock.Mock()
+        rest_client._client = http_client
+        request = httpclient.HTTPRequest('http://unittest')
+        http_client.fetch.side_effect = [
+            tornado_value(httpclient.HTTPResponse(
+                request, 200, headers=httputil.HTTPHeaders({'ETag': '"1"'}),
+                buffer=StringIO.StringIO('[{"name": "unittest"}]'))),
+            httpclient.HTTPError(304, 'Not Modified')]
+
+        first = yield actor._get_all_packages(repo='unittest')
+        second = yield actor._get_all_packages(repo='unittest')
+        self.assertEquals(first, [{'name': 'unittest'}])
+        self.assertEquals(second, first)
+
+        request = http_client.fetch.call_args[0][0]
+        self.assertEquals(request.headers['If-None-Match'], '"1"')
+
+        # The other actors do not cache
+        actor = packagecloud.Delete(
+            'Unit test action',
+            {'packages_to_delete': 'unittest', 'repo': 'unittest'})
+        self.assertEquals(actor._packagecloud_client._client._cache, None)
+
     @testing.gen_test
     def test_bad_regex_version(self):
         with self.assertRaises(exceptions.InvalidOptions):
@@ -10,6 +10,8 @@ from tornado import testing
 
 from kingpin.actors import rollbar
 from kingpin.actors import exceptions
+from kingpin.actors.support import outbox
+from kingpin.actors.test.helper import tornado_value
 
 
 __author__ = 'Matt Wise <matt@nextdoor.com>'
@@ -249,3 +251,21 @@ class TestDeploy(testing.AsyncTestCase):
         actor._deploy = fake_deploy
         res = yield actor._execute()
         self.assertEquals(res, None)
+
+    @testing.gen_test
+    def test_execute_async_delivery(self):
+        actor = rollbar.Deploy(
+            'Unit Test Action',
+            {'environment': 'unittest',
+             'revision': '0001a',
+             'async_delivery': True})
+        actor._deploy = mock.MagicMock(return_value=tornado_value('123'))
+
+        test_outbox = outbox.Outbox()
+        with mock.patch.object(outbox, 'get_outbox',
+                               return_value=test_outbox):
+            yield actor._execute()
+            self.assertFalse(actor._deploy.called)
+            yield test_outbox.flush()
+
+        actor._deploy.assert_called_once_with()
@@ -6,6 +6,7 @@ from tornado import testing
 
 from kingpin.actors import slack
 from kingpin.actors import exceptions
+from kingpin.actors.support import outbox
 from kingpin.actors.test.helper import mock_tornado
 
 
@@ -113,6 +114,31 @@ class TestMessage(testing.AsyncTestCase):
             unfurl_media=True, parse='none', link_names=1, channel='#testing'
         )])
 
+    @testing.gen_test
+    def test_execute_async_delivery(self):
+        post_mock = mock.MagicMock()
+        post_mock.http_post.side_effect = mock_tornado({'ok': 'true'})
+        self._slack_mock.chat_postMessage.return_value = post_mock
+        self.actor = slack.Message(
+            'Unit test message',
+            {'channel': '#testing', 'message': 'Unittest',
+             'async_delivery': True})
+        self.actor._slack_client = self._slack_mock
+
+        test_outbox = outbox.Outbox()
+        with mock.patch.object(outbox, 'get_outbox',
+                               return_value=test_outbox):
+            yield self.actor._execute()
+            self.assertFalse(post_mock.http_post.called)
+            self.assertEquals(test_outbox.pending(), 1)
+
+            yield test_outbox.flush()
+
+        post_mock.http_post.assert_has_calls([mock.call(
+            username='Kingpin', unfurl_links=True, text='Unittest',
+            unfurl_media=True, parse='none', link_names=1, channel='#testing'
+        )])
+
     @testing.gen_test
     def test_execute_list_rooms(self):
         actor = slack.Message(
@@ -6,6 +6,7 @@ import json
 from tornado import testing
 from tornado import httpclient
 
+from kingpin import utils
 from kingpin.actors import exceptions
 from kingpin.actors import spotinst
 from kingpin.actors.test.helper import mock_tornado, tornado_value
@@ -165,7 +166,8 @@ class TestElastiGroup(testing.AsyncTestCase):
             None, self.actor._parse_group_config())
 
     def test_parse_group_config_missing_token(self):
-        del(self.actor._init_tokens['ZONE'])
+        self.actor._init_tokens = utils.TokenScope(
+            {'SECGRP': 'sg-123123', 'SUBNET': 'sn-123123'})
         with self.assertRaises(exceptions.InvalidOptions):
             self.actor._parse_group_config()
 
@@ -276,6 +278,36 @@ class TestElastiGroup(testing.AsyncTestCase):
         ret = yield self.actor._get_state()
         self.assertEquals('absent', ret)
 
+    @testing.gen_test
+    def test_plan_fingerprint(self):
+        self.actor._group = None
+        absent = yield self.actor._plan_fingerprint()
+
+        self.actor._group = {'group': {'id': 'sig-1', 'updatedAt': '1'}}
+        first = yield self.actor._plan_fingerprint()
+        self.actor._group['group']['updatedAt'] = '2'
+        second = yield self.actor._plan_fingerprint()
+
+        self.assertEquals(len(set([absent, first, second])), 3)
+
+    @testing.gen_test
+    def test_remote_version(self):
+        self.actor._get_group = mock_tornado(None)
+        absent = yield self.actor._remote_version()
+        self.assertEquals(absent, None)
+
+        group = {'group': {'id': 'sig-1', 'updatedAt': '1'}}
+        self.actor._get_group = mock_tornado(group)
+        first = yield self.actor._remote_version()
+        group['group']['updatedAt'] = '2'
+        second = yield self.actor._remote_version()
+
+        # The config that we were given is part of the version too
+        self.actor._config_fingerprint = 'other config'
+        third = yield self.actor._remote_version()
+
+        self.assertEquals(len(set([first, second, third])), 3)
+
     @testing.gen_test
     def test_set_state_present(self):
         fake_ret = {
@@ -54,11 +54,11 @@ def dry(dry_message):
         the method being wrapped.
     """
     # TODO: Bring these back when we have log.trace
-    # log.debug('Creating _skip_on_dry decorator with "%s"' % dry_message)
+    # log.debug('Creating _skip_on_dry decorator with "%s"', dry_message)
 
     def _skip_on_dry(f):
         # TODO: Bring these back when we have log.trace
-        # log.debug('Decorating function "%s" with _skip_on_dry' % f)
+        # log.debug('Decorating function "%s" with _skip_on_dry', f)
 
         def wrapper(self, *args, **kwargs):
             # _Always_ compile the message we'd use in the event of a Dry run.
@@ -101,8 +101,8 @@ def timer(f):
 
         # Log the finished execution time
         exec_time = "%.2f" % (time.time() - start_time)
-        self.log.debug('%s.%s() execution time: %ss' %
-                       (self._type, f.__name__, exec_time))
+        self.log.debug('%s.%s() execution time: %ss',
+                       self._type, f.__name__, exec_time)
 
         raise gen.Return(ret)
     return _wrap_in_timer
@@ -140,11 +140,11 @@ def get_actor(config, dry):
     # contain credentials! This is used purely for this debug message below.
     #
     # Known actors that do this are misc.Macro, group.Sync, group.Async
-    clean_config = config.copy()
-    clean_config['init_tokens'] = '<hidden>'
-
-    log.debug('Building Actor "%s" with args: %s' %
-              (actor_string, clean_config))
+    if log.isEnabledFor(logging.DEBUG):
+        clean_config = config.copy()
+        clean_config['init_tokens'] = '<hidden>'
+        log.debug('Building Actor "%s" with args: %s',
+                  actor_string, clean_config)
     ActorClass = get_actor_class(actor_string)
     return ActorClass(dry=dry, **config)
 
@@ -167,7 +167,7 @@ def get_actor_class(actor):
         try:
             return utils.str_to_class(full_actor)
         except expected_exceptions as e:
-            log.debug('Tried importing "%s" but failed: %s' % (full_actor, e))
+            log.debug('Tried importing "%s" but failed: %s', full_actor, e)
 
     msg = 'Unable to import "%s" as a valid Actor.' % actor
     raise exceptions.InvalidActor(msg)
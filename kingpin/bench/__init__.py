@@ -0,0 +1,11 @@
+"""
+:mod:`kingpin.bench`
+^^^^^^^^^^^^^^^^^^^^
+
+Benchmarks for the hot paths inside of Kingpin itself. These do not talk to
+any remote services. The full suite (see `kingpin.bench.suite`) is run with
+``make bench``, and individual micro-benchmarks can be run directly::
+
+    $ python -m kingpin.bench
+    $ python -m kingpin.bench.restconsumer
+"""
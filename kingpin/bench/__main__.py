@@ -0,0 +1,7 @@
+"""Runs the benchmark suite: ``python -m kingpin.bench``"""
+
+import sys
+
+from kingpin.bench import suite
+
+sys.exit(suite.main())
@@ -0,0 +1,207 @@
+"""
+:mod:`kingpin.bench.fakecloud`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Local, in-memory stand-ins for the remote services that Kingpin talks to:
+the parts of AWS used by the `kingpin.actors.aws` actors (CloudFormation,
+EC2, ECS, ELB, IAM, S3 and SQS), RightScale, Spotinst and Packagecloud.
+
+Each service listens on its own port. Every request can be delayed, failed
+or throttled at a configurable rate, so that a deployment of thousands of
+actors can be timed (and its retry behavior exercised) without a cloud
+account::
+
+    $ python -m kingpin.bench.fakecloud --port 8700 --latency 0.05 \\
+        --throttle-rate 0.02
+    export AWS_ENDPOINT_URL=http://127.0.0.1:8700
+    ...
+    $ eval "$(python -m kingpin.bench.fakecloud --env)"
+    $ kingpin --script big-deploy.json
+
+See `kingpin.bench.loadtest` for a driver that does all of this for you.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from tornado import httpserver
+from tornado import ioloop
+from tornado import netutil
+from tornado import web
+
+from kingpin.bench.fakecloud import aws
+from kingpin.bench.fakecloud import base
+from kingpin.bench.fakecloud import services
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8700
+DEFAULT_ADDRESS = '127.0.0.1'
+
+# Credentials handed to Kingpin. The fake services accept anything.
+CREDENTIAL = 'fakecloud'
+
+
+class StatsHandler(web.RequestHandler):
+
+    """Returns the per-service request counters (never faulted)."""
+
+    def initialize(self, faults):
+        self.faults = faults
+
+    def get(self):
+        self.write(dict(
+            (service, dict(counts))
+            for service, counts in self.faults.stats.items()))
+
+
+class FakeCloud(object):
+
+    """All of the fake services, and their state.
+
+    Args:
+        faults: A `Faults` object shared by every service (optional)
+        packages: Dict of Packagecloud repository name -> list of package
+                  dicts to start out with (optional)
+    """
+
+    SERVICES = ('aws', 'rightscale', 'spotinst', 'packagecloud')
+
+    def __init__(self, faults=None, packages=None):
+        self.faults = faults or base.Faults()
+        self.aws = aws.AWSState()
+        self.rightscale = services.RightScaleState()
+        self.spotinst = {}
+        self.packagecloud = packages or {}
+        self.address = DEFAULT_ADDRESS
+        self.ports = {}
+        self._servers = []
+
+    def application(self, service):
+        """Returns the tornado.web.Application for a single service."""
+        stats = (r'/_fakecloud/stats', StatsHandler, {'faults': self.faults})
+
+        if service == 'aws':
+            routes = [(r'/(.*)', aws.AWSHandler, {'state': self.aws})]
+        elif service == 'rightscale':
+            routes = [(r'/api/(.*)', services.RightScaleHandler,
+                       {'state': self.rightscale})]
+        elif service == 'spotinst':
+            routes = [(r'/aws/ec2/group(?:/([^/]+))?(?:/(status|roll))?.*',
+                       services.SpotinstHandler, {'state': self.spotinst})]
+        elif service == 'packagecloud':
+            repo = r'/api/v1/repos/([^/]+)/([^/]+)'
+            routes = [
+                (repo + r'/packages\.json', services.PackagecloudHandler,
+                 {'state': self.packagecloud}),
+                (repo + r'/([^/]+/[^/]+)/([^/]+)',
+                 services.PackagecloudHandler, {'state': self.packagecloud}),
+            ]
+        else:
+            raise KeyError('Unknown service %s' % service)
+
+        for route in routes:
+            route[2].setdefault('faults', self.faults)
+        return web.Application([stats] + routes)
+
+    def listen(self, port=DEFAULT_PORT, address=DEFAULT_ADDRESS):
+        """Starts every service on the current IOLoop.
+
+        The services listen on consecutive ports, starting at `port`. With a
+        `port` of 0, each service picks a free port of its own.
+        """
+        for offset, service in enumerate(self.SERVICES):
+            sockets = netutil.bind_sockets(
+                port + offset if port else 0, address)
+            server = httpserver.HTTPServer(self.application(service))
+            server.add_sockets(sockets)
+            self._servers.append(server)
+            self.ports[service] = sockets[0].getsockname()[1]
+        self.address = address
+
+    def stop(self):
+        for server in self._servers:
+            server.stop()
+        self._servers = []
+
+    def environment(self):
+        """Returns the environment variables that point Kingpin at us."""
+        urls = dict((service, 'http://%s:%s' % (self.address, port))
+                    for service, port in self.ports.items())
+        return {
+            'AWS_ENDPOINT_URL': urls['aws'],
+            'AWS_ACCESS_KEY_ID': CREDENTIAL,
+            'AWS_SECRET_ACCESS_KEY': CREDENTIAL,
+            'RIGHTSCALE_ENDPOINT': urls['rightscale'],
+            'RIGHTSCALE_TOKEN': CREDENTIAL,
+            'SPOTINST_ENDPOINT': urls['spotinst'] + '/',
+            'SPOTINST_TOKEN': CREDENTIAL,
+            'PACKAGECLOUD_ENDPOINT': urls['packagecloud'] + '/api/v1/',
+            'PACKAGECLOUD_ACCOUNT': CREDENTIAL,
+            'PACKAGECLOUD_TOKEN': CREDENTIAL,
+        }
+
+
+def add_fault_arguments(parser):
+    """Adds the fault injection options to an argparse.ArgumentParser."""
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='Random +/- seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='Fraction of requests that fail (0-1)')
+    parser.add_argument('--throttle-rate', type=float, default=0,
+                        help='Fraction of requests that are throttled (0-1)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed, for repeatable runs')
+
+
+def faults_from_args(args):
+    return base.Faults(latency=args.latency, jitter=args.jitter,
+                       error_rate=args.error_rate,
+                       throttle_rate=args.throttle_rate, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Kingpin fake cloud')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='First of the consecutive ports to listen on '
+                             '(default: %(default)s)')
+    parser.add_argument('--address', default=DEFAULT_ADDRESS,
+                        help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--packages',
+                        help='JSON file of Packagecloud repo -> packages')
+    parser.add_argument('--env', action='store_true',
+                        help='Only print the environment and exit')
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    packages = None
+    if args.packages:
+        with open(args.packages) as f:
+            packages = json.load(f)
+
+    cloud = FakeCloud(faults_from_args(args), packages=packages)
+    if args.env:
+        cloud.address = args.address
+        cloud.ports = dict((service, args.port + offset)
+                           for offset, service in enumerate(cloud.SERVICES))
+    else:
+        cloud.listen(args.port, args.address)
+
+    for key, value in sorted(cloud.environment().items()):
+        print('export %s=%s' % (key, value))
+    sys.stdout.flush()
+
+    if args.env:
+        return 0
+
+    try:
+        ioloop.IOLoop.current().start()
+    except KeyboardInterrupt:
+        print(json.dumps(cloud.faults.stats, indent=2, sort_keys=True))
+    return 0
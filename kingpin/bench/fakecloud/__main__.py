@@ -0,0 +1,5 @@
+import sys
+
+from kingpin.bench import fakecloud
+
+sys.exit(fakecloud.main())
@@ -0,0 +1,1016 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.fakecloud.aws`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+An in-memory stand-in for the parts of the AWS API that Kingpin's actors use.
+
+All of the services share a single endpoint. Requests are routed by their
+protocol: JSON requests (ECS) by their ``X-Amz-Target`` header, Query
+requests (CloudFormation, EC2, ELB, IAM and SQS) by their ``Action``
+parameter, and everything else is treated as a path-style S3 request.
+
+Resources are created instantly -- stacks are ``CREATE_COMPLETE``, ECS
+services have reached their desired count and tasks have already exited
+cleanly. Use the `Faults` latency settings to make them take time.
+"""
+
+import re
+import time
+import urllib
+import uuid
+from xml.sax import saxutils
+
+from botocore import xform_name
+
+from kingpin.bench.fakecloud import base
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+ACCOUNT = '123456789012'
+DEFAULT_REGION = 'us-east-1'
+
+
+class Flat(list):
+
+    """A list that is serialized without a wrapper element.
+
+    SQS (for example) returns its queues as a series of sibling ``QueueUrl``
+    elements, rather than wrapped up in ``member`` elements.
+    """
+
+
+def to_xml(name, value, item='member'):
+    """Serializes a python object into a Query API XML element.
+
+    Args:
+        name: Name of the element
+        value: A dict, list, Flat list, bool, None or a scalar
+        item: Element name used for list items ('member', or 'item' for EC2)
+
+    Returns:
+        A unicode string
+    """
+    if value is None:
+        return u''
+    if isinstance(value, Flat):
+        return u''.join(to_xml(name, v, item) for v in value)
+    if isinstance(value, dict):
+        inner = u''.join(to_xml(k, v, item) for k, v in sorted(value.items()))
+    elif isinstance(value, (list, tuple)):
+        inner = u''.join(to_xml(item, v, item) for v in value)
+    elif isinstance(value, bool):
+        inner = u'true' if value else u'false'
+    else:
+        inner = saxutils.escape(unicode(value))
+    return u'<%s>%s</%s>' % (name, inner, name)
+
+
+def members(params, name):
+    """Decodes a list passed as Query API parameters.
+
+    Lists are passed as ``Name.member.N`` (for a list of strings) or
+    ``Name.member.N.Field`` (for a list of structures) parameters.
+
+    Returns:
+        A list of strings or dicts, in order
+    """
+    prefix = '%s.member.' % name
+    items = {}
+    for key, value in params.items():
+        if not key.startswith(prefix):
+            continue
+        index, _, field = key[len(prefix):].partition('.')
+        if field:
+            items.setdefault(int(index), {})[field] = value
+        else:
+            items[int(index)] = value
+    return [items[i] for i in sorted(items)]
+
+
+def not_found(code, kind, name):
+    return base.FakeError(400, code, '%s %s does not exist' % (kind, name))
+
+
+class Service(object):
+
+    """A single fake AWS service.
+
+    API actions are implemented as methods named after the Boto3 method
+    (ie, `describe_stacks()` for ``DescribeStacks``). Each one takes a dict of
+    request parameters, and returns a dict of response data.
+    """
+
+    # One of 'query', 'ec2', 'json' or 'rest'
+    PROTOCOL = 'query'
+
+    def handles(self, action):
+        return hasattr(self, xform_name(action))
+
+    def call(self, action, params):
+        return getattr(self, xform_name(action))(params)
+
+    @staticmethod
+    def arn(service, resource, region=DEFAULT_REGION):
+        return 'arn:aws:%s:%s:%s:%s' % (service, region, ACCOUNT, resource)
+
+
+class CloudFormation(Service):
+
+    def __init__(self):
+        self.stacks = {}
+        self.deleted = {}
+        self.change_sets = {}
+
+    def _find(self, name):
+        for stack in self.stacks.values():
+            if name in (stack['StackName'], stack['StackId']):
+                return stack
+        if name in self.deleted:
+            return self.deleted[name]
+        raise base.FakeError(
+            400, 'ValidationError', 'Stack with id %s does not exist' % name)
+
+    @staticmethod
+    def _public(item):
+        return dict((k, v) for k, v in item.items() if k != 'TemplateBody')
+
+    @staticmethod
+    def _template(params):
+        if 'TemplateBody' in params:
+            return params['TemplateBody']
+        return '{"TemplateURL": "%s"}' % params.get('TemplateURL', '')
+
+    def describe_stacks(self, params):
+        if 'StackName' in params:
+            stacks = [self._find(params['StackName'])]
+        else:
+            stacks = self.stacks.values()
+        return {'Stacks': [self._public(s) for s in stacks]}
+
+    def create_stack(self, params):
+        name = params['StackName']
+        if name in self.stacks:
+            raise base.FakeError(400, 'AlreadyExistsException',
+                                 'Stack [%s] already exists' % name)
+
+        stack_id = self.arn('cloudformation', 'stack/%s/%s' %
+                            (name, uuid.uuid4()))
+        self.stacks[name] = {
+            'StackName': name,
+            'StackId': stack_id,
+            'StackStatus': 'CREATE_COMPLETE',
+            'CreationTime': base.now(),
+            'Parameters': members(params, 'Parameters'),
+            'Capabilities': members(params, 'Capabilities'),
+            'Tags': members(params, 'Tags'),
+            'Outputs': [],
+            'TemplateBody': self._template(params),
+        }
+        return {'StackId': stack_id}
+
+    def delete_stack(self, params):
+        try:
+            stack = self._find(params['StackName'])
+        except base.FakeError:
+            # Deleting a missing stack is not an error
+            return {}
+
+        if stack['StackStatus'] != 'DELETE_COMPLETE':
+            stack['StackStatus'] = 'DELETE_COMPLETE'
+            stack['DeletionTime'] = base.now()
+            self.deleted[stack['StackId']] = self.stacks.pop(
+                stack['StackName'])
+        return {}
+
+    def describe_stack_events(self, params):
+        stack = self._find(params['StackName'])
+        return {'StackEvents': [{
+            'StackId': stack['StackId'],
+            'StackName': stack['StackName'],
+            'EventId': base.new_id(),
+            'LogicalResourceId': stack['StackName'],
+            'PhysicalResourceId': stack['StackId'],
+            'ResourceType': 'AWS::CloudFormation::Stack',
+            'ResourceStatus': stack['StackStatus'],
+            'Timestamp': base.now(),
+        }]}
+
+    def get_template(self, params):
+        stack = self._find(params['StackName'])
+        return {'TemplateBody': stack['TemplateBody']}
+
+    def validate_template(self, params):
+        return {'Parameters': [], 'Description': 'fakecloud'}
+
+    def create_change_set(self, params):
+        stack = self._find(params['StackName'])
+        change_set_id = self.arn('cloudformation', 'changeSet/%s/%s' % (
+            params['ChangeSetName'], uuid.uuid4()))
+        self.change_sets[change_set_id] = {
+            'ChangeSetId': change_set_id,
+            'ChangeSetName': params['ChangeSetName'],
+            'StackId': stack['StackId'],
+            'StackName': stack['StackName'],
+            'Status': 'CREATE_COMPLETE',
+            'ExecutionStatus': 'AVAILABLE',
+            'CreationTime': base.now(),
+            'Parameters': members(params, 'Parameters'),
+            'Changes': [{
+                'Type': 'Resource',
+                'ResourceChange': {
+                    'Action': 'Modify',
+                    'LogicalResourceId': stack['StackName'],
+                    'ResourceType': 'AWS::CloudFormation::Stack',
+                    'Replacement': 'False',
+                    'Scope': [],
+                }
+            }],
+            'TemplateBody': self._template(params),
+        }
+        return {'Id': change_set_id, 'StackId': stack['StackId']}
+
+    def _change_set(self, params):
+        try:
+            return self.change_sets[params['ChangeSetName']]
+        except KeyError:
+            raise not_found(
+                'ChangeSetNotFound', 'ChangeSet', params['ChangeSetName'])
+
+    def describe_change_set(self, params):
+        return self._public(self._change_set(params))
+
+    def execute_change_set(self, params):
+        change_set = self._change_set(params)
+        stack = self._find(change_set['StackId'])
+        stack.update({
+            'StackStatus': 'UPDATE_COMPLETE',
+            'LastUpdatedTime': base.now(),
+            'Parameters': change_set['Parameters'],
+            'TemplateBody': change_set['TemplateBody'],
+        })
+        change_set['ExecutionStatus'] = 'EXECUTE_COMPLETE'
+        return {}
+
+    def delete_change_set(self, params):
+        self.change_sets.pop(params['ChangeSetName'], None)
+        return {}
+
+
+class EC2(Service):
+
+    PROTOCOL = 'ec2'
+
+    def describe_availability_zones(self, params):
+        region = params['Region']
+        return {'availabilityZoneInfo': [
+            {'zoneName': region + zone,
+             'zoneState': 'available',
+             'regionName': region}
+            for zone in 'abc']}
+
+
+class ELB(Service):
+
+    def __init__(self):
+        self.load_balancers = {}
+
+    def _find(self, name):
+        try:
+            return self.load_balancers[name]
+        except KeyError:
+            raise not_found('LoadBalancerNotFound', 'LoadBalancer', name)
+
+    def create_load_balancer(self, params):
+        name = params['LoadBalancerName']
+        dns_name = '%s-%s.%s.elb.amazonaws.com' % (
+            name, ACCOUNT, params['Region'])
+        self.load_balancers[name] = {
+            'LoadBalancerName': name,
+            'DNSName': dns_name,
+            'CreatedTime': base.now(),
+            'AvailabilityZones': members(params, 'AvailabilityZones'),
+            'ListenerDescriptions': [
+                {'Listener': listener, 'PolicyNames': []}
+                for listener in members(params, 'Listeners')],
+            'Instances': [],
+        }
+        return {'DNSName': dns_name}
+
+    def describe_load_balancers(self, params):
+        names = members(params, 'LoadBalancerNames')
+        if names:
+            elbs = [self._find(name) for name in names]
+        else:
+            elbs = self.load_balancers.values()
+        return {'LoadBalancerDescriptions': elbs}
+
+    def register_instances_with_load_balancer(self, params):
+        elb = self._find(params['LoadBalancerName'])
+        for instance in members(params, 'Instances'):
+            if instance not in elb['Instances']:
+                elb['Instances'].append(instance)
+        return {'Instances': elb['Instances']}
+
+    def deregister_instances_from_load_balancer(self, params):
+        elb = self._find(params['LoadBalancerName'])
+        remove = members(params, 'Instances')
+        elb['Instances'] = [i for i in elb['Instances'] if i not in remove]
+        return {'Instances': elb['Instances']}
+
+    def describe_instance_health(self, params):
+        elb = self._find(params['LoadBalancerName'])
+        return {'InstanceStates': [
+            {'InstanceId': i['InstanceId'],
+             'State': 'InService',
+             'ReasonCode': 'N/A',
+             'Description': 'N/A'}
+            for i in elb['Instances']]}
+
+    def set_load_balancer_listener_ssl_certificate(self, params):
+        elb = self._find(params['LoadBalancerName'])
+        for description in elb['ListenerDescriptions']:
+            listener = description['Listener']
+            if listener.get('LoadBalancerPort') == params['LoadBalancerPort']:
+                listener['SSLCertificateId'] = params['SSLCertificateId']
+        return {}
+
+
+class IAM(Service):
+
+    """Users, groups, roles, instance profiles and server certificates.
+
+    The create/delete/get/list and inline policy actions for each entity type
+    are all the same, so they are handled generically.
+    """
+
+    ENTITIES = ('User', 'Group', 'Role', 'InstanceProfile')
+    ENTITY_ACTION = re.compile(
+        r'^(Create|Delete|Get|List)(User|Group|Role|InstanceProfile)(s?)$')
+    POLICY_ACTION = re.compile(
+        r'^(Put|Get|Delete|List)(User|Group|Role)(Policy|Policies)$')
+
+    def __init__(self):
+        self.entities = dict((kind, {}) for kind in self.ENTITIES)
+        self.policies = dict((kind, {}) for kind in self.ENTITIES)
+        self.members = {}
+        self.certificates = {}
+
+    def handles(self, action):
+        return bool(self.ENTITY_ACTION.match(action) or
+                    self.POLICY_ACTION.match(action) or
+                    super(IAM, self).handles(action))
+
+    def call(self, action, params):
+        match = self.ENTITY_ACTION.match(action)
+        if match:
+            verb, kind, plural = match.groups()
+            if verb == 'List' and plural:
+                return {kind + 's': self.entities[kind].values(),
+                        'IsTruncated': False}
+            if not plural:
+                return getattr(self, '_%s_entity' % verb.lower())(
+                    kind, params['%sName' % kind], params)
+
+        match = self.POLICY_ACTION.match(action)
+        if match:
+            verb, kind, _ = match.groups()
+            name = params['%sName' % kind]
+            self._find(kind, name)
+            policies = self.policies[kind].setdefault(name, {})
+            return self._policy(verb, kind, name, policies, params)
+
+        return super(IAM, self).call(action, params)
+
+    def _find(self, kind, name):
+        try:
+            return self.entities[kind][name]
+        except KeyError:
+            raise base.FakeError(404, 'NoSuchEntity',
+                                 'The %s with name %s cannot be found.' %
+                                 (kind, name))
+
+    def _create_entity(self, kind, name, params):
+        if name in self.entities[kind]:
+            raise base.FakeError(409, 'EntityAlreadyExists',
+                                 '%s with name %s already exists.' %
+                                 (kind, name))
+
+        path = params.get('Path', '/')
+        entity = {
+            '%sName' % kind: name,
+            '%sId' % kind: base.new_id().upper(),
+            'Arn': 'arn:aws:iam::%s:%s%s%s' % (
+                ACCOUNT, xform_name(kind, '-'), path, name),
+            'Path': path,
+            'CreateDate': base.now(),
+        }
+        if kind == 'Role':
+            entity['AssumeRolePolicyDocument'] = urllib.quote(
+                params.get('AssumeRolePolicyDocument', '{}'))
+        if kind == 'InstanceProfile':
+            entity['Roles'] = []
+
+        self.entities[kind][name] = entity
+        return {kind: entity}
+
+    def _delete_entity(self, kind, name, params):
+        self._find(kind, name)
+        del self.entities[kind][name]
+        self.policies[kind].pop(name, None)
+        self.members.pop(name, None)
+        return {}
+
+    def _get_entity(self, kind, name, params):
+        entity = self._find(kind, name)
+        if kind == 'Group':
+            users = [self.entities['User'][user]
+                     for user in sorted(self.members.get(name, ()))
+                     if user in self.entities['User']]
+            return {'Group': entity, 'Users': users, 'IsTruncated': False}
+        return {kind: entity}
+
+    def _policy(self, verb, kind, name, policies, params):
+        if verb == 'List':
+            return {'PolicyNames': sorted(policies), 'IsTruncated': False}
+
+        policy_name = params['PolicyName']
+        if verb == 'Put':
+            policies[policy_name] = params['PolicyDocument']
+            return {}
+
+        if policy_name not in policies:
+            raise base.FakeError(404, 'NoSuchEntity',
+                                 'The policy %s cannot be found.' %
+                                 policy_name)
+        if verb == 'Delete':
+            del policies[policy_name]
+            return {}
+
+        return {'%sName' % kind: name,
+                'PolicyName': policy_name,
+                'PolicyDocument': urllib.quote(policies[policy_name])}
+
+    def add_user_to_group(self, params):
+        self._find('User', params['UserName'])
+        self._find('Group', params['GroupName'])
+        self.members.setdefault(params['GroupName'], set()).add(
+            params['UserName'])
+        return {}
+
+    def remove_user_from_group(self, params):
+        self.members.get(params['GroupName'], set()).discard(
+            params['UserName'])
+        return {}
+
+    def list_groups_for_user(self, params):
+        self._find('User', params['UserName'])
+        groups = [self.entities['Group'][group]
+                  for group, users in sorted(self.members.items())
+                  if params['UserName'] in users]
+        return {'Groups': groups, 'IsTruncated': False}
+
+    def add_role_to_instance_profile(self, params):
+        profile = self._find('InstanceProfile', params['InstanceProfileName'])
+        role = self._find('Role', params['RoleName'])
+        if profile['Roles']:
+            raise base.FakeError(409, 'LimitExceeded',
+                                 'Cannot exceed quota for '
+                                 'InstanceSessionsPerInstanceProfile: 1')
+        profile['Roles'].append(role)
+        return {}
+
+    def remove_role_from_instance_profile(self, params):
+        profile = self._find('InstanceProfile', params['InstanceProfileName'])
+        profile['Roles'] = [r for r in profile['Roles']
+                            if r['RoleName'] != params['RoleName']]
+        return {}
+
+    def update_assume_role_policy(self, params):
+        role = self._find('Role', params['RoleName'])
+        role['AssumeRolePolicyDocument'] = urllib.quote(
+            params['PolicyDocument'])
+        return {}
+
+    def upload_server_certificate(self, params):
+        name = params['ServerCertificateName']
+        if name in self.certificates:
+            raise base.FakeError(409, 'EntityAlreadyExists',
+                                 'Certificate %s already exists.' % name)
+
+        path = params.get('Path', '/')
+        metadata = {
+            'ServerCertificateName': name,
+            'ServerCertificateId': base.new_id().upper(),
+            'Arn': 'arn:aws:iam::%s:server-certificate%s%s' % (
+                ACCOUNT, path, name),
+            'Path': path,
+            'UploadDate': base.now(),
+        }
+        self.certificates[name] = {
+            'ServerCertificateMetadata': metadata,
+            'CertificateBody': params['CertificateBody'],
+            'CertificateChain': params.get('CertificateChain'),
+        }
+        return {'ServerCertificateMetadata': metadata}
+
+    def _certificate(self, name):
+        try:
+            return self.certificates[name]
+        except KeyError:
+            raise base.FakeError(404, 'NoSuchEntity',
+                                 'The Server Certificate with name %s cannot '
+                                 'be found.' % name)
+
+    def get_server_certificate(self, params):
+        return {'ServerCertificate':
+                self._certificate(params['ServerCertificateName'])}
+
+    def delete_server_certificate(self, params):
+        self._certificate(params['ServerCertificateName'])
+        del self.certificates[params['ServerCertificateName']]
+        return {}
+
+    def list_server_certificates(self, params):
+        return {'ServerCertificateMetadataList': [
+            c['ServerCertificateMetadata']
+            for c in self.certificates.values()],
+            'IsTruncated': False}
+
+
+class SQS(Service):
+
+    def __init__(self):
+        self.queues = {}
+
+    def _url(self, params, name):
+        return '%s/%s/%s' % (params['Endpoint'], ACCOUNT, name)
+
+    def _name(self, params):
+        # Boto3 passes the QueueUrl as a parameter, Boto makes its request to
+        # the queue URL itself.
+        url = params.get('QueueUrl', params['Path'])
+        name = url.rstrip('/').split('/')[-1]
+        if name not in self.queues:
+            raise base.FakeError(
+                400, 'AWS.SimpleQueueService.NonExistentQueue',
+                'The specified queue does not exist.')
+        return name
+
+    def create_queue(self, params):
+        name = params['QueueName']
+        self.queues.setdefault(name, {
+            'QueueArn': self.arn('sqs', name, params['Region']),
+            'CreatedTimestamp': str(int(time.time())),
+            'ApproximateNumberOfMessages': '0',
+            'ApproximateNumberOfMessagesNotVisible': '0',
+            'ApproximateNumberOfMessagesDelayed': '0',
+        })
+        return {'QueueUrl': self._url(params, name)}
+
+    def get_queue_url(self, params):
+        params['QueueUrl'] = params['QueueName']
+        return {'QueueUrl': self._url(params, self._name(params))}
+
+    def list_queues(self, params):
+        prefix = params.get('QueueNamePrefix', '')
+        return {'QueueUrl': Flat(self._url(params, name)
+                                 for name in sorted(self.queues)
+                                 if name.startswith(prefix))}
+
+    def delete_queue(self, params):
+        del self.queues[self._name(params)]
+        return None
+
+    def get_queue_attributes(self, params):
+        attributes = self.queues[self._name(params)]
+        return {'Attribute': Flat({'Name': k, 'Value': v}
+                                  for k, v in sorted(attributes.items()))}
+
+
+class ECS(Service):
+
+    PROTOCOL = 'json'
+
+    def __init__(self):
+        self.task_definitions = {}
+        self.services = {}
+        self.tasks = {}
+
+    def _task_definition(self, ref):
+        # Task definitions are referred to by family, family:revision or ARN
+        family, _, revision = ref.split('/')[-1].partition(':')
+        revisions = self.task_definitions.get(family, [])
+        if revision:
+            revisions = revisions[int(revision) - 1:int(revision)]
+        else:
+            revisions = [r for r in revisions if r['status'] == 'ACTIVE']
+
+        if not revisions:
+            raise base.FakeError(400, 'ClientException',
+                                 'Unable to describe task definition.')
+        return revisions[-1]
+
+    def register_task_definition(self, params):
+        family = params['family']
+        revisions = self.task_definitions.setdefault(family, [])
+        revision = len(revisions) + 1
+        task_definition = dict(
+            params,
+            revision=revision,
+            status='ACTIVE',
+            taskDefinitionArn=self.arn(
+                'ecs', 'task-definition/%s:%s' % (family, revision)))
+        revisions.append(task_definition)
+        return {'taskDefinition': task_definition}
+
+    def describe_task_definition(self, params):
+        return {'taskDefinition':
+                self._task_definition(params['taskDefinition'])}
+
+    def deregister_task_definition(self, params):
+        task_definition = self._task_definition(params['taskDefinition'])
+        task_definition['status'] = 'INACTIVE'
+        return {'taskDefinition': task_definition}
+
+    def list_task_definitions(self, params):
+        prefix = params.get('familyPrefix', '')
+        status = params.get('status', 'ACTIVE')
+        arns = [td['taskDefinitionArn']
+                for family, revisions in sorted(self.task_definitions.items())
+                if family.startswith(prefix)
+                for td in revisions if td['status'] == status]
+        if params.get('sort') == 'DESC':
+            arns.reverse()
+        return {'taskDefinitionArns': arns}
+
+    def _service(self, params, name_key='service'):
+        cluster = params.get('cluster', 'default')
+        name = params[name_key].split('/')[-1]
+        return self.services.get((cluster, name))
+
+    def _deploy(self, service):
+        stamp = time.time()
+        service['deployments'] = [{
+            'id': 'ecs-svc/%s' % base.new_id(),
+            'status': 'PRIMARY',
+            'taskDefinition': service['taskDefinition'],
+            'desiredCount': service['desiredCount'],
+            'runningCount': service['desiredCount'],
+            'pendingCount': 0,
+            'createdAt': stamp,
+            'updatedAt': stamp,
+        }]
+        service['runningCount'] = service['desiredCount']
+        service['events'].insert(0, {
+            'id': str(uuid.uuid4()),
+            'createdAt': stamp,
+            'message': '(service %s) has reached a steady state.' %
+                       service['serviceName'],
+        })
+
+    def create_service(self, params):
+        existing = self._service(params, 'serviceName')
+        if existing and existing['status'] == 'ACTIVE':
+            raise base.FakeError(400, 'InvalidParameterException',
+                                 'Creation of service was not idempotent.')
+
+        cluster = params.get('cluster', 'default')
+        name = params['serviceName']
+        task_definition = self._task_definition(params['taskDefinition'])
+        service = {
+            'serviceName': name,
+            'serviceArn': self.arn('ecs', 'service/%s' % name),
+            'clusterArn': self.arn('ecs', 'cluster/%s' % cluster),
+            'status': 'ACTIVE',
+            'taskDefinition': task_definition['taskDefinitionArn'],
+            'desiredCount': params.get('desiredCount', 0),
+            'pendingCount': 0,
+            'loadBalancers': params.get('loadBalancers', []),
+            'deploymentConfiguration': params.get(
+                'deploymentConfiguration', {}),
+            'createdAt': time.time(),
+            'events': [],
+        }
+        if 'role' in params:
+            service['roleArn'] = params['role']
+        self._deploy(service)
+
+        self.services[(cluster, name)] = service
+        return {'service': service}
+
+    def _active_service(self, params):
+        service = self._service(params)
+        if not service:
+            raise base.FakeError(400, 'ServiceNotFoundException',
+                                 'Service not found.')
+        if service['status'] != 'ACTIVE':
+            raise base.FakeError(400, 'ServiceNotActiveException',
+                                 'Service was not ACTIVE.')
+        return service
+
+    def update_service(self, params):
+        service = self._active_service(params)
+        if 'taskDefinition' in params:
+            service['taskDefinition'] = self._task_definition(
+                params['taskDefinition'])['taskDefinitionArn']
+        if 'desiredCount' in params:
+            service['desiredCount'] = params['desiredCount']
+        if 'deploymentConfiguration' in params:
+            service['deploymentConfiguration'] = (
+                params['deploymentConfiguration'])
+        self._deploy(service)
+        return {'service': service}
+
+    def delete_service(self, params):
+        service = self._active_service(params)
+        service['status'] = 'INACTIVE'
+        return {'service': service}
+
+    def describe_services(self, params):
+        services, failures = [], []
+        for name in params.get('services', []):
+            service = self._service(dict(params, service=name))
+            if service:
+                services.append(service)
+            else:
+                failures.append({
+                    'arn': self.arn('ecs', 'service/%s' % name),
+                    'reason': 'MISSING'})
+        return {'services': services, 'failures': failures}
+
+    def run_task(self, params):
+        cluster = params.get('cluster', 'default')
+        task_definition = self._task_definition(params['taskDefinition'])
+        stamp = time.time()
+
+        tasks = []
+        for _ in xrange(params.get('count', 1)):
+            arn = self.arn('ecs', 'task/%s' % uuid.uuid4())
+            tasks.append({
+                'taskArn': arn,
+                'clusterArn': self.arn('ecs', 'cluster/%s' % cluster),
+                'taskDefinitionArn': task_definition['taskDefinitionArn'],
+                'overrides': params.get('overrides', {}),
+                'lastStatus': 'STOPPED',
+                'desiredStatus': 'STOPPED',
+                'createdAt': stamp,
+                'stoppedAt': stamp,
+                'containers': [
+                    {'containerArn': self.arn('ecs', 'container/%s' %
+                                              uuid.uuid4()),
+                     'taskArn': arn,
+                     'name': container.get('name', 'container'),
+                     'lastStatus': 'STOPPED',
+                     'exitCode': 0}
+                    for container in task_definition.get(
+                        'containerDefinitions', [{}])],
+            })
+        self.tasks.update((task['taskArn'], task) for task in tasks)
+        return {'tasks': tasks, 'failures': []}
+
+    def describe_tasks(self, params):
+        tasks, failures = [], []
+        for arn in params.get('tasks', []):
+            if arn in self.tasks:
+                tasks.append(self.tasks[arn])
+            else:
+                failures.append({'arn': arn, 'reason': 'MISSING'})
+        return {'tasks': tasks, 'failures': failures}
+
+    def list_tasks(self, params):
+        return {'taskArns': sorted(self.tasks)}
+
+
+class S3(Service):
+
+    """Path-style bucket operations.
+
+    Bucket configurations (policy, versioning, tagging, lifecycle and
+    logging) are stored exactly as they were PUT, and handed back verbatim --
+    the request and response documents share the same format.
+    """
+
+    PROTOCOL = 'rest'
+
+    # Subresource -> error code when it has never been set (or None if an
+    # empty document is returned instead)
+    SUBRESOURCES = {
+        'policy': 'NoSuchBucketPolicy',
+        'lifecycle': 'NoSuchLifecycleConfiguration',
+        'tagging': 'NoSuchTagSet',
+        'versioning': None,
+        'logging': None,
+    }
+    EMPTY = {
+        'versioning': '<VersioningConfiguration/>',
+        'logging': '<BucketLoggingStatus/>',
+    }
+
+    def __init__(self):
+        self.buckets = {}
+
+    def _bucket(self, name):
+        try:
+            return self.buckets[name]
+        except KeyError:
+            raise base.FakeError(404, 'NoSuchBucket',
+                                 'The specified bucket does not exist')
+
+    def handle(self, method, path, arguments, body):
+        """Handles a single S3 REST request.
+
+        Args:
+            method: HTTP method
+            path: Request path (without the leading slash)
+            arguments: Dict of query string arguments
+            body: Request body
+
+        Returns:
+            A (status, response body) tuple
+        """
+        bucket = path.split('/')[0]
+        if not bucket:
+            return 200, self.list_buckets()
+
+        subresource = [s for s in self.SUBRESOURCES if s in arguments]
+        if subresource:
+            return self._subresource(method, bucket, subresource[0], body)
+
+        if method == 'PUT':
+            if bucket in self.buckets:
+                raise base.FakeError(409, 'BucketAlreadyOwnedByYou',
+                                     'Your previous request to create the '
+                                     'named bucket succeeded.')
+            self.buckets[bucket] = {'CreationDate': base.now()}
+            return 200, ''
+
+        self._bucket(bucket)
+        if method == 'DELETE':
+            del self.buckets[bucket]
+            return 204, ''
+
+        return 200, ('<ListBucketResult><Name>%s</Name><Prefix></Prefix>'
+                     '<IsTruncated>false</IsTruncated></ListBucketResult>' %
+                     saxutils.escape(bucket))
+
+    def _subresource(self, method, bucket, subresource, body):
+        config = self._bucket(bucket)
+        if method == 'PUT':
+            config[subresource] = body
+            return 200, ''
+        if method == 'DELETE':
+            config.pop(subresource, None)
+            return 204, ''
+
+        if subresource in config:
+            return 200, config[subresource]
+        if self.SUBRESOURCES[subresource]:
+            raise base.FakeError(404, self.SUBRESOURCES[subresource],
+                                 'The %s configuration does not exist' %
+                                 subresource)
+        return 200, self.EMPTY[subresource]
+
+    def list_buckets(self):
+        buckets = [{'Name': name, 'CreationDate': b['CreationDate']}
+                   for name, b in sorted(self.buckets.items())]
+        return ('<ListAllMyBucketsResult><Owner><ID>%s</ID></Owner>%s'
+                '</ListAllMyBucketsResult>' %
+                (ACCOUNT, to_xml('Buckets', buckets, item='Bucket')))
+
+
+class AWSState(object):
+
+    """The state of every fake AWS service."""
+
+    def __init__(self):
+        self.cloudformation = CloudFormation()
+        self.ec2 = EC2()
+        self.ecs = ECS()
+        self.elb = ELB()
+        self.iam = IAM()
+        self.s3 = S3()
+        self.sqs = SQS()
+        self.services = (self.cloudformation, self.ec2, self.ecs, self.elb,
+                         self.iam, self.sqs)
+
+    def find(self, action, protocols):
+        """Returns the service that implements an action.
+
+        Raises:
+            FakeError: If no service does
+        """
+        for service in self.services:
+            if service.PROTOCOL in protocols and service.handles(action):
+                return service
+        raise base.FakeError(400, 'InvalidAction',
+                             'Unsupported action %s' % action)
+
+
+class AWSHandler(base.FakeHandler):
+
+    """Routes every AWS request to the right fake service."""
+
+    SERVICE = 'aws'
+    THROTTLE_STATUS = 400
+    THROTTLE_CODE = 'Throttling'
+
+    # Boto guesses at the region in the credential scope for hosts that it
+    # doesn't recognize, so only trust things that look like a real region.
+    SCOPE = re.compile(r'Credential=[^/]+/\d+/([a-z]{2}(?:-[a-z]+)+-\d)/')
+
+    def _protocol(self):
+        if 'X-Amz-Target' in self.request.headers:
+            return 'json'
+        if 'Action' in self.request.arguments:
+            return 'query'
+        return 'rest'
+
+    def _region(self):
+        # The region is only given to us in the signature's credential scope
+        auth = self.request.headers.get('Authorization', '')
+        scope = self.SCOPE.search(auth)
+        return scope.group(1) if scope else DEFAULT_REGION
+
+    def _request_id(self):
+        return str(uuid.uuid4())
+
+    def get(self, path):
+        try:
+            getattr(self, '_%s' % self._protocol())(path)
+        except base.FakeError as e:
+            self.write_error_response(e)
+
+    post = put = delete = get
+
+    def _json(self, path):
+        action = self.request.headers['X-Amz-Target'].split('.')[-1]
+        service = self.state.find(action, ('json',))
+        self.write_json(service.call(action, self.json_body()),
+                        content_type='application/x-amz-json-1.1')
+
+    def _query(self, path):
+        params = dict((key, self.get_argument(key))
+                      for key in self.request.arguments)
+        action = params.pop('Action')
+        params.update({
+            'Path': '/' + path,
+            'Region': self._region(),
+            'Endpoint': '%s://%s' % (self.request.protocol, self.request.host),
+        })
+
+        service = self.state.find(action, ('query', 'ec2'))
+        result = service.call(action, params)
+
+        if service.PROTOCOL == 'ec2':
+            result['requestId'] = self._request_id()
+            body = to_xml('%sResponse' % action, result, item='item')
+        else:
+            body = to_xml('%sResponse' % action, {
+                '%sResult' % action: result,
+                'ResponseMetadata': {'RequestId': self._request_id()}})
+        self.respond(body.encode('utf-8'), content_type='text/xml')
+
+    def _rest(self, path):
+        status, body = self.state.s3.handle(
+            self.request.method, path, self.request.arguments,
+            self.request.body)
+        self.respond(body, status, content_type='application/xml')
+
+    def write_error_response(self, error):
+        protocol = self._protocol()
+        throttled = error.code == self.THROTTLE_CODE
+
+        if protocol == 'json':
+            code = 'ThrottlingException' if throttled else error.code
+            self.write_json({'__type': code, 'message': error.message},
+                            status=error.status,
+                            content_type='application/x-amz-json-1.1')
+            return
+
+        status = error.status
+        if protocol == 'query':
+            body = to_xml('ErrorResponse', {
+                'Error': {'Type': 'Sender', 'Code': error.code,
+                          'Message': error.message},
+                'RequestId': self._request_id()})
+        else:
+            if throttled:
+                status, error.code = 503, 'SlowDown'
+            body = to_xml('Error', {'Code': error.code,
+                                    'Message': error.message,
+                                    'RequestId': self._request_id()})
+        self.respond(body.encode('utf-8'), status, content_type='text/xml')
@@ -0,0 +1,195 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.fakecloud.base`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Latency, error and throttle injection shared by all of the fake services.
+"""
+
+import collections
+import datetime
+import json
+import logging
+import random
+import uuid
+
+from tornado import gen
+from tornado import httputil
+from tornado import web
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+log = logging.getLogger(__name__)
+
+# Python 2's httplib doesn't know about every status code we return.
+REASONS = {429: 'Too Many Requests'}
+
+
+def now():
+    """Returns the current time as an ISO8601 string."""
+    return datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def new_id():
+    """Returns a random resource ID."""
+    return uuid.uuid4().hex[:16]
+
+
+class FakeError(Exception):
+
+    """Raised by a fake service to return an API error to the caller.
+
+    Args:
+        status: HTTP status code
+        code: Service-specific error code (ie, 'ValidationError')
+        message: Human readable description
+    """
+
+    def __init__(self, status, code, message=''):
+        super(FakeError, self).__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class Faults(object):
+
+    """Describes the misbehavior injected into every request.
+
+    Args:
+        latency: Mean number of seconds added to every request
+        jitter: Maximum number of seconds randomly added to or removed from
+                the latency
+        error_rate: Fraction (0-1) of requests that fail with a server error
+        throttle_rate: Fraction (0-1) of requests that are throttled
+        seed: Seed for the random number generator (optional)
+    """
+
+    def __init__(self, latency=0, jitter=0, error_rate=0, throttle_rate=0,
+                 seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+
+        # Per-service counters of requests, injected errors and throttles
+        self.stats = collections.defaultdict(collections.Counter)
+
+    def delay(self):
+        """Returns the number of seconds to hold the next request for."""
+        jitter = self._random.uniform(-self.jitter, self.jitter)
+        return max(0, self.latency + jitter)
+
+    def pick(self, service):
+        """Decides the fate of the next request to a service.
+
+        Returns:
+            None, 'error' or 'throttle'
+        """
+        self.stats[service]['requests'] += 1
+
+        roll = self._random.random()
+        if roll < self.error_rate:
+            fault = 'error'
+        elif roll < self.error_rate + self.throttle_rate:
+            fault = 'throttle'
+        else:
+            return None
+
+        self.stats[service][fault] += 1
+        return fault
+
+
+class FakeHandler(web.RequestHandler):
+
+    """Base request handler for the fake services.
+
+    Every request is delayed, and may then be failed or throttled, according
+    to the shared `Faults` object before it ever reaches the handler method.
+
+    Subclasses implement `write_error_response()` in their service's own error
+    format.
+    """
+
+    # Name of the service, used for the request statistics
+    SERVICE = None
+
+    # HTTP status code used for throttled requests
+    THROTTLE_STATUS = 429
+    THROTTLE_CODE = 'TooManyRequests'
+
+    def initialize(self, faults, state):
+        self.faults = faults
+        self.state = state
+
+    @gen.coroutine
+    def prepare(self):
+        delay = self.faults.delay()
+        if delay:
+            yield gen.sleep(delay)
+
+        fault = self.faults.pick(self.SERVICE)
+        if fault == 'error':
+            self.write_error_response(
+                FakeError(500, 'InternalError', 'Injected server error'))
+        elif fault == 'throttle':
+            self.write_error_response(
+                FakeError(self.THROTTLE_STATUS, self.THROTTLE_CODE,
+                          'Injected throttle'))
+
+    def write_error_response(self, error):
+        self.write_json(
+            {'error': {'code': error.code, 'message': error.message}},
+            status=error.status)
+
+    def respond(self, body, status=200, content_type='application/json'):
+        reason = REASONS.get(status) or httputil.responses.get(status, 'Error')
+        self.set_status(status, reason=reason)
+        self.set_header('Content-Type', content_type)
+        self.finish(body or None)
+
+    def write_json(self, data, status=200, content_type='application/json'):
+        self.respond(json.dumps(data), status, content_type)
+
+    def json_body(self):
+        """Returns the decoded JSON request body (or an empty dict)."""
+        if not self.request.body:
+            return {}
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise FakeError(400, 'BadRequest', 'Request body is not JSON')
+
+    def log_exception(self, typ, value, tb):
+        # FakeErrors are expected, and are rendered by the subclass.
+        if not isinstance(value, FakeError):
+            super(FakeHandler, self).log_exception(typ, value, tb)
+
+    def write_error(self, status_code, **kwargs):
+        error = kwargs.get('exc_info', (None, None))[1]
+        if not isinstance(error, FakeError):
+            error = FakeError(status_code, 'InternalError', self._reason)
+        self.write_error_response(error)
+
+    def send_error(self, status_code=500, **kwargs):
+        # web.RequestHandler.send_error() only takes the status code from
+        # HTTPErrors. Use the one our FakeError asked for instead.
+        error = kwargs.get('exc_info', (None, None))[1]
+        if isinstance(error, FakeError):
+            status_code = error.status
+            kwargs['reason'] = error.code
+        super(FakeHandler, self).send_error(status_code, **kwargs)
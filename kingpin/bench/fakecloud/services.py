@@ -0,0 +1,341 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.fakecloud.services`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+In-memory stand-ins for the RightScale, Spotinst and Packagecloud APIs.
+"""
+
+import copy
+import re
+
+from kingpin.bench.fakecloud import base
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class RightScaleState(object):
+
+    """A generic store of RightScale API 1.5 resources.
+
+    Rather than modelling every RightScale resource, every path is treated as
+    a collection of resources. Creating a resource (or calling an action on
+    one, like ``launch`` or ``run_executable``) stores a new resource in that
+    collection, and returns its location. Every resource is immediately
+    ``operational``, and every task is immediately ``completed``.
+    """
+
+    # Links handed out with every resource, so that the python-rightscale
+    # client can walk from one resource to its children.
+    LINKS = ('current_instances', 'next_instance', 'inputs', 'alert_specs',
+             'live', 'tasks', 'detail')
+
+    # Collections linked to from /api/sessions
+    COLLECTIONS = ('alert_specs', 'audit_entries', 'clouds', 'cookbooks',
+                   'deployments', 'instances', 'multi_cloud_images',
+                   'right_scripts', 'server_arrays', 'server_templates',
+                   'servers', 'tags')
+
+    def __init__(self):
+        self.resources = {}
+        self._next_id = 1
+
+    def links(self, path):
+        return ([{'rel': 'self', 'href': path}] +
+                [{'rel': name, 'href': '%s/%s' % (path, name)}
+                 for name in self.LINKS])
+
+    def session(self):
+        return {'links': [{'rel': name, 'href': '/api/%s' % name}
+                          for name in self.COLLECTIONS]}
+
+    def index(self, collection, filters=()):
+        """Returns the resources in a collection that match all filters.
+
+        Args:
+            collection: Path of the collection (ie, /api/server_arrays)
+            filters: List of RightScale filters (ie, 'name==foo')
+        """
+        found = [r for path, r in sorted(self.resources.items())
+                 if path.rsplit('/', 1)[0] == collection]
+
+        for f in filters:
+            field, op, value = re.split(r'(==|<>|=~)', f, 1)
+            if op == '==':
+                found = [r for r in found if r.get(field) == value]
+            elif op == '<>':
+                found = [r for r in found if r.get(field) != value]
+            else:
+                found = [r for r in found if value in r.get(field, '')]
+        return found
+
+    def create(self, collection, fields):
+        """Stores a new resource in a collection.
+
+        Returns:
+            The new resource
+        """
+        path = '%s/%s' % (collection, self._next_id)
+        self._next_id += 1
+
+        resource = {'id': path.rsplit('/', 1)[1],
+                    'state': 'operational',
+                    'summary': 'completed: fakecloud',
+                    'links': self.links(path)}
+        resource.update(fields)
+        self.resources[path] = resource
+        return resource
+
+    def singleton(self, path):
+        """Returns the resource at a path, creating it if necessary.
+
+        Used for resources (like a server array's ``next_instance``) that
+        always exist, and are not part of a collection.
+        """
+        if path not in self.resources:
+            self.resources[path] = {'links': self.links(path)}
+        return self.resources[path]
+
+    def show(self, path):
+        try:
+            return self.resources[path]
+        except KeyError:
+            raise base.FakeError(404, 'ResourceNotFound',
+                                 'No resource at %s' % path)
+
+    def update(self, path, fields):
+        resource = self.show(path)
+        resource.update(fields)
+        return resource
+
+    def destroy(self, path):
+        self.show(path)
+        for child in [p for p in self.resources
+                      if p == path or p.startswith(path + '/')]:
+            del self.resources[child]
+
+
+def parse_fields(arguments):
+    """Decodes RightScale style ``resource[key][subkey]=value`` arguments.
+
+    The outer resource name is dropped, since every request only ever
+    describes a single resource.
+
+    Returns:
+        A (fields dict, filters list) tuple
+    """
+    fields = {}
+    filters = []
+    for key, values in arguments.items():
+        if key == 'filter[]':
+            filters.extend(values)
+            continue
+
+        parts = re.findall(r'\[([^\]]*)\]', key) or [key]
+        target = fields
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = values[-1]
+    return fields, filters
+
+
+class RightScaleHandler(base.FakeHandler):
+
+    SERVICE = 'rightscale'
+
+    # Actions that are called on a resource (or collection) rather than
+    # reading or creating one. Most of them return a (completed) task.
+    ACTIONS = re.compile(r'/(launch|terminate|multi_terminate|clone|'
+                         r'run_executable|multi_run_executable|commit|'
+                         r'multi_add|multi_delete|multi_update)$')
+
+    def _arguments(self):
+        return parse_fields(dict(
+            (k, [v.decode('utf-8') for v in values])
+            for k, values in self.request.arguments.items()))
+
+    def _content_type(self, path, collection=False):
+        kind = path.strip('/').split('/')[-1 if collection else -2]
+        content_type = 'application/vnd.rightscale.%s+json' % kind.rstrip('s')
+        if collection:
+            content_type += ';type=collection'
+        return content_type
+
+    def get(self, path):
+        path = '/api/' + path
+        if path == '/api/sessions':
+            self.write_json(self.state.session(),
+                            content_type='application/vnd.rightscale.session'
+                                         '+json')
+            return
+
+        if path.endswith('/next_instance'):
+            self.write_json(self.state.singleton(path),
+                            content_type='application/vnd.rightscale.instance'
+                                         '+json')
+            return
+
+        if path in self.state.resources or path.split('/')[-1].isdigit():
+            self.write_json(self.state.show(path),
+                            content_type=self._content_type(path))
+            return
+
+        _, filters = self._arguments()
+        self.write_json(self.state.index(path, filters),
+                        content_type=self._content_type(path, True))
+
+    def post(self, path):
+        if path == 'oauth2':
+            self.write_json({'access_token': base.new_id(),
+                             'expires_in': 7200,
+                             'token_type': 'bearer'})
+            return
+
+        path = '/api/' + path
+        fields, _ = self._arguments()
+        action = self.ACTIONS.search(path)
+        if not action:
+            self._created(self.state.create(path, fields))
+            return
+
+        name = action.group(1)
+        parent = path[:action.start()]
+        if name == 'launch':
+            # Launching an array adds an instance to it
+            self._created(
+                self.state.create(parent + '/current_instances', fields))
+        elif name == 'clone':
+            fields = dict(copy.deepcopy(self.state.show(parent)), **fields)
+            fields.pop('links')
+            self._created(
+                self.state.create(parent.rsplit('/', 1)[0], fields))
+        else:
+            fields['name'] = name
+            self._created(self.state.create(parent + '/tasks', fields), 202)
+
+    def _created(self, resource, status=201):
+        self.set_header('Location', resource['links'][0]['href'])
+        self.respond('', status)
+
+    def put(self, path):
+        path = '/api/' + path
+        fields, _ = self._arguments()
+        if not self.ACTIONS.search(path):
+            self.state.update(path, fields)
+        self.respond('', 204)
+
+    def delete(self, path):
+        self.state.destroy('/api/' + path)
+        self.respond('', 204)
+
+
+class SpotinstHandler(base.FakeHandler):
+
+    """ElastiGroups, as managed by `kingpin.actors.spotinst`."""
+
+    SERVICE = 'spotinst'
+
+    def _respond(self, items, status=200):
+        self.write_json({
+            'request': {'id': base.new_id(),
+                        'url': self.request.path,
+                        'method': self.request.method},
+            'response': {'status': {'code': status}, 'items': items}},
+            status=status)
+
+    def write_error_response(self, error):
+        request = {'id': base.new_id(),
+                   'url': self.request.path,
+                   'method': self.request.method}
+        response = {'status': {'code': error.status},
+                    'errors': [{'code': error.code,
+                                'message': error.message}]}
+        self.write_json({'request': request, 'response': response},
+                        status=error.status)
+
+    def _group(self, group_id):
+        try:
+            return self.state[group_id]
+        except KeyError:
+            raise base.FakeError(400, 'GROUP_DOESNT_EXIST',
+                                 'Group %s does not exist' % group_id)
+
+    def get(self, group_id=None, action=None):
+        if group_id is None:
+            self._respond(self.state.values())
+        elif action == 'status':
+            self._group(group_id)
+            self._respond([])
+        elif action == 'roll':
+            # Every deployment finishes instantly
+            self._group(group_id)
+            self._respond([{'id': 'sbgd-%s' % base.new_id(),
+                            'status': 'finished'}])
+        else:
+            self._respond([self._group(group_id)])
+
+    def post(self, group_id=None, action=None):
+        group = self.json_body().get('group', {})
+        if group_id == 'validation':
+            self._respond([])
+            return
+
+        group = copy.deepcopy(group)
+        group['id'] = 'sig-%s' % base.new_id()[:8]
+        group['createdAt'] = group['updatedAt'] = base.now()
+        self.state[group['id']] = group
+        self._respond([group])
+
+    def put(self, group_id, action=None):
+        group = self._group(group_id)
+        if action == 'roll':
+            self._respond([{'id': 'sbgd-%s' % base.new_id(),
+                            'status': 'in_progress'}])
+            return
+
+        group.update(self.json_body().get('group', {}))
+        group['updatedAt'] = base.now()
+        self._respond([group])
+
+    def delete(self, group_id, action=None):
+        self._group(group_id)
+        del self.state[group_id]
+        self._respond([])
+
+
+class PackagecloudHandler(base.FakeHandler):
+
+    """Package listing and deletion, as used by `kingpin.actors.packagecloud`.
+
+    The repositories start out empty. Seed them by passing a dict of
+    repository name -> list of package dicts as the service state.
+    """
+
+    SERVICE = 'packagecloud'
+
+    def get(self, account, repo):
+        self.write_json(self.state.get(repo, []))
+
+    def delete(self, account, repo, distro_version, filename):
+        packages = self.state.get(repo, [])
+        remaining = [p for p in packages
+                     if not (p['distro_version'] == distro_version and
+                             p['package_html_url'].endswith('/' + filename))]
+        if len(remaining) == len(packages):
+            raise base.FakeError(404, 'NotFound',
+                                 'Package %s not found' % filename)
+        self.state[repo] = remaining
+        self.write_json({})
@@ -0,0 +1,146 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.loadtest`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Times a complete deployment against `kingpin.bench.fakecloud`.
+
+The fake cloud is started in a child process, and Kingpin is run in another
+one -- exactly the way a user would run it -- with its environment pointed at
+the fake cloud. By default the deployed script is a `scripts.cloud()` script
+of ``--actors`` AWS actors::
+
+    $ python -m kingpin.bench.loadtest --actors 1000 --latency 0.05 \\
+        --throttle-rate 0.02
+    $ python -m kingpin.bench.loadtest --script my-deploy.json --dry
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib2
+
+from tornado import ioloop
+
+from kingpin.bench import fakecloud
+from kingpin.bench import scripts
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+TEMPLATE = {
+    'AWSTemplateFormatVersion': '2010-09-09',
+    'Resources': {
+        'Queue': {'Type': 'AWS::SQS::Queue'},
+    },
+}
+
+
+def _serve(faults, queue):
+    logging.getLogger().handlers = [logging.NullHandler()]
+    cloud = fakecloud.FakeCloud(faults)
+    cloud.listen(port=0)
+    queue.put(cloud.environment())
+    ioloop.IOLoop.current().start()
+
+
+def run(script, faults, dry=False, level='error'):
+    """Deploys a script against a freshly started fake cloud.
+
+    Args:
+        script: Path to the Kingpin script
+        faults: A `kingpin.bench.fakecloud.base.Faults` object
+        dry: Run Kingpin with --dry
+        level: Kingpin log level
+
+    Returns:
+        A dict with the Kingpin exit code, the wall time in seconds and the
+        per-service request counts of the fake cloud.
+    """
+    queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(faults, queue))
+    server.start()
+    try:
+        env = queue.get(timeout=30)
+        command = [sys.executable, '-m', 'kingpin.bin.deploy',
+                   '--script', script, '--level', level]
+        if dry:
+            command.append('--dry')
+
+        began = time.time()
+        code = subprocess.call(command, env=dict(os.environ, **env))
+        took = time.time() - began
+
+        stats = json.load(urllib2.urlopen(
+            env['AWS_ENDPOINT_URL'] + '/_fakecloud/stats'))
+    finally:
+        server.terminate()
+        server.join()
+
+    return {'exit_code': code, 'seconds': round(took, 3), 'stats': stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time a Kingpin deployment against the fake cloud')
+    parser.add_argument('--actors', type=int, default=1000,
+                        help='Number of actors in the generated script '
+                             '(default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='group.Async concurrency of the generated script')
+    parser.add_argument('--script',
+                        help='Deploy this script instead of a generated one')
+    parser.add_argument('--dry', action='store_true',
+                        help='Only do a dry run')
+    parser.add_argument('--level', default='error',
+                        help='Kingpin log level (default: %(default)s)')
+    fakecloud.add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix='kingpin-loadtest-')
+    try:
+        script = args.script
+        if not script:
+            template = scripts.write(
+                TEMPLATE, os.path.join(tmpdir, 'template.json'))
+            script = scripts.write(
+                scripts.cloud(args.actors, template, args.concurrency),
+                os.path.join(tmpdir, 'script.json'))
+
+        results = run(script, fakecloud.faults_from_args(args),
+                      dry=args.dry, level=args.level)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    print('Deployed %s in %.3fs (exit code %s)' % (
+        script if args.script else '%s actors' % args.actors,
+        results['seconds'], results['exit_code']))
+    for service, counts in sorted(results['stats'].items()):
+        print('  %-14s %6d requests %6d errors %6d throttles' % (
+            service, counts.get('requests', 0), counts.get('error', 0),
+            counts.get('throttle', 0)))
+
+    return results['exit_code']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.restconsumer`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Measures the cost of walking a `RestConsumer` attribute chain, like
+`self._client.aws.ec2.roll(id=...)` in the Spotinst actors.
+
+The `warm` numbers are the steady-state cost of a walk. The `cold` numbers
+clear the generated class cache before every walk, and show the one-time cost
+paid the first time each API config is used.
+"""
+
+import timeit
+
+from kingpin.actors.support import api
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class BenchAPI(api.RestConsumer):
+
+    _CONFIG = {
+        'attrs': {
+            'aws': {
+                'path': '/aws',
+                'attrs': {
+                    'ec2': {
+                        'path': '/aws/ec2',
+                        'attrs': {
+                            'roll': {
+                                'path': '/aws/ec2/group/%id%/roll',
+                                'http_methods': {'get': {}, 'put': {}},
+                            },
+                            'list_groups': {
+                                'path': '/aws/ec2/group',
+                                'http_methods': {'get': {}, 'post': {}},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    }
+    _ENDPOINT = 'http://benchmark'
+
+
+def walk(root):
+    return root.aws().ec2().roll(id='sig-1234')
+
+
+def cold(root):
+    api._GENERATED_CLASSES.clear()
+    return walk(root)
+
+
+def run(number=20000):
+    """Times both walks, and returns the microseconds-per-walk of each.
+
+    Args:
+        number: Number of attribute chains to walk for each measurement
+
+    Returns:
+        A dict like {'cold': 830.2, 'warm': 13.2}
+    """
+    root = BenchAPI(client=api.RestClient(client=object()))
+    results = {}
+    for name, func in (('cold', cold), ('warm', walk)):
+        seconds = timeit.timeit(lambda: func(root), number=number)
+        results[name] = seconds / number * 1e6
+    return results
+
+
+def main():
+    results = run()
+    for name in ('cold', 'warm'):
+        print('%-5s %8.2f us per attribute chain' % (name, results[name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.scripts`
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Generators for synthetic Kingpin scripts of an arbitrary size. Every script
+only uses actors that never talk to a remote service (`misc.Note`,
+`misc.Sleep`, and a dry `misc.GenericHTTP`) -- except for `cloud()`, which is
+meant to be run against `kingpin.bench.fakecloud`.
+
+Each function returns a plain dict that can be passed to
+`kingpin.actors.utils.get_actor()`, or written out with `write()` and loaded
+by a `misc.Macro`.
+"""
+
+import json
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+def note(message='Note %RELEASE%'):
+    return {'actor': 'misc.Note', 'options': {'message': message}}
+
+
+def sleep(seconds=0):
+    return {'actor': 'misc.Sleep', 'options': {'sleep': seconds}}
+
+
+def deep(depth, leaf=None):
+    """Returns `depth` levels of nested group.Sync actors.
+
+    Args:
+        depth: Number of nested groups
+        leaf: The actor config at the very bottom (default: a misc.Note)
+    """
+    script = leaf or note()
+    for i in xrange(depth):
+        script = {'desc': 'Level %s' % i,
+                  'actor': 'group.Sync',
+                  'options': {'acts': [script]}}
+    return script
+
+
+def wide(width, act=None, concurrency=0):
+    """Returns a single group.Async with `width` acts."""
+    act = act or note()
+    return {'actor': 'group.Async',
+            'options': {'concurrency': concurrency,
+                        'acts': [dict(act) for _ in xrange(width)]}}
+
+
+def contexts(count, acts=3):
+    """Returns a group.Sync with `count` contexts of `acts` acts each."""
+    return {'actor': 'group.Sync',
+            'options': {
+                'contexts': [{'NAME': 'name-%s' % i, 'INDEX': str(i)}
+                             for i in xrange(count)],
+                'acts': [note('Context {NAME} ({INDEX}) act %s' % i)
+                         for i in xrange(acts)]}}
+
+
+def big_options(count, size):
+    """Returns `count` dry misc.GenericHTTP actors with big inline options.
+
+    Args:
+        count: Number of actors
+        size: Number of keys in each actor's `data-json` option
+    """
+    data = dict(('key-%s' % i, {'value': '%%RELEASE%%-%s' % i,
+                                'list': range(5)})
+                for i in xrange(size))
+    act = {'actor': 'misc.GenericHTTP',
+           'options': {'url': 'http://localhost/%RELEASE%',
+                       'data-json': data}}
+    return {'actor': 'group.Sync', 'options': {'acts': [act] * count}}
+
+
+def big_dict(size, depth=3):
+    """Returns a nested dict like the configs handed to utils.diff_dicts()."""
+    if depth == 0:
+        return ['item-%s' % i for i in xrange(size, 0, -1)]
+    return dict(('key-%s' % i, big_dict(size, depth - 1))
+                for i in xrange(size))
+
+
+def cloud(count, template, concurrency=0, region='us-east-1'):
+    """Returns a group.Async of `count` AWS actors that all do real work.
+
+    The acts cycle through creating S3 buckets, SQS queues, IAM users and
+    CloudFormation stacks, each with a unique name.
+
+    Args:
+        count: Number of actors
+        template: Path to the CloudFormation template for the stacks
+        concurrency: The group.Async concurrency
+        region: AWS region for the regional actors
+    """
+    kinds = (
+        lambda i: {'actor': 'aws.s3.Bucket',
+                   'options': {'name': 'bucket-%s' % i, 'region': region}},
+        lambda i: {'actor': 'aws.sqs.Create',
+                   'options': {'name': 'queue-%s' % i, 'region': region}},
+        lambda i: {'actor': 'aws.iam.User',
+                   'options': {'name': 'user-%s' % i}},
+        lambda i: {'actor': 'aws.cloudformation.Create',
+                   'options': {'name': 'stack-%s' % i, 'region': region,
+                               'template': template}},
+    )
+    return {'actor': 'group.Async',
+            'options': {'concurrency': concurrency,
+                        'acts': [kinds[i % len(kinds)](i)
+                                 for i in xrange(count)]}}
+
+
+def write(script, path):
+    """Writes a script out as JSON so that a misc.Macro can load it."""
+    with open(path, 'w') as f:
+        json.dump(script, f)
+    return path
@@ -0,0 +1,381 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+
+"""
+:mod:`kingpin.bench.suite`
+^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Measures how the cost of building and executing a Kingpin script scales with
+its size, using the synthetic scripts in `kingpin.bench.scripts`.
+
+Every case runs in its own forked process, so that the peak memory growth of
+one case is not hidden by another. For each case we report the best wall time
+(in milliseconds) of a few repeats, and the peak growth in resident memory (in
+kilobytes). Results are compared against the stored baselines in
+`baseline.json`, and anything slower or bigger than the baseline by more than
+the allowed tolerance is flagged as a regression::
+
+    $ make bench
+    $ python -m kingpin.bench --case macro_wide --case diff_dicts
+    $ python -m kingpin.bench --save   # Record new baselines
+
+The baselines are only meaningful on the machine that recorded them. Re-record
+them (with ``--save``) when moving the suite to a new machine.
+"""
+
+import argparse
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from tornado import ioloop
+
+from kingpin import utils
+from kingpin.actors import misc
+from kingpin.actors import utils as actor_utils
+from kingpin.actors.support import api
+from kingpin.actors.support import orgchart
+from kingpin.bench import restconsumer
+from kingpin.bench import scripts
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Allowed growth over the baseline before a case is flagged, and a floor for
+# memory growth that is too small to be anything other than noise. Wall times
+# on shared (CI) machines easily vary by a third from one run to the next.
+TOLERANCE = 0.5
+MEMORY_NOISE_KB = 2048
+
+TOKENS = {'RELEASE': '1.0.0'}
+
+
+class Case(object):
+
+    """A single benchmark.
+
+    Args:
+        name: Name of the case (used as the baseline key)
+        setup: Function called with a temporary directory before each repeat.
+               Its return value is handed to `run`, and is not timed.
+        run: Function that does the work being measured
+        number: Number of times to call `run` per repeat
+        repeat: Number of repeats. The fastest one is reported.
+    """
+
+    def __init__(self, name, setup, run, number=1, repeat=5):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.number = number
+        self.repeat = repeat
+
+    def measure(self):
+        """Runs the case in this process.
+
+        Returns:
+            A dict like {'time': <ms per run>, 'memory': <peak growth in KB>}
+        """
+        tmpdir = tempfile.mkdtemp(prefix='kingpin-bench-')
+        start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        best = None
+        try:
+            for _ in xrange(self.repeat):
+                state = self.setup(tmpdir)
+                began = time.time()
+                for _ in xrange(self.number):
+                    self.run(state)
+                took = (time.time() - began) / self.number
+                best = took if best is None else min(best, took)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'time': round(best * 1000, 3),
+                'memory': peak_rss - start_rss}
+
+
+def _macro(script):
+    def setup(tmpdir):
+        return scripts.write(script, os.path.join(tmpdir, 'script.json'))
+
+    def run(path):
+        return misc.Macro('Benchmark',
+                          {'macro': path, 'tokens': TOKENS}, dry=True)
+    return setup, run
+
+
+def _macro_environment(script, count=500, size=200):
+    # A deployment host with a big environment, all of which ends up in the
+    # init_tokens of every actor in the script.
+    tokens = dict(('ENV_%s' % i, 'x' * size) for i in xrange(count))
+    tokens.update(TOKENS)
+
+    def setup(tmpdir):
+        return scripts.write(script, os.path.join(tmpdir, 'script.json'))
+
+    def run(path):
+        return misc.Macro('Benchmark',
+                          {'macro': path, 'tokens': tokens}, dry=True)
+    return setup, run
+
+
+def _build(script, dry=True):
+    def setup(tmpdir):
+        return copy.deepcopy(script)
+
+    def run(config):
+        return actor_utils.get_actor(copy.deepcopy(config), dry=dry)
+    return setup, run
+
+
+def _execute(script, dry=False):
+    def setup(tmpdir):
+        return actor_utils.get_actor(copy.deepcopy(script), dry=dry)
+
+    def run(actor):
+        ioloop.IOLoop.current().run_sync(actor.execute)
+    return setup, run
+
+
+def _fill_in_contexts():
+    context = dict(('KEY%s' % i, 'value-%s' % i) for i in xrange(50))
+    message = ' '.join('{KEY%s}' % i for i in xrange(50))
+    config = {'actor': 'misc.GenericHTTP',
+              'desc': 'Fill in {KEY0}',
+              'options': {'url': 'http://localhost/{KEY1}',
+                          'data-json': dict(('key-%s' % i, message)
+                                            for i in xrange(100))},
+              'init_context': context}
+
+    def setup(tmpdir):
+        actor = actor_utils.get_actor(copy.deepcopy(config), dry=True)
+        return actor, context, config
+
+    def run(state):
+        actor, context, config = state
+        actor._desc = config['desc']
+        actor._options = copy.deepcopy(config['options'])
+        actor._fill_in_contexts(context)
+    return setup, run
+
+
+def _populate_with_tokens():
+    tokens = dict(('TOKEN_%s' % i, 'value-%s' % i) for i in xrange(200))
+    tokens.update(os.environ)
+    string = json.dumps(scripts.big_options(10, 100)).replace(
+        '%RELEASE%', '%TOKEN_10% %TOKEN_199% %MISSING|default%')
+
+    def setup(tmpdir):
+        return string
+
+    def run(string):
+        utils.populate_with_tokens(string, tokens)
+    return setup, run
+
+
+def _get_orgchart(script):
+    def setup(tmpdir):
+        path = scripts.write(script, os.path.join(tmpdir, 'script.json'))
+        return misc.Macro('Benchmark',
+                          {'macro': path, 'tokens': TOKENS}, dry=True)
+
+    def run(macro):
+        macro.get_orgchart()
+    return setup, run
+
+
+def _write_orgchart(script, fmt):
+    def setup(tmpdir):
+        path = scripts.write(script, os.path.join(tmpdir, 'script.json'))
+        macro = misc.Macro('Benchmark',
+                           {'macro': path, 'tokens': TOKENS}, dry=True)
+        return macro, os.path.join(tmpdir, 'orgchart')
+
+    def run(state):
+        macro, path = state
+        with open(path, 'w') as output:
+            orgchart.write(macro, output, fmt)
+    return setup, run
+
+
+def _diff_dicts():
+    first = scripts.big_dict(10)
+    second = scripts.big_dict(10)
+    second['key-3']['key-4']['key-5'] = ['changed']
+
+    def setup(tmpdir):
+        return first, second
+
+    def run(state):
+        utils.diff_dicts(*state)
+    return setup, run
+
+
+def _restconsumer():
+    def setup(tmpdir):
+        return restconsumer.BenchAPI(client=api.RestClient(client=object()))
+    return setup, restconsumer.walk
+
+
+CASES = [
+    Case('macro_deep', *_macro(scripts.deep(30))),
+    Case('macro_wide', *_macro(scripts.wide(1000))),
+    Case('macro_contexts', *_macro(scripts.contexts(500))),
+    Case('macro_big_options', *_macro(scripts.big_options(20, 100))),
+    Case('macro_environment',
+         *_macro_environment(scripts.contexts(200, acts=5)), repeat=3),
+    Case('get_actor', *_build(scripts.note()), number=500),
+    Case('get_actor_nested', *_build(scripts.deep(20, scripts.wide(20)))),
+    Case('fill_in_contexts', *_fill_in_contexts(), number=20),
+    Case('populate_with_tokens', *_populate_with_tokens(), number=20),
+    Case('get_orgchart', *_get_orgchart(scripts.contexts(500))),
+    Case('write_orgchart_dot',
+         *_write_orgchart(scripts.contexts(2000, acts=5), 'dot'), repeat=2),
+    Case('diff_dicts', *_diff_dicts()),
+    Case('execute_sync_notes', *_execute(scripts.contexts(500))),
+    Case('execute_async_sleeps',
+         *_execute(scripts.wide(2000, scripts.sleep()))),
+    Case('execute_async_concurrency',
+         *_execute(scripts.wide(500, scripts.sleep(), concurrency=10))),
+    Case('restconsumer_walk', *_restconsumer(), number=5000),
+]
+
+
+def _measure(case, queue):
+    # Actors log at INFO. Records are still created, just never written.
+    root = logging.getLogger()
+    root.handlers = [logging.NullHandler()]
+    root.setLevel(logging.INFO)
+
+    # Every repeat should decode its script from scratch.
+    utils.SCRIPT_CACHE_SIZE = 0
+    try:
+        queue.put(case.measure())
+    except Exception as e:
+        queue.put({'error': '%s: %s' % (e.__class__.__name__, e)})
+
+
+def measure(case):
+    """Runs a case in a forked process, and returns its results.
+
+    Raises:
+        RuntimeError: If the case failed
+    """
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_measure, args=(case, queue))
+    proc.start()
+    results = queue.get()
+    proc.join()
+
+    if 'error' in results:
+        raise RuntimeError('%s failed: %s' % (case.name, results['error']))
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Compares results against the baselines.
+
+    Args:
+        results: Dict of case name -> results from measure()
+        baseline: Dict of case name -> previously recorded results
+        tolerance: Allowed growth (0.5 means 50%) before we complain
+
+    Returns:
+        A list of (case name, metric, baseline, result) regressions
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+
+        base = baseline[name]
+        if result['time'] > base['time'] * (1 + tolerance):
+            regressions.append((name, 'time', base['time'], result['time']))
+
+        memory_limit = max(base['memory'] * (1 + tolerance),
+                           base['memory'] + MEMORY_NOISE_KB)
+        if result['memory'] > memory_limit:
+            regressions.append(
+                (name, 'memory', base['memory'], result['memory']))
+
+    return regressions
+
+
+def _change(result, base):
+    if not base:
+        return ''
+    return '%+.0f%%' % ((result - base) * 100.0 / base)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Kingpin benchmarks')
+    parser.add_argument('--case', dest='cases', action='append',
+                        choices=[c.name for c in CASES],
+                        help='Only run this case (may be repeated)')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='Baseline file (default: %(default)s)')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='Allowed slowdown before flagging a regression '
+                             '(default: %(default)s)')
+    parser.add_argument('--save', action='store_true',
+                        help='Record the results as the new baselines')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print('%-26s %10s %8s %10s %8s' %
+          ('case', 'ms', 'change', 'peak KB', 'change'))
+    for case in CASES:
+        if args.cases and case.name not in args.cases:
+            continue
+
+        result = results[case.name] = measure(case)
+        base = baseline.get(case.name, {})
+        print('%-26s %10.3f %8s %10d %8s' % (
+            case.name,
+            result['time'], _change(result['time'], base.get('time')),
+            result['memory'], _change(result['memory'], base.get('memory'))))
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True,
+                      separators=(',', ': '))
+            f.write('\n')
+        print('Saved baselines to %s' % args.baseline)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, base, result in regressions:
+        print('REGRESSION: %s %s went from %s to %s' %
+              (name, metric, base, result))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
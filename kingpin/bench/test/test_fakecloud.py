@@ -0,0 +1,356 @@
+"""Tests for the bench.fakecloud package."""
+
+import json
+import urllib
+
+from botocore import exceptions as botocore_exceptions
+from tornado import httpclient
+from tornado import testing
+
+from kingpin.actors.aws import api
+from kingpin.actors.aws import settings
+from kingpin.bench import fakecloud
+from kingpin.bench.fakecloud import aws
+from kingpin.bench.fakecloud import base
+from kingpin.bench.fakecloud import services
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestFaults(testing.unittest.TestCase):
+
+    def test_pick(self):
+        self.assertEquals(base.Faults().pick('a'), None)
+        self.assertEquals(base.Faults(error_rate=1).pick('a'), 'error')
+        self.assertEquals(base.Faults(throttle_rate=1).pick('a'), 'throttle')
+
+    def test_stats(self):
+        faults = base.Faults(throttle_rate=0.5, seed=1)
+        for _ in xrange(100):
+            faults.pick('a')
+        self.assertEquals(faults.stats['a']['requests'], 100)
+        self.assertTrue(0 < faults.stats['a']['throttle'] < 100)
+        self.assertEquals(faults.stats['a']['error'], 0)
+
+    def test_delay(self):
+        faults = base.Faults(latency=1, jitter=0.5, seed=1)
+        for _ in xrange(10):
+            self.assertTrue(0.5 <= faults.delay() <= 1.5)
+        self.assertEquals(base.Faults(latency=0.1, jitter=1).delay() >= 0,
+                          True)
+
+
+class TestHelpers(testing.unittest.TestCase):
+
+    def test_to_xml(self):
+        ret = aws.to_xml('Result', {
+            'Names': ['a', 'b<'],
+            'Flag': True,
+            'Skipped': None,
+            'Urls': aws.Flat(['x', 'y'])})
+        self.assertEquals(
+            ret,
+            '<Result><Flag>true</Flag>'
+            '<Names><member>a</member><member>b&lt;</member></Names>'
+            '<Urls>x</Urls><Urls>y</Urls></Result>')
+
+    def test_members(self):
+        params = {'Parameters.member.2.ParameterKey': 'b',
+                  'Parameters.member.1.ParameterKey': 'a',
+                  'Parameters.member.1.ParameterValue': '1',
+                  'Names.member.1': 'n',
+                  'Other': 'o'}
+        self.assertEquals(aws.members(params, 'Parameters'),
+                          [{'ParameterKey': 'a', 'ParameterValue': '1'},
+                           {'ParameterKey': 'b'}])
+        self.assertEquals(aws.members(params, 'Names'), ['n'])
+        self.assertEquals(aws.members(params, 'Missing'), [])
+
+    def test_parse_fields(self):
+        fields, filters = services.parse_fields({
+            'server_array[name]': ['foo'],
+            'server_array[instance][cloud_href]': ['/api/clouds/1'],
+            'filter[]': ['name==foo', 'state<>stopped']})
+        self.assertEquals(fields, {
+            'name': 'foo', 'instance': {'cloud_href': '/api/clouds/1'}})
+        self.assertEquals(filters, ['name==foo', 'state<>stopped'])
+
+
+class FakeCloudTestCase(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(FakeCloudTestCase, self).setUp()
+        self.cloud = fakecloud.FakeCloud(
+            packages={'repo': [{'name': 'pkg',
+                                'distro_version': 'ubuntu/trusty',
+                                'package_html_url': '/p/pkg_1.0.deb',
+                                'created_at': '2016-01-01T00:00:00.000Z'}]})
+        self.cloud.listen(port=0)
+        self.env = self.cloud.environment()
+        self.http = httpclient.AsyncHTTPClient()
+
+        settings.ASYNC_RETRY_DELAY = 0
+        api._CLIENTS.clear()
+
+    def tearDown(self):
+        self.cloud.stop()
+        super(FakeCloudTestCase, self).tearDown()
+
+    def client(self, service):
+        return api.AsyncClient(
+            service, 'us-west-2', 'unit-test', 'unit-test',
+            endpoint_url=self.env['AWS_ENDPOINT_URL'], http_client=self.http)
+
+    def fetch(self, service, path, method='GET', body=None, **kwargs):
+        url = 'http://127.0.0.1:%s%s' % (self.cloud.ports[service], path)
+        if isinstance(body, dict):
+            body = json.dumps(body)
+        return self.http.fetch(url, method=method, body=body,
+                               raise_error=False, **kwargs)
+
+
+class TestAWS(FakeCloudTestCase):
+
+    @testing.gen_test
+    def test_cloudformation(self):
+        cfn = self.client('cloudformation')
+        ret = yield cfn.call('create_stack', StackName='unit',
+                             TemplateBody='{}',
+                             Parameters=[{'ParameterKey': 'a',
+                                          'ParameterValue': 'b'}])
+        stack_id = ret['StackId']
+
+        ret = yield cfn.call('describe_stacks', StackName='unit')
+        stack = ret['Stacks'][0]
+        self.assertEquals(stack['StackStatus'], 'CREATE_COMPLETE')
+        self.assertEquals(stack['Parameters'],
+                          [{'ParameterKey': 'a', 'ParameterValue': 'b'}])
+
+        yield cfn.call('delete_stack', StackName='unit')
+        ret = yield cfn.call('describe_stacks', StackName=stack_id)
+        self.assertEquals(ret['Stacks'][0]['StackStatus'], 'DELETE_COMPLETE')
+
+        with self.assertRaises(botocore_exceptions.ClientError) as e:
+            yield cfn.call('describe_stacks', StackName='unit')
+        self.assertEquals(e.exception.response['Error']['Code'],
+                          'ValidationError')
+
+    @testing.gen_test
+    def test_cloudformation_change_set(self):
+        cfn = self.client('cloudformation')
+        yield cfn.call('create_stack', StackName='unit', TemplateBody='{}')
+        ret = yield cfn.call('create_change_set', StackName='unit',
+                             ChangeSetName='change', TemplateBody='{"a": 1}')
+
+        change_set = yield cfn.call('describe_change_set',
+                                    ChangeSetName=ret['Id'])
+        self.assertEquals(change_set['Status'], 'CREATE_COMPLETE')
+        self.assertEquals(len(change_set['Changes']), 1)
+
+        yield cfn.call('execute_change_set', ChangeSetName=ret['Id'])
+        ret = yield cfn.call('get_template', StackName='unit')
+        self.assertEquals(ret['TemplateBody'], '{"a": 1}')
+
+    @testing.gen_test
+    def test_ecs(self):
+        ecs = self.client('ecs')
+        containers = [{'name': 'c', 'image': 'i'}]
+        yield ecs.call('register_task_definition', family='unit',
+                       containerDefinitions=containers)
+        ret = yield ecs.call('register_task_definition', family='unit',
+                             containerDefinitions=containers)
+        self.assertEquals(ret['taskDefinition']['revision'], 2)
+
+        yield ecs.call('create_service', cluster='c', serviceName='svc',
+                       taskDefinition='unit:1', desiredCount=3)
+        ret = yield ecs.call('describe_services', cluster='c',
+                             services=['svc', 'missing'])
+        deployment = ret['services'][0]['deployments'][0]
+        self.assertEquals(deployment['status'], 'PRIMARY')
+        self.assertEquals(deployment['runningCount'], 3)
+        self.assertTrue(deployment['taskDefinition'].endswith('unit:1'))
+        self.assertEquals(ret['failures'][0]['reason'], 'MISSING')
+
+        ret = yield ecs.call('run_task', cluster='c', taskDefinition='unit',
+                             count=2)
+        arns = [t['taskArn'] for t in ret['tasks']]
+        ret = yield ecs.call('describe_tasks', cluster='c', tasks=arns)
+        self.assertEquals(
+            [c['exitCode'] for t in ret['tasks'] for c in t['containers']],
+            [0, 0])
+
+        with self.assertRaises(botocore_exceptions.ClientError) as e:
+            yield ecs.call('update_service', cluster='c', service='missing')
+        self.assertEquals(e.exception.response['Error']['Code'],
+                          'ServiceNotFoundException')
+
+    @testing.gen_test
+    def test_sqs(self):
+        sqs = self.client('sqs')
+        ret = yield sqs.call('create_queue', QueueName='unit')
+        self.assertEquals(ret['QueueUrl'].split('/')[-1], 'unit')
+
+        ret = yield sqs.call('list_queues', QueueNamePrefix='un')
+        self.assertEquals(len(ret['QueueUrls']), 1)
+
+        ret = yield sqs.call('get_queue_attributes',
+                             QueueUrl=ret['QueueUrls'][0],
+                             AttributeNames=['All'])
+        self.assertEquals(ret['Attributes']['ApproximateNumberOfMessages'],
+                          '0')
+
+    @testing.gen_test
+    def test_s3(self):
+        s3 = self.client('s3')
+        yield s3.call('create_bucket', Bucket='unit')
+        yield s3.call('put_bucket_policy', Bucket='unit', Policy='{"a": 1}')
+
+        ret = yield s3.call('get_bucket_policy', Bucket='unit')
+        self.assertEquals(ret['Policy'], '{"a": 1}')
+
+        ret = yield s3.call('list_buckets')
+        self.assertEquals([b['Name'] for b in ret['Buckets']], ['unit'])
+
+        with self.assertRaises(botocore_exceptions.ClientError) as e:
+            yield s3.call('get_bucket_lifecycle', Bucket='unit')
+        self.assertEquals(e.exception.response['Error']['Code'],
+                          'NoSuchLifecycleConfiguration')
+
+        yield s3.call('delete_bucket', Bucket='unit')
+        with self.assertRaises(botocore_exceptions.ClientError) as e:
+            yield s3.call('list_objects', Bucket='unit')
+        self.assertEquals(e.exception.response['Error']['Code'],
+                          'NoSuchBucket')
+
+    @testing.gen_test
+    def test_iam(self):
+        iam = self.client('iam')
+        yield iam.call('create_user', UserName='unit')
+        yield iam.call('put_user_policy', UserName='unit', PolicyName='p',
+                       PolicyDocument='{"a": 1}')
+
+        ret = yield iam.call('list_users')
+        self.assertEquals([u['UserName'] for u in ret['Users']], ['unit'])
+
+        ret = yield iam.call('get_user_policy', UserName='unit',
+                             PolicyName='p')
+        self.assertEquals(urllib.unquote(ret['PolicyDocument']), '{"a": 1}')
+
+        with self.assertRaises(botocore_exceptions.ClientError) as e:
+            yield iam.call('create_user', UserName='unit')
+        self.assertEquals(e.exception.response['Error']['Code'],
+                          'EntityAlreadyExists')
+
+    @testing.gen_test
+    def test_unsupported_action(self):
+        with self.assertRaises(botocore_exceptions.ClientError) as e:
+            yield self.client('sqs').call('purge_queue', QueueUrl='/a/b')
+        self.assertEquals(e.exception.response['Error']['Code'],
+                          'InvalidAction')
+
+    @testing.gen_test
+    def test_throttling(self):
+        self.cloud.faults.throttle_rate = 1
+        settings.ASYNC_RETRY_ATTEMPTS = 2
+        try:
+            for service, method, code in (
+                    ('cloudformation', 'describe_stacks', 'Throttling'),
+                    ('ecs', 'list_tasks', 'ThrottlingException'),
+                    ('s3', 'list_buckets', 'SlowDown')):
+                with self.assertRaises(botocore_exceptions.ClientError) as e:
+                    yield self.client(service).call(method)
+                self.assertEquals(e.exception.response['Error']['Code'],
+                                  code)
+        finally:
+            settings.ASYNC_RETRY_ATTEMPTS = 5
+
+        # The stats are served even while everything else is throttled
+        ret = yield self.fetch('aws', '/_fakecloud/stats')
+        self.assertEquals(json.loads(ret.body)['aws'],
+                          {'requests': 6, 'throttle': 6})
+
+
+class TestServices(FakeCloudTestCase):
+
+    @testing.gen_test
+    def test_rightscale(self):
+        ret = yield self.fetch('rightscale', '/api/oauth2', 'POST', body='')
+        self.assertIn('access_token', json.loads(ret.body))
+
+        ret = yield self.fetch(
+            'rightscale', '/api/server_arrays?server_array[name]=unit',
+            'POST', body='')
+        self.assertEquals(ret.code, 201)
+        array = ret.headers['Location']
+
+        ret = yield self.fetch(
+            'rightscale', '/api/server_arrays?filter[]=name==unit')
+        self.assertEquals(ret.headers['Content-Type'],
+                          'application/vnd.rightscale.server_array+json;'
+                          'type=collection')
+        self.assertEquals([a['name'] for a in json.loads(ret.body)],
+                          ['unit'])
+
+        ret = yield self.fetch('rightscale', array + '/launch', 'POST',
+                               body='')
+        ret = yield self.fetch('rightscale', array + '/current_instances')
+        self.assertEquals(json.loads(ret.body)[0]['state'], 'operational')
+
+        ret = yield self.fetch('rightscale', array, 'DELETE')
+        self.assertEquals(ret.code, 204)
+        ret = yield self.fetch('rightscale', array)
+        self.assertEquals(ret.code, 404)
+
+    @testing.gen_test
+    def test_spotinst(self):
+        ret = yield self.fetch('spotinst', '/aws/ec2/group', 'POST',
+                               body={'group': {'name': 'unit'}})
+        group = json.loads(ret.body)['response']['items'][0]
+
+        ret = yield self.fetch('spotinst', '/aws/ec2/group')
+        self.assertEquals(json.loads(ret.body)['response']['items'], [group])
+
+        ret = yield self.fetch('spotinst', '/aws/ec2/group/%s/roll?limit=50' %
+                               group['id'])
+        self.assertEquals(
+            json.loads(ret.body)['response']['items'][0]['status'],
+            'finished')
+
+        yield self.fetch('spotinst', '/aws/ec2/group/%s' % group['id'],
+                         'DELETE')
+        ret = yield self.fetch('spotinst', '/aws/ec2/group/%s' % group['id'])
+        self.assertEquals(ret.code, 400)
+        self.assertEquals(
+            json.loads(ret.body)['response']['errors'][0]['code'],
+            'GROUP_DOESNT_EXIST')
+
+    @testing.gen_test
+    def test_packagecloud(self):
+        ret = yield self.fetch('packagecloud',
+                               '/api/v1/repos/acct/repo/packages.json')
+        self.assertEquals(json.loads(ret.body)[0]['name'], 'pkg')
+
+        ret = yield self.fetch(
+            'packagecloud',
+            '/api/v1/repos/acct/repo/ubuntu/trusty/pkg_1.0.deb', 'DELETE')
+        self.assertEquals(ret.code, 200)
+        self.assertEquals(self.cloud.packagecloud['repo'], [])
+
+    @testing.gen_test
+    def test_injected_errors(self):
+        self.cloud.faults.error_rate = 1
+        ret = yield self.fetch('spotinst', '/aws/ec2/group')
+        self.assertEquals(ret.code, 500)
+
+        self.cloud.faults.error_rate = 0
+        self.cloud.faults.throttle_rate = 1
+        ret = yield self.fetch('packagecloud',
+                               '/api/v1/repos/acct/repo/packages.json')
+        self.assertEquals(ret.code, 429)
+
+    def test_environment(self):
+        self.assertEquals(
+            self.env['SPOTINST_ENDPOINT'],
+            'http://127.0.0.1:%s/' % self.cloud.ports['spotinst'])
+        self.assertEquals(sorted(self.cloud.ports), sorted(
+            fakecloud.FakeCloud.SERVICES))
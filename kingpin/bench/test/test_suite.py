@@ -0,0 +1,48 @@
+"""Tests for the bench.suite package."""
+
+from tornado.testing import unittest
+
+from kingpin import schema
+from kingpin.bench import scripts
+from kingpin.bench import suite
+
+__author__ = 'Matt Wise <matt@nextdoor.com>'
+
+
+class TestScripts(unittest.TestCase):
+
+    def test_scripts_are_valid(self):
+        for script in (scripts.deep(3),
+                       scripts.wide(3, scripts.sleep()),
+                       scripts.contexts(3),
+                       scripts.big_options(2, 2),
+                       scripts.cloud(4, 'template.json')):
+            schema.validate(script)
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_measure(self):
+        calls = []
+        case = suite.Case('unit', lambda tmpdir: tmpdir, calls.append,
+                          number=2, repeat=2)
+        ret = case.measure()
+
+        self.assertEquals(len(calls), 4)
+        self.assertEquals(sorted(ret.keys()), ['memory', 'time'])
+
+    def test_compare(self):
+        baseline = {'a': {'time': 10, 'memory': 10000},
+                    'b': {'time': 10, 'memory': 10000}}
+        results = {'a': {'time': 11, 'memory': 11000},
+                   'b': {'time': 20, 'memory': 20000},
+                   'new': {'time': 1, 'memory': 1}}
+
+        ret = suite.compare(results, baseline, tolerance=0.5)
+        self.assertEquals(ret, [('b', 'time', 10, 20),
+                                ('b', 'memory', 10000, 20000)])
+
+    def test_compare_ignores_small_memory_growth(self):
+        ret = suite.compare({'a': {'time': 1, 'memory': 1500}},
+                            {'a': {'time': 1, 'memory': 100}})
+        self.assertEquals(ret, [])
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+"""The `kingpin` command.
+
+`kingpin serve`, `kingpin submit` and `kingpin merge-reports` are handed off
+to `kingpin.bin.server`, `kingpin.bin.client` and `kingpin.bin.report`, and
+anything else is a regular run of `kingpin.bin.deploy`. Only the modules that
+are needed are imported.
+"""
+
+import sys
+
+__author__ = 'Matt Wise (matt@nextdoor.com)'
+
+
+def begin(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv and argv[0] == 'submit':
+        from kingpin.bin import client
+        sys.exit(client.submit(argv[1:]))
+
+    if argv and argv[0] == 'merge-reports':
+        from kingpin.bin import report
+        sys.exit(report.main(argv[1:]))
+
+    if argv and argv[0] == 'serve':
+        from kingpin.bin import server
+        sys.exit(server.serve(argv[1:]))
+
+    from kingpin.bin import deploy
+    deploy.begin(argv)
+
+
+if __name__ == '__main__':
+    begin()
@@ -0,0 +1,114 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+"""`kingpin submit` -- the client of a `kingpin serve` server.
+
+This only uses the standard library, so that submitting a deployment does
+not pay for importing Kingpin (and all of its dependencies) again.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+__author__ = 'Matt Wise (matt@nextdoor.com)'
+
+DEFAULT_SOCKET = os.getenv(
+    'KINGPIN_SOCKET',
+    os.path.join(tempfile.gettempdir(), 'kingpin-%s.sock' % os.getuid()))
+DEFAULT_ADDRESS = '127.0.0.1'
+DEFAULT_TOKEN_FILE = os.getenv(
+    'KINGPIN_TOKEN_FILE', os.path.expanduser('~/.kingpin-serve.token'))
+
+
+def add_address_arguments(parser):
+    """Adds the arguments that locate the server to an ArgumentParser."""
+    parser.add_argument('--socket', dest='socket', default=DEFAULT_SOCKET,
+                        help='Unix socket of the server '
+                             '(default: %(default)s)')
+    parser.add_argument('--port', dest='port', type=int, default=None,
+                        help='Use a TCP port rather than a Unix socket')
+    parser.add_argument('--address', dest='address', default=DEFAULT_ADDRESS,
+                        help='Loopback address of the TCP port '
+                             '(default: %(default)s)')
+    parser.add_argument('--token-file', dest='token_file',
+                        default=DEFAULT_TOKEN_FILE,
+                        help='File with the secret that authenticates '
+                             'submissions over TCP (default: %(default)s)')
+
+
+def read_token(path):
+    """Returns the secret token stored in a file, or None if unreadable."""
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except IOError:
+        return None
+
+
+def submit(argv=None, stdout=None, stderr=None):
+    """`kingpin submit` -- Runs a deployment on the Kingpin server.
+
+    Any arguments other than those that locate the server are handed to the
+    server as-is, and are treated just like the arguments of `kingpin`.
+
+    Returns:
+        The exit code of the run.
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    parser = argparse.ArgumentParser(
+        prog='kingpin submit', add_help=False,
+        description='Run a deployment on a `kingpin serve` server')
+    add_address_arguments(parser)
+    opts, argv = parser.parse_known_args(argv)
+
+    request = {'argv': argv, 'env': dict(os.environ), 'cwd': os.getcwd()}
+    if opts.port:
+        request['token'] = read_token(opts.token_file)
+        if not request['token']:
+            stderr.write('Could not read the token of the Kingpin server '
+                         'from %s\n' % opts.token_file)
+            return 1
+
+    try:
+        if opts.port:
+            sock = socket.create_connection((opts.address, opts.port))
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(opts.socket)
+    except socket.error as e:
+        stderr.write('Could not reach the Kingpin server at %s: %s\n' % (
+            opts.port and '%s:%s' % (opts.address, opts.port) or opts.socket,
+            e))
+        return 1
+
+    try:
+        sock.sendall(json.dumps(request) + '\n')
+        for line in sock.makefile('r'):
+            message = json.loads(line)
+            if 'exit' in message:
+                return message['exit']
+            for name, output in (('stdout', stdout), ('stderr', stderr)):
+                if name in message:
+                    output.write(message[name].encode('utf-8'))
+                    output.flush()
+    finally:
+        sock.close()
+
+    stderr.write('Lost the connection to the Kingpin server\n')
+    return 3
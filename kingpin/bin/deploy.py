@@ -18,15 +18,27 @@ import argparse
 import json
 import logging
 import os
+import sqlite3
 import sys
+import time
 
 from tornado import gen
 from tornado import ioloop
 
+from kingpin import exceptions
 from kingpin import utils
 from kingpin.actors import utils as actor_utils
 from kingpin.actors import exceptions as actor_exceptions
 from kingpin.actors.misc import Macro
+from kingpin.actors.support import compiler
+from kingpin.actors.support import history
+from kingpin.actors.support import incremental
+from kingpin.actors.support import orgchart
+from kingpin.actors.support import outbox
+from kingpin.actors.support import plan
+from kingpin.actors.support import readcache
+from kingpin.actors.support import shard
+from kingpin.bin import report
 from kingpin.version import __version__
 
 
@@ -62,8 +74,59 @@ parser.add_argument('-d', '--dry', dest='dry', action='store_true',
                     help='Executes a dry run only.')
 parser.add_argument('--build-only', dest='build_only', action='store_true',
                     help='Compile the input JSON without executing any runs')
+parser.add_argument('--offline', dest='offline', action='store_true',
+                    help='With --build-only, only check the script and the '
+                         'options of its actors, without connecting to any '
+                         'APIs or fetching remote macros')
 parser.add_argument('--orgchart', dest='orgchart',
-                    help='Save the orgchart into file. Requires --build-only')
+                    help='Save the orgchart into file. With --build-only, it '
+                         'is saved right away. Otherwise it is saved after '
+                         'the run, with the timing of every actor.')
+parser.add_argument('--orgchart-format', dest='orgchart_format',
+                    choices=orgchart.FORMATS, default='json',
+                    help='Orgchart file format (default: %(default)s)')
+parser.add_argument('--plan-out', dest='plan_out',
+                    help='Record the changes found by the dry run into a '
+                         'plan file')
+parser.add_argument('--plan-in', dest='plan_in',
+                    help='Apply a plan file recorded by --plan-out, rather '
+                         'than re-discovering the state of every resource')
+parser.add_argument('--shard', dest='shard',
+                    help='INDEX/COUNT: Only build this share of the contexts '
+                         'of the groups with the "shard" option set')
+parser.add_argument('--report', dest='report',
+                    help='Save a JSON report of the run (its exit code and '
+                         'the timings of every actor) into file. The reports '
+                         'of all --shards can be merged with `kingpin '
+                         'merge-reports`')
+parser.add_argument('--history', dest='history',
+                    help='Record how long every actor takes into file, and '
+                         'use the durations of earlier runs to estimate how '
+                         'long groups will take (and to order the acts of '
+                         'group.Async with longest_first)')
+parser.add_argument('--incremental', dest='incremental',
+                    help='Record a fingerprint of every resource ensured by '
+                         'a real run into file, and skip the actors whose '
+                         'options and resources are unchanged since then')
+parser.add_argument('--read-cache', dest='read_cache',
+                    help='Cache the responses to idempotent API reads made '
+                         'by dry runs in this SQLite file, for the dry runs '
+                         'that follow. Real runs never read from the cache, '
+                         'and empty it when they are done')
+
+# HTTP Client Configuration
+parser.add_argument('--curl', dest='curl', action='store_true',
+                    default=bool(os.getenv('KINGPIN_CURL', False)),
+                    help='Use the pooled, keep-alive curl HTTP client '
+                         '(requires PycURL)')
+parser.add_argument('--max-clients', dest='max_clients', type=int,
+                    default=int(os.getenv('KINGPIN_MAX_CLIENTS', 10)),
+                    help='Maximum number of simultaneous HTTP requests')
+parser.add_argument('--max-host-connections', dest='max_host_connections',
+                    type=int,
+                    default=int(os.getenv('KINGPIN_MAX_HOST_CONNECTIONS', 0)),
+                    help='Maximum number of simultaneous connections to a '
+                         'single host (requires --curl)')
 
 # Logging Configuration
 parser.add_argument('-l', '--level', dest='level', default='info',
@@ -72,8 +135,62 @@ parser.add_argument('-D', '--debug', dest='level_debug', default=False,
                     action='store_true', help='Equivalent to --level=DEBUG')
 parser.add_argument('-c', '--color', dest='color', default=False,
                     action='store_true', help='Colorize the log output')
+parser.add_argument('--log-format', dest='log_format', default='text',
+                    choices=('text', 'json'),
+                    help='Log output format. "json" writes one JSON object '
+                         'per line.')
+
+# Options that default to an environment variable of the run. These are read
+# in parse_args() rather than here, since the run may have been submitted to
+# `kingpin serve` from another environment (see utils.get_environ()).
+ENVIRON_DEFAULTS = (
+    ('shard', 'KINGPIN_SHARD'),
+    ('history', 'KINGPIN_HISTORY'),
+    ('incremental', 'KINGPIN_INCREMENTAL'),
+    ('read_cache', 'KINGPIN_READ_CACHE'),
+)
+
+# The parsed command line (see parse_args()). `kingpin serve` swaps it out for
+# every script submitted to it.
+args = None
+
+
+def parse_args(argv=None):
+    """Parses (and checks) the command line into the global `args`.
+
+    Raises:
+        SystemExit: If the command line is invalid
+    """
+    global args
+    args = parser.parse_args(argv)
+    environ = utils.get_environ()
+    for dest, variable in ENVIRON_DEFAULTS:
+        if getattr(args, dest) is None:
+            setattr(args, dest, environ.get(variable))
 
-args = parser.parse_args()
+    if args.level_debug:
+        args.level = 'DEBUG'
+
+    # Cannot specify a script file an an actor at the same time.
+    if args.script and args.actor:
+        kingpin_fail('You may only specify --actor or --script, not both!')
+
+    if not (args.script or args.actor):
+        kingpin_fail('You must specify --script or --actor.')
+
+    if args.offline and not args.build_only:
+        kingpin_fail('--offline only works with --build-only.')
+
+    if args.plan_in and args.plan_out:
+        kingpin_fail('You may only specify --plan-in or --plan-out, not both!')
+
+    if args.shard:
+        try:
+            args.shard = shard.parse(args.shard)
+        except exceptions.InvalidShard as e:
+            kingpin_fail(str(e))
+
+    return args
 
 
 def kingpin_fail(message):
@@ -83,11 +200,7 @@ def kingpin_fail(message):
 
 
 def get_main_actor(dry):
-    env_tokens = dict(os.environ)
-
-    # Cannot specify a script file an an actor at the same time.
-    if args.script and args.actor:
-        kingpin_fail('You may only specify --actor or --script, not both!')
+    env_tokens = dict(utils.get_environ())
 
     if args.actor:
         ActorClass = actor_utils.get_actor_class(args.actor)
@@ -100,65 +213,117 @@ def get_main_actor(dry):
                           **parameters)
 
     # Actor not specified. Process JSON file.
-    try:
-        script = args.script or sys.argv[1] if sys.argv else None
-    except Exception as e:
-        kingpin_fail(
-            '%s You must specify --script or provide it as first argument.'
-            % e)
-
     return Macro(desc='Kingpin',
-                 options={'macro': script, 'tokens': env_tokens},
+                 options={'macro': args.script, 'tokens': env_tokens},
                  dry=dry)
 
 
+def compile_main_actor():
+    """Same as get_main_actor(), compiled offline (see --offline)."""
+    env_tokens = dict(utils.get_environ())
+
+    if args.actor:
+        config = dict([i.split('=') for i in args.params])
+        config.update({
+            'actor': args.actor,
+            'options': dict([i.split('=') for i in args.options]),
+            'init_tokens': env_tokens})
+        return compiler.compile_actor(config)
+
+    return compiler.compile_actor({
+        'actor': 'misc.Macro',
+        'desc': 'Kingpin',
+        'options': {'macro': args.script, 'tokens': env_tokens}})
+
+
 @gen.coroutine
 def main():
+    """Runs the deployment described by `args`.
 
+    Returns:
+        The exit code for Kingpin.
+    """
     if args.actor and args.explain:
         ActorClass = actor_utils.get_actor_class(args.actor)
         print(ActorClass.__doc__)
-        sys.exit(0)
+        raise gen.Return(0)
+
+    shard.set_shard(args.shard)
+    started = time.time()
+
+    if args.history and not args.build_only:
+        history.set_history(history.History.load(args.history))
+
+    if args.incremental and not args.build_only:
+        incremental.set_fingerprints(
+            incremental.Fingerprints.load(args.incremental))
 
     if args.build_only:
         try:
-            actor = get_main_actor(dry=False)
+            if args.offline:
+                actor = compile_main_actor()
+            else:
+                actor = get_main_actor(dry=False)
         except Exception as e:
             log.critical(e)
-            sys.exit(1)
+            raise gen.Return(1)
 
         if args.orgchart:
-            log.info('Creating organizational chart into %s' % args.orgchart)
             try:
-                orgdata = actor.get_orgchart()
+                save_orgchart(actor)
             except Exception as e:
                 log.critical(e)
-                sys.exit(2)
+                raise gen.Return(2)
 
-            with file(args.orgchart, 'w') as output:
-                output.write(json.dumps(orgdata))
+        raise gen.Return(0)
 
-        sys.exit(0)
+    if args.plan_in:
+        try:
+            plan.set_plan(plan.Plan.load(args.plan_in))
+        except exceptions.InvalidPlan as e:
+            log.critical(e)
+            raise gen.Return(1)
+        log.info('Loaded a plan for %s actor(s) from %s' %
+                 (len(plan.get_plan()), args.plan_in))
+    elif args.plan_out:
+        plan.set_plan(plan.Plan())
+
+    cache = open_read_cache()
 
     # Begin doing real stuff!
-    if os.environ.get('SKIP_DRY', False):
+    if utils.get_environ().get('SKIP_DRY', False):
         log.warn('')
         log.warn('*** You have disabled the dry run.')
         log.warn('*** Execution will begin with no expectation of success.')
         log.warn('')
+    elif args.plan_in and not args.dry:
+        log.info('Skipping the rehearsal, we have a plan.')
     elif not args.dry:
         log.info('Rehearsing... Break a leg!')
 
+        dry_actor = None
+        readcache.set_cache(cache)
         try:
             dry_actor = get_main_actor(dry=True)
             yield dry_actor.execute()
         except actor_exceptions.ActorException as e:
             log.critical('Dry run failed. Reason:')
             log.critical(e)
-            sys.exit(2)
-
+            save_report(dry_actor, 2, started)
+            save_history()
+            save_fingerprints()
+            close_read_cache(cache, changed=False)
+            raise gen.Return(2)
+        finally:
+            readcache.set_cache(None)
+
+        save_plan()
         log.info('Rehearsal OK! Performing!')
 
+    # The real run always works with the live state of every resource
+    readcache.set_cache(cache if args.dry else None)
+
+    runner = None
     try:
         runner = get_main_actor(dry=args.dry)
 
@@ -169,17 +334,132 @@ def main():
     except actor_exceptions.ActorException as e:
         log.error('Kingpin encountered mistakes during the play.')
         log.error(e)
-        sys.exit(2)
+        save_orgchart(runner, timings=True)
+        save_report(runner, 2, started)
+        save_history()
+        save_fingerprints()
+        close_read_cache(cache, changed=not args.dry)
+        yield outbox.get_outbox().flush()
+        raise gen.Return(2)
+
+    save_plan()
+    save_orgchart(runner, timings=True)
+    save_report(runner, 0, started)
+    save_history()
+    save_fingerprints()
+    close_read_cache(cache, changed=not args.dry)
+
+    # Give any notifications that were queued up by actors with the
+    # 'async_delivery' option a chance to go out before we exit.
+    yield outbox.get_outbox().flush()
+    raise gen.Return(0)
+
+
+def save_orgchart(actor, timings=False):
+    """Streams the orgchart of an actor out to --orgchart (if given)."""
+    if not args.orgchart or actor is None:
+        return
+
+    log.info('Creating organizational chart into %s' % args.orgchart)
+    with open(args.orgchart, 'w') as output:
+        orgchart.write(actor, output, args.orgchart_format, timings=timings)
+
+
+def save_report(actor, exit_code, started):
+    """Writes out the report of the run to --report (if given)."""
+    if not args.report:
+        return
+
+    entries = actor.iter_orgchart(timings=True) if actor else []
+    log.info('Saving the report of the run into %s' % args.report)
+    with open(args.report, 'w') as output:
+        json.dump(report.build(entries, exit_code, args.shard, started),
+                  output)
+
+
+def open_read_cache():
+    """Opens the --read-cache database (if given)."""
+    if not args.read_cache:
+        return None
+
+    try:
+        return readcache.ReadCache(args.read_cache)
+    except (sqlite3.Error, OSError) as e:
+        log.warning('Not using the read cache %s: %s' % (args.read_cache, e))
+        return None
+
+
+def close_read_cache(cache, changed):
+    """Closes the read cache, emptying it if resources may have changed."""
+    readcache.set_cache(None)
+    if cache is None:
+        return
+
+    log.info('Read cache: %s hits, %s misses' % (cache.hits, cache.misses))
+    if changed:
+        log.info('Emptying the read cache, since this was a real run')
+        cache.clear()
+    else:
+        cache.prune()
+    cache.close()
+
+
+def save_history():
+    """Folds the actor durations of the run into --history (if given)."""
+    current = history.get_history()
+    if current is None:
+        return
+
+    try:
+        current.save(args.history)
+    except (IOError, OSError) as e:
+        log.warning('Unable to save the history to %s: %s' %
+                    (args.history, e))
 
 
-def begin():
+def save_fingerprints():
+    """Folds the fingerprints of the run into --incremental (if given)."""
+    current = incremental.get_fingerprints()
+    if current is None:
+        return
+
+    try:
+        current.save(args.incremental)
+    except (IOError, OSError) as e:
+        log.warning('Unable to save the fingerprints to %s: %s' %
+                    (args.incremental, e))
+
+
+def save_plan():
+    """Writes out the plan recorded by a dry run (if --plan-out was given).
+
+    The plan is only recorded once, so that the real run that follows a
+    rehearsal does not add to it.
+    """
+    current = plan.get_plan()
+    if current is None or not current.recording:
+        return
+
+    current.save(args.plan_out)
+    plan.set_plan(None)
+
+
+def begin(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    parse_args(argv)
+
     # Set up logging before we do anything else
-    if args.level_debug:
-        args.level = 'DEBUG'
-    utils.setup_root_logger(level=args.level, color=args.color)
+    utils.setup_root_logger(level=args.level, color=args.color, queue=True,
+                            json_lines=(args.log_format == 'json'))
+    utils.setup_http_client(
+        curl=args.curl,
+        max_clients=args.max_clients,
+        max_host_connections=args.max_host_connections)
 
     try:
-        ioloop.IOLoop.instance().run_sync(main)
+        code = ioloop.IOLoop.instance().run_sync(main)
     except KeyboardInterrupt:
         log.info('CTRL-C Caught, shutting down')
         sys.exit(130)  # Standard KeyboardInterrupt exit code.
@@ -197,5 +477,7 @@ def begin():
             skip_next = False
         sys.exit(3)
 
+    sys.exit(code)
+
 if __name__ == '__main__':
     begin()
@@ -0,0 +1,191 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+"""Run reports (``kingpin --report``), and ``kingpin merge-reports``.
+
+A report is a JSON file that records how a run went: its exit code, the shard
+it ran (see `kingpin.actors.support.shard`), and the orgchart of the run with
+the timings and outcome of every actor. The reports of all of the shards of a
+run can be merged into a single report::
+
+    $ kingpin --script deploy.json --shard 0/2 --report shard-0.json &
+    $ kingpin --script deploy.json --shard 1/2 --report shard-1.json &
+    $ wait
+    $ kingpin merge-reports --output report.json shard-*.json
+
+This module only uses the standard library, so that merging reports does not
+pay for importing all of Kingpin.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+__author__ = 'Matt Wise (matt@nextdoor.com)'
+
+# Version of the report format, checked before reports are merged.
+VERSION = 1
+
+# The exit code of a merged report that is missing some of its shards.
+INCOMPLETE = 3
+
+
+class ReportError(Exception):
+
+    """Raised when reports cannot be read or merged."""
+
+
+def build(entries, exit_code, shard=None, started=None):
+    """Returns the report of a run.
+
+    Args:
+        entries: Iterable of orgchart entries of the run (with timings)
+        exit_code: Exit code of the run
+        shard: (index, count) tuple of the run, or None
+        started: Time the run began
+    """
+    return {
+        'version': VERSION,
+        'shard': list(shard) if shard else None,
+        'exit_code': exit_code,
+        'started': started,
+        'finished': time.time(),
+        'actors': list(entries),
+    }
+
+
+def load(path):
+    """Reads in a report written by `kingpin --report`."""
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (IOError, ValueError) as e:
+        raise ReportError('Unable to read report %s: %s' % (path, e))
+
+    if report.get('version') != VERSION:
+        raise ReportError('Report %s has unsupported version %s' %
+                          (path, report.get('version')))
+    return report
+
+
+def merge(reports):
+    """Merges the reports of the shards of a run into a single report.
+
+    The actor ids of each shard are prefixed with its index (``1:12345``),
+    since they are only unique within a single process.
+
+    Args:
+        reports: List of report dicts, one for every shard
+
+    Returns:
+        A report dict with a `shards` list (the shard, exit code and timing
+        of every report), the `missing` shard indexes, per-outcome actor
+        `outcomes` counts, and the `actors` of every shard. Its exit code is
+        the worst of the exit codes of the shards, or INCOMPLETE if any shard
+        is missing.
+
+    Raises:
+        ReportError: If the reports do not belong to a single sharded run
+    """
+    counts = set(r['shard'][1] for r in reports if r.get('shard'))
+    if len(counts) > 1 or any(not r.get('shard') for r in reports):
+        raise ReportError('Reports are not all from shards of one run '
+                          '(shard counts: %s)' % sorted(counts))
+    count = counts.pop() if counts else 0
+
+    by_index = {}
+    for report in reports:
+        index = report['shard'][0]
+        if index in by_index:
+            raise ReportError('Shard %s/%s was reported twice' %
+                              (index, count))
+        by_index[index] = report
+
+    missing = [i for i in xrange(count) if i not in by_index]
+
+    actors = []
+    outcomes = {}
+    shards = []
+    for index, report in sorted(by_index.items()):
+        shards.append({'shard': report['shard'],
+                       'exit_code': report['exit_code'],
+                       'started': report['started'],
+                       'finished': report['finished']})
+        for entry in report['actors']:
+            entry = dict(entry, shard=index,
+                         id='%s:%s' % (index, entry['id']))
+            if entry['parent_id']:
+                entry['parent_id'] = '%s:%s' % (index, entry['parent_id'])
+            outcome = entry.get('outcome')
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            actors.append(entry)
+
+    exit_code = max([r['exit_code'] for r in reports] or [0])
+    if missing:
+        exit_code = max(exit_code, INCOMPLETE)
+
+    started = [s['started'] for s in shards if s['started']]
+    return {
+        'version': VERSION,
+        'shards': shards,
+        'missing': missing,
+        'exit_code': exit_code,
+        'started': min(started) if started else None,
+        'finished': max([s['finished'] for s in shards] or [None]),
+        'outcomes': outcomes,
+        'actors': actors,
+    }
+
+
+def main(argv=None, stdout=None, stderr=None):
+    """`kingpin merge-reports` -- Merges the reports of a sharded run.
+
+    Returns:
+        The exit code of the merged report (1 if it could not be merged).
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    parser = argparse.ArgumentParser(
+        prog='kingpin merge-reports',
+        description='Merge the --report files of the shards of a run')
+    parser.add_argument('reports', nargs='+', metavar='REPORT',
+                        help='Report files written by kingpin --report')
+    parser.add_argument('-o', '--output', dest='output',
+                        help='Write the merged report here (default: stdout)')
+    opts = parser.parse_args(argv)
+
+    try:
+        merged = merge([load(path) for path in opts.reports])
+    except ReportError as e:
+        stderr.write('%s\n' % e)
+        return 1
+
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(merged, f)
+    else:
+        json.dump(merged, stdout)
+        stdout.write('\n')
+
+    summary = ', '.join('%s %s' % (n, outcome)
+                        for outcome, n in sorted(merged['outcomes'].items()))
+    stderr.write('Merged %s of %s shards: %s actors (%s)\n' % (
+        len(merged['shards']), len(merged['shards']) + len(merged['missing']),
+        len(merged['actors']), summary))
+    if merged['missing']:
+        stderr.write('Missing shards: %s\n' %
+                     ', '.join(str(i) for i in merged['missing']))
+
+    return merged['exit_code']
@@ -0,0 +1,377 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright 2014 Nextdoor.com, Inc
+"""Long running Kingpin server (``kingpin serve``).
+
+Every ``kingpin`` run pays for starting up the interpreter, importing all of
+the actors, and then building (and authenticating) fresh API clients. When
+deploying many small scripts, that is most of the work.
+
+``kingpin serve`` does all of that once. It imports every actor up front, and
+then runs the scripts submitted to it -- one at a time -- on a single IOLoop,
+so that HTTP client pools, RightScale sessions and parsed scripts are reused
+from one run to the next::
+
+    $ kingpin serve &
+    $ kingpin submit --script deploy.json --dry
+    $ echo $?
+
+``kingpin submit`` (`kingpin.bin.client`) takes exactly the same arguments
+as ``kingpin``. It sends them, along with its current directory and
+environment (used for %TOKEN% replacement), to the server, and writes out the
+log output it streams back. It exits with the same code that ``kingpin`` would
+have.
+
+Credentials and the HTTP client settings (``--curl``, ``--max-clients``, ...)
+are those of the server. The server listens on a Unix socket (only readable
+by its user) by default, or on a loopback TCP port with ``--port``. Anyone who
+can submit a script can run anything with the server's credentials, so over
+TCP every request must carry the secret token that the server writes to its
+``--token-file`` (only readable by its user), and non-loopback addresses are
+refused.
+
+The protocol is one line of JSON per message. The client sends a single
+request (``{"argv": [...], "env": {...}, "cwd": "...", "token": "..."}``),
+and the server
+answers with any number of ``{"stdout": "..."}`` and ``{"stderr": "..."}``
+messages, followed by ``{"exit": <code>}``.
+"""
+
+import argparse
+import binascii
+import hmac
+import importlib
+import json
+import logging
+import os
+import pkgutil
+import signal
+import socket
+import sys
+
+from tornado import gen
+from tornado import ioloop
+from tornado import iostream
+from tornado import locks
+from tornado import netutil
+from tornado import tcpserver
+
+from kingpin import actors
+from kingpin import utils
+from kingpin.actors.support import breaker
+from kingpin.actors.support import history
+from kingpin.actors.support import incremental
+from kingpin.actors.support import plan
+from kingpin.actors.support import readcache
+from kingpin.actors.support import shard
+from kingpin.bin import client
+from kingpin.bin import deploy
+
+
+log = logging.getLogger(__name__)
+
+__author__ = 'Matt Wise (matt@nextdoor.com)'
+
+# The environment of a client is part of its request, and can be big.
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def preload():
+    """Imports all of the actor modules (skipping their tests).
+
+    Returns:
+        A list of the names of the modules that were imported.
+    """
+    names = []
+    packages = [actors]
+    while packages:
+        package = packages.pop(0)
+        for _, name, is_pkg in pkgutil.iter_modules(package.__path__):
+            if name == 'test':
+                continue
+
+            name = '%s.%s' % (package.__name__, name)
+            try:
+                module = importlib.import_module(name)
+            except ImportError as e:
+                log.warning('Could not preload %s: %s' % (name, e))
+                continue
+
+            names.append(name)
+            if is_pkg:
+                packages.append(module)
+
+    return names
+
+
+class ClientOutput(object):
+
+    """A file-like object that forwards everything written to it to a client.
+
+    Args:
+        stream: The tornado.iostream.IOStream of the client
+        name: 'stdout' or 'stderr'
+    """
+
+    def __init__(self, stream, name):
+        self._stream = stream
+        self._name = name
+
+    def write(self, data):
+        if not data or self._stream.closed():
+            return
+
+        if isinstance(data, str):
+            data = data.decode('utf-8', 'replace')
+
+        try:
+            self._stream.write(json.dumps({self._name: data}) + '\n')
+        except iostream.StreamClosedError:
+            pass
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def _exit_code(exc):
+    """Returns the exit code that a SystemExit would have exited with."""
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    sys.stderr.write('%s\n' % exc.code)
+    return 1
+
+
+@gen.coroutine
+def run(request, stdout, stderr):
+    """Runs a submitted deployment, exactly like `kingpin` would.
+
+    While the deployment runs, its output (and all logging) goes to `stdout`
+    and `stderr`, and it runs in the current directory and with the
+    environment of the client. Only one deployment may run at a time.
+
+    Args:
+        request: The request dict of the client
+        stdout: File-like object for the output of the run
+        stderr: File-like object for the errors (and logs) of the run
+
+    Returns:
+        The exit code of the run.
+    """
+    root = logging.getLogger()
+    saved = (sys.stdout, sys.stderr, root.handlers, root.level, os.getcwd())
+
+    sys.stdout, sys.stderr = stdout, stderr
+    root.handlers = []
+    try:
+        os.chdir(request.get('cwd') or saved[4])
+        utils.set_environ(request.get('env'))
+
+        try:
+            args = deploy.parse_args(request.get('argv', []))
+        except SystemExit as e:
+            raise gen.Return(_exit_code(e))
+
+        utils.setup_root_logger(level=args.level, color=args.color,
+                                json_lines=(args.log_format == 'json'))
+
+        try:
+            code = yield deploy.main()
+        except Exception as e:
+            log.exception('Unexpected error: %s' % e)
+            code = 3
+    finally:
+        plan.set_plan(None)
+        shard.set_shard(None)
+        history.set_history(None)
+        incremental.set_fingerprints(None)
+        readcache.set_cache(None)
+        breaker.reset()
+        utils.set_environ(None)
+        (sys.stdout, sys.stderr, root.handlers, level, cwd) = saved
+        root.setLevel(level)
+        os.chdir(cwd)
+
+    raise gen.Return(code)
+
+
+class Server(tcpserver.TCPServer):
+
+    """Runs the deployments submitted by `kingpin submit`, one at a time.
+
+    Args:
+        token: Secret that every request must carry (or None, when only the
+               owner can reach the server anyway)
+    """
+
+    def __init__(self, token=None, *args, **kwargs):
+        super(Server, self).__init__(*args, **kwargs)
+        self._token = token
+        self._lock = locks.Lock()
+        self.runs = 0
+
+    def _authorized(self, request):
+        """Whether a request carries our token (if we have one)."""
+        if self._token is None:
+            return True
+
+        token = request.get('token')
+        if not isinstance(token, basestring):
+            return False
+        return hmac.compare_digest(token.encode('utf-8'), self._token)
+
+    @gen.coroutine
+    def handle_stream(self, stream, address):
+        try:
+            line = yield stream.read_until('\n', max_bytes=MAX_REQUEST_BYTES)
+            request = json.loads(line)
+        except (iostream.StreamClosedError, iostream.UnsatisfiableReadError,
+                ValueError) as e:
+            log.error('Bad request: %s' % e)
+            stream.close()
+            return
+
+        if not self._authorized(request):
+            log.error('Rejected a request from %s without a valid token' %
+                      (address,))
+            yield stream.write(
+                json.dumps({'stderr': 'Invalid token\n'}) + '\n' +
+                json.dumps({'exit': 1}) + '\n')
+            stream.close()
+            return
+
+        with (yield self._lock.acquire()):
+            self.runs += 1
+            number = self.runs
+            log.info('Run #%s: kingpin %s' % (
+                number, ' '.join(request.get('argv', []))))
+            code = yield run(request,
+                             ClientOutput(stream, 'stdout'),
+                             ClientOutput(stream, 'stderr'))
+            log.info('Run #%s exited with %s' % (number, code))
+
+        try:
+            yield stream.write(json.dumps({'exit': code}) + '\n')
+        except iostream.StreamClosedError:
+            log.warning('Run #%s: the client went away' % number)
+        stream.close()
+
+
+def _in_use(path):
+    """Whether a server is already listening on a Unix socket."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def _is_loopback(address):
+    """Whether an address (or host name) only resolves to loopback IPs."""
+    try:
+        infos = socket.getaddrinfo(address, None)
+    except socket.gaierror:
+        return False
+    ips = set(info[4][0] for info in infos)
+    return bool(ips) and all(
+        ip.startswith('127.') or ip == '::1' for ip in ips)
+
+
+def _write_token(path):
+    """Writes a new random token to a file only readable by us."""
+    token = binascii.hexlify(os.urandom(32))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+    try:
+        os.fchmod(fd, 0600)
+        os.write(fd, token + '\n')
+    finally:
+        os.close(fd)
+    return token
+
+
+def serve(argv=None):
+    """`kingpin serve` -- Runs the Kingpin server until interrupted."""
+    parser = argparse.ArgumentParser(
+        prog='kingpin serve',
+        description='Run scripts submitted by `kingpin submit`')
+    client.add_address_arguments(parser)
+    parser.add_argument('--curl', dest='curl', action='store_true',
+                        default=bool(os.getenv('KINGPIN_CURL', False)),
+                        help='Use the pooled, keep-alive curl HTTP client '
+                             '(requires PycURL)')
+    parser.add_argument('--max-clients', dest='max_clients', type=int,
+                        default=int(os.getenv('KINGPIN_MAX_CLIENTS', 10)),
+                        help='Maximum number of simultaneous HTTP requests')
+    parser.add_argument('--max-host-connections',
+                        dest='max_host_connections', type=int,
+                        default=int(
+                            os.getenv('KINGPIN_MAX_HOST_CONNECTIONS', 0)),
+                        help='Maximum number of simultaneous connections to '
+                             'a single host (requires --curl)')
+    parser.add_argument('-l', '--level', dest='level', default='info',
+                        help='Set logging level of the server itself')
+    opts = parser.parse_args(argv)
+
+    utils.setup_root_logger(level=opts.level, queue=True)
+
+    # Scripts run with our credentials, so only local clients that can read
+    # our token file may submit them.
+    if opts.port and not _is_loopback(opts.address):
+        log.critical('Refusing to listen on %s, which is not a loopback '
+                     'address' % opts.address)
+        return 1
+
+    utils.setup_http_client(
+        curl=opts.curl,
+        max_clients=opts.max_clients,
+        max_host_connections=opts.max_host_connections)
+
+    if opts.port:
+        server = Server(token=_write_token(opts.token_file))
+        server.listen(opts.port, opts.address)
+        where = '%s:%s (token in %s)' % (opts.address, opts.port,
+                                         opts.token_file)
+    else:
+        if _in_use(opts.socket):
+            log.critical('A server is already listening on %s' % opts.socket)
+            return 1
+        server = Server()
+        server.add_socket(netutil.bind_unix_socket(opts.socket))
+        where = opts.socket
+
+    log.info('Preloaded %s actor modules' % len(preload()))
+    log.info('Listening on %s' % where)
+
+    # Shut down cleanly (removing the socket) when we are killed, too
+    loop = ioloop.IOLoop.current()
+    signal.signal(signal.SIGTERM,
+                  lambda *_: loop.add_callback_from_signal(loop.stop))
+
+    try:
+        loop.start()
+    except KeyboardInterrupt:
+        log.info('CTRL-C Caught, shutting down')
+    finally:
+        server.stop()
+        path = opts.token_file if opts.port else opts.socket
+        if os.path.exists(path):
+            os.unlink(path)
+
+    return 0
@@ -0,0 +1,106 @@
+import StringIO
+import json
+import os
+import shutil
+import tempfile
+
+from tornado import testing
+
+from kingpin.bin import report
+
+
+def _entries(*outcomes):
+    entries = [{'id': '1', 'parent_id': '', 'desc': 'Kingpin',
+                'class': 'Macro', 'outcome': 'succeeded'}]
+    for i, outcome in enumerate(outcomes):
+        entries.append({'id': str(i + 2), 'parent_id': '1',
+                        'desc': 'act %s' % i, 'class': 'Sleep',
+                        'outcome': outcome})
+    return entries
+
+
+class TestReport(testing.unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+    def test_build(self):
+        built = report.build(_entries('succeeded'), 0, (1, 2), started=10)
+        self.assertEquals(built['version'], report.VERSION)
+        self.assertEquals(built['shard'], [1, 2])
+        self.assertEquals(built['exit_code'], 0)
+        self.assertEquals(built['started'], 10)
+        self.assertEquals(len(built['actors']), 2)
+
+    def test_load(self):
+        path = self._write('r.json', report.build([], 0))
+        self.assertEquals(report.load(path)['exit_code'], 0)
+
+    def test_load_invalid(self):
+        with self.assertRaises(report.ReportError):
+            report.load(os.path.join(self.tmpdir, 'missing.json'))
+        with self.assertRaises(report.ReportError):
+            report.load(self._write('old.json', {'version': 0}))
+
+    def test_merge(self):
+        merged = report.merge([
+            report.build(_entries('failed'), 2, (1, 2), started=20),
+            report.build(_entries('succeeded', 'skipped'), 0, (0, 2),
+                         started=10),
+        ])
+        self.assertEquals(merged['exit_code'], 2)
+        self.assertEquals(merged['missing'], [])
+        self.assertEquals(merged['started'], 10)
+        self.assertEquals([s['shard'] for s in merged['shards']],
+                          [[0, 2], [1, 2]])
+        self.assertEquals(merged['outcomes'],
+                          {'succeeded': 3, 'skipped': 1, 'failed': 1})
+
+        # Ids are made unique by prefixing them with the shard
+        ids = [a['id'] for a in merged['actors']]
+        self.assertEquals(len(ids), len(set(ids)))
+        self.assertEquals(merged['actors'][1]['parent_id'], '0:1')
+        self.assertEquals(merged['actors'][1]['shard'], 0)
+
+    def test_merge_missing_shard(self):
+        merged = report.merge([report.build(_entries(), 0, (0, 3))])
+        self.assertEquals(merged['missing'], [1, 2])
+        self.assertEquals(merged['exit_code'], report.INCOMPLETE)
+
+    def test_merge_mismatched(self):
+        with self.assertRaises(report.ReportError):
+            report.merge([report.build([], 0, (0, 2)),
+                          report.build([], 0, (1, 3))])
+        with self.assertRaises(report.ReportError):
+            report.merge([report.build([], 0, (0, 2)),
+                          report.build([], 0, (0, 2))])
+        with self.assertRaises(report.ReportError):
+            report.merge([report.build([], 0)])
+
+    def test_main(self):
+        paths = [self._write('shard-%s.json' % i,
+                             report.build(_entries('succeeded'), 0, (i, 2)))
+                 for i in xrange(2)]
+        output = os.path.join(self.tmpdir, 'merged.json')
+        stderr = StringIO.StringIO()
+
+        code = report.main(['-o', output] + paths, stderr=stderr)
+        self.assertEquals(code, 0)
+        self.assertEquals(len(json.load(open(output))['actors']), 4)
+        self.assertIn('Merged 2 of 2 shards: 4 actors', stderr.getvalue())
+
+    def test_main_error(self):
+        stderr = StringIO.StringIO()
+        code = report.main([os.path.join(self.tmpdir, 'missing.json')],
+                           stderr=stderr)
+        self.assertEquals(code, 1)
+        self.assertIn('Unable to read report', stderr.getvalue())
@@ -0,0 +1,177 @@
+import StringIO
+import os
+import shutil
+import sys
+import tempfile
+
+import mock
+from concurrent import futures
+from tornado import gen
+from tornado import netutil
+from tornado import testing
+
+from kingpin.actors.support import shard
+from kingpin.bin import client
+from kingpin.bin import server
+
+
+class TestServer(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestServer, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.socket = os.path.join(self.tmpdir, 'kingpin.sock')
+        self.server = server.Server()
+        self.server.add_socket(netutil.bind_unix_socket(self.socket))
+        self.executor = futures.ThreadPoolExecutor(1)
+
+    def tearDown(self):
+        self.server.stop()
+        self.executor.shutdown()
+        shutil.rmtree(self.tmpdir)
+        super(TestServer, self).tearDown()
+
+    @gen.coroutine
+    def submit(self, *argv):
+        stdout = StringIO.StringIO()
+        stderr = StringIO.StringIO()
+        argv = ('--socket', self.socket) + argv
+        code = yield self.executor.submit(
+            client.submit, list(argv), stdout, stderr)
+        raise gen.Return((code, stdout.getvalue(), stderr.getvalue()))
+
+    @testing.gen_test(timeout=30)
+    def test_submit(self):
+        stdout = sys.stdout
+        with mock.patch.dict(os.environ, {'SKIP_DRY': '1'}):
+            code, _, stderr = yield self.submit(
+                '--actor', 'misc.Sleep', '-p', 'desc=Nap', '-o', 'sleep=0',
+                '--level', 'debug')
+        self.assertEquals(code, 0, stderr)
+        self.assertIn('[Nap] Sleeping for 0 seconds', stderr)
+
+        # The environment of the client was used for the run
+        self.assertIn('You have disabled the dry run', stderr)
+        self.assertEquals(self.server.runs, 1)
+
+        # The server is back to its own stdout/stderr
+        self.assertIs(sys.stdout, stdout)
+
+    @testing.gen_test(timeout=30)
+    def test_submit_with_environment_defaults(self):
+        durations = os.path.join(self.tmpdir, 'history.json')
+        env = {'SKIP_DRY': '1', 'KINGPIN_SHARD': '1/4',
+               'KINGPIN_HISTORY': durations}
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(shard, 'set_shard') as set_shard:
+            code, _, stderr = yield self.submit(
+                '--actor', 'misc.Sleep', '-o', 'sleep=0')
+        self.assertEquals(code, 0, stderr)
+
+        # The run used the shard and history of the client's environment
+        self.assertEquals(set_shard.call_args_list[0], mock.call((1, 4)))
+        self.assertTrue(os.path.exists(durations))
+
+    @testing.gen_test(timeout=30)
+    def test_submit_bad_arguments(self):
+        code, _, stderr = yield self.submit('--dry')
+        self.assertEquals(code, 1)
+        self.assertIn('You must specify --script or --actor', stderr)
+
+    @testing.gen_test(timeout=30)
+    def test_submit_failed_run(self):
+        code, _, _ = yield self.submit(
+            '--actor', 'misc.Sleep', '-o', 'sleep=soon')
+        self.assertEquals(code, 2)
+
+    def test_submit_no_server(self):
+        stderr = StringIO.StringIO()
+        code = client.submit(
+            ['--socket', self.socket + '.missing', '--dry'],
+            StringIO.StringIO(), stderr)
+        self.assertEquals(code, 1)
+        self.assertIn('Could not reach the Kingpin server', stderr.getvalue())
+
+    def test_preload(self):
+        names = server.preload()
+        self.assertIn('kingpin.actors.misc', names)
+        self.assertIn('kingpin.actors.aws.s3', names)
+        self.assertFalse([n for n in names if '.test' in n])
+
+
+class TestTCPServer(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(TestTCPServer, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.token_file = os.path.join(self.tmpdir, 'token')
+        self.server = server.Server(
+            token=server._write_token(self.token_file))
+        sock = netutil.bind_sockets(0, '127.0.0.1')[0]
+        self.port = sock.getsockname()[1]
+        self.server.add_socket(sock)
+        self.executor = futures.ThreadPoolExecutor(1)
+
+    def tearDown(self):
+        self.server.stop()
+        self.executor.shutdown()
+        shutil.rmtree(self.tmpdir)
+        super(TestTCPServer, self).tearDown()
+
+    @gen.coroutine
+    def submit(self, token_file, *argv):
+        stderr = StringIO.StringIO()
+        argv = ('--port', str(self.port), '--token-file', token_file) + argv
+        code = yield self.executor.submit(
+            client.submit, list(argv), StringIO.StringIO(), stderr)
+        raise gen.Return((code, stderr.getvalue()))
+
+    def test_write_token(self):
+        self.assertEquals(os.stat(self.token_file).st_mode & 0777, 0600)
+        self.assertEquals(len(client.read_token(self.token_file)), 64)
+
+    @testing.gen_test(timeout=30)
+    def test_submit_with_token(self):
+        code, stderr = yield self.submit(
+            self.token_file, '--actor', 'misc.Sleep', '-o', 'sleep=0')
+        self.assertEquals(code, 0, stderr)
+        self.assertEquals(self.server.runs, 1)
+
+    @testing.gen_test(timeout=30)
+    def test_submit_with_bad_token(self):
+        bad = os.path.join(self.tmpdir, 'bad')
+        with open(bad, 'w') as f:
+            f.write('guess\n')
+        code, stderr = yield self.submit(
+            bad, '--actor', 'misc.Sleep', '-o', 'sleep=0')
+        self.assertEquals(code, 1)
+        self.assertIn('Invalid token', stderr)
+        self.assertEquals(self.server.runs, 0)
+
+        # A request without a token at all
+        self.assertFalse(self.server._authorized({'argv': []}))
+        self.assertFalse(self.server._authorized({'token': 1}))
+
+    @testing.gen_test(timeout=30)
+    def test_submit_without_token_file(self):
+        code, stderr = yield self.submit(
+            os.path.join(self.tmpdir, 'missing'), '--dry')
+        self.assertEquals(code, 1)
+        self.assertIn('Could not read the token', stderr)
+        self.assertEquals(self.server.runs, 0)
+
+    def test_is_loopback(self):
+        self.assertTrue(server._is_loopback('127.0.0.1'))
+        self.assertTrue(server._is_loopback('localhost'))
+        self.assertFalse(server._is_loopback('0.0.0.0'))
+        self.assertFalse(server._is_loopback('10.1.2.3'))
+
+    def test_serve_refuses_public_addresses(self):
+        with mock.patch.object(server, 'Server') as server_class:
+            with mock.patch.object(server.utils, 'setup_root_logger'):
+                with mock.patch.object(server.utils, 'setup_http_client'):
+                    code = server.serve(['--port', '1234',
+                                         '--address', '0.0.0.0',
+                                         '--token-file', self.token_file])
+        self.assertEquals(code, 1)
+        self.assertFalse(server_class.called)
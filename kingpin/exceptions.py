@@ -26,3 +26,13 @@ class InvalidScript(KingpinException):
 class InvalidScriptName(KingpinException):
 
     """Raised when the script name does not end on .yaml or .json"""
+
+
+class InvalidPlan(KingpinException):
+
+    """Raised when a plan file cannot be loaded"""
+
+
+class InvalidShard(KingpinException):
+
+    """Raised when a --shard specification is invalid"""
@@ -72,6 +72,12 @@ SCHEMA_1_0 = {
     ]
 }
 
+# Checking the schema itself and building a validator for it is not free, so
+# it is done once rather than for every script.
+_Validator = jsonschema.validators.validator_for(SCHEMA_1_0)
+_Validator.check_schema(SCHEMA_1_0)
+VALIDATOR_1_0 = _Validator(SCHEMA_1_0)
+
 
 def validate(config):
     """Validates the JSON against our schemas.
@@ -87,7 +93,7 @@ def validate(config):
     Raises:
         Execption if something went wrong.
     """
-    try:
-        return jsonschema.validate(config, SCHEMA_1_0)
-    except jsonschema.exceptions.ValidationError as e:
-        raise exceptions.InvalidScript(e)
+    error = jsonschema.exceptions.best_match(
+        VALIDATOR_1_0.iter_errors(config))
+    if error is not None:
+        raise exceptions.InvalidScript(error)
@@ -1,9 +1,15 @@
 import StringIO
+import json
 import logging
 import os
+import pickle
+import sys
+import threading
 import time
 
 from tornado import gen
+from tornado import httpclient
+from tornado import simple_httpclient
 from tornado import testing
 from tornado.testing import unittest
 import mock
@@ -80,6 +86,40 @@ class TestUtils(unittest.TestCase):
         result = utils.populate_with_tokens(string, tokens)
         self.assertEquals(result, string)
 
+    def test_token_scope(self):
+        env = {'HOME': '/home/unit', 'RELEASE': '0.1'}
+        root = utils.TokenScope(env)
+        scope = root.child({'RELEASE': '1.0', 'FOO': 'bar'})
+
+        # The root scope holds its own copy of the tokens
+        env['HOME'] = '/tmp'
+        self.assertEquals(root['HOME'], '/home/unit')
+
+        self.assertEquals(scope['RELEASE'], '1.0')
+        self.assertEquals(scope['HOME'], '/home/unit')
+        self.assertEquals(root['RELEASE'], '0.1')
+        self.assertNotIn('FOO', root)
+        self.assertIn('FOO', scope)
+        self.assertEquals(len(scope), 3)
+        self.assertEquals(
+            scope, {'HOME': '/home/unit', 'RELEASE': '1.0', 'FOO': 'bar'})
+        with self.assertRaises(KeyError):
+            scope['MISSING']
+        with self.assertRaises(TypeError):
+            scope['FOO'] = 'baz'
+
+        # Nothing to override, nothing new is created
+        self.assertIs(scope.child({}), scope)
+        self.assertIs(utils.TokenScope.wrap(scope), scope)
+
+        result = utils.populate_with_tokens('%FOO% %RELEASE% %HOME|x%', scope)
+        self.assertEquals(result, 'bar 1.0 /home/unit')
+
+    def test_token_scope_pickle(self):
+        scope = utils.TokenScope({'A': '1'}).child({'B': '2'})
+        copied = pickle.loads(pickle.dumps(scope))
+        self.assertEquals(copied, {'A': '1', 'B': '2'})
+
     def test_populate_with_not_strict(self):
         tokens = {'UNIT_TEST': 'FOOBAR'}
         string = 'Unit {UNIT_TEST} {FAIL} Test'
@@ -154,6 +194,39 @@ class TestUtils(unittest.TestCase):
             logger().debug.assert_called_with(mock.ANY, exc_info=1)
 
 
+class TestSetupHTTPClient(unittest.TestCase):
+
+    def tearDown(self):
+        httpclient.AsyncHTTPClient.configure(None)
+
+    def test_setup_http_client(self):
+        impl = utils.setup_http_client(max_clients=50)
+        self.assertEquals(impl, simple_httpclient.SimpleAsyncHTTPClient)
+
+        client = httpclient.AsyncHTTPClient(force_instance=True)
+        self.assertEquals(client.max_clients, 50)
+        client.close()
+
+    def test_setup_http_client_curl_missing(self):
+        with mock.patch.object(utils, 'pycurl', None):
+            impl = utils.setup_http_client(curl=True)
+        self.assertEquals(impl, simple_httpclient.SimpleAsyncHTTPClient)
+
+    def test_setup_http_client_curl(self):
+        fake_impl = mock.MagicMock(name='PooledCurlAsyncHTTPClient')
+        with mock.patch.object(utils, 'pycurl', create=True):
+            with mock.patch.object(utils, 'PooledCurlAsyncHTTPClient',
+                                   fake_impl, create=True):
+                with mock.patch.object(httpclient.AsyncHTTPClient,
+                                       'configure') as configure:
+                    utils.setup_http_client(
+                        curl=True, max_clients=20, max_host_connections=4)
+
+        configure.assert_called_once_with(
+            fake_impl, max_clients=20, max_host_connections=4,
+            defaults={'decompress_response': True})
+
+
 class TestSetupRootLoggerUtils(unittest.TestCase):
 
     def setUp(self):
@@ -207,6 +280,18 @@ class TestSetupRootLoggerUtils(unittest.TestCase):
                           logging.handlers.SysLogHandler)
         self.assertEquals(logger.handlers[0].facility, 'local0')
 
+    def test_setup_root_logger_with_queue_and_json(self):
+        log = logging.getLogger()
+        log.handlers = []
+
+        logger = utils.setup_root_logger(queue=True, json_lines=True)
+        handler = logger.handlers[0]
+        self.assertEquals(type(handler), utils.QueueHandler)
+        self.assertEquals(type(handler.handler.formatter),
+                          utils.JSONFormatter)
+        handler.close()
+        log.handlers = []
+
     def test_super_httplib_debug_logging(self):
         logger = utils.super_httplib_debug_logging()
         self.assertEquals(10, logger.level)
@@ -221,8 +306,116 @@ class TestSetupRootLoggerUtils(unittest.TestCase):
         self.assertEquals(ordered_d1, ordered_d2)
 
 
+class TestLogHandlers(unittest.TestCase):
+
+    def _record(self, msg, args=None, **extra):
+        record = logging.LogRecord(
+            'unit-test', logging.WARNING, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_queue_handler(self):
+        stream = StringIO.StringIO()
+        handler = utils.QueueHandler(logging.StreamHandler(stream))
+
+        args = {'name': 'before'}
+        handler.handle(self._record('Hello %(name)s', (args,)))
+
+        # The message is rendered when it is queued, not when it is written
+        args['name'] = 'after'
+        handler.close()
+
+        self.assertEquals(stream.getvalue(), 'Hello before\n')
+        self.assertFalse(handler._thread.is_alive())
+
+    def test_queue_handler_exc_info(self):
+        handler = utils.QueueHandler(logging.NullHandler())
+        handler.close()
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = self._record('Failed')
+            record.exc_info = sys.exc_info()
+
+        record = handler.prepare(record)
+        self.assertEquals(record.exc_info, None)
+        self.assertIn('ValueError: boom', record.exc_text)
+
+    def test_json_formatter(self):
+        formatter = utils.JSONFormatter()
+
+        ret = json.loads(formatter.format(self._record('Hi %s', ('there',))))
+        self.assertEquals(ret['message'], 'Hi there')
+        self.assertEquals(ret['level'], 'WARNING')
+        self.assertEquals(ret['name'], 'unit-test')
+        self.assertNotIn('actor', ret)
+
+        ret = json.loads(formatter.format(self._record('Hi', actor='Test')))
+        self.assertEquals(ret['actor'], 'Test')
+
+
 class TestCoroutineHelpers(testing.AsyncTestCase):
 
+    @testing.gen_test
+    def test_buffered_logs(self):
+        stream = StringIO.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        logger = logging.getLogger('unit-test.buffered')
+        logger.setLevel(logging.INFO)
+
+        @gen.coroutine
+        def chatter(name, fail=False):
+            for i in range(3):
+                logger.info('%s %s' % (name, i))
+                yield gen.moment
+            if fail:
+                raise ValueError(name)
+            raise gen.Return(name)
+
+        try:
+            ret = yield [utils.buffered_logs(chatter, 'a'),
+                         utils.buffered_logs(chatter, 'b', fail=True)]
+        except ValueError:
+            ret = None
+        finally:
+            root.removeHandler(handler)
+            handler.removeFilter(utils._buffered_log_filter)
+
+        self.assertEquals(ret, None)
+        lines = stream.getvalue().splitlines()
+        self.assertEquals(lines,
+                          ['a 0', 'a 1', 'a 2', 'b 0', 'b 1', 'b 2'])
+
+    @testing.gen_test
+    def test_buffered_logs_other_threads(self):
+        stream = StringIO.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        logger = logging.getLogger('unit-test.buffered')
+        logger.setLevel(logging.INFO)
+
+        @gen.coroutine
+        def chatter():
+            logger.info('loop')
+            worker = threading.Thread(target=logger.info, args=('thread',))
+            worker.start()
+            worker.join()
+            yield gen.moment
+
+        try:
+            yield utils.buffered_logs(chatter)
+        finally:
+            root.removeHandler(handler)
+            handler.removeFilter(utils._buffered_log_filter)
+
+        # The thread's record is not held back with those of the act
+        self.assertEquals(stream.getvalue().splitlines(), ['thread', 'loop'])
+
     @testing.gen_test
     def test_retry_with_backoff(self):
 
@@ -244,6 +437,60 @@ class TestCoroutineHelpers(testing.AsyncTestCase):
         ret = yield work()
         self.assertEquals(ret, True)
 
+    @testing.gen_test
+    def test_retry_with_guard(self):
+        guard = mock.Mock()
+        guard.retry.return_value = True
+        calls = []
+
+        @gen.coroutine
+        @utils.retry(excs=(requests.exceptions.HTTPError), retries=3,
+                     delay=0, guard=guard)
+        def raise_exception():
+            calls.append(1)
+            raise requests.exceptions.HTTPError('Failed')
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            yield raise_exception()
+        self.assertEquals(len(calls), 3)
+        self.assertEquals(guard.before.call_count, 3)
+        self.assertEquals(guard.failure.call_count, 3)
+
+        # Only the failures that were followed by a retry asked for one
+        self.assertEquals(guard.retry.call_count, 2)
+
+    @testing.gen_test
+    def test_retry_denied_by_guard(self):
+        guard = mock.Mock()
+        guard.retry.return_value = False
+        calls = []
+
+        @gen.coroutine
+        @utils.retry(excs=(requests.exceptions.HTTPError), retries=3,
+                     delay=0, guard=guard)
+        def raise_exception():
+            calls.append(1)
+            raise requests.exceptions.HTTPError('Failed')
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            yield raise_exception()
+        self.assertEquals(len(calls), 1)
+
+    @testing.gen_test
+    def test_retry_guard_settles_other_errors(self):
+        guard = mock.Mock()
+
+        @gen.coroutine
+        @utils.retry(excs=(requests.exceptions.HTTPError), retries=3,
+                     delay=0, guard=guard)
+        def raise_exception():
+            raise ValueError('Failed')
+
+        with self.assertRaises(ValueError):
+            yield raise_exception()
+        guard.success.assert_called_once_with()
+        self.assertFalse(guard.failure.called)
+
     @testing.gen_test
     def testTornadoSleep(self):
         start = time.time()
@@ -20,26 +20,43 @@ Common package for utility functions.
 """
 
 from logging import handlers
+import Queue
+import collections
+import contextlib
+import copy
 import difflib
 import datetime
 import demjson
 import functools
+import hashlib
 import importlib
+import json
 import logging
 import os
 import pprint
 import re
 import sys
+import threading
 import yaml
 import time
 
 from tornado import gen
+from tornado import httpclient
 from tornado import ioloop
+from tornado import stack_context
 import httplib
 import rainbow_logging_handler
 
 from kingpin import exceptions
 
+# PycURL is optional. Without it we fall back to Tornado's (pure Python)
+# SimpleAsyncHTTPClient. See setup_http_client() below.
+try:
+    from tornado import curl_httpclient
+    import pycurl
+except ImportError:
+    pycurl = None
+
 
 __author__ = 'Matt Wise (matt@nextdoor.com)'
 
@@ -48,6 +65,17 @@ log = logging.getLogger(__name__)
 # Constants for some of the utilities below
 STATIC_PATH_NAME = 'static'
 
+# Scripts that have already been decoded by convert_script_to_dict(), keyed by
+# their (token-filled) contents. Decoding is slow, and the same script is often
+# read many times: a macro in a group with many contexts, or the same scripts
+# submitted to `kingpin serve` over and over again.
+SCRIPT_CACHE_SIZE = 64
+_script_cache = {}
+
+# The environment of the current run, if it is not our own. See get_environ()
+# below.
+_ENVIRON = None
+
 # Disable the global threadpool defined here to try to narrow down the random
 # unit test failures regarding the IOError. Instead, instantiating a new
 # threadpool object for every thread using the 'with' context below.
@@ -58,6 +86,21 @@ STATIC_PATH_NAME = 'static'
 # THREADPOOL = futures.ThreadPoolExecutor(THREADPOOL_SIZE)
 
 
+def get_environ():
+    """Returns the environment of the current run.
+
+    This is os.environ, unless the run was submitted to `kingpin serve` -- in
+    which case it is the environment of the client that submitted it.
+    """
+    return os.environ if _ENVIRON is None else _ENVIRON
+
+
+def set_environ(environ):
+    """Sets (or with None, clears) the environment of the current run."""
+    global _ENVIRON
+    _ENVIRON = environ
+
+
 def str_to_class(string):
     """Method that converts a string name into a usable Class name
 
@@ -84,7 +127,226 @@ def str_to_class(string):
     return getattr(m, class_name)
 
 
-def setup_root_logger(level='warn', syslog=None, color=False):
+if pycurl:
+    class PooledCurlAsyncHTTPClient(curl_httpclient.CurlAsyncHTTPClient):
+
+        """CurlAsyncHTTPClient with a per-host connection limit.
+
+        libcurl already keeps connections alive and re-uses them across
+        requests -- this just keeps any one remote API from hogging all of
+        our `max_clients` slots.
+        """
+
+        def initialize(self, *args, **kwargs):
+            # Tornado 5 dropped the io_loop argument, so only pick ours out
+            # and hand the rest over as they are.
+            max_host_connections = kwargs.pop('max_host_connections', None)
+            super(PooledCurlAsyncHTTPClient, self).initialize(*args, **kwargs)
+            if max_host_connections:
+                self._multi.setopt(pycurl.M_MAX_HOST_CONNECTIONS,
+                                   max_host_connections)
+
+
+def setup_http_client(curl=False, max_clients=10, max_host_connections=None):
+    """Configures the global Tornado AsyncHTTPClient implementation.
+
+    Every HTTP based actor (and the RestClient) gets its client from
+    `tornado.httpclient.AsyncHTTPClient()`, so this must be called once at
+    startup -- before any clients have been created.
+
+    Args:
+        curl: Use the pooled, keep-alive libcurl client (requires PycURL)
+        max_clients: Maximum number of simultaneous requests
+        max_host_connections: Maximum number of simultaneous connections to a
+                              single host (curl only, None means unlimited)
+
+    Returns:
+        The configured AsyncHTTPClient class
+    """
+    defaults = {'decompress_response': True}
+
+    if curl and pycurl is None:
+        log.warning('PycURL is not installed, falling back to the '
+                    'SimpleAsyncHTTPClient.')
+        curl = False
+
+    if curl:
+        httpclient.AsyncHTTPClient.configure(
+            PooledCurlAsyncHTTPClient,
+            max_clients=max_clients,
+            defaults=defaults,
+            max_host_connections=max_host_connections)
+    else:
+        httpclient.AsyncHTTPClient.configure(
+            None, max_clients=max_clients, defaults=defaults)
+
+    impl = httpclient.AsyncHTTPClient.configured_class()
+    log.debug('Using %s (max_clients=%s)' % (impl.__name__, max_clients))
+    return impl
+
+
+class QueueHandler(logging.Handler):
+
+    """Hands log records off to a background thread for writing.
+
+    Writing to the console (or a syslog socket) can block. Kingpin does all of
+    its real work on a single IOLoop thread, so we don't want that thread to
+    ever wait on log I/O. Records are rendered into plain strings here (so
+    that the objects they reference can safely change afterwards), and then
+    written out by the wrapped handler on a daemon thread.
+
+    Queued records are drained when the handler is closed, which the logging
+    module does for us at exit.
+
+    Args:
+        handler: The logging.Handler that actually writes the records
+        maxsize: Maximum number of queued records. Once full, logging blocks
+                 until the writer catches up rather than dropping records.
+    """
+
+    def __init__(self, handler, maxsize=10000):
+        logging.Handler.__init__(self)
+        self.handler = handler
+        self.queue = Queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._write,
+                                        name='kingpin-log-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def prepare(self, record):
+        """Renders the message and any exception info into the record."""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def _write(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            self.handler.handle(record)
+
+    def close(self):
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(10)
+        self.handler.close()
+        logging.Handler.close(self)
+
+
+class JSONFormatter(logging.Formatter):
+
+    """Formats each log record as a single line of JSON.
+
+    Records logged by an actor carry the actors description in the `actor`
+    field (see kingpin.actors.base.LogAdapter).
+    """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'name': record.name,
+            'message': record.getMessage(),
+        }
+
+        actor = getattr(record, 'actor', None)
+        if actor is not None:
+            data['actor'] = actor
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+
+        return json.dumps(data)
+
+
+# The list that log records are currently being held back in (if any). This is
+# swapped in and out by the Tornado StackContext set up in buffered_logs(),
+# which only ever runs on the IOLoop thread. Records logged by other threads
+# (like those of the actors' thread pools) can not be told apart by act, so
+# they are never held back.
+_log_buffer = threading.local()
+
+
+@contextlib.contextmanager
+def _use_log_buffer(records):
+    previous = getattr(_log_buffer, 'records', None)
+    _log_buffer.records = records
+    try:
+        yield
+    finally:
+        _log_buffer.records = previous
+
+
+class BufferedLogFilter(logging.Filter):
+
+    """Holds back log records emitted from within buffered_logs()."""
+
+    def filter(self, record):
+        records = getattr(_log_buffer, 'records', None)
+        if records is None:
+            return True
+
+        # Each of the root handlers passes the same record through here.
+        if not records or records[-1] is not record:
+            records.append(record)
+        return False
+
+
+_buffered_log_filter = BufferedLogFilter()
+
+
+@gen.coroutine
+def buffered_logs(func, *args, **kwargs):
+    """Runs a coroutine, holding back its log output until it is finished.
+
+    When several coroutines run at the same time, their log lines are
+    interleaved. This groups all of the lines logged by `func` (and anything
+    it calls on the IOLoop) together, and writes them out in one block once
+    it has finished -- successfully or not. Nested calls work as you would
+    expect; the inner block is written into the outer one. Lines logged by
+    other threads (ie, from `BaseActor.thread()`) are written out right away.
+
+    Args:
+        func: Coroutine function to run
+        args: Arguments for func
+        kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    root = logging.getLogger()
+    for handler in root.handlers:
+        handler.addFilter(_buffered_log_filter)
+
+    records = []
+    with stack_context.StackContext(
+            functools.partial(_use_log_buffer, records)):
+        future = func(*args, **kwargs)
+
+    try:
+        ret = yield future
+    finally:
+        for record in records:
+            root.handle(record)
+
+    raise gen.Return(ret)
+
+
+def setup_root_logger(level='warn', syslog=None, color=False, queue=False,
+                      json_lines=False):
     """Configures the root logger.
 
     Args:
@@ -92,6 +354,8 @@ def setup_root_logger(level='warn', syslog=None, color=False):
         syslog: String representing syslog facility to output to.  If empty,
         logs are written to console.
         color: Colorize the log output
+        queue: Write the log output from a background thread
+        json_lines: Write each log record as a line of JSON
 
     Returns:
         A root Logger object
@@ -126,10 +390,11 @@ def setup_root_logger(level='warn', syslog=None, color=False):
     else:
         handler = logging.StreamHandler()
 
-    # Get our PID .. used below in the log line format.
+    # Log the PID (of the worker process, if any, that the record came from)
+    # along with the logger and function names.
     details = ''
     if level_obj <= 10:
-        details = str(os.getpid()) + ' [%(name)-40s] [%(funcName)-20s]'
+        details = '%(process)d [%(name)-40s] [%(funcName)-20s]'
 
     # If syslog enabled, then override the logging handler to go to syslog.
     asctime = '%(asctime)-10s '
@@ -140,10 +405,14 @@ def setup_root_logger(level='warn', syslog=None, color=False):
 
     fmt = asctime + '%(levelname)-8s ' + details + ' %(message)s'
     formatter = logging.Formatter(fmt)
+    if json_lines:
+        formatter = JSONFormatter()
 
     # Append the formatter to the handler, then set the handler as our default
     # handler for the root logger.
     handler.setFormatter(formatter)
+    if queue:
+        handler = QueueHandler(handler)
     logger.addHandler(handler)
 
     return logger
@@ -191,13 +460,19 @@ def exception_logger(func):
     return wrapper
 
 
-def retry(excs, retries=3, delay=0.25):
+def retry(excs, retries=3, delay=0.25, guard=None):
     """Coroutine-compatible Retry Decorator.
 
     This decorator provides a simple retry mechanism that looks for a
     particular set of exceptions and retries async tasks in the event that
     those exceptions were caught.
 
+    A `guard` is told about every attempt, and gets a say in whether failed
+    ones are retried (see `kingpin.actors.support.breaker.Guard`, which puts
+    the calls behind the circuit breaker of their endpoint and the retry
+    budget of the run). Leave it out when the retries are really polling for
+    some state to change.
+
     Example usage:
         >>> @gen.coroutine
         ... @retry(excs=(Exception), retries=3)
@@ -208,11 +483,17 @@ def retry(excs, retries=3, delay=0.25):
         excs: A single (or tuple) exception type to catch.
         retries: The number of times to try the operation in total.
         delay: Time (in seconds) to wait between retries
+        guard: Object with before(), success() and failure(exception)
+               methods that are called around every attempt, and a
+               retry(exception) method that returns whether a failed one
+               may be retried.
     """
     def _retry_on_exc(f):
         def wrapper(*args, **kwargs):
             i = 1
             while True:
+                if guard:
+                    guard.before()
                 try:
                     # Don't log the first time..
                     if i > 1:
@@ -220,17 +501,29 @@ def retry(excs, retries=3, delay=0.25):
                                   (i, retries, f, args, kwargs))
                     ret = yield gen.coroutine(f)(*args, **kwargs)
                     log.debug('Result: %s' % ret)
+                    if guard:
+                        guard.success()
                     raise gen.Return(ret)
                 except excs as e:
                     log.error('Exception raised on try %s: %s' % (i, e))
+                    if guard:
+                        guard.failure(e)
 
-                    if i >= retries:
+                    if i >= retries or (guard and not guard.retry(e)):
                         log.debug('Raising exception: %s' % e)
                         raise e
 
                     i += 1
                     log.debug('Retrying in %s...' % delay)
                     yield tornado_sleep(delay)
+                except gen.Return:
+                    raise
+                except Exception:
+                    # Any other error came from an endpoint that is up, even
+                    # if it did not like what it was asked.
+                    if guard:
+                        guard.success()
+                    raise
                 log.debug('Retrying..')
         return wrapper
     return _retry_on_exc
@@ -247,6 +540,100 @@ def tornado_sleep(seconds=1.0):
                    time.time() + seconds)
 
 
+class TokenScope(collections.Mapping):
+
+    """A read-only, layered set of %TOKEN% values.
+
+    Every actor in a script is handed the tokens of its parent (usually all of
+    os.environ, plus whatever a misc.Macro adds). Rather than copying them into
+    every actor, a TokenScope is shared by reference: a scope holds only its
+    own tokens, and falls back to its parent scope for everything else. Since
+    no scope can be modified, sharing one between thousands of actors is safe.
+
+    Args:
+        tokens: Dict of tokens defined by this scope (copied)
+        parent: Mapping of tokens to fall back to (optional). Anything other
+                than a TokenScope is copied into one.
+
+    Example:
+        >>> env = TokenScope(os.environ)
+        >>> scope = env.child({'RELEASE': '1.0'})
+        >>> scope['RELEASE'], scope['HOME']
+        ('1.0', '/root')
+    """
+
+    __slots__ = ('_tokens', '_parent')
+
+    def __init__(self, tokens=None, parent=None):
+        if parent is not None and not isinstance(parent, TokenScope):
+            parent = TokenScope(parent)
+        self._tokens = dict(tokens or {})
+        self._parent = parent
+
+    @classmethod
+    def wrap(cls, tokens):
+        """Returns `tokens` as a TokenScope, copying it only if necessary."""
+        if isinstance(tokens, cls):
+            return tokens
+        return cls(tokens)
+
+    def child(self, tokens):
+        """Returns a new scope that overrides this one with `tokens`.
+
+        If there is nothing to override, this scope is returned as-is.
+        """
+        if not tokens:
+            return self
+        if not self._tokens and self._parent is None:
+            return TokenScope(tokens)
+        return TokenScope(tokens, parent=self)
+
+    def __getitem__(self, key):
+        scope = self
+        while scope is not None:
+            if key in scope._tokens:
+                return scope._tokens[key]
+            scope = scope._parent
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        scope = self
+        while scope is not None:
+            if key in scope._tokens:
+                return True
+            scope = scope._parent
+        return False
+
+    def __iter__(self):
+        if self._parent is None:
+            return iter(self._tokens)
+        return self._iter_layers()
+
+    def _iter_layers(self):
+        seen = set()
+        scope = self
+        while scope is not None:
+            for key in scope._tokens:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+            scope = scope._parent
+
+    def __len__(self):
+        if self._parent is None:
+            return len(self._tokens)
+        return sum(1 for _ in self._iter_layers())
+
+    def __getstate__(self):
+        return (self._tokens, self._parent)
+
+    def __setstate__(self, state):
+        self._tokens, self._parent = state
+
+    def __repr__(self):
+        return 'TokenScope(%s tokens)' % len(self)
+
+
 def populate_with_tokens(string, tokens, left_wrapper='%', right_wrapper='%',
                          strict=True):
     """Insert token variables into the string.
@@ -345,6 +732,17 @@ def convert_script_to_dict(script_file, tokens):
     # If the file ends with .json, use demjson to read it. If it ends with
     # .yml/.yaml, use PyYAML. If neither, error.
     suffix = filename.split('.')[-1].strip().lower()
+
+    # Callers are free to modify what we return, so the cache only ever hands
+    # out copies.
+    digest = parsed
+    if isinstance(digest, unicode):
+        digest = digest.encode('utf-8')
+    key = (suffix, hashlib.sha1(digest).digest())
+    if key in _script_cache:
+        log.debug('Using the cached contents of %s' % filename)
+        return copy.deepcopy(_script_cache[key])
+
     try:
         if suffix == 'json':
             decoded = demjson.decode(parsed)
@@ -361,6 +759,12 @@ def convert_script_to_dict(script_file, tokens):
         # much more useful info.
         raise exceptions.InvalidScript('JSON in `%s` has an error: %s' % (
             filename, e.pretty_description()))
+
+    if SCRIPT_CACHE_SIZE:
+        if len(_script_cache) >= SCRIPT_CACHE_SIZE:
+            _script_cache.clear()
+        _script_cache[key] = copy.deepcopy(decoded)
+
     return decoded
 
 
@@ -169,7 +169,7 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            'kingpin = kingpin.bin.deploy:begin'
+            'kingpin = kingpin.bin.cli:begin'
         ],
     },
     classifiers=[